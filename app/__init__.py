@@ -56,6 +56,26 @@ def create_app(config_name=None):
     from .extensions import init_extensions
     init_extensions(app)
 
+    # Gestor de conexiones SQLite (una conexión por request + pool)
+    from database import init_app as init_db
+    init_db(app)
+
+    # Migraciones incrementales pendientes (idempotentes)
+    try:
+        from database import aplicar_migraciones
+        aplicar_migraciones()
+    except Exception as e:
+        print(f"⚠️ Error aplicando migraciones: {e}")
+
+    # Persistencia write-behind del historial de simulaciones (opcional)
+    if app.config.get('SIMULACIONES_WRITE_BEHIND'):
+        from db_escritura_diferida import configurar_escritura_diferida
+        configurar_escritura_diferida(
+            app.config['SIMULACIONES_WB_SPILL_DIR'],
+            max_cola=app.config['SIMULACIONES_WB_MAX_COLA'],
+            fsync_spill=app.config['SIMULACIONES_WB_FSYNC'],
+        )
+
     # Registrar filtros Jinja2
     register_jinja_filters(app)
 
@@ -118,14 +138,16 @@ def register_context_processors(app):
 
     @app.context_processor
     def inject_navbar_stats():
-        """Inyecta estadísticas del navbar en todos los templates"""
+        """
+        Inyecta estadísticas del navbar en todos los templates.
+        Se calculan (desde el cache por usuario) solo si el template las lee.
+        """
         if session.get('autorizado'):
             try:
-                from db_helpers_dashboard import obtener_resumen_navbar
+                from db_helpers_dashboard import ResumenNavbarPerezoso
                 rol = session.get('rol', 'asesor')
                 username = session.get('username')
-                navbar_stats = obtener_resumen_navbar(rol, username)
-                return {'navbar_stats': navbar_stats}
+                return {'navbar_stats': ResumenNavbarPerezoso(rol, username)}
             except Exception as e:
                 print(f"⚠️ Error obteniendo navbar stats: {e}")
         return {'navbar_stats': {'items': []}}
@@ -25,6 +25,14 @@ class Config:
     DB_PATH = BASE_DIR / 'loansi.db'
     SQLITE_DEBUG = os.environ.get('SQLITE_DEBUG', 'True').lower() == 'true'
     
+    # Persistencia write-behind del historial de simulaciones
+    # (ver db_escritura_diferida.py). Desactivada: con varios clientes
+    # concurrentes empeora el p99
+    SIMULACIONES_WRITE_BEHIND = os.environ.get('SIMULACIONES_WRITE_BEHIND', 'False').lower() == 'true'
+    SIMULACIONES_WB_MAX_COLA = int(os.environ.get('SIMULACIONES_WB_MAX_COLA', 1000))
+    SIMULACIONES_WB_SPILL_DIR = BASE_DIR / 'spill'
+    SIMULACIONES_WB_FSYNC = os.environ.get('SIMULACIONES_WB_FSYNC', 'False').lower() == 'true'
+    
     # ============================================
     # SESIONES
     # ============================================
@@ -19,13 +19,22 @@ if str(BASE_DIR) not in sys.path:
 from db_helpers import (
     cargar_configuracion,
     guardar_configuracion,
+    obtener_snapshot_configuracion,
+    invalidar_cache_configuracion,
     cargar_scoring,
+    obtener_snapshot_scoring,
+    invalidar_cache_scoring,
     guardar_scoring,
     cargar_evaluaciones,
+    obtener_evaluaciones_paginadas,
+    obtener_estadisticas_historial,
+    obtener_asesores_con_evaluaciones,
     guardar_evaluacion,
+    guardar_evaluaciones_bulk,
     actualizar_evaluacion,
     cargar_simulaciones,
     guardar_simulacion,
+    guardar_simulaciones_bulk,
     obtener_casos_comite,
     contar_casos_nuevos_asesor,
     obtener_usuario,
@@ -34,6 +43,8 @@ from db_helpers import (
     eliminar_usuario_db,
     resolve_visible_usernames,
     obtener_evaluacion_por_timestamp,
+    obtener_contexto_riesgo_caso,
+    obtener_simulaciones_cliente,
     obtener_usuarios_completos,
     actualizar_usuario,
     ensure_user_assignments_table,
@@ -84,8 +95,20 @@ from db_helpers_estados import (
 from db_helpers_dashboard import (
     obtener_estadisticas_por_rol,
     obtener_resumen_navbar,
+    obtener_resumen_navbar_cacheado,
+    invalidar_resumen_navbar,
     obtener_usuarios_asignados_detalle,
     obtener_jerarquia_gerente,
+    obtener_arbol_estadisticas,
+    obtener_metricas_asesores,
+    obtener_series_dashboard,
+)
+
+# Re-exportar índice de jerarquía organizacional
+from db_jerarquia import (
+    obtener_indice_jerarquia,
+    invalidar_indice_jerarquia,
+    reconstruir_clausura,
 )
 
 # Re-exportar conexión a DB
@@ -98,8 +121,12 @@ __all__ = [
     # Configuración
     'cargar_configuracion',
     'guardar_configuracion',
+    'obtener_snapshot_configuracion',
+    'invalidar_cache_configuracion',
     # Scoring
     'cargar_scoring',
+    'obtener_snapshot_scoring',
+    'invalidar_cache_scoring',
     'guardar_scoring',
     'cargar_scoring_por_linea',
     'obtener_lineas_credito_scoring',
@@ -119,14 +146,21 @@ __all__ = [
     'crear_config_scoring_linea_defecto',
     # Evaluaciones
     'cargar_evaluaciones',
+    'obtener_evaluaciones_paginadas',
+    'obtener_estadisticas_historial',
+    'obtener_asesores_con_evaluaciones',
     'guardar_evaluacion',
+    'guardar_evaluaciones_bulk',
     'actualizar_evaluacion',
     'obtener_evaluacion_por_timestamp',
+    'obtener_contexto_riesgo_caso',
     'obtener_evaluaciones_por_asesores',
     # Simulaciones
     'cargar_simulaciones',
     'guardar_simulacion',
+    'guardar_simulaciones_bulk',
     'obtener_simulaciones_por_asesores',
+    'obtener_simulaciones_cliente',
     # Comité
     'obtener_casos_comite',
     'contar_casos_nuevos_asesor',
@@ -160,6 +194,15 @@ __all__ = [
     # Dashboard
     'obtener_estadisticas_por_rol',
     'obtener_resumen_navbar',
+    'obtener_resumen_navbar_cacheado',
+    'invalidar_resumen_navbar',
     'obtener_usuarios_asignados_detalle',
     'obtener_jerarquia_gerente',
+    'obtener_arbol_estadisticas',
+    'obtener_metricas_asesores',
+    'obtener_series_dashboard',
+    # Jerarquía
+    'obtener_indice_jerarquia',
+    'invalidar_indice_jerarquia',
+    'reconstruir_clausura',
 ]
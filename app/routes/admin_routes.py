@@ -214,7 +214,8 @@ def cambiar_password():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
 
-    from database import conectar_db
+    from db_helpers import invalidar_cache_configuracion
+    from db_writer import ejecutar_escritura
     from werkzeug.security import generate_password_hash
 
     try:
@@ -225,15 +226,13 @@ def cambiar_password():
             flash("Usuario y nueva contraseña son requeridos", "error")
             return redirect(url_for("admin.admin_panel") + "#Usuarios")
 
-        # Actualizar en SQLite
-        conn = conectar_db()
-        cursor = conn.cursor()
-        cursor.execute(
+        # Actualizar en SQLite (escritor único)
+        password_hash = generate_password_hash(new_password)
+        ejecutar_escritura(lambda conn: conn.execute(
             "UPDATE usuarios SET password_hash = ? WHERE username = ?",
-            (generate_password_hash(new_password), username)
-        )
-        conn.commit()
-        conn.close()
+            (password_hash, username)
+        ))
+        invalidar_cache_configuracion()
 
         flash(f"Contraseña de '{username}' actualizada", "success")
 
@@ -386,16 +385,18 @@ def actualizar_seguros():
 @login_required
 @requiere_permiso("sco_hist_todos")
 def historial_evaluaciones():
-    """Historial de todas las evaluaciones"""
+    """Historial de todas las evaluaciones (paginación keyset, filtros en SQL)"""
     import sys
     from pathlib import Path
     BASE_DIR = Path(__file__).parent.parent.parent.resolve()
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
 
-    from db_helpers import cargar_evaluaciones
-
-    evaluaciones = cargar_evaluaciones()
+    from db_helpers import (
+        obtener_evaluaciones_paginadas,
+        obtener_estadisticas_historial,
+        obtener_asesores_con_evaluaciones,
+    )
 
     # Obtener filtros de la URL
     filtros = {
@@ -405,40 +406,50 @@ def historial_evaluaciones():
         'resultado': request.args.get('resultado', '')
     }
 
-    # Obtener lista de asesores únicos para el filtro
-    asesores_disponibles = list(set(e.get('asesor', '') for e in evaluaciones if e.get('asesor')))
-    asesores_disponibles.sort()
-    
-    # Calcular estadísticas para las tarjetas
-    total = len(evaluaciones)
-    aprobados = sum(1 for e in evaluaciones if e.get('resultado', {}).get('aprobado', False))
-    rechazados = total - aprobados
-    tasa_aprobacion = round((aprobados / total * 100) if total > 0 else 0)
-    
-    stats = {
-        'total': total,
-        'aprobados': aprobados,
-        'rechazados': rechazados,
-        'tasa_aprobacion': tasa_aprobacion
-    }
-    
-    # Paginación
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    total_pages = (total + per_page - 1) // per_page if total > 0 else 1
-    
+    # Lista de asesores y tarjetas: consultas agregadas
+    asesores_disponibles = obtener_asesores_con_evaluaciones()
+    stats = obtener_estadisticas_historial(filtros)
+
+    if filtros['resultado'] == 'aprobado':
+        total_filtrado = stats['aprobados']
+    elif filtros['resultado'] == 'rechazado':
+        total_filtrado = stats['rechazados']
+    else:
+        total_filtrado = stats['total']
+
+    # Paginación keyset: ?cursor=...&dir=siguiente|anterior
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    cursor = request.args.get('cursor') or None
+    direccion = request.args.get('dir', 'siguiente')
+    posicion = max(0, request.args.get('pos', 0, type=int))
+
+    pagina = obtener_evaluaciones_paginadas(
+        filtros, limite=per_page, cursor=cursor, direccion=direccion
+    )
+    logs = pagina['items']
+
+    # Sin cursor siempre es la primera página
+    if not cursor:
+        posicion = 0
+
     pagination = {
-        'page': page,
         'per_page': per_page,
-        'total': total,
-        'total_pages': total_pages,
-        'has_prev': page > 1,
-        'has_next': page < total_pages
+        'total': total_filtrado,
+        'total_logs': total_filtrado,
+        'start_idx': posicion + 1 if logs else 0,
+        'end_idx': posicion + len(logs),
+        'has_prev': pagina['has_prev'],
+        'has_next': pagina['has_next'],
+        'cursor_anterior': pagina['cursor_anterior'],
+        'cursor_siguiente': pagina['cursor_siguiente'],
+        'pos_anterior': max(0, posicion - per_page),
+        'pos_siguiente': posicion + len(logs),
     }
 
     return render_template(
         "admin/historial_evaluaciones.html",
-        evaluaciones=evaluaciones,
+        logs=logs,
+        evaluaciones=logs,
         filtros=filtros,
         asesores=asesores_disponibles,
         asesores_disponibles=asesores_disponibles,
@@ -10,6 +10,15 @@ import json
 import traceback
 
 from . import api_bp
+from ..utils.cache_http import (
+    respuesta_condicional,
+    validador_sesion,
+    validador_versiones,
+    obtener_estadisticas_condicionales,
+)
+
+# Roles que ven el contador de pendientes de comité en los badges
+ROLES_PENDIENTES_COMITE = ["admin", "admin_tecnico", "comite_credito"]
 
 
 def api_login_required(f):
@@ -71,6 +80,7 @@ def api_csrf_token():
 
 
 @api_bp.route("/session-status", methods=["GET"])
+@respuesta_condicional(validador_sesion)
 def api_session_status():
     """Verificar estado de sesión"""
     if session.get("autorizado"):
@@ -190,8 +200,16 @@ def api_detalle_evaluacion(timestamp):
         }), 500
 
 
+def _validador_badge_count():
+    """Casos del asesor (version_asesor) y, para comité, la cola de pendientes."""
+    rol = session.get("rol")
+    conjuntos = ("comite",) if rol in ROLES_PENDIENTES_COMITE else ()
+    return validador_versiones(conjuntos, session.get("username"))
+
+
 @api_bp.route("/badge-count", methods=["GET"])
 @api_login_required
+@respuesta_condicional(_validador_badge_count)
 def api_badge_count():
     """Obtener contadores para badges del navbar"""
     import sys
@@ -218,7 +236,7 @@ def api_badge_count():
             response["casos_nuevos"] = 0
     
     # Pendientes de comité (para admin y comité)
-    if rol in ["admin", "admin_tecnico", "comite_credito"]:
+    if rol in ROLES_PENDIENTES_COMITE:
         try:
             casos_pendientes = obtener_casos_comite({"estado_comite": "pending"})
             response["pendientes_comite"] = len(casos_pendientes)
@@ -228,6 +246,165 @@ def api_badge_count():
     return jsonify(response)
 
 
+@api_bp.route("/eventos", methods=["GET"])
+@api_login_required
+def api_eventos():
+    """Stream SSE (text/event-stream) de decisiones de comité, casos pendientes y badges"""
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    
+    from flask import Response
+    from bus_eventos import suscribir, generar_stream
+    
+    # EventSource reenvía el último id recibido al reconectar
+    ultimo_id = request.headers.get("Last-Event-ID") or request.args.get("ultimo_id")
+    try:
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        ultimo_id = None
+    
+    suscripcion = suscribir(session.get("username"), session.get("rol"), ultimo_id)
+    if suscripcion is None:
+        # EventSource no reintenta ante un error HTTP: el cliente pasa a polling
+        return jsonify({
+            'error': 'Demasiadas conexiones de eventos',
+            'code': 'SSE_LIMIT'
+        }), 503, {"Retry-After": "60"}
+    
+    # Sin stream_with_context: el request (y su conexión a la DB) se libera
+    # al retornar; el stream solo espera eventos del bus
+    return Response(
+        generar_stream(suscripcion),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_bp.route("/navbar-resumen", methods=["GET"])
+@api_login_required
+def api_navbar_resumen():
+    """Resumen del navbar del usuario (cacheado) para cargarlo de forma asíncrona"""
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    from db_helpers_dashboard import obtener_resumen_navbar_cacheado
+
+    resumen = obtener_resumen_navbar_cacheado(
+        session.get("rol", "asesor"), session.get("username")
+    )
+    return jsonify({
+        "success": "error" not in resumen,
+        "items": resumen.get("items", [])
+    })
+
+
+@api_bp.route("/metricas-asesores", methods=["GET"])
+@api_login_required
+def api_metricas_asesores():
+    """
+    Métricas históricas por asesor (tabla materializada metricas_asesores),
+    limitadas a los asesores que el usuario puede ver en el historial de
+    evaluaciones. Parámetros: orden, limite.
+    """
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    from db_helpers import resolve_visible_usernames
+    from db_helpers_dashboard import obtener_metricas_asesores
+    from permisos import obtener_permisos_usuario_actual
+
+    visibilidad = resolve_visible_usernames(
+        session.get("username"), obtener_permisos_usuario_actual(), contexto="evaluaciones"
+    )
+    if visibilidad["scope"] == "ninguno":
+        return jsonify({"success": False, "error": "Sin permiso"}), 403
+
+    limite = request.args.get("limite", type=int)
+    metricas = obtener_metricas_asesores(
+        usernames=visibilidad["usernames_visibles"],
+        orden=request.args.get("orden", "total_evaluaciones"),
+        limite=limite if limite and limite > 0 else None,
+    )
+    return jsonify({
+        "success": True,
+        "scope": visibilidad["scope"],
+        "metricas": metricas
+    })
+
+
+@api_bp.route("/dashboard/series", methods=["GET"])
+@api_login_required
+def api_dashboard_series():
+    """
+    Series de tendencia (evaluaciones, aprobaciones, simulaciones,
+    desembolsos y monto desembolsado) de los asesores visibles para el
+    usuario. Parámetros: rango (30, 90, 365), granularidad (dia, semana),
+    agrupar (asesor, linea), asesor, linea.
+    """
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    from db_helpers import resolve_visible_usernames
+    from db_helpers_dashboard import (
+        AGRUPACIONES_SERIES,
+        GRANULARIDADES_SERIES,
+        RANGOS_SERIES,
+        obtener_series_dashboard,
+    )
+    from permisos import obtener_permisos_usuario_actual
+
+    visibilidad = resolve_visible_usernames(
+        session.get("username"), obtener_permisos_usuario_actual(), contexto="evaluaciones"
+    )
+    if visibilidad["scope"] == "ninguno":
+        return jsonify({"success": False, "error": "Sin permiso"}), 403
+
+    rango = request.args.get("rango", 30, type=int)
+    granularidad = request.args.get("granularidad", "dia")
+    agrupar = request.args.get("agrupar") or None
+    if rango not in RANGOS_SERIES or granularidad not in GRANULARIDADES_SERIES \
+            or agrupar not in AGRUPACIONES_SERIES:
+        return jsonify({
+            "success": False,
+            "error": "Parámetros inválidos",
+            "rangos": list(RANGOS_SERIES),
+            "granularidades": list(GRANULARIDADES_SERIES),
+            "agrupaciones": [a for a in AGRUPACIONES_SERIES if a],
+        }), 400
+
+    asesores = visibilidad["usernames_visibles"]
+    asesor = request.args.get("asesor")
+    if asesor:
+        if asesores is not None and asesor not in asesores:
+            return jsonify({"success": False, "error": "Asesor fuera de su alcance"}), 403
+        asesores = [asesor]
+
+    series = obtener_series_dashboard(
+        asesores=asesores,
+        dias=rango,
+        granularidad=granularidad,
+        agrupar=agrupar,
+        linea=request.args.get("linea") or None,
+    )
+    return jsonify({
+        "success": True,
+        "scope": visibilidad["scope"],
+        **series
+    })
+
+
 # ============================================================================
 # API DE USUARIOS
 # ============================================================================
@@ -621,10 +798,11 @@ def api_invalidar_cache():
     
     try:
         from db_helpers_scoring_linea import invalidar_cache_scoring_linea
-        from db_helpers import cargar_configuracion # To force reload if needed
+        from db_helpers import invalidar_cache_scoring
         
-        # Invalidar cache de scoring
+        # Invalidar cache de scoring (local y, vía versión, en otros workers)
         invalidar_cache_scoring_linea()
+        invalidar_cache_scoring(propagar=True)
         
         return jsonify({
             "success": True, 
@@ -682,6 +860,63 @@ def guardar_factores_rechazo(linea_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@api_bp.route("/scoring/backtest", methods=["POST"])
+@api_login_required
+@api_requiere_permiso("admin_panel_acceso")
+def api_scoring_backtest():
+    """
+    Re-puntúa las evaluaciones guardadas con una configuración borrador.
+    
+    Body JSON: borrador (configuración en formato guardado, puede ser
+    parcial), linea_credito, desde, hasta ('YYYY-MM-DD'), limite y procesos.
+    El backtest corre dentro del request: limite (por defecto y como
+    máximo MAX_LIMITE_API) acota las evaluaciones más recientes a
+    re-puntuar; para más filas usar python -m backtesting_scoring.
+    Retorna tasas de aprobación, matriz de migración de niveles y
+    distribución del score (ver backtesting_scoring.py).
+    """
+    import sys
+    from pathlib import Path
+    BASE_DIR = Path(__file__).parent.parent.parent.resolve()
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    
+    try:
+        from backtesting_scoring import MAX_LIMITE_API, MAX_PROCESOS, ejecutar_backtest
+        
+        data = request.get_json(silent=True) or {}
+        borrador = data.get("borrador")
+        if not isinstance(borrador, dict):
+            return jsonify({"success": False, "error": "borrador debe ser un objeto JSON"}), 400
+        
+        try:
+            limite = int(data.get("limite") or MAX_LIMITE_API)
+            procesos = min(int(data.get("procesos") or MAX_PROCESOS), MAX_PROCESOS)
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "limite y procesos deben ser enteros"}), 400
+        if not 0 < limite <= MAX_LIMITE_API:
+            return jsonify({
+                "success": False,
+                "error": f"limite debe estar entre 1 y {MAX_LIMITE_API}; para más evaluaciones use python -m backtesting_scoring",
+            }), 400
+        
+        resultado = ejecutar_backtest(
+            borrador,
+            linea_credito=data.get("linea_credito") or None,
+            desde=data.get("desde") or None,
+            hasta=data.get("hasta") or None,
+            limite=limite,
+            procesos=procesos,
+        )
+        return jsonify(resultado)
+    
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @api_bp.route("/debug/session", methods=["GET"])
 @api_login_required
 @api_requiere_permiso("aud_ver_todos")
@@ -718,8 +953,18 @@ def api_db_diagnostics():
             conectar_db,
             verificar_integridad_db,
             listar_tablas,
-            contar_registros_tabla
+            contar_registros_tabla,
+            obtener_estadisticas_conexiones
+        )
+        from db_writer import obtener_estadisticas_escritor
+        from bus_eventos import obtener_estadisticas_bus
+        from db_lectura import obtener_estadisticas_lectura
+        from db_escritura_diferida import obtener_estadisticas_escritura_diferida
+        from db_helpers_dashboard import (
+            obtener_estadisticas_resumen_navbar,
+            obtener_estadisticas_series,
         )
+        from ..services.motor_scoring import obtener_motor_scoring
         import sqlite3
 
         # 1. Verificar conexión
@@ -751,6 +996,15 @@ def api_db_diagnostics():
                 "journal_mode": journal_mode,
                 "python_sqlite_version": sqlite3.version,
                 "sqlite_lib_version": sqlite3.sqlite_version,
+                "connection_stats": obtener_estadisticas_conexiones(),
+                "writer_stats": obtener_estadisticas_escritor(),
+                "read_batch_stats": obtener_estadisticas_lectura(),
+                "write_behind_stats": obtener_estadisticas_escritura_diferida(),
+                "navbar_cache_stats": obtener_estadisticas_resumen_navbar(),
+                "series_cache_stats": obtener_estadisticas_series(),
+                "conditional_get_stats": obtener_estadisticas_condicionales(),
+                "event_bus_stats": obtener_estadisticas_bus(),
+                "scoring_engine_stats": obtener_motor_scoring().estadisticas(),
             }
         )
 
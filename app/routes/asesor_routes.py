@@ -9,6 +9,7 @@ import json
 import traceback
 
 from . import asesor_bp
+from ..utils.cache_http import respuesta_condicional, validador_versiones
 
 
 def login_required(f):
@@ -82,6 +83,7 @@ def mis_casos_comite():
 
 @asesor_bp.route("/api/casos-comite/cambios")
 @login_required
+@respuesta_condicional(lambda: validador_versiones((), session.get("username")))
 def verificar_cambios_casos():
     """API para verificar si hay cambios en casos del asesor"""
     import sys
@@ -113,6 +115,7 @@ def marcar_caso_visto(timestamp):
         sys.path.insert(0, str(BASE_DIR))
 
     from db_helpers import obtener_evaluacion_por_timestamp, actualizar_evaluacion
+    from bus_eventos import publicar_badges, publicar_en_segundo_plano
     from ..utils.timezone import obtener_hora_colombia
 
     try:
@@ -130,6 +133,8 @@ def marcar_caso_visto(timestamp):
             "visto_por_asesor": True,
             "fecha_visto_asesor": obtener_hora_colombia().isoformat()
         })
+        # casos_nuevos cambió: actualizar el badge en las demás pestañas
+        publicar_en_segundo_plano(publicar_badges, evaluacion.get("asesor"))
 
         return jsonify({
             "success": True,
@@ -21,7 +21,7 @@ def login():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
     
-    from db_helpers import cargar_configuracion
+    from db_helpers import obtener_snapshot_configuracion
     
     # Si ya está autenticado, redirigir
     if session.get("autorizado"):
@@ -50,7 +50,7 @@ def login():
             return render_template("login.html")
         
         # Cargar usuarios
-        config = cargar_configuracion()
+        config = obtener_snapshot_configuracion()
         usuarios = config.get("USUARIOS", {})
         
         # Verificar credenciales
@@ -64,7 +64,7 @@ def comite_credito():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
     
-    from db_helpers import obtener_casos_comite, cargar_configuracion, cargar_scoring
+    from db_helpers import obtener_casos_comite, obtener_snapshot_configuracion, cargar_scoring
     
     # Obtener casos por estado
     casos_pendientes = obtener_casos_comite({"estado_comite": "pending"})
@@ -72,7 +72,7 @@ def comite_credito():
     casos_rechazados = obtener_casos_comite({"estado_comite": "rejected", "limite": 50})
     
     # Configuración
-    config = cargar_configuracion()
+    config = obtener_snapshot_configuracion()
     scoring = cargar_scoring()
     
     config_comite = config.get("COMITE_CREDITO", {})
@@ -128,6 +128,7 @@ def aprobar_caso():
         sys.path.insert(0, str(BASE_DIR))
     
     from db_helpers import obtener_evaluacion_por_timestamp, actualizar_evaluacion
+    from bus_eventos import publicar_decision_comite
     from ..utils.timezone import obtener_hora_colombia
     from ..utils.formatting import parse_currency_value
     
@@ -168,6 +169,7 @@ def aprobar_caso():
             "monto_aprobado": monto_aprobado or evaluacion.get("monto_solicitado"),
             "nivel_riesgo_ajustado": nivel_riesgo_ajustado
         })
+        publicar_decision_comite(evaluacion, "approved")
         
         flash(f"Caso aprobado para {evaluacion.get('nombre_cliente')}", "success")
         return jsonify({"success": True, "message": f"Caso aprobado para {evaluacion.get('nombre_cliente')}"})
@@ -189,6 +191,7 @@ def rechazar_caso():
         sys.path.insert(0, str(BASE_DIR))
     
     from db_helpers import obtener_evaluacion_por_timestamp, actualizar_evaluacion
+    from bus_eventos import publicar_decision_comite
     from ..utils.timezone import obtener_hora_colombia
     
     try:
@@ -228,6 +231,7 @@ def rechazar_caso():
             "estado_comite": "rejected",
             "decision_admin": decision_admin
         })
+        publicar_decision_comite(evaluacion, "rejected")
         
         flash(f"Caso rechazado para {evaluacion.get('nombre_cliente')}", "success")
         return jsonify({"success": True, "message": f"Caso rechazado para {evaluacion.get('nombre_cliente')}"})
@@ -7,6 +7,8 @@ from flask import render_template, redirect, url_for, session
 from functools import wraps
 
 from . import main_bp
+from ..utils.cache_http import respuesta_condicional, validador_versiones, omitir_validador
+from ..utils.timezone import obtener_hora_colombia
 
 
 def login_required(f):
@@ -32,9 +34,10 @@ def home():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
         
-    from db_helpers import cargar_configuracion
+    from db_helpers import obtener_snapshot_configuracion
     
-    config = cargar_configuracion()
+    # Solo lectura: el snapshot no necesita copia
+    config = obtener_snapshot_configuracion()
     lineas_credito = config.get("LINEAS_CREDITO", {})
     
     return render_template(
@@ -49,8 +52,23 @@ def simulador_publico():
     return home()
 
 
+def _validador_dashboard():
+    """
+    Todas las versiones de datos (el dashboard y el navbar leen
+    evaluaciones, simulaciones, usuarios, asignaciones, líneas y permisos),
+    el día (estadísticas de "hoy") y el tema. Los dashboards de admin
+    muestran la hora, así que su página cambia cada minuto.
+    """
+    rol = session.get("rol", "asesor")
+    formato = "%Y-%m-%d %H:%M" if rol in ("admin", "admin_tecnico") else "%Y-%m-%d"
+    return validador_versiones(
+        None, None, obtener_hora_colombia().strftime(formato), session.get("theme")
+    )
+
+
 @main_bp.route("/dashboard")
 @login_required
+@respuesta_condicional(_validador_dashboard)
 def dashboard():
     """Dashboard principal según rol del usuario"""
     import sys
@@ -66,6 +84,9 @@ def dashboard():
     
     # Obtener estadísticas según rol
     stats = obtener_estadisticas_por_rol(rol, username)
+    if stats.get("parcial"):
+        # Resultados incompletos: que el navegador no los reutilice
+        omitir_validador()
     
     # Determinar template según rol
     template_map = {
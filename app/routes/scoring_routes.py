@@ -3,7 +3,7 @@ SCORING_ROUTES.PY - Rutas de scoring de crédito
 ================================================
 """
 
-from flask import render_template, request, redirect, url_for, session, jsonify, flash
+from flask import render_template, request, redirect, url_for, session, jsonify, flash, make_response
 from functools import wraps
 import json
 import traceback
@@ -62,48 +62,20 @@ def scoring_page():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
     
-    from db_helpers import cargar_configuracion, cargar_scoring
+    from db_helpers import obtener_snapshot_configuracion, obtener_snapshot_scoring
     
-    config = cargar_configuracion()
-    scoring = cargar_scoring()
+    config = obtener_snapshot_configuracion()
+    # Snapshot inmutable: las plantillas solo leen, no hace falta copiarlo
+    scoring = obtener_snapshot_scoring()
     
     lineas_credito = config.get("LINEAS_CREDITO", {})
-    criterios = scoring.get("criterios", {})
-    secciones = scoring.get("secciones", [])
-    niveles_riesgo = scoring.get("niveles_riesgo", [])
-    factores_rechazo = scoring.get("factores_rechazo_automatico", [])
+    criterios = scoring.criterios_por_codigo
+    secciones = scoring.get("secciones", ())
+    niveles_riesgo = scoring.get("niveles_riesgo", ())
+    factores_rechazo = scoring.get("factores_rechazo_automatico", ())
     
-    # Preparar criterios agrupados por sección para el template
-    scoring_criterios_agrupados = []
-    criterios_por_seccion = {}
-    
-    # Agrupar criterios por sección
-    for criterio_id, criterio_data in criterios.items():
-        seccion_id = criterio_data.get("seccion", "otros")
-        if seccion_id not in criterios_por_seccion:
-            criterios_por_seccion[seccion_id] = []
-        criterios_por_seccion[seccion_id].append({
-            "id": criterio_id,
-            **criterio_data
-        })
-    
-    # Construir estructura agrupada
-    for seccion in secciones:
-        seccion_id = seccion.get("id", "")
-        criterios_seccion = criterios_por_seccion.get(seccion_id, [])
-        if criterios_seccion:
-            scoring_criterios_agrupados.append({
-                "seccion": seccion,
-                "criterios": criterios_seccion
-            })
-    
-    # Agregar criterios sin sección asignada
-    criterios_sin_seccion = criterios_por_seccion.get("otros", [])
-    if criterios_sin_seccion:
-        scoring_criterios_agrupados.append({
-            "seccion": {"id": "otros", "nombre": "Otros Criterios", "icono": "bi-gear"},
-            "criterios": criterios_sin_seccion
-        })
+    # Criterios agrupados por sección (precalculados en el snapshot)
+    scoring_criterios_agrupados = scoring.agrupar_criterios()
     
     return render_template(
         "scoring.html",
@@ -119,7 +91,7 @@ def scoring_page():
             "lineas_credito": lineas_credito,
             "criterios": criterios,
             "niveles_riesgo": niveles_riesgo
-        })
+        }, default=dict)
     )
 
 
@@ -134,7 +106,8 @@ def calcular_scoring():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
     
-    from db_helpers import cargar_scoring, guardar_evaluacion
+    from db_helpers import obtener_snapshot_configuracion, obtener_snapshot_scoring, guardar_evaluacion
+    from ..services.motor_scoring import obtener_motor_scoring
     from ..utils.timezone import obtener_hora_colombia
     from ..utils.formatting import parse_currency_value
     
@@ -151,98 +124,31 @@ def calcular_scoring():
             flash("Nombre y cédula son requeridos", "error")
             return redirect(url_for("scoring.scoring_page"))
         
-        # Cargar configuración de scoring
-        scoring_config = cargar_scoring()
-        criterios = scoring_config.get("criterios", {})
-
-        niveles_riesgo = scoring_config.get("niveles_riesgo", [])
-        factores_rechazo = scoring_config.get("factores_rechazo_automatico", [])
-        puntaje_minimo = scoring_config.get("puntaje_minimo_aprobacion", 17)
-        
-        # Calcular score (lógica simplificada - el cálculo real está en flask_app.py)
-        score_total = 0
-        criterios_evaluados = []
-        
-        for codigo, config_criterio in criterios.items():
-            if not config_criterio.get("activo", True):
-                continue
-            
-            valor = form_data.get(codigo)
-            if valor is None:
+        # Valores del formulario; los campos de moneda llegan también
+        # sin separadores de miles en <campo>_normalized
+        valores = {}
+        for campo, valor in form_data.items():
+            if campo.endswith("_normalized") or not str(valor).strip():
                 continue
-            
-            peso = config_criterio.get("peso", 5)
-            rangos = config_criterio.get("rangos", [])
-            
-            # Determine range type (numeric vs categorical) based on config or value
-            # Actually, `valor` is string from form. We try to convert to float.
-            valor_num = None
-            try:
-                # Remove currency symbols if present
-                clean_val = str(valor).replace('$', '').replace('.', '').replace(',', '').strip()
-                if clean_val.isdigit():
-                     valor_num = float(clean_val)
-                else: 
-                     # Handle percentages "46" or "46%"
-                     clean_val = clean_val.replace('%', '')
-                     if clean_val.replace('.', '', 1).isdigit():
-                         valor_num = float(clean_val)
-            except:
-                pass
-
-            puntaje_criterio = 0
-            
-            # Find matching range
-            for rango in rangos:
-                rango_min = rango.get("min")
-                rango_max = rango.get("max")
-                rango_valor = rango.get("valor")
-                puntos = rango.get("puntos", 0)
-                
-                # Define bounds if numeric logic applies
-                lower_bound = float(rango_min) if rango_min is not None else float('-inf')
-                upper_bound = float(rango_max) if rango_max is not None else float('inf')
-
-
-                # Logic 1: Categorical Match
-                if rango_valor is not None:
-                     # Check exact match or substring
-                     if str(rango_valor).lower() == str(valor).lower():
-                         puntaje_criterio = puntos
-                         break
-                     # Sometimes Select values are codes like "rango_1", check that too
-                     if str(rango_valor) == str(valor):
-                         puntaje_criterio = puntos
-                         break
-                
-                # Logic 2: Numeric Range
-                elif valor_num is not None and (rango_min is not None or rango_max is not None):
-                     if lower_bound <= valor_num <= upper_bound:
-                         puntaje_criterio = puntos
-                         break
-            
-            score_total += puntaje_criterio
-            criterios_evaluados.append({
-                "codigo": codigo,
-                "nombre": config_criterio.get("nombre", codigo),
-                "valor": valor,
-                "puntaje": puntaje_criterio,
-                "peso": peso
-            })
-        
-        # Determinar nivel de riesgo
-        nivel_riesgo = "Alto riesgo"
-        for nivel in niveles_riesgo:
-            if nivel.get("min", 0) <= score_total <= nivel.get("max", 100):
-                nivel_riesgo = nivel.get("nombre", "Sin clasificar")
-                break
+            valores[campo] = form_data.get(f"{campo}_normalized") or valor
         
-        # Verificar factores de rechazo
-        rechazo_automatico = False
-        razon_rechazo = None
+        # Motor compartido: modelo compilado de la línea (o el global),
+        # recompilado solo cuando cambia la versión de la configuración
+        resultado_motor = obtener_motor_scoring().evaluar(valores, linea_credito or None)
+        modelo = resultado_motor["modelo"]
+        nivel_riesgo = resultado_motor["nivel"]
         
-        # Determinar resultado
-        aprobado = score_total >= puntaje_minimo and not rechazo_automatico
+        criterios_evaluados = [
+            {
+                "codigo": evaluado["codigo"],
+                "nombre": evaluado["nombre"],
+                "valor": evaluado["valor"],
+                "puntaje": evaluado["puntaje"],
+                "peso": evaluado["peso"],
+                "descripcion": evaluado["detalle"],
+            }
+            for evaluado in resultado_motor["criterios_evaluados"]
+        ]
         
         # Crear evaluación
         evaluacion = {
@@ -253,14 +159,22 @@ def calcular_scoring():
             "linea_credito": linea_credito,
             "monto_solicitado": monto_solicitado,
             "resultado": {
-                "score": score_total,
-                "score_normalizado": min(100, max(0, score_total)),
+                "score": resultado_motor["score"],
+                "score_normalizado": resultado_motor["score_normalizado"],
                 "nivel": nivel_riesgo,
-                "aprobado": aprobado,
-                "rechazo_automatico": rechazo_automatico,
-                "razon_rechazo": razon_rechazo
+                "aprobado": resultado_motor["aprobado"],
+                "rechazo_automatico": resultado_motor["rechazo_automatico"],
+                "razon_rechazo": resultado_motor["razon_rechazo"],
+                "factor_rechazo": resultado_motor["factor_rechazo"],
             },
             "criterios_evaluados": criterios_evaluados,
+            # Valores de entrada del modelo, para re-puntuar con otra
+            # configuración (backtesting_scoring.py)
+            "valores_criterios": {
+                codigo: valores[codigo]
+                for codigo in modelo.codigos_entrada
+                if codigo in valores
+            },
             "nivel_riesgo": nivel_riesgo,
             "estado_comite": None,
             "origen": "Manual"
@@ -269,35 +183,44 @@ def calcular_scoring():
         # Guardar evaluación
         guardar_evaluacion(evaluacion)
         
-        # Re-renderizar el formulario con resultados incluidos
-        # Cargar de nuevo la configuración para mostrar el formulario
-        lineas_credito = cargar_configuracion().get("LINEAS_CREDITO", {})
-        criterios = scoring_config.get("criterios", {})
-        
-        # Agrupar criterios por sección
-        from db_helpers_scoring_linea import obtener_secciones_criterios
-        criterios_por_seccion = obtener_secciones_criterios(linea_credito)
-        
-        secciones = scoring_config.get("secciones", [])
-        scoring_criterios_agrupados = []
+        # Datos del resultado en el formato de scoring.html
+        por_codigo = {criterio.codigo: criterio for criterio in modelo.criterios}
+        detalles = []
+        for evaluado in criterios_evaluados:
+            criterio = por_codigo[evaluado["codigo"]]
+            detalles.append({
+                "nombre": evaluado["nombre"],
+                "descripcion": evaluado["descripcion"],
+                "valor": evaluado["valor"],
+                "peso": evaluado["peso"],
+                "puntos_originales": evaluado["puntaje"],
+                "puntos_ponderados": evaluado["puntaje"] * criterio.factor,
+                "puntos_maximos": criterio.maximo_ponderado,
+                "puntos_minimos": criterio.puntaje_minimo * criterio.factor,
+            })
         
-        for seccion in secciones:
-            seccion_criterios = criterios_por_seccion.get(seccion["id"], [])
-            if seccion_criterios:
-                scoring_criterios_agrupados.append({
-                    "seccion": seccion,
-                    "criterios": seccion_criterios
-                })
+        scoring_result = dict(evaluacion["resultado"])
+        scoring_result.update({
+            "level": nivel_riesgo,
+            "color": resultado_motor["nivel_detalle"]["color"],
+            "puntaje_minimo": resultado_motor["puntaje_minimo"],
+            # scoring.html muestra el texto del rechazo
+            "rechazo_automatico": resultado_motor["razon_rechazo"] if resultado_motor["rechazo_automatico"] else False,
+            "timestamp": evaluacion["timestamp"],
+            "detalles": detalles,
+        })
         
-        criterios_sin_seccion = criterios_por_seccion.get("otros", [])
-        if criterios_sin_seccion:
-            scoring_criterios_agrupados.append({
-                "seccion": {"id": "otros", "nombre": "Otros Criterios", "icono": "bi-gear"},
-                "criterios": criterios_sin_seccion
-            })
+        # Re-renderizar el formulario con resultados incluidos
+        scoring_config = obtener_snapshot_scoring()
+        criterios = scoring_config.criterios_por_codigo
+        niveles_riesgo = scoring_config.get("niveles_riesgo", ())
+        factores_rechazo = scoring_config.get("factores_rechazo_automatico", ())
+        lineas_credito = obtener_snapshot_configuracion().get("LINEAS_CREDITO", {})
+        secciones = scoring_config.get("secciones", ())
+        scoring_criterios_agrupados = scoring_config.agrupar_criterios()
         
         # Renderizar scoring.html con los resultados Y el formulario
-        return render_template(
+        respuesta = make_response(render_template(
             "scoring.html",
             lineas_credito=lineas_credito,
             criterios=criterios,
@@ -311,12 +234,18 @@ def calcular_scoring():
                 "lineas_credito": lineas_credito,
                 "criterios": criterios,
                 "niveles_riesgo": niveles_riesgo
-            }),
+            }, default=dict),
             # Agregar datos de resultado
             evaluacion=evaluacion,
-            scoring_result=evaluacion["resultado"],
+            scoring_result=scoring_result,
             form_values=form_data  # Para mantener valores del formulario
+        ))
+        # Tiempos del motor por etapa (DevTools > Network > Timing)
+        respuesta.headers["Server-Timing"] = ", ".join(
+            f"scoring-{etapa};dur={segundos * 1000:.3f}"
+            for etapa, segundos in resultado_motor["tiempos"].items()
         )
+        return respuesta
         
     except Exception as e:
         traceback.print_exc()
@@ -335,7 +264,9 @@ def api_scoring_invalidar_cache():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
         
+    from db_helpers import invalidar_cache_scoring
     from db_helpers_scoring_linea import invalidar_cache_scoring_linea
+    from ..services.motor_scoring import obtener_motor_scoring
     import logging
     logger = logging.getLogger(__name__)
 
@@ -343,6 +274,9 @@ def api_scoring_invalidar_cache():
         linea_id = request.get_json().get("linea_id") if request.is_json else None
 
         invalidar_cache_scoring_linea(linea_id)
+        obtener_motor_scoring().invalidar()
+        # Incrementa la versión para que los demás workers también recarguen
+        invalidar_cache_scoring(propagar=True)
 
         return jsonify({"success": True, "message": "Cache de scoring invalidado"})
     except Exception as e:
@@ -103,9 +103,9 @@ def capacidad_pago():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
 
-    from db_helpers import cargar_configuracion
+    from db_helpers import obtener_snapshot_configuracion
 
-    config = cargar_configuracion()
+    config = obtener_snapshot_configuracion()
     parametros = config.get("PARAMETROS_CAPACIDAD_PAGO", {})
 
     return render_template(
@@ -163,7 +163,7 @@ def guardar_simulacion_endpoint():
     if str(BASE_DIR) not in sys.path:
         sys.path.insert(0, str(BASE_DIR))
 
-    from db_helpers import guardar_simulacion
+    from db_helpers import registrar_simulacion
     from ..utils.timezone import obtener_hora_colombia
 
     try:
@@ -176,8 +176,8 @@ def guardar_simulacion_endpoint():
         data["timestamp"] = obtener_hora_colombia().isoformat()
         data["asesor"] = session.get("username")
 
-        # Guardar simulación
-        guardar_simulacion(data)
+        # Guardar simulación (write-behind si está activo)
+        registrar_simulacion(data)
 
         return jsonify({
             "success": True,
@@ -315,7 +315,7 @@ def calcular_asesor():
         sys.path.insert(0, str(BASE_DIR))
         
     from db_helpers_scoring_linea import cargar_scoring_por_linea
-    from db_helpers import cargar_evaluaciones, guardar_simulacion
+    from db_helpers import obtener_contexto_riesgo_caso, registrar_simulacion
 
     config = cargar_configuracion()
     lineas_credito = config.get("LINEAS_CREDITO", {})
@@ -382,15 +382,9 @@ def calcular_asesor():
     
     if timestamp_caso:
         try:
-            evaluaciones = cargar_evaluaciones()
-            caso = next((ev for ev in evaluaciones if ev.get("timestamp") == timestamp_caso), None)
-            if caso:
-                if caso.get("decision_admin", {}).get("nivel_riesgo_ajustado"):
-                    nivel_usado = caso["decision_admin"]["nivel_riesgo_ajustado"]
-                elif caso.get("nivel_riesgo"):
-                    nivel_usado = caso["nivel_riesgo"]
-                elif caso.get("resultado", {}).get("nivel"):
-                    nivel_usado = caso["resultado"]["nivel"]
+            contexto = obtener_contexto_riesgo_caso(timestamp_caso)
+            if contexto:
+                nivel_usado = contexto["nivel_efectivo"]
                 
                 if nivel_usado:
                     # Cargar scoring por línea para pasar a la función
@@ -477,7 +471,7 @@ def calcular_asesor():
                 "caso_origen": timestamp_caso,
                 "modalidad_desembolso": modalidad_desembolso
             }
-            guardar_simulacion(simulacion)
+            registrar_simulacion(simulacion)
         except Exception as e:
             print(f"Error guardando simulación: {e}")
 
@@ -527,14 +521,11 @@ def api_simulaciones_cliente(cedula):
         scope_info = resolve_visible_usernames(username, permisos, "simulaciones")
         usernames_visibles = scope_info.get("usernames_visibles")
 
-        # Obtener simulaciones del cliente
-        simulaciones = obtener_simulaciones_cliente(cedula)
-
-        # Filtrar si no tiene acceso a todos
-        if usernames_visibles is not None:
-            simulaciones = [
-                s for s in simulaciones if s.get("asesor") in usernames_visibles
-            ]
+        # Simulaciones del cliente, filtradas por scope en SQL
+        simulaciones = obtener_simulaciones_cliente(
+            cedula,
+            list(usernames_visibles) if usernames_visibles is not None else None,
+        )
 
         return jsonify({"simulaciones": simulaciones, "total": len(simulaciones)}), 200
     except Exception as e:
@@ -4,11 +4,17 @@ SERVICES - Módulo de servicios de lógica de negocio
 """
 
 from .scoring_service import ScoringService
+from .modelo_scoring import CompiledScoringModel
+from .motor_scoring import MotorScoring
+from .registro_modelos import RegistroModelos
 from .simulacion_service import SimulacionService
 from .seguro_service import SeguroService
 
 __all__ = [
     'ScoringService',
+    'CompiledScoringModel',
+    'MotorScoring',
+    'RegistroModelos',
     'SimulacionService',
     'SeguroService'
 ]
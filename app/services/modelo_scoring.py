@@ -0,0 +1,417 @@
+"""
+MODELO_SCORING.PY - Modelo de scoring compilado
+================================================
+
+ScoringService.evaluar_criterio recorría la lista de rangos de cada
+criterio y volvía a leer 'activo', 'peso' y 'tipo_campo' del dict en cada
+evaluación (hoy delega en CriterioCompilado). CompiledScoringModel hace
+ese trabajo una vez por configuración:
+
+- Criterios numéricos: límites ordenados y búsqueda con bisect sobre
+  intervalos elementales (ver TablaRangos)
+- Criterios de selección y booleanos: dict con la clave ya normalizada
+- Pesos, factor peso/100 y el denominador de normalización precalculados
+- Factores de rechazo con el operador y el umbral ya convertidos
+- Niveles de riesgo con la misma TablaRangos
+
+El resultado es idéntico al del recorrido lineal: el primer rango de la
+lista que contiene el valor gana, aunque los rangos se solapen o dejen
+huecos.
+"""
+
+import bisect
+import operator
+from time import perf_counter
+from types import MappingProxyType
+
+
+INFINITO = float("inf")
+
+VALORES_VERDADEROS = frozenset(("true", "1", "si", "sí", "yes"))
+
+OPERADORES_RECHAZO = MappingProxyType({
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+})
+
+SIN_COINCIDENCIA = (0, "")
+
+
+def parsear_numero(valor):
+    """
+    Valor numérico de un criterio con la misma limpieza que
+    ScoringService ("$", "," y "." se descartan). Los int se convierten
+    directo: su str() no tiene nada que limpiar.
+
+    Returns:
+        float: Valor numérico (0 si no se puede convertir)
+    """
+    if type(valor) is int:
+        return float(valor)
+    try:
+        return float(str(valor).replace(",", ".").replace("$", "").replace(".", ""))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _limite(valor, defecto):
+    if valor is None:
+        return defecto
+    return float(valor)
+
+
+class TablaRangos:
+    """
+    Rangos cerrados [min, max] con semántica de "primer rango que
+    contiene el valor", resueltos con una búsqueda binaria.
+
+    Los límites de todos los rangos parten la recta en intervalos
+    elementales: cada límite p_i y cada intervalo abierto entre dos
+    límites consecutivos. Dentro de uno de ellos todos los valores caen
+    en los mismos rangos, así que el resultado se calcula al compilar.
+
+    Attributes:
+        puntos: Límites ordenados sin repetir
+        en_punto: Resultado para un valor igual a puntos[i]
+        en_intervalo: Resultado para un valor entre puntos[i-1] y puntos[i]
+                      (len(puntos) + 1 entradas, con los extremos infinitos)
+    """
+
+    __slots__ = ("puntos", "en_punto", "en_intervalo", "defecto")
+
+    def __init__(self, rangos, defecto=None):
+        """
+        Args:
+            rangos (iterable): Tuplas (min, max, resultado) en orden de prioridad
+            defecto: Resultado cuando ningún rango contiene el valor
+        """
+        # Un límite NaN no se cumple nunca (todas sus comparaciones son falsas)
+        rangos = tuple(r for r in rangos if r[0] == r[0] and r[1] == r[1])
+        self.defecto = defecto
+        self.puntos = tuple(sorted({limite for mn, mx, _ in rangos for limite in (mn, mx)}))
+
+        def primero(contiene):
+            for mn, mx, resultado in rangos:
+                if contiene(mn, mx):
+                    return resultado
+            return defecto
+
+        self.en_punto = tuple(
+            primero(lambda mn, mx, p=p: mn <= p <= mx) for p in self.puntos
+        )
+        # Un rango contiene todo el intervalo (a, b) si min <= a y b <= max
+        extremos = (-INFINITO,) + self.puntos + (INFINITO,)
+        self.en_intervalo = tuple(
+            primero(lambda mn, mx, a=a, b=b: mn <= a and b <= mx)
+            for a, b in zip(extremos, extremos[1:])
+        )
+
+    def buscar(self, valor):
+        """Resultado del primer rango que contiene `valor`."""
+        if valor != valor:  # NaN no está en ningún rango
+            return self.defecto
+        puntos = self.puntos
+        i = bisect.bisect_left(puntos, valor)
+        if i < len(puntos) and puntos[i] == valor:
+            return self.en_punto[i]
+        return self.en_intervalo[i]
+
+
+class CriterioCompilado:
+    """Criterio activo listo para evaluar: tipo, peso y tabla de rangos."""
+
+    __slots__ = ("codigo", "nombre", "peso", "factor", "tipo", "tabla", "opciones", "por_booleano",
+                 "puntaje_maximo", "puntaje_minimo", "maximo_ponderado")
+
+    def __init__(self, codigo, config):
+        self.codigo = codigo
+        self.nombre = config.get("nombre", codigo)
+        self.peso = config.get("peso", 5)
+        self.factor = self.peso / 100.0
+        self.tipo = config.get("tipo_campo", "numerico")
+        self.tabla = None
+        self.opciones = None
+        self.por_booleano = None
+
+        rangos = config.get("rangos", ())
+        resultados = [(r.get("puntaje", 0), r.get("descripcion", "")) for r in rangos]
+        self.puntaje_maximo = max((p for p, _ in resultados), default=0)
+        self.puntaje_minimo = min((p for p, _ in resultados), default=0)
+        self.maximo_ponderado = self.puntaje_maximo * self.factor
+
+        if self.tipo == "numerico":
+            limites = []
+            for rango, resultado in zip(rangos, resultados):
+                try:
+                    limites.append((_limite(rango.get("min"), -INFINITO),
+                                    _limite(rango.get("max"), INFINITO), resultado))
+                except (ValueError, TypeError):
+                    # Un límite no numérico nunca contiene al valor
+                    continue
+            self.tabla = TablaRangos(limites, SIN_COINCIDENCIA)
+
+        elif self.tipo == "seleccion":
+            opciones = {}
+            for rango, resultado in zip(rangos, resultados):
+                opciones.setdefault(str(rango.get("valor", "")).lower(), resultado)
+            self.opciones = MappingProxyType(opciones)
+
+        elif self.tipo == "booleano":
+            por_booleano = {}
+            for clave in (True, False):
+                por_booleano[clave] = next(
+                    (resultado for rango, resultado in zip(rangos, resultados)
+                     if rango.get("valor") == clave),
+                    SIN_COINCIDENCIA,
+                )
+            self.por_booleano = MappingProxyType(por_booleano)
+
+    def evaluar(self, valor):
+        """
+        Returns:
+            tuple: (puntaje, detalle) del rango que aplica o (0, "")
+        """
+        tipo = self.tipo
+        if tipo == "numerico":
+            return self.tabla.buscar(parsear_numero(valor))
+        if tipo == "seleccion":
+            return self.opciones.get(str(valor).lower(), SIN_COINCIDENCIA)
+        if tipo == "booleano":
+            return self.por_booleano[str(valor).lower() in VALORES_VERDADEROS]
+        return SIN_COINCIDENCIA
+
+
+class FactorRechazoCompilado:
+    """Factor de rechazo automático con operador y umbral ya convertidos."""
+
+    __slots__ = ("criterio", "comparar", "umbral", "umbral_original", "mensaje")
+
+    def __init__(self, criterio, comparar, umbral, umbral_original, mensaje):
+        self.criterio = criterio
+        self.comparar = comparar
+        self.umbral = umbral
+        self.umbral_original = umbral_original
+        self.mensaje = mensaje
+
+
+def _compilar_factor(factor):
+    """FactorRechazoCompilado o None si el factor nunca puede aplicar."""
+    comparar = OPERADORES_RECHAZO.get(factor.get("operador", "<"))
+    umbral = factor.get("valor", 0)
+    try:
+        umbral_num = float(umbral)
+    except (ValueError, TypeError):
+        return None
+    if comparar is None:
+        return None
+    return FactorRechazoCompilado(
+        factor.get("criterio"), comparar, umbral_num, umbral,
+        factor.get("mensaje", "Rechazo automático"),
+    )
+
+
+def _nivel_detalle(nivel):
+    return MappingProxyType({
+        "nombre": nivel.get("nombre", "Sin clasificar"),
+        "color": nivel.get("color", "#808080"),
+        "tasa_ea": nivel.get("tasa_ea"),
+        "tasa_nominal_mensual": nivel.get("tasa_nominal_mensual"),
+        "aval_porcentaje": nivel.get("aval_porcentaje"),
+        "min": nivel.get("min", 0),
+        "max": nivel.get("max", 100),
+    })
+
+
+NIVEL_SIN_CLASIFICAR = MappingProxyType({
+    "nombre": "Sin clasificar",
+    "color": "#808080",
+    "tasa_ea": None,
+    "tasa_nominal_mensual": None,
+    "aval_porcentaje": None,
+})
+
+SIN_RECHAZO = MappingProxyType({"rechazo": False, "razon": None, "factor": None})
+
+
+class CompiledScoringModel:
+    """
+    Configuración de scoring compilada e inmutable.
+
+    Se construye una vez por configuración (ScoringService.cargar_config)
+    y evalúa sin volver a leer los dicts de la configuración.
+
+    'criterios' puede ser un dict código -> criterio o una lista de
+    criterios con 'codigo' (formato de cargar_scoring_por_linea).
+
+    Normalización ('normalizacion' en la configuración):
+    - "peso" (defecto): score / suma de pesos evaluados * escala_max
+    - "maximo": score / puntaje máximo alcanzable con los criterios
+      evaluados * escala_max (fórmula de las evaluaciones guardadas)
+
+    Attributes:
+        version: 'version' de la configuración compilada (None si no tiene)
+        criterios: Tupla de CriterioCompilado activos, en orden de configuración
+        peso_total: Suma de pesos con todos los criterios presentes
+        maximo_total: Puntaje ponderado máximo con todos los criterios presentes
+        rechazos: Tupla de FactorRechazoCompilado aplicables
+        codigos_entrada: Códigos que lee el modelo (criterios y factores)
+        niveles: TablaRangos de niveles de riesgo
+    """
+
+    __slots__ = ("version", "criterios", "peso_total", "maximo_total", "por_maximo",
+                 "rechazos", "codigos_entrada", "niveles", "puntaje_minimo", "escala_max")
+
+    def __init__(self, config):
+        config = config or {}
+        self.version = config.get("version")
+        criterios = config.get("criterios", {})
+        if hasattr(criterios, "items"):
+            pares = criterios.items()
+        else:
+            pares = ((criterio.get("codigo"), criterio) for criterio in criterios)
+        self.criterios = tuple(
+            CriterioCompilado(codigo, criterio)
+            for codigo, criterio in pares
+            if criterio.get("activo", True)
+        )
+        # Mismas sumas, en el mismo orden, que el recorrido de calcular()
+        peso_total = 0
+        maximo_total = 0
+        for criterio in self.criterios:
+            peso_total += criterio.peso
+            maximo_total += criterio.maximo_ponderado
+        self.peso_total = peso_total
+        self.maximo_total = maximo_total
+        self.por_maximo = config.get("normalizacion", "peso") == "maximo"
+
+        self.rechazos = tuple(
+            factor for factor in map(_compilar_factor, config.get("factores_rechazo_automatico", ()))
+            if factor is not None
+        )
+        self.codigos_entrada = tuple(dict.fromkeys(
+            [criterio.codigo for criterio in self.criterios]
+            + [factor.criterio for factor in self.rechazos]
+        ))
+        niveles = []
+        for nivel in config.get("niveles_riesgo", ()):
+            try:
+                niveles.append((_limite(nivel.get("min", 0), -INFINITO),
+                                _limite(nivel.get("max", 100), INFINITO), _nivel_detalle(nivel)))
+            except (ValueError, TypeError):
+                continue
+        self.niveles = TablaRangos(niveles, NIVEL_SIN_CLASIFICAR)
+        self.puntaje_minimo = config.get("puntaje_minimo_aprobacion", 17)
+        self.escala_max = config.get("escala_max", 100)
+
+    def verificar_rechazo(self, valores):
+        """
+        Primer factor de rechazo automático que aplica.
+
+        Returns:
+            dict: {rechazo, razon, factor[, valor, umbral]}
+        """
+        for factor in self.rechazos:
+            criterio = factor.criterio
+            if criterio not in valores:
+                continue
+            valor = valores[criterio]
+            try:
+                valor_num = float(str(valor).replace(",", "."))
+            except (ValueError, TypeError):
+                continue
+            if factor.comparar(valor_num, factor.umbral):
+                return {
+                    "rechazo": True,
+                    "razon": factor.mensaje,
+                    "factor": criterio,
+                    "valor": valor,
+                    "umbral": factor.umbral_original,
+                }
+        return dict(SIN_RECHAZO)
+
+    def nivel(self, score):
+        """Detalle (copia) del nivel de riesgo que contiene el score."""
+        return dict(self.niveles.buscar(score))
+
+    def calcular(self, valores, tiempos=None):
+        """
+        Scoring completo de un solicitante.
+
+        Args:
+            valores (dict): Valor de cada criterio por código
+            tiempos (dict, optional): Si se pasa, recibe los segundos de
+                                      cada etapa (rechazo, criterios, nivel)
+
+        Returns:
+            dict: Mismo formato que ScoringService.calcular_scoring
+        """
+        if tiempos is not None:
+            inicio = perf_counter()
+        rechazo = self.verificar_rechazo(valores)
+        if tiempos is not None:
+            marca = perf_counter()
+            tiempos["rechazo"] = marca - inicio
+            inicio = marca
+
+        evaluaciones = []
+        score_total = 0
+        peso_total = 0
+        maximo_total = 0
+        completos = True
+
+        for criterio in self.criterios:
+            valor = valores.get(criterio.codigo)
+            if valor is None:
+                completos = False
+                continue
+
+            puntaje, detalle = criterio.evaluar(valor)
+            evaluaciones.append({
+                "codigo": criterio.codigo,
+                "nombre": criterio.nombre,
+                "valor": valor,
+                "puntaje": puntaje,
+                "peso": criterio.peso,
+                "detalle": detalle,
+            })
+            score_total += puntaje * criterio.factor
+            peso_total += criterio.peso
+            maximo_total += criterio.maximo_ponderado
+
+        if completos:
+            peso_total = self.peso_total
+            maximo_total = self.maximo_total
+        denominador = maximo_total if self.por_maximo else peso_total
+
+        escala_max = self.escala_max
+        if denominador > 0:
+            score_normalizado = (score_total / denominador) * escala_max
+        else:
+            score_normalizado = 0
+        score_normalizado = min(escala_max, max(0, score_normalizado))
+        if tiempos is not None:
+            marca = perf_counter()
+            tiempos["criterios"] = marca - inicio
+            inicio = marca
+
+        nivel = self.nivel(score_normalizado)
+        aprobado = not rechazo["rechazo"] and score_normalizado >= self.puntaje_minimo
+        if tiempos is not None:
+            tiempos["nivel"] = perf_counter() - inicio
+
+        return {
+            "score": round(score_total, 2),
+            "score_normalizado": round(score_normalizado, 2),
+            "nivel": nivel["nombre"],
+            "nivel_detalle": nivel,
+            "aprobado": aprobado,
+            "rechazo_automatico": rechazo["rechazo"],
+            "razon_rechazo": rechazo["razon"],
+            "factor_rechazo": rechazo["factor"],
+            "criterios_evaluados": evaluaciones,
+            "puntaje_minimo": self.puntaje_minimo,
+            "escala_max": escala_max,
+        }
@@ -0,0 +1,299 @@
+"""
+MOTOR_SCORING.PY - Motor de scoring compartido
+===============================================
+
+Un solo camino de cálculo para POST /scoring: el motor evalúa contra el
+CompiledScoringModel de la línea del formulario.
+
+- Los modelos se guardan en el registro compartido (registro_modelos.py)
+  bajo la clave ("modelo", línea), con la versión de datos con la que se
+  compilaron; en estado estable evaluar no lee configuración de la base,
+  solo los dos contadores de versión por PK.
+- Es la única entrada por línea: ScoringService (calcular_scoring y
+  calcular_scoring_lote) y el backtest de la configuración vigente usan
+  el mismo modelo compilado (entrada_para).
+- La configuración de la línea se lee con cargar_scoring_por_linea; si la
+  línea no existe o no tiene niveles se usa el modelo global (snapshot de
+  scoring).
+- Los formatos guardados en la base se convierten al formato de
+  CompiledScoringModel en config_desde_bd.
+- Se miden los tiempos de cada etapa (modelo, rechazo, criterios, nivel)
+  y se acumulan en estadisticas().
+
+Cambio de resultados respecto al cálculo en línea anterior de la ruta
+(suma de puntos sin peso, configuración global, sin rechazos): el score
+es suma de puntos x peso / 100, se normaliza contra el máximo alcanzable
+("maximo"), el nivel se busca con el score normalizado y aplican los
+factores de nivel RECHAZO_AUTOMATICO. Los puntos de cada criterio son los
+mismos; tests/test_motor_scoring.py compara ambos cálculos.
+
+Uso:
+    from app.services.motor_scoring import obtener_motor_scoring
+
+    resultado = obtener_motor_scoring().evaluar(valores, "LoansiFlex")
+"""
+
+import threading
+from time import perf_counter
+
+import db_helpers_scoring_linea
+from db_helpers import congelar
+
+from .modelo_scoring import CompiledScoringModel
+from .registro_modelos import obtener_registro_modelos, version_scoring
+
+
+# Niveles de factor que rechazan; los demás (análisis especial, alertas)
+# no cambian el resultado del scoring
+NIVELES_RECHAZO = frozenset((None, "RECHAZO_AUTOMATICO"))
+
+OPERADORES_BD = {"=": "=="}
+
+ETAPAS = ("modelo", "rechazo", "criterios", "nivel", "total")
+
+
+# ============================================================================
+# CONVERSIÓN DE LA CONFIGURACIÓN GUARDADA
+# ============================================================================
+
+def criterio_desde_bd(codigo, criterio):
+    """Un criterio guardado ('puntos', tipo_campo 'number', 'select'...) en el formato de CriterioCompilado."""
+    rangos = criterio.get("rangos", ())
+    por_valor = any("valor" in rango for rango in rangos)
+    return {
+        "codigo": codigo,
+        "nombre": criterio.get("nombre", codigo),
+        "peso": criterio.get("peso", 5),
+        "activo": criterio.get("activo", True),
+        "tipo_campo": "seleccion" if por_valor else "numerico",
+        "rangos": [
+            {
+                "min": rango.get("min"),
+                "max": rango.get("max"),
+                "valor": rango.get("valor"),
+                "puntaje": rango.get("puntos", rango.get("puntaje", 0)),
+                "descripcion": rango.get("descripcion", ""),
+            }
+            for rango in rangos
+        ],
+    }
+
+
+def _factor_desde_bd(factor, config, linea_credito):
+    if not factor.get("activo", True) or factor.get("nivel") not in NIVELES_RECHAZO:
+        return None
+
+    umbral = factor.get("valor", factor.get("valor_limite", factor.get("valor_exacto")))
+    dinamico = factor.get("valor_limite_dinamico")
+    if umbral is None and dinamico:
+        # Solo los límites que están en la configuración (p. ej.
+        # umbral_mora_telcos_rechazo); los que dependen del score no
+        # son comparables con un valor del formulario
+        umbral = config.get(dinamico)
+    if umbral is None:
+        return None
+
+    mensaje = factor.get("mensaje", "")
+    mensaje = mensaje.replace("{valor_limite}", str(umbral))
+    if linea_credito:
+        mensaje = mensaje.replace("{linea_credito}", linea_credito)
+
+    operador = factor.get("operador", "<")
+    return {
+        "criterio": factor.get("criterio"),
+        "operador": OPERADORES_BD.get(operador, operador),
+        "valor": umbral,
+        "mensaje": mensaje,
+    }
+
+
+def config_desde_bd(config, linea_credito=None):
+    """
+    Convierte una configuración guardada (cargar_scoring o
+    cargar_scoring_por_linea) al formato de CompiledScoringModel.
+
+    - criterios: dict o lista; 'puntos' -> 'puntaje'; rangos con 'valor'
+      se evalúan como selección, el resto como rangos numéricos
+    - factores: umbral de 'valor', 'valor_limite', 'valor_exacto' o
+      'valor_limite_dinamico'; solo los de nivel RECHAZO_AUTOMATICO
+    - normalización "maximo" (fórmula de las evaluaciones guardadas)
+
+    Args:
+        config (Mapping): Configuración leída de la base
+        linea_credito (str, optional): Nombre de la línea (para mensajes)
+
+    Returns:
+        dict: Configuración para CompiledScoringModel
+    """
+    criterios = config.get("criterios", {})
+    if hasattr(criterios, "items"):
+        pares = criterios.items()
+    else:
+        pares = ((criterio.get("codigo"), criterio) for criterio in criterios)
+
+    factores = (
+        _factor_desde_bd(factor, config, linea_credito)
+        for factor in config.get("factores_rechazo_automatico", ())
+    )
+    return {
+        "version": config.get("version"),
+        "criterios": [criterio_desde_bd(codigo, criterio) for codigo, criterio in pares],
+        "factores_rechazo_automatico": [factor for factor in factores if factor is not None],
+        "niveles_riesgo": list(config.get("niveles_riesgo", ())),
+        "puntaje_minimo_aprobacion": config.get("puntaje_minimo_aprobacion", 17),
+        "escala_max": config.get("escala_max", 100),
+        "normalizacion": "maximo",
+    }
+
+
+# ============================================================================
+# MOTOR
+# ============================================================================
+
+class MotorScoring:
+    """
+    Evaluación con los modelos compilados por línea del registro compartido.
+
+    Attributes:
+        registro: RegistroModelos con las entradas ("modelo", línea) ->
+                  (CompiledScoringModel, línea de origen o None si es el
+                  global, configuración convertida con config_desde_bd, de
+                  solo lectura)
+    """
+
+    def __init__(self, registro=None):
+        self.registro = registro or obtener_registro_modelos()
+        self._lock = threading.Lock()
+        self._tiempos = {etapa: [0.0, 0.0] for etapa in ETAPAS}  # [total, máximo]
+        self._evaluaciones = 0
+
+    def _compilar(self, linea_credito, scoring, version):
+        config = None
+        if linea_credito:
+            config = db_helpers_scoring_linea.cargar_scoring_por_linea(linea_credito)
+        origen = linea_credito if config else None
+        config = config_desde_bd(config or scoring, linea_credito)
+        modelo = CompiledScoringModel(config)
+        print(f"🔄 Modelo de scoring compilado para {origen or 'configuración global'} "
+              f"(línea {linea_credito or '-'}, versión {version})")
+        # La entrada es compartida por todos los hilos y servicios
+        return modelo, origen, congelar(config)
+
+    def entrada_para(self, linea_credito=None):
+        """
+        Entrada vigente del registro para la línea (o la global).
+
+        Se recompila solo si cambió la versión de scoring o de
+        configuración desde la última compilación. La configuración es
+        compartida y de solo lectura (MappingProxyType y tuplas); para
+        modificarla, copiarla con db_helpers.descongelar.
+
+        Returns:
+            tuple: (CompiledScoringModel, línea de origen o None si es el
+                    global, configuración convertida de solo lectura)
+        """
+        linea_credito = linea_credito or None
+        version, scoring = version_scoring()
+        return self.registro.obtener(
+            ("modelo", linea_credito), version,
+            lambda: self._compilar(linea_credito, scoring, version),
+        )
+
+    def modelo_para(self, linea_credito=None):
+        """
+        Modelo compilado vigente para la línea (o el global).
+
+        Returns:
+            tuple: (CompiledScoringModel, línea de origen o None si es el global)
+        """
+        modelo, origen, _config = self.entrada_para(linea_credito)
+        return modelo, origen
+
+    def evaluar(self, valores, linea_credito=None):
+        """
+        Scoring de un solicitante con el modelo de su línea.
+
+        Args:
+            valores (dict): Valor de cada criterio por código
+            linea_credito (str, optional): Nombre de la línea de crédito
+
+        Returns:
+            dict: Resultado de CompiledScoringModel.calcular más
+                  'modelo' (el CompiledScoringModel usado), 'linea_modelo'
+                  (línea de origen o None) y 'tiempos' (segundos por etapa)
+        """
+        inicio = perf_counter()
+        modelo, origen = self.modelo_para(linea_credito)
+        tiempos = {"modelo": perf_counter() - inicio}
+
+        resultado = modelo.calcular(valores, tiempos)
+        tiempos["total"] = perf_counter() - inicio
+
+        if resultado["rechazo_automatico"] and resultado["razon_rechazo"]:
+            valor = valores.get(resultado["factor_rechazo"])
+            resultado["razon_rechazo"] = resultado["razon_rechazo"].replace("{valor_actual}", str(valor))
+
+        with self._lock:
+            self._evaluaciones += 1
+            for etapa, segundos in tiempos.items():
+                acumulado = self._tiempos[etapa]
+                acumulado[0] += segundos
+                if segundos > acumulado[1]:
+                    acumulado[1] = segundos
+
+        resultado["modelo"] = modelo
+        resultado["linea_modelo"] = origen
+        resultado["tiempos"] = tiempos
+        return resultado
+
+    def invalidar(self, linea_credito=None):
+        """Descarta el modelo de una línea (o todo el registro)."""
+        if linea_credito is None:
+            self.registro.invalidar()
+        else:
+            self.registro.invalidar(("modelo", linea_credito))
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Evaluaciones, métricas del registro, modelos del motor y
+                  tiempos por etapa (promedio y máximo en ms)
+        """
+        modelos = {
+            clave[1] or "global": {
+                "version": list(version),
+                "origen": origen or "global",
+                "criterios": len(modelo.criterios),
+                "factores_rechazo": len(modelo.rechazos),
+            }
+            for clave, version, (modelo, origen, _config) in self.registro.entradas()
+            if clave[0] == "modelo"
+        }
+        with self._lock:
+            evaluaciones = self._evaluaciones
+            return {
+                "evaluaciones": evaluaciones,
+                "registro": self.registro.estadisticas(),
+                "modelos": modelos,
+                "tiempos_ms": {
+                    etapa: {
+                        "promedio": round(total / evaluaciones * 1000, 4) if evaluaciones else 0,
+                        "maximo": round(maximo * 1000, 4),
+                    }
+                    for etapa, (total, maximo) in self._tiempos.items()
+                },
+            }
+
+
+_MOTOR = None
+_MOTOR_LOCK = threading.Lock()
+
+
+def obtener_motor_scoring():
+    """Motor de scoring compartido por el proceso."""
+    global _MOTOR
+    if _MOTOR is None:
+        with _MOTOR_LOCK:
+            if _MOTOR is None:
+                _MOTOR = MotorScoring()
+    return _MOTOR
@@ -0,0 +1,195 @@
+"""
+REGISTRO_MODELOS.PY - Registro de modelos de scoring compilados
+================================================================
+
+Registro compartido por el proceso para los modelos de scoring por línea
+de crédito (una entrada por línea, la del motor de scoring, que usan
+también ScoringService y el backtest de la configuración vigente):
+
+- LRU: guarda hasta CAPACIDAD_REGISTRO entradas entre todas las líneas y
+  descarta la usada hace más tiempo
+- Versión: cada entrada guarda la versión de datos con la que se cargó,
+  (version_datos['scoring'], version_datos['configuracion']); si cambió,
+  la entrada se vuelve a cargar
+- Carga única: si varios hilos piden a la vez una línea que no está en
+  el registro, uno solo la lee de la base y los demás esperan su resultado
+- Métricas de aciertos, fallos, cargas, esperas y desalojos
+
+Las versiones salen de los snapshots de db_helpers: dentro de un request
+se resuelven una sola vez; fuera de él cuestan dos consultas por PK.
+
+Uso:
+    from app.services.registro_modelos import obtener_registro_modelos, version_scoring
+
+    version, scoring = version_scoring()
+    modelo = obtener_registro_modelos().obtener(clave, version, cargar)
+"""
+
+import threading
+from collections import OrderedDict
+
+from db_helpers import obtener_snapshot_configuracion, obtener_snapshot_scoring
+
+
+CAPACIDAD_REGISTRO = 32
+
+
+def version_scoring():
+    """
+    Versión vigente de la configuración de scoring.
+
+    La configuración por línea depende de las tablas de scoring y de
+    lineas_credito (conjunto 'configuracion'), por eso se usan ambos
+    contadores.
+
+    Returns:
+        tuple: ((versión scoring, versión configuración) o None si la base
+                no tiene versiones, ScoringSnapshot vigente)
+    """
+    scoring = obtener_snapshot_scoring()
+    version = (scoring.version, obtener_snapshot_configuracion().version)
+    if None in version:
+        return None, scoring
+    return version, scoring
+
+
+class _Carga:
+    """Carga en curso de una clave: los demás hilos esperan el evento."""
+
+    __slots__ = ("version", "evento", "valor", "error")
+
+    def __init__(self, version):
+        self.version = version
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class RegistroModelos:
+    """
+    Registro LRU de valores versionados con carga única por clave.
+
+    Attributes:
+        capacidad: Máximo de entradas antes de desalojar la más antigua
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_REGISTRO):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()  # clave -> (versión, valor)
+        self._cargando = {}  # clave -> _Carga
+        self._lock = threading.Lock()
+        self._metricas = {
+            "aciertos": 0,
+            "fallos": 0,
+            "cargas": 0,
+            "esperas": 0,
+            "desalojos": 0,
+            "errores": 0,
+        }
+
+    def obtener(self, clave, version, cargar):
+        """
+        Valor de `clave` para `version`, cargándolo si hace falta.
+
+        Args:
+            clave: Clave hashable (p. ej. ("modelo", "LoansiFlex"))
+            version: Versión vigente; None = no guardar (siempre se carga)
+            cargar (callable): Sin argumentos, retorna el valor a registrar
+
+        Returns:
+            El valor registrado o recién cargado
+
+        Raises:
+            Exception: La que lance `cargar` (también en los hilos que
+                       esperaban esa carga)
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and version is not None and entrada[0] == version:
+                self._entradas.move_to_end(clave)
+                self._metricas["aciertos"] += 1
+                return entrada[1]
+
+            self._metricas["fallos"] += 1
+            carga = self._cargando.get(clave)
+            if carga is not None and carga.version == version and version is not None:
+                self._metricas["esperas"] += 1
+                lider = False
+            else:
+                carga = self._cargando[clave] = _Carga(version)
+                lider = True
+
+        if not lider:
+            carga.evento.wait()
+            if carga.error is not None:
+                raise carga.error
+            return carga.valor
+
+        try:
+            carga.valor = cargar()
+        except Exception as e:
+            carga.error = e
+            with self._lock:
+                self._metricas["errores"] += 1
+                if self._cargando.get(clave) is carga:
+                    del self._cargando[clave]
+            carga.evento.set()
+            raise
+
+        with self._lock:
+            self._metricas["cargas"] += 1
+            if self._cargando.get(clave) is carga:
+                del self._cargando[clave]
+            if version is not None:
+                self._entradas[clave] = (version, carga.valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.capacidad:
+                    self._entradas.popitem(last=False)
+                    self._metricas["desalojos"] += 1
+        carga.evento.set()
+        return carga.valor
+
+    def invalidar(self, clave=None):
+        """Descarta una entrada (o todas)."""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+
+    def entradas(self):
+        """Lista de (clave, versión, valor), de la menos a la más reciente."""
+        with self._lock:
+            return [(clave, version, valor) for clave, (version, valor) in self._entradas.items()]
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Métricas, tamaño, capacidad y tasa de aciertos (%)
+        """
+        with self._lock:
+            metricas = dict(self._metricas)
+            tamano = len(self._entradas)
+            cargando = len(self._cargando)
+        consultas = metricas["aciertos"] + metricas["fallos"]
+        return {
+            **metricas,
+            "tamano": tamano,
+            "capacidad": self.capacidad,
+            "cargas_en_curso": cargando,
+            "tasa_aciertos": round(metricas["aciertos"] / consultas * 100, 2) if consultas else 0,
+        }
+
+
+_REGISTRO = None
+_REGISTRO_LOCK = threading.Lock()
+
+
+def obtener_registro_modelos():
+    """Registro de modelos compartido por el proceso."""
+    global _REGISTRO
+    if _REGISTRO is None:
+        with _REGISTRO_LOCK:
+            if _REGISTRO is None:
+                _REGISTRO = RegistroModelos()
+    return _REGISTRO
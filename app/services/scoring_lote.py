@@ -0,0 +1,317 @@
+"""
+SCORING_LOTE.PY - Scoring vectorizado de muchos solicitantes
+=============================================================
+
+Pre-scoring de listas de leads de aliados: en lugar de llamar a
+ScoringService.calcular_scoring fila por fila, cada criterio se evalúa
+sobre la columna completa con NumPy, usando las tablas del
+CompiledScoringModel:
+
+1. Cada columna se factoriza (np.unique): la conversión a número y las
+   claves de selección se calculan una vez por valor distinto, con las
+   mismas funciones del cálculo escalar
+2. Criterios numéricos: np.searchsorted sobre los límites de TablaRangos
+   y np.take sobre los puntajes de cada punto / intervalo
+3. Factores de rechazo: máscaras por factor; gana el primero que aplica
+4. Score, normalización, nivel y aprobación como operaciones de arreglos;
+   el redondeo final usa round() de Python sobre los valores distintos
+
+El resultado es idéntico al de calcular_scoring para cada fila
+(benchmarks/bench_scoring_lote.py lo verifica).
+
+NumPy está en requirements.txt; se importa solo aquí, así que el resto de
+la app sigue funcionando sin él.
+
+Uso:
+    from app.services.scoring_lote import calcular_scoring_lote, leer_columnas
+
+    resultado = calcular_scoring_lote(servicio.modelo, leer_columnas("leads.csv"))
+    resultado.score, resultado.aprobado, resultado.fila(0)
+"""
+
+import csv
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .modelo_scoring import parsear_numero
+
+
+def _requerir_numpy():
+    if np is None:
+        raise RuntimeError("El scoring por lotes requiere NumPy (pip install numpy)")
+
+
+# ============================================================================
+# ENTRADA COLUMNAR
+# ============================================================================
+
+def leer_columnas(ruta):
+    """
+    Lee un CSV (con encabezado), JSONL o arreglo JSON como dict de columnas.
+
+    Las celdas que faltan quedan en None (el criterio no se evalúa en esa
+    fila, igual que una clave ausente en calcular_scoring).
+
+    Args:
+        ruta (str | Path): Archivo .csv, .jsonl o .json
+
+    Returns:
+        dict: nombre de columna -> lista de valores
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() == ".csv":
+        with open(ruta, "r", encoding="utf-8-sig", newline="") as archivo:
+            lector = csv.DictReader(archivo)
+            columnas = {nombre: [] for nombre in lector.fieldnames or ()}
+            for fila in lector:
+                for nombre, lista in columnas.items():
+                    lista.append(fila.get(nombre))
+        return columnas
+
+    from carga_masiva import leer_registros
+
+    columnas = {}
+    n = 0
+    for registro in leer_registros(ruta):
+        for nombre, valor in registro.items():
+            lista = columnas.get(nombre)
+            if lista is None:
+                lista = columnas[nombre] = [None] * n
+            lista.append(valor)
+        n += 1
+        for lista in columnas.values():
+            if len(lista) < n:
+                lista.append(None)
+    return columnas
+
+
+class _Columna:
+    """
+    Columna factorizada: valores distintos (objetos de Python), índice de
+    cada fila en `unicos` y máscara de filas con valor (no None).
+    """
+
+    __slots__ = ("unicos", "inverso", "presente", "enteros")
+
+    def __init__(self, valores):
+        self.enteros = None
+        if isinstance(valores, np.ndarray) and valores.dtype.kind in "iu":
+            # float(int) es exactamente lo que hace parsear_numero
+            self.enteros = valores
+            self.presente = np.ones(len(valores), dtype=bool)
+            unicos, self.inverso = np.unique(valores, return_inverse=True)
+            self.unicos = unicos.tolist()
+            return
+
+        if isinstance(valores, np.ndarray) and valores.dtype.kind in "fU":
+            if valores.dtype.kind == "f":
+                # Por patrón de bits: 0.0 y -0.0 tienen distinto str()
+                valores = valores.astype(np.float64)
+                unicos, self.inverso = np.unique(valores.view(np.int64), return_inverse=True)
+                unicos = unicos.view(np.float64)
+            else:
+                unicos, self.inverso = np.unique(valores, return_inverse=True)
+            self.presente = np.ones(len(valores), dtype=bool)
+            self.unicos = unicos.tolist()
+            return
+
+        # Listas y arreglos de objetos: todo el cálculo escalar depende solo
+        # de str(valor), así que se factoriza por texto
+        if isinstance(valores, np.ndarray):
+            valores = valores.tolist()
+        self.presente = np.fromiter((v is not None for v in valores), dtype=bool, count=len(valores))
+        textos = np.array(["" if v is None else (v if type(v) is str else str(v)) for v in valores], dtype=str)
+        unicos, self.inverso = np.unique(textos, return_inverse=True)
+        self.unicos = unicos.tolist()
+
+    def mapear(self, funcion, dtype=float):
+        """Aplica `funcion` a cada valor distinto y lo expande a las filas."""
+        return np.array([funcion(v) for v in self.unicos], dtype=dtype).take(self.inverso)
+
+
+# ============================================================================
+# TABLAS DE RANGOS COMO ARREGLOS
+# ============================================================================
+
+class _TablaVectorizada:
+    """TablaRangos con los resultados convertidos por `convertir` a un arreglo."""
+
+    __slots__ = ("puntos", "en_punto", "en_intervalo", "defecto")
+
+    def __init__(self, tabla, convertir, dtype=float):
+        self.puntos = np.array(tabla.puntos, dtype=float)
+        self.en_punto = np.array([convertir(r) for r in tabla.en_punto], dtype=dtype)
+        self.en_intervalo = np.array([convertir(r) for r in tabla.en_intervalo], dtype=dtype)
+        self.defecto = convertir(tabla.defecto)
+
+    def buscar(self, x):
+        """Mismo resultado que TablaRangos.buscar para cada elemento de x."""
+        n = len(self.puntos)
+        i = np.searchsorted(self.puntos, x, side="left")
+        if n:
+            cercano = np.minimum(i, n - 1)
+            en_punto = (i < n) & (self.puntos.take(cercano) == x)
+            resultado = np.where(en_punto, self.en_punto.take(cercano), self.en_intervalo.take(i))
+        else:
+            resultado = self.en_intervalo.take(i)
+        return np.where(np.isnan(x), self.defecto, resultado)
+
+
+def _parsear_rechazo(valor):
+    try:
+        return float(str(valor).replace(",", "."))
+    except (ValueError, TypeError):
+        return np.nan
+
+
+# ============================================================================
+# RESULTADO
+# ============================================================================
+
+class ResultadoLote:
+    """
+    Resultado columnar del scoring de un lote.
+
+    Attributes:
+        score, score_normalizado: float64, redondeados a 2 decimales
+        nivel: nombre del nivel de riesgo (arreglo de objetos)
+        aprobado, rechazo_automatico: bool
+        factor_rechazo: criterio del primer factor que aplicó o None
+        desglose: código -> puntaje por fila (NaN si el valor faltaba),
+                  solo si se pidió
+    """
+
+    __slots__ = ("score", "score_normalizado", "nivel", "aprobado",
+                 "rechazo_automatico", "factor_rechazo", "desglose")
+
+    def __init__(self, score, score_normalizado, nivel, aprobado,
+                 rechazo_automatico, factor_rechazo, desglose):
+        self.score = score
+        self.score_normalizado = score_normalizado
+        self.nivel = nivel
+        self.aprobado = aprobado
+        self.rechazo_automatico = rechazo_automatico
+        self.factor_rechazo = factor_rechazo
+        self.desglose = desglose
+
+    def __len__(self):
+        return len(self.score)
+
+    def fila(self, i):
+        """Resultado de la fila i como dict de valores de Python."""
+        fila = {
+            "score": float(self.score[i]),
+            "score_normalizado": float(self.score_normalizado[i]),
+            "nivel": self.nivel[i],
+            "aprobado": bool(self.aprobado[i]),
+            "rechazo_automatico": bool(self.rechazo_automatico[i]),
+            "factor_rechazo": self.factor_rechazo[i],
+        }
+        if self.desglose is not None:
+            fila["desglose"] = {codigo: float(p[i]) for codigo, p in self.desglose.items()}
+        return fila
+
+
+# ============================================================================
+# CÁLCULO
+# ============================================================================
+
+def _redondear(x):
+    """round(x, 2) de Python (no np.round, que difiere en algunos decimales)."""
+    unicos, inverso = np.unique(x, return_inverse=True)
+    return np.array([round(v, 2) for v in unicos.tolist()], dtype=float).take(inverso)
+
+
+def calcular_scoring_lote(modelo, columnas, desglose=False):
+    """
+    Scoring de todas las filas de `columnas` con un modelo compilado.
+
+    Args:
+        modelo (CompiledScoringModel): Modelo de la línea a evaluar
+        columnas (dict): código -> secuencia o arreglo de valores (todas
+                         del mismo largo); None = sin valor en esa fila
+        desglose (bool): Incluir el puntaje de cada criterio por fila
+
+    Returns:
+        ResultadoLote
+    """
+    _requerir_numpy()
+
+    largos = {len(valores) for valores in columnas.values()}
+    if len(largos) > 1:
+        raise ValueError(f"Las columnas tienen largos distintos: {sorted(largos)}")
+    n = largos.pop() if largos else 0
+
+    factorizadas = {}
+
+    def columna(codigo):
+        if codigo not in factorizadas:
+            factorizadas[codigo] = _Columna(columnas[codigo])
+        return factorizadas[codigo]
+
+    # 1. Factores de rechazo: el primero (en orden) que aplica
+    indice_rechazo = np.full(n, -1, dtype=np.int64)
+    for posicion, factor in enumerate(modelo.rechazos):
+        if factor.criterio not in columnas:
+            continue
+        col = columna(factor.criterio)
+        valor = col.mapear(_parsear_rechazo)
+        with np.errstate(invalid="ignore"):
+            aplica = factor.comparar(valor, factor.umbral) & col.presente
+        indice_rechazo[(indice_rechazo < 0) & aplica] = posicion
+    rechazo = indice_rechazo >= 0
+
+    # 2. Criterios, en el mismo orden de suma que el cálculo escalar
+    score_total = np.zeros(n)
+    peso_total = np.zeros(n)
+    maximo_total = np.zeros(n)
+    puntajes = {} if desglose else None
+
+    for criterio in modelo.criterios:
+        if criterio.codigo not in columnas:
+            continue
+        col = columna(criterio.codigo)
+
+        if criterio.tipo == "numerico":
+            if col.enteros is not None:
+                valor = col.enteros.astype(float)
+            else:
+                valor = col.mapear(parsear_numero)
+            puntaje = _TablaVectorizada(criterio.tabla, lambda r: r[0]).buscar(valor)
+        else:
+            puntaje = col.mapear(lambda v: criterio.evaluar(v)[0])
+
+        presente = col.presente
+        score_total += np.where(presente, puntaje * criterio.factor, 0.0)
+        peso_total += np.where(presente, criterio.peso, 0)
+        maximo_total += np.where(presente, criterio.maximo_ponderado, 0.0)
+        if puntajes is not None:
+            puntajes[criterio.codigo] = np.where(presente, puntaje, np.nan)
+
+    # 3. Normalización: min(escala, max(0, x)) con la semántica de Python
+    escala_max = modelo.escala_max
+    denominador = maximo_total if modelo.por_maximo else peso_total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalizado = np.where(denominador > 0, (score_total / denominador) * escala_max, 0.0)
+    normalizado = np.where(normalizado > 0, normalizado, 0.0)
+    normalizado = np.where(normalizado < escala_max, normalizado, float(escala_max))
+
+    # 4. Nivel y aprobación sobre el score sin redondear
+    niveles = _TablaVectorizada(modelo.niveles, lambda detalle: detalle["nombre"], dtype=object)
+    nivel = niveles.buscar(normalizado)
+    aprobado = ~rechazo & (normalizado >= modelo.puntaje_minimo)
+
+    criterios_rechazo = np.array([None] + [f.criterio for f in modelo.rechazos], dtype=object)
+    return ResultadoLote(
+        score=_redondear(score_total),
+        score_normalizado=_redondear(normalizado),
+        nivel=nivel,
+        aprobado=aprobado,
+        rechazo_automatico=rechazo,
+        factor_rechazo=criterios_rechazo.take(indice_rechazo + 1),
+        desglose=puntajes,
+    )
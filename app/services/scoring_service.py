@@ -6,11 +6,27 @@ SCORING_SERVICE.PY - Servicio de cálculo de scoring de crédito
 import json
 from datetime import datetime
 
+from .modelo_scoring import CompiledScoringModel, CriterioCompilado
+from .motor_scoring import criterio_desde_bd, obtener_motor_scoring
+
+
+# tipo_campo que CriterioCompilado evalúa tal cual
+TIPOS_CAMPO = ("numerico", "seleccion", "booleano")
+
 
 class ScoringService:
     """
     Servicio para cálculos de scoring de crédito.
     Centraliza toda la lógica de evaluación de riesgo crediticio.
+
+    La configuración se compila en un CompiledScoringModel (self.modelo);
+    las que vienen de la base son la entrada del motor de scoring para la
+    línea (el mismo modelo que POST /scoring y el backtest).
+    calcular_scoring evalúa contra el modelo.
+
+    Tras cargar_config, self.config es de solo lectura y self.criterios es
+    una tupla de criterios con 'codigo' (formato de config_desde_bd), no
+    un dict por código.
     """
     
     def __init__(self, scoring_config=None):
@@ -26,33 +42,23 @@ class ScoringService:
         self.factores_rechazo = self.config.get("factores_rechazo_automatico", [])
         self.puntaje_minimo = self.config.get("puntaje_minimo_aprobacion", 17)
         self.escala_max = self.config.get("escala_max", 100)
+        self.modelo = CompiledScoringModel(self.config)
     
     def cargar_config(self, linea_credito=None):
         """
         Carga la configuración de scoring desde la base de datos.
-        
+
+        La configuración (convertida con config_desde_bd) y su modelo
+        compilado son la entrada del motor de scoring para la línea, que
+        solo vuelve a leer la base cuando cambia la versión de scoring o
+        de configuración. La configuración es compartida y de solo
+        lectura; para modificarla, copiarla con db_helpers.descongelar.
+
         Args:
             linea_credito: Nombre de la línea de crédito (opcional)
         """
-        import sys
-        from pathlib import Path
-        BASE_DIR = Path(__file__).parent.parent.parent.resolve()
-        if str(BASE_DIR) not in sys.path:
-            sys.path.insert(0, str(BASE_DIR))
-        
-        from db_helpers import cargar_scoring
-        from db_helpers_scoring_linea import cargar_scoring_por_linea
-        
-        if linea_credito:
-            # Intentar cargar configuración específica de la línea
-            config_linea = cargar_scoring_por_linea(linea_credito)
-            if config_linea:
-                self.config = config_linea
-            else:
-                self.config = cargar_scoring()
-        else:
-            self.config = cargar_scoring()
-        
+        self.modelo, _origen, self.config = obtener_motor_scoring().entrada_para(linea_credito)
+
         # Actualizar referencias
         self.criterios = self.config.get("criterios", {})
         self.niveles_riesgo = self.config.get("niveles_riesgo", [])
@@ -64,6 +70,10 @@ class ScoringService:
         """
         Evalúa un criterio individual.
         
+        Usa el mismo CriterioCompilado que calcular_scoring; un criterio
+        en el formato guardado en la base ('puntos', tipo_campo 'number',
+        'select'...) se convierte antes con criterio_desde_bd.
+        
         Args:
             codigo: Código del criterio
             valor: Valor a evaluar
@@ -75,53 +85,18 @@ class ScoringService:
         if not criterio_config.get("activo", True):
             return {"puntaje": 0, "evaluado": False}
         
-        peso = criterio_config.get("peso", 5)
-        rangos = criterio_config.get("rangos", [])
-        tipo_campo = criterio_config.get("tipo_campo", "numerico")
-        
-        puntaje = 0
-        detalle = ""
-        
-        # Convertir valor según tipo
-        if tipo_campo == "numerico":
-            try:
-                valor_num = float(str(valor).replace(",", ".").replace("$", "").replace(".", ""))
-            except (ValueError, TypeError):
-                valor_num = 0
-            
-            # Buscar rango que aplica
-            for rango in rangos:
-                min_val = rango.get("min", float("-inf"))
-                max_val = rango.get("max", float("inf"))
-                
-                if min_val <= valor_num <= max_val:
-                    puntaje = rango.get("puntaje", 0)
-                    detalle = rango.get("descripcion", "")
-                    break
-        
-        elif tipo_campo == "seleccion":
-            # Buscar opción seleccionada
-            for rango in rangos:
-                if str(rango.get("valor", "")).lower() == str(valor).lower():
-                    puntaje = rango.get("puntaje", 0)
-                    detalle = rango.get("descripcion", "")
-                    break
+        rangos = criterio_config.get("rangos", ())
+        if (criterio_config.get("tipo_campo", "numerico") not in TIPOS_CAMPO
+                or any("puntos" in rango for rango in rangos)):
+            criterio_config = criterio_desde_bd(codigo, criterio_config)
         
-        elif tipo_campo == "booleano":
-            valor_bool = str(valor).lower() in ["true", "1", "si", "sí", "yes"]
-            for rango in rangos:
-                if rango.get("valor") == valor_bool:
-                    puntaje = rango.get("puntaje", 0)
-                    detalle = rango.get("descripcion", "")
-                    break
-        
-        # Aplicar peso
-        puntaje_ponderado = puntaje * (peso / 100.0)
+        criterio = CriterioCompilado(codigo, criterio_config)
+        puntaje, detalle = criterio.evaluar(valor)
         
         return {
             "puntaje": puntaje,
-            "puntaje_ponderado": puntaje_ponderado,
-            "peso": peso,
+            "puntaje_ponderado": puntaje * criterio.factor,
+            "peso": criterio.peso,
             "detalle": detalle,
             "evaluado": True,
             "valor_original": valor
@@ -137,47 +112,7 @@ class ScoringService:
         Returns:
             dict: {rechazo: bool, razon: str, factor: str}
         """
-        for factor in self.factores_rechazo:
-            criterio = factor.get("criterio")
-            operador = factor.get("operador", "<")
-            umbral = factor.get("valor", 0)
-            mensaje = factor.get("mensaje", "Rechazo automático")
-            
-            if criterio not in valores:
-                continue
-            
-            valor = valores[criterio]
-            
-            # Convertir a número si es posible
-            try:
-                valor_num = float(str(valor).replace(",", "."))
-                umbral_num = float(umbral)
-            except (ValueError, TypeError):
-                continue
-            
-            # Evaluar condición
-            rechazado = False
-            if operador == "<" and valor_num < umbral_num:
-                rechazado = True
-            elif operador == "<=" and valor_num <= umbral_num:
-                rechazado = True
-            elif operador == ">" and valor_num > umbral_num:
-                rechazado = True
-            elif operador == ">=" and valor_num >= umbral_num:
-                rechazado = True
-            elif operador == "==" and valor_num == umbral_num:
-                rechazado = True
-            
-            if rechazado:
-                return {
-                    "rechazo": True,
-                    "razon": mensaje,
-                    "factor": criterio,
-                    "valor": valor,
-                    "umbral": umbral
-                }
-        
-        return {"rechazo": False, "razon": None, "factor": None}
+        return self.modelo.verificar_rechazo(valores)
     
     def determinar_nivel_riesgo(self, score):
         """
@@ -189,28 +124,7 @@ class ScoringService:
         Returns:
             dict: Info del nivel de riesgo
         """
-        for nivel in self.niveles_riesgo:
-            min_score = nivel.get("min", 0)
-            max_score = nivel.get("max", 100)
-            
-            if min_score <= score <= max_score:
-                return {
-                    "nombre": nivel.get("nombre", "Sin clasificar"),
-                    "color": nivel.get("color", "#808080"),
-                    "tasa_ea": nivel.get("tasa_ea"),
-                    "tasa_nominal_mensual": nivel.get("tasa_nominal_mensual"),
-                    "aval_porcentaje": nivel.get("aval_porcentaje"),
-                    "min": min_score,
-                    "max": max_score
-                }
-        
-        return {
-            "nombre": "Sin clasificar",
-            "color": "#808080",
-            "tasa_ea": None,
-            "tasa_nominal_mensual": None,
-            "aval_porcentaje": None
-        }
+        return self.modelo.nivel(score)
     
     def calcular_scoring(self, valores, linea_credito=None):
         """
@@ -227,61 +141,27 @@ class ScoringService:
         if linea_credito or not self.criterios:
             self.cargar_config(linea_credito)
         
-        # 1. Verificar rechazo automático
-        rechazo = self.verificar_rechazo_automatico(valores)
-        
-        # 2. Evaluar todos los criterios
-        evaluaciones = []
-        score_total = 0
-        peso_total = 0
+        return self.modelo.calcular(valores)
+    
+    def calcular_scoring_lote(self, columnas, linea_credito=None, desglose=False):
+        """
+        Calcula el scoring de muchos solicitantes a la vez (requiere NumPy).
         
-        for codigo, config in self.criterios.items():
-            if not config.get("activo", True):
-                continue
-            
-            valor = valores.get(codigo)
-            if valor is None:
-                continue
-            
-            resultado = self.evaluar_criterio(codigo, valor, config)
+        Args:
+            columnas: Dict código -> valores por fila, o ruta a un CSV/JSONL
+            linea_credito: Línea de crédito (opcional)
+            desglose: Incluir el puntaje de cada criterio por fila
             
-            if resultado["evaluado"]:
-                evaluaciones.append({
-                    "codigo": codigo,
-                    "nombre": config.get("nombre", codigo),
-                    "valor": valor,
-                    "puntaje": resultado["puntaje"],
-                    "peso": resultado["peso"],
-                    "detalle": resultado["detalle"]
-                })
-                
-                score_total += resultado["puntaje_ponderado"]
-                peso_total += resultado["peso"]
-        
-        # 3. Normalizar score
-        if peso_total > 0:
-            score_normalizado = (score_total / peso_total) * self.escala_max
-        else:
-            score_normalizado = 0
-        
-        score_normalizado = min(self.escala_max, max(0, score_normalizado))
+        Returns:
+            ResultadoLote: score, nivel, aprobado... como arreglos, con el
+                           mismo resultado que calcular_scoring por fila
+        """
+        from .scoring_lote import calcular_scoring_lote, leer_columnas
         
-        # 4. Determinar nivel de riesgo
-        nivel = self.determinar_nivel_riesgo(score_normalizado)
+        if linea_credito or not self.criterios:
+            self.cargar_config(linea_credito)
         
-        # 5. Determinar si está aprobado
-        aprobado = not rechazo["rechazo"] and score_normalizado >= self.puntaje_minimo
+        if not isinstance(columnas, dict):
+            columnas = leer_columnas(columnas)
         
-        return {
-            "score": round(score_total, 2),
-            "score_normalizado": round(score_normalizado, 2),
-            "nivel": nivel["nombre"],
-            "nivel_detalle": nivel,
-            "aprobado": aprobado,
-            "rechazo_automatico": rechazo["rechazo"],
-            "razon_rechazo": rechazo["razon"],
-            "factor_rechazo": rechazo["factor"],
-            "criterios_evaluados": evaluaciones,
-            "puntaje_minimo": self.puntaje_minimo,
-            "escala_max": self.escala_max
-        }
+        return calcular_scoring_lote(self.modelo, columnas, desglose=desglose)
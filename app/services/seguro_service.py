@@ -31,9 +31,9 @@ class SeguroService:
         if str(BASE_DIR) not in sys.path:
             sys.path.insert(0, str(BASE_DIR))
         
-        from db_helpers import cargar_configuracion
+        from db_helpers import obtener_snapshot_configuracion
         
-        config = cargar_configuracion()
+        config = obtener_snapshot_configuracion()
         seguros = config.get("SEGUROS", {})
         self.tabla_seguros = seguros.get("SEGURO_VIDA", [])
     
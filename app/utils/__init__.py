@@ -7,7 +7,10 @@ from .timezone import (
     obtener_hora_colombia,
     obtener_hora_colombia_naive,
     formatear_fecha_colombia,
-    parsear_timestamp_naive
+    parsear_timestamp_naive,
+    inicio_periodo_colombia,
+    fin_periodo_colombia,
+    colombia_a_utc_sql
 )
 
 from .formatting import (
@@ -42,12 +45,23 @@ from .backup import (
 
 from .logging import log_db_operation
 
+from .cache_http import (
+    respuesta_condicional,
+    validador_versiones,
+    validador_sesion,
+    omitir_validador,
+    obtener_estadisticas_condicionales
+)
+
 __all__ = [
     # Timezone
     'obtener_hora_colombia',
     'obtener_hora_colombia_naive',
     'formatear_fecha_colombia',
     'parsear_timestamp_naive',
+    'inicio_periodo_colombia',
+    'fin_periodo_colombia',
+    'colombia_a_utc_sql',
     # Formatting
     'formatear_monto',
     'formatear_con_miles',
@@ -64,6 +78,12 @@ __all__ = [
     'recuperar_desde_backup_mas_reciente',
     # Logging
     'log_db_operation',
+    # Cache HTTP (GET condicional)
+    'respuesta_condicional',
+    'validador_versiones',
+    'validador_sesion',
+    'omitir_validador',
+    'obtener_estadisticas_condicionales',
     # Finance
     'calcular_cuota',
     'calcular_edad_desde_fecha',
@@ -0,0 +1,168 @@
+"""
+CACHE_HTTP.PY - GET condicional (ETag / Last-Modified) por versión de datos
+===========================================================================
+
+Los endpoints que cada pestaña abierta consulta periódicamente (badges,
+cambios de casos, estado de sesión) y la página del dashboard recalculaban
+todo en cada poll aunque nada hubiera cambiado. Aquí la respuesta se valida
+contra un token barato:
+
+1. La vista declara un validador: una función que retorna (token,
+   ultima_modificacion) o None. El token sale de los contadores de
+   version_datos / version_asesor (una consulta por PK, ver
+   database.obtener_versiones) más los datos de sesión que cambian la
+   respuesta (usuario, rol, ...)
+2. El ETag (débil) es un hash del endpoint y el token
+3. Si el If-None-Match del navegador coincide, se responde 304 sin
+   ejecutar la vista (ninguna de sus consultas)
+4. Si no, se ejecuta la vista y la respuesta 200 lleva ETag, Last-Modified
+   y Cache-Control: private, no-cache (el navegador la guarda pero la
+   revalida en cada uso)
+
+Last-Modified es informativo: la validación se hace solo con el ETag,
+porque la resolución de un segundo de fecha_modificacion no distingue dos
+escrituras en el mismo segundo y el token incluye datos que no son fechas.
+
+Uso:
+    from app.utils.cache_http import respuesta_condicional, validador_versiones
+
+    @bp.route("/api/contador")
+    @api_login_required
+    @respuesta_condicional(lambda: validador_versiones(asesor=session.get("username")))
+    def contador():
+        ...
+"""
+
+import hashlib
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+
+
+CACHE_CONTROL_CONDICIONAL = "private, no-cache"
+
+_lock = threading.Lock()
+_stats = {
+    "validadas": 0,        # Requests con validador (ETag calculado)
+    "no_modificado": 0,    # Respondidas con 304 sin ejecutar la vista
+    "completas": 0,        # Vista ejecutada (sin If-None-Match o con cambios)
+    "sin_validador": 0,    # Sin token (base sin migrar, flashes pendientes, no GET)
+}
+
+
+def _contar(clave):
+    with _lock:
+        _stats[clave] += 1
+
+
+def _fecha_http(fecha_sql):
+    """'YYYY-MM-DD HH:MM:SS' (UTC, CURRENT_TIMESTAMP de SQLite) -> datetime aware."""
+    if not fecha_sql:
+        return None
+    try:
+        return datetime.strptime(fecha_sql[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def validador_sesion(*extra):
+    """
+    Validador que solo depende de la sesión (usuario, rol, nombre) y de
+    los valores `extra`; no consulta la base.
+
+    Returns:
+        tuple: (token, None)
+    """
+    partes = [session.get("autorizado"), session.get("username"), session.get("rol"),
+              session.get("nombre_completo")]
+    return repr(partes + list(extra)), None
+
+
+def validador_versiones(conjuntos=(), asesor=None, *extra):
+    """
+    Validador a partir de los contadores de versión de la base.
+
+    Args:
+        conjuntos (iterable | None): Contadores de version_datos (None = todos)
+        asesor (str, optional): Incluye el contador version_asesor del asesor
+        *extra: Otros valores que cambian la respuesta (fecha, tema...)
+
+    Returns:
+        tuple | None: (token, ultima_modificacion) o None si la base no
+                      tiene los contadores (la respuesta no se valida)
+    """
+    from database import obtener_versiones
+
+    versiones, ultima = obtener_versiones(conjuntos, asesor)
+    if versiones is None:
+        return None
+    token, _ = validador_sesion(*extra)
+    return f"{token}|{sorted(versiones.items())}", _fecha_http(ultima)
+
+
+def omitir_validador():
+    """
+    Llamada desde la vista: la respuesta actual no debe llevar ETag (p. ej.
+    un dashboard con resultados parciales, que no debe quedar en el cache
+    del navegador hasta el siguiente cambio de datos).
+    """
+    g._loansi_sin_validador = True
+
+
+def _calcular_etag(token):
+    resumen = hashlib.sha1(f"{request.endpoint}|{token}".encode("utf-8")).hexdigest()
+    return resumen[:24]
+
+
+def respuesta_condicional(calcular_validador):
+    """
+    Decorador de GET condicional. Debe ir después de los decoradores de
+    autenticación (el validador asume una sesión válida).
+
+    Args:
+        calcular_validador (callable): Sin argumentos; retorna
+            (token, ultima_modificacion) o None para no validar
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Con mensajes flash pendientes la página los consume al renderizar
+            if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+                _contar("sin_validador")
+                return vista(*args, **kwargs)
+
+            validador = calcular_validador()
+            if validador is None:
+                _contar("sin_validador")
+                return vista(*args, **kwargs)
+
+            token, ultima_modificacion = validador
+            etag = _calcular_etag(token)
+            _contar("validadas")
+
+            if request.if_none_match.contains_weak(etag):
+                _contar("no_modificado")
+                respuesta = current_app.response_class(status=304)
+            else:
+                _contar("completas")
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200 or g.pop("_loansi_sin_validador", False):
+                    return respuesta
+
+            respuesta.set_etag(etag, weak=True)
+            if ultima_modificacion is not None:
+                respuesta.last_modified = ultima_modificacion
+            respuesta.headers["Cache-Control"] = CACHE_CONTROL_CONDICIONAL
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def obtener_estadisticas_condicionales():
+    """Contadores de requests validadas, 304 y vistas ejecutadas."""
+    with _lock:
+        stats = dict(_stats)
+    stats["tasa_304"] = round(stats["no_modificado"] / stats["validadas"], 3) if stats["validadas"] else 0.0
+    return stats
@@ -84,3 +84,41 @@ def parsear_timestamp_naive(timestamp_str):
     except Exception:
         # Si falla, retornar fecha actual
         return obtener_hora_colombia_naive()
+
+
+def inicio_periodo_colombia(periodo="dia", referencia=None):
+    """
+    Retorna el inicio (naive, hora Colombia) del día, la semana (lunes)
+    o el mes que contiene `referencia` (por defecto, ahora).
+    Usado para armar rangos semiabiertos [inicio, fin) en SQL
+    """
+    referencia = referencia or obtener_hora_colombia_naive()
+    inicio = referencia.replace(hour=0, minute=0, second=0, microsecond=0)
+    if periodo == "semana":
+        inicio -= timedelta(days=inicio.weekday())
+    elif periodo == "mes":
+        inicio = inicio.replace(day=1)
+    elif periodo != "dia":
+        raise ValueError(f"Periodo no soportado: {periodo}")
+    return inicio
+
+
+def fin_periodo_colombia(periodo="dia", referencia=None):
+    """
+    Retorna el inicio del periodo SIGUIENTE (límite exclusivo del rango).
+    """
+    inicio = inicio_periodo_colombia(periodo, referencia)
+    if periodo == "dia":
+        return inicio + timedelta(days=1)
+    if periodo == "semana":
+        return inicio + timedelta(days=7)
+    return (inicio + timedelta(days=32)).replace(day=1)
+
+
+def colombia_a_utc_sql(fecha):
+    """
+    Convierte un datetime naive en hora Colombia al formato de
+    CURRENT_TIMESTAMP de SQLite ('YYYY-MM-DD HH:MM:SS' en UTC).
+    Usado para comparar contra columnas fecha_creacion
+    """
+    return (fecha + timedelta(hours=5)).strftime("%Y-%m-%d %H:%M:%S")
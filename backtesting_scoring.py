@@ -0,0 +1,622 @@
+"""
+BACKTESTING_SCORING.PY - Re-scoring histórico con configuraciones borrador
+==========================================================================
+
+Antes de publicar un cambio en los criterios, pesos o niveles de riesgo
+de una línea, vuelve a puntuar las evaluaciones guardadas con la
+configuración borrador y compara contra el resultado guardado:
+
+- tasa de aprobación guardada vs borrador y decisiones que cambian
+- matriz de migración de niveles (nivel guardado -> nivel borrador)
+- histogramas del score normalizado y de la diferencia borrador - guardado
+
+La tabla no se carga en memoria: se recorre por rangos de id (PK) de
+TAMANO_BLOQUE ids. Cada rango lo lee y puntúa un proceso del pool con su
+propia conexión de solo lectura y devuelve solo los agregados del rango
+(ResumenBacktest), que el proceso principal va combinando.
+
+- Valores: valores_criterios o, si no está, el 'valor' de cada elemento
+  de criterios_evaluados. Las filas sin valores no se puntúan.
+- Resultado guardado: columnas derivadas score_normalizado,
+  nivel_resultado y aprobado. Las filas sin score guardado no se comparan.
+- Borrador: formato guardado (cargar_scoring_por_linea / cargar_scoring);
+  las claves que no trae se toman de la configuración vigente de la línea.
+  Se puntúa con el mismo cálculo que POST /scoring (config_desde_bd).
+- Con NumPy cada bloque se puntúa con calcular_scoring_lote; sin NumPy,
+  fila por fila con el mismo resultado.
+
+Uso:
+    python -m backtesting_scoring --linea LoansiFlex --borrador borrador.json
+    python -m backtesting_scoring --linea LoansiFlex --borrador borrador.json --procesos 4 --desde 2026-01-01 --json resultado.json
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+TAMANO_BLOQUE = 5000        # Ids por tarea del pool
+MAX_PROCESOS = os.cpu_count() or 1
+MAX_LIMITE_API = 100000      # Evaluaciones máximas por POST /api/scoring/backtest (síncrono)
+ANCHO_BIN_SCORE = 10        # Puntos por barra del histograma de score
+ANCHO_BIN_DELTA = 5         # Puntos por barra del histograma de diferencias
+SIN_NIVEL = "Sin nivel"
+
+# PRAGMAs de database.PRAGMAS_CONEXION que aplican a una conexión mode=ro
+_PRAGMAS_LECTURA = {"busy_timeout", "cache_size", "mmap_size", "temp_store"}
+
+_LINEA_SQL = "COALESCE(NULLIF(linea_credito, ''), tipo_credito)"
+
+
+# ============================================================================
+# AGREGADOS
+# ============================================================================
+
+class ResumenBacktest:
+    """
+    Agregados combinables de un backtest (por bloque o totales).
+
+    Solo guarda contadores, sumas e histogramas: su tamaño no depende del
+    número de filas.
+    """
+
+    __slots__ = (
+        "filas", "sin_valores", "sin_resultado", "comparadas",
+        "aprobadas_guardado", "aprobadas_borrador",
+        "aprobada_a_rechazada", "rechazada_a_aprobada",
+        "migracion", "hist_guardado", "hist_borrador", "hist_delta",
+        "delta_suma", "delta_cuadrados", "delta_min", "delta_max",
+    )
+
+    def __init__(self):
+        self.filas = 0
+        self.sin_valores = 0
+        self.sin_resultado = 0
+        self.comparadas = 0
+        self.aprobadas_guardado = 0
+        self.aprobadas_borrador = 0
+        self.aprobada_a_rechazada = 0
+        self.rechazada_a_aprobada = 0
+        self.migracion = {}      # (nivel guardado, nivel borrador) -> filas
+        self.hist_guardado = {}  # barra -> filas
+        self.hist_borrador = {}
+        self.hist_delta = {}
+        self.delta_suma = 0.0
+        self.delta_cuadrados = 0.0
+        self.delta_min = None
+        self.delta_max = None
+
+    def agregar(self, score_guardado, nivel_guardado, aprobado_guardado,
+                score, nivel, aprobado):
+        """Suma una fila comparada (resultado guardado vs borrador)."""
+        self.comparadas += 1
+        aprobado_guardado = bool(aprobado_guardado)
+        if aprobado_guardado:
+            self.aprobadas_guardado += 1
+        if aprobado:
+            self.aprobadas_borrador += 1
+            if not aprobado_guardado:
+                self.rechazada_a_aprobada += 1
+        elif aprobado_guardado:
+            self.aprobada_a_rechazada += 1
+
+        clave = (nivel_guardado or SIN_NIVEL, nivel or SIN_NIVEL)
+        self.migracion[clave] = self.migracion.get(clave, 0) + 1
+
+        barra = math.floor(score_guardado / ANCHO_BIN_SCORE)
+        self.hist_guardado[barra] = self.hist_guardado.get(barra, 0) + 1
+        barra = math.floor(score / ANCHO_BIN_SCORE)
+        self.hist_borrador[barra] = self.hist_borrador.get(barra, 0) + 1
+
+        delta = score - score_guardado
+        barra = math.floor(delta / ANCHO_BIN_DELTA)
+        self.hist_delta[barra] = self.hist_delta.get(barra, 0) + 1
+        self.delta_suma += delta
+        self.delta_cuadrados += delta * delta
+        if self.delta_min is None or delta < self.delta_min:
+            self.delta_min = delta
+        if self.delta_max is None or delta > self.delta_max:
+            self.delta_max = delta
+
+    def combinar(self, otro):
+        """Suma los agregados de `otro` (p. ej. el de un bloque) a este."""
+        for campo in ("filas", "sin_valores", "sin_resultado", "comparadas",
+                      "aprobadas_guardado", "aprobadas_borrador",
+                      "aprobada_a_rechazada", "rechazada_a_aprobada",
+                      "delta_suma", "delta_cuadrados"):
+            setattr(self, campo, getattr(self, campo) + getattr(otro, campo))
+        for campo in ("migracion", "hist_guardado", "hist_borrador", "hist_delta"):
+            propio = getattr(self, campo)
+            for clave, filas in getattr(otro, campo).items():
+                propio[clave] = propio.get(clave, 0) + filas
+        if otro.delta_min is not None:
+            self.delta_min = otro.delta_min if self.delta_min is None else min(self.delta_min, otro.delta_min)
+            self.delta_max = otro.delta_max if self.delta_max is None else max(self.delta_max, otro.delta_max)
+
+    def como_dict(self, niveles=()):
+        """
+        Resumen serializable a JSON.
+
+        Args:
+            niveles (iterable): Nombres de nivel del borrador, en orden, para
+                                ordenar la matriz (los demás van al final)
+        """
+        n = self.comparadas
+
+        def tasa(aprobadas):
+            return round(aprobadas / n * 100, 2) if n else 0
+
+        promedio = self.delta_suma / n if n else 0
+        varianza = max(0.0, self.delta_cuadrados / n - promedio * promedio) if n else 0
+
+        orden = list(dict.fromkeys(niveles))
+        for guardado, borrador in sorted(self.migracion):
+            for nivel in (guardado, borrador):
+                if nivel not in orden:
+                    orden.append(nivel)
+        filas_matriz = [nivel for nivel in orden if any(g == nivel for g, _ in self.migracion)]
+        columnas_matriz = [nivel for nivel in orden if any(b == nivel for _, b in self.migracion)]
+
+        barras = sorted(set(self.hist_guardado) | set(self.hist_borrador))
+        return {
+            "filas": self.filas,
+            "evaluadas": n,
+            "sin_valores": self.sin_valores,
+            "sin_resultado": self.sin_resultado,
+            "aprobacion": {
+                "guardado": {"aprobadas": self.aprobadas_guardado, "tasa": tasa(self.aprobadas_guardado)},
+                "borrador": {"aprobadas": self.aprobadas_borrador, "tasa": tasa(self.aprobadas_borrador)},
+                "diferencia_pp": round(tasa(self.aprobadas_borrador) - tasa(self.aprobadas_guardado), 2),
+                "aprobada_a_rechazada": self.aprobada_a_rechazada,
+                "rechazada_a_aprobada": self.rechazada_a_aprobada,
+            },
+            "migracion_niveles": {
+                "guardado": filas_matriz,
+                "borrador": columnas_matriz,
+                "matriz": [
+                    [self.migracion.get((guardado, borrador), 0) for borrador in columnas_matriz]
+                    for guardado in filas_matriz
+                ],
+            },
+            "distribucion_score": [
+                {
+                    "desde": barra * ANCHO_BIN_SCORE,
+                    "hasta": (barra + 1) * ANCHO_BIN_SCORE,
+                    "guardado": self.hist_guardado.get(barra, 0),
+                    "borrador": self.hist_borrador.get(barra, 0),
+                    "diferencia": self.hist_borrador.get(barra, 0) - self.hist_guardado.get(barra, 0),
+                }
+                for barra in barras
+            ],
+            "delta_score": {
+                "promedio": round(promedio, 4),
+                "desviacion": round(math.sqrt(varianza), 4),
+                "minimo": round(self.delta_min, 4) if self.delta_min is not None else None,
+                "maximo": round(self.delta_max, 4) if self.delta_max is not None else None,
+                "histograma": [
+                    {"desde": barra * ANCHO_BIN_DELTA, "hasta": (barra + 1) * ANCHO_BIN_DELTA, "filas": filas}
+                    for barra, filas in sorted(self.hist_delta.items())
+                ],
+            },
+        }
+
+
+# ============================================================================
+# TRABAJO POR BLOQUE
+# ============================================================================
+
+# Estado de cada proceso del pool (ver _inicializar_trabajador)
+_MODELO = None
+_RUTA_DB = None
+_VECTORIZADO = True
+_CONEXION = None
+
+
+def _inicializar_trabajador(ruta_db, config_modelo, vectorizado):
+    """Initializer del pool: compila el modelo una vez por proceso."""
+    global _MODELO, _RUTA_DB, _VECTORIZADO
+    from app.services.modelo_scoring import CompiledScoringModel
+
+    _MODELO = CompiledScoringModel(config_modelo)
+    _RUTA_DB = ruta_db
+    _VECTORIZADO = vectorizado
+
+
+def _conexion_lectura(ruta_db):
+    """Conexión mode=ro con los PRAGMAs de lectura de database.PRAGMAS_CONEXION."""
+    from database import PRAGMAS_CONEXION
+
+    conn = sqlite3.connect(f"{Path(ruta_db).as_uri()}?mode=ro", uri=True, timeout=5.0)
+    for pragma, valor in PRAGMAS_CONEXION:
+        if pragma in _PRAGMAS_LECTURA:
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+    return conn
+
+
+def _valores_fila(valores_criterios, criterios_evaluados):
+    """Valores de una evaluación guardada (dict código -> valor) o None."""
+    try:
+        if valores_criterios:
+            valores = json.loads(valores_criterios)
+            if isinstance(valores, dict) and valores:
+                return valores
+        if criterios_evaluados:
+            evaluados = json.loads(criterios_evaluados)
+            if isinstance(evaluados, list):
+                valores = {
+                    criterio["codigo"]: criterio["valor"]
+                    for criterio in evaluados
+                    if isinstance(criterio, dict) and "codigo" in criterio and criterio.get("valor") is not None
+                }
+                return valores or None
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def _puntuar(modelo, lista_valores, vectorizado):
+    """(scores normalizados, niveles, aprobados) de cada dict de valores."""
+    if vectorizado:
+        from app.services.scoring_lote import calcular_scoring_lote, np
+
+        if np is not None:
+            columnas = {
+                codigo: [valores.get(codigo) for valores in lista_valores]
+                for codigo in modelo.codigos_entrada
+                if any(codigo in valores for valores in lista_valores)
+            }
+            # Sin ninguna columna del modelo el lote no tendría filas
+            if columnas:
+                lote = calcular_scoring_lote(modelo, columnas)
+                return lote.score_normalizado.tolist(), lote.nivel.tolist(), lote.aprobado.tolist()
+
+    scores, niveles, aprobados = [], [], []
+    for valores in lista_valores:
+        resultado = modelo.calcular(valores)
+        scores.append(resultado["score_normalizado"])
+        niveles.append(resultado["nivel"])
+        aprobados.append(resultado["aprobado"])
+    return scores, niveles, aprobados
+
+
+def puntuar_bloque(conn, modelo, vectorizado, id_desde, id_hasta, filtros_sql="", params=()):
+    """
+    Puntúa con `modelo` las evaluaciones con id en (id_desde, id_hasta].
+
+    Returns:
+        ResumenBacktest: Agregados del bloque
+    """
+    filas = conn.execute(
+        f"""
+        SELECT valores_criterios, criterios_evaluados,
+               score_normalizado, nivel_resultado, aprobado
+        FROM evaluaciones
+        WHERE id > ? AND id <= ?{filtros_sql}
+        """,
+        (id_desde, id_hasta, *params),
+    ).fetchall()
+
+    resumen = ResumenBacktest()
+    lista_valores, guardados = [], []
+    for valores_criterios, criterios_evaluados, score, nivel, aprobado in filas:
+        resumen.filas += 1
+        valores = _valores_fila(valores_criterios, criterios_evaluados)
+        if valores is None:
+            resumen.sin_valores += 1
+        elif score is None:
+            resumen.sin_resultado += 1
+        else:
+            lista_valores.append(valores)
+            guardados.append((score, nivel, aprobado))
+
+    if lista_valores:
+        scores, niveles, aprobados = _puntuar(modelo, lista_valores, vectorizado)
+        for (score_g, nivel_g, aprobado_g), score, nivel, aprobado in zip(guardados, scores, niveles, aprobados):
+            resumen.agregar(score_g, nivel_g, aprobado_g, score, nivel, aprobado)
+    return resumen
+
+
+def _procesar_bloque(id_desde, id_hasta, filtros_sql, params):
+    """Tarea del pool: puntuar_bloque con el modelo y la conexión del proceso."""
+    global _CONEXION
+    if _CONEXION is None:
+        _CONEXION = _conexion_lectura(_RUTA_DB)
+    return puntuar_bloque(_CONEXION, _MODELO, _VECTORIZADO, id_desde, id_hasta, filtros_sql, params)
+
+
+# ============================================================================
+# BACKTEST
+# ============================================================================
+
+def _filtros(linea_credito, desde, hasta):
+    partes, params = [], []
+    if linea_credito:
+        partes.append(f"{_LINEA_SQL} = ?")
+        params.append(linea_credito)
+    if desde:
+        partes.append("timestamp >= ?")
+        params.append(desde)
+    if hasta:
+        # Inclusivo: 'YYYY-MM-DD' cubre todo ese día
+        partes.append("substr(timestamp, 1, 10) <= ?")
+        params.append(hasta)
+    return "".join(f" AND {parte}" for parte in partes), tuple(params)
+
+
+def config_borrador(borrador, linea_credito=None):
+    """
+    Configuración completa del borrador en el formato de
+    CompiledScoringModel: las claves que no trae se toman de la
+    configuración vigente de la línea (o la global).
+
+    Raises:
+        ValueError: Si el borrador no es un dict o queda sin criterios o
+                    sin niveles de riesgo
+    """
+    from app.services.motor_scoring import config_desde_bd
+    from db_helpers import cargar_scoring
+    from db_helpers_scoring_linea import cargar_scoring_por_linea
+
+    if not isinstance(borrador, dict):
+        raise ValueError("El borrador debe ser un objeto JSON")
+
+    base = (cargar_scoring_por_linea(linea_credito) if linea_credito else None) or cargar_scoring()
+    return _validar_config(config_desde_bd({**base, **borrador}, linea_credito))
+
+
+def _validar_config(config):
+    """La configuración, si tiene criterios activos y niveles de riesgo."""
+    if not any(criterio.get("activo", True) for criterio in config["criterios"]):
+        raise ValueError("El borrador no tiene criterios activos")
+    if not config["niveles_riesgo"]:
+        raise ValueError("El borrador no tiene niveles de riesgo")
+    return config
+
+
+def _rango_ids(conn, filtros_sql, params, limite):
+    """(id_desde exclusivo, id_hasta inclusivo) de las filas a evaluar."""
+    id_min, id_max = conn.execute(
+        f"SELECT MIN(id), MAX(id) FROM evaluaciones WHERE 1 = 1{filtros_sql}", params
+    ).fetchone()
+    if id_min is None:
+        return 0, 0
+    id_desde = id_min - 1
+    if limite:
+        # Las `limite` evaluaciones más recientes
+        fila = conn.execute(
+            f"SELECT id FROM evaluaciones WHERE 1 = 1{filtros_sql} ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (*params, limite),
+        ).fetchone()
+        if fila is not None:
+            id_desde = fila[0]
+    return id_desde, id_max
+
+
+def ejecutar_backtest(borrador, linea_credito=None, desde=None, hasta=None, limite=None,
+                      procesos=None, tamano_bloque=TAMANO_BLOQUE, vectorizado=True,
+                      progreso=None):
+    """
+    Re-puntúa las evaluaciones guardadas con una configuración borrador.
+
+    Args:
+        borrador (dict): Configuración borrador (formato guardado, parcial;
+                         {} = la vigente, con el modelo del motor)
+        linea_credito (str, optional): Línea a evaluar (None = todas)
+        desde, hasta (str, optional): 'YYYY-MM-DD' sobre timestamp (inclusivos)
+        limite (int, optional): Solo las N evaluaciones más recientes
+        procesos (int, optional): Procesos del pool (None = MAX_PROCESOS;
+                                  1 = en este proceso)
+        tamano_bloque (int): Ids por tarea
+        vectorizado (bool): Usar calcular_scoring_lote si hay NumPy
+        progreso (callable, optional): progreso(filas, evaluadas, segundos)
+                                       tras cada bloque
+
+    Returns:
+        dict: success, parámetros, segundos, evaluaciones_por_segundo y el
+              resumen (ver ResumenBacktest.como_dict)
+
+    Raises:
+        ValueError: Borrador inválido
+    """
+    import database
+    from app.services.modelo_scoring import CompiledScoringModel
+    from app.services.motor_scoring import obtener_motor_scoring
+    from db_helpers import descongelar
+
+    inicio = time.perf_counter()
+    if borrador == {}:
+        # Configuración vigente: el modelo compilado del motor para la
+        # línea, el mismo que usan POST /scoring y ScoringService
+        modelo, _origen, config = obtener_motor_scoring().entrada_para(linea_credito)
+        _validar_config(config)
+    else:
+        config = config_borrador(borrador, linea_credito)
+        modelo = None
+    procesos = max(1, min(int(procesos or MAX_PROCESOS), MAX_PROCESOS * 4))
+    ruta_db = str(Path(database.DB_PATH).resolve())
+    filtros_sql, params = _filtros(linea_credito, desde, hasta)
+
+    conn = _conexion_lectura(ruta_db)
+    try:
+        id_desde, id_hasta = _rango_ids(conn, filtros_sql, params, limite)
+    finally:
+        conn.close()
+
+    rangos = (
+        (inicio_rango, min(inicio_rango + tamano_bloque, id_hasta), filtros_sql, params)
+        for inicio_rango in range(id_desde, id_hasta, tamano_bloque)
+    )
+    total = ResumenBacktest()
+
+    def sumar(resumen):
+        total.combinar(resumen)
+        if progreso:
+            progreso(total.filas, total.comparadas, time.perf_counter() - inicio)
+
+    if procesos == 1:
+        # En este proceso (p. ej. un request): modelo y conexión propios,
+        # no los globales de los trabajadores del pool
+        modelo = modelo or CompiledScoringModel(config)
+        conn = _conexion_lectura(ruta_db)
+        try:
+            for rango in rangos:
+                sumar(puntuar_bloque(conn, modelo, vectorizado, *rango))
+        finally:
+            conn.close()
+    else:
+        # spawn: no hereda hilos ni conexiones abiertas del proceso web
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_trabajador,
+            # Copia mutable: la configuración del registro no se serializa
+            initargs=(ruta_db, descongelar(config), vectorizado),
+        ) as pool:
+            pendientes = set()
+            for rango in rangos:
+                # Como mucho 2 bloques en cola por proceso
+                if len(pendientes) >= procesos * 2:
+                    listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in listos:
+                        sumar(futuro.result())
+                pendientes.add(pool.submit(_procesar_bloque, *rango))
+            for futuro in pendientes:
+                sumar(futuro.result())
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "success": True,
+        "linea_credito": linea_credito,
+        "desde": desde,
+        "hasta": hasta,
+        "limite": limite,
+        "procesos": procesos,
+        "segundos": round(segundos, 3),
+        "evaluaciones_por_segundo": round(total.comparadas / segundos) if segundos else 0,
+        "borrador": {
+            "criterios": len(config["criterios"]),
+            "factores_rechazo": len(config["factores_rechazo_automatico"]),
+            "niveles": [nivel.get("nombre") for nivel in config["niveles_riesgo"]],
+            "puntaje_minimo_aprobacion": config["puntaje_minimo_aprobacion"],
+        },
+        **total.como_dict(nivel.get("nombre") for nivel in config["niveles_riesgo"]),
+    }
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _imprimir_resultado(resultado):
+    aprobacion = resultado["aprobacion"]
+    print(
+        f"📊 Backtest {resultado['linea_credito'] or 'todas las líneas'}: "
+        f"{resultado['filas']:,} filas | {resultado['evaluadas']:,} evaluadas | "
+        f"{resultado['sin_valores']:,} sin valores | {resultado['sin_resultado']:,} sin resultado | "
+        f"{resultado['segundos']}s ({resultado['evaluaciones_por_segundo']:,} eval/s, "
+        f"{resultado['procesos']} procesos)"
+    )
+    print(
+        f"   Aprobación: guardado {aprobacion['guardado']['tasa']}% -> borrador "
+        f"{aprobacion['borrador']['tasa']}% ({aprobacion['diferencia_pp']:+} pp) | "
+        f"{aprobacion['aprobada_a_rechazada']:,} aprobadas→rechazadas | "
+        f"{aprobacion['rechazada_a_aprobada']:,} rechazadas→aprobadas"
+    )
+    delta = resultado["delta_score"]
+    print(
+        f"   Score normalizado (borrador - guardado): promedio {delta['promedio']:+} | "
+        f"desviación {delta['desviacion']} | mín {delta['minimo']} | máx {delta['maximo']}"
+    )
+
+    migracion = resultado["migracion_niveles"]
+    if migracion["matriz"]:
+        ancho = max(len(nivel) for nivel in migracion["guardado"] + migracion["borrador"] + ["guardado \\ borrador"])
+        print("\n   Migración de niveles")
+        print("   " + "guardado \\ borrador".ljust(ancho) + "".join(f"{n:>{ancho + 2}}" for n in migracion["borrador"]))
+        for nivel, fila in zip(migracion["guardado"], migracion["matriz"]):
+            print("   " + nivel.ljust(ancho) + "".join(f"{filas:>{ancho + 2},}" for filas in fila))
+
+    print("\n   Distribución del score normalizado")
+    for barra in resultado["distribucion_score"]:
+        print(
+            f"   [{barra['desde']:>4}, {barra['hasta']:>4})  guardado {barra['guardado']:>10,}  "
+            f"borrador {barra['borrador']:>10,}  ({barra['diferencia']:+,})"
+        )
+
+
+def _imprimir_progreso(filas, evaluadas, segundos):
+    velocidad = evaluadas / segundos if segundos else 0
+    print(f"   🔄 {filas:,} leídas | {evaluadas:,} evaluadas | {velocidad:,.0f} eval/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backtesting_scoring",
+        description="Re-puntúa evaluaciones guardadas con una configuración de scoring borrador",
+    )
+    parser.add_argument("--borrador", type=Path, required=True,
+                        help="JSON con la configuración borrador (formato guardado, puede ser parcial)")
+    parser.add_argument("--linea", default=None, help="Línea de crédito (por defecto todas)")
+    parser.add_argument("--desde", default=None, help="Fecha inicial YYYY-MM-DD")
+    parser.add_argument("--hasta", default=None, help="Fecha final YYYY-MM-DD (inclusiva)")
+    parser.add_argument("--limite", type=int, default=None, help="Solo las N evaluaciones más recientes")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help=f"Procesos del pool (por defecto {MAX_PROCESOS})")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="Ids por tarea")
+    parser.add_argument("--sin-numpy", action="store_true", help="Puntuar fila por fila")
+    parser.add_argument("--json", type=Path, default=None, help="Guardar el resultado completo en este archivo")
+    parser.add_argument("--silencioso", action="store_true", help="No mostrar el progreso por bloque")
+    args = parser.parse_args(argv)
+
+    if not args.borrador.exists():
+        parser.error(f"No existe el archivo: {args.borrador}")
+
+    from database import aplicar_migraciones
+
+    # Las columnas derivadas (score_normalizado, nivel_resultado...) deben existir
+    aplicar_migraciones()
+
+    with open(args.borrador, "r", encoding="utf-8") as archivo:
+        borrador = json.load(archivo)
+
+    try:
+        resultado = ejecutar_backtest(
+            borrador,
+            linea_credito=args.linea,
+            desde=args.desde,
+            hasta=args.hasta,
+            limite=args.limite,
+            procesos=args.procesos,
+            tamano_bloque=args.bloque,
+            vectorizado=not args.sin_numpy,
+            progreso=None if args.silencioso else _imprimir_progreso,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    _imprimir_resultado(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+        print(f"\n✅ Resultado guardado en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+BENCH_ACTIVIDAD_DIARIA.PY - Costo de los dashboards vs tamaño del historial
+===========================================================================
+
+Sobre una COPIA temporal de loansi.db agrega historial sintético por tandas
+(evaluaciones y simulaciones repartidas en los mismos 90 días y asesores) y
+tras cada tanda mide obtener_estadisticas_por_rol() para cada rol.
+
+Con actividad_diaria el tiempo debe quedar prácticamente plano: crece con
+los días y asesores mostrados, no con las filas de evaluaciones (los
+pendientes de comité y las respuestas no vistas crecen solo con lo que está
+pendiente, que aquí son los casos de los últimos 3 días). Al final
+verifica que el rollup mantenido por los triggers coincide con una
+reconstrucción completa.
+
+Uso:
+    python benchmarks/bench_actividad_diaria.py
+    python benchmarks/bench_actividad_diaria.py --tandas 4 --filas 100000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+def _agregar_historial(conn, filas, desplazamiento, rnd):
+    """Inserta `filas` evaluaciones y simulaciones en los últimos 90 días."""
+    asesores = [row[0] for row in conn.execute(
+        "SELECT username FROM usuarios WHERE activo = 1"
+    ).fetchall()]
+    lineas = [row[0] for row in conn.execute("SELECT nombre FROM lineas_credito").fetchall()]
+    ahora = datetime.now()
+
+    evaluaciones, simulaciones = [], []
+    for n in range(filas):
+        asesor = rnd.choice(asesores)
+        linea = rnd.choice(lineas)
+        dias = rnd.randint(0, 90)
+        fecha = ahora - timedelta(days=dias, minutes=rnd.randint(0, 1440))
+        # El comité decide y el asesor revisa en pocos días: solo los casos
+        # recientes quedan pendientes o sin ver
+        estado = rnd.choice([None, 'pending' if dias < 3 else 'approved', 'rejected'])
+        evaluaciones.append((
+            f"bench-ad-{desplazamiento + n}", asesor, linea, estado,
+            fecha.strftime('%Y-%m-%d %H:%M:%S'), rnd.randint(1, 50) * 100000, int(dias >= 3),
+        ))
+        simulaciones.append((
+            f"{fecha.isoformat()}-{desplazamiento + n}", asesor, linea, rnd.randint(1, 50) * 100000,
+        ))
+
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, tipo_credito, resultado, estado_comite, "
+        "fecha_creacion, monto_solicitado, visto_por_asesor) VALUES (?, ?, ?, '{}', ?, ?, ?, ?)",
+        evaluaciones,
+    )
+    conn.executemany(
+        "INSERT INTO simulaciones (timestamp, asesor, linea_credito, monto, plazo) "
+        "VALUES (?, ?, ?, ?, 12)",
+        simulaciones,
+    )
+    conn.commit()
+
+
+def _usuarios_por_rol():
+    conn = database.conectar_db()
+    try:
+        usuarios = {}
+        for rol, username in conn.execute(
+            "SELECT u.rol, u.username FROM usuarios u "
+            "LEFT JOIN user_assignments ua ON ua.manager_username = u.username AND ua.activo = 1 "
+            "WHERE u.activo = 1 GROUP BY u.username ORDER BY COUNT(ua.id) DESC"
+        ).fetchall():
+            usuarios.setdefault(rol, username)
+        return usuarios
+    finally:
+        conn.close()
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def _contenido_actividad(conn):
+    return conn.execute(
+        "SELECT * FROM actividad_diaria "
+        "WHERE evaluaciones OR simulaciones OR decisiones_aprobadas OR decisiones_rechazadas "
+        "ORDER BY asesor, fecha, linea"
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboards vs tamaño del historial")
+    parser.add_argument("--tandas", type=int, default=3)
+    parser.add_argument("--filas", type=int, default=50000,
+                        help="Evaluaciones (y simulaciones) agregadas por tanda")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+
+        from db_helpers_dashboard import obtener_estadisticas_por_rol
+
+        usuarios = _usuarios_por_rol()
+        roles = sorted(usuarios)
+        rnd = random.Random(12)
+
+        print(f"{'evaluaciones':>13} {'filas rollup':>13} " + " ".join(f"{rol[:12]:>12}" for rol in roles))
+        for tanda in range(args.tandas + 1):
+            if tanda:
+                conn = database.conectar_db()
+                try:
+                    _agregar_historial(conn, args.filas, tanda * args.filas, rnd)
+                finally:
+                    conn.close()
+
+            conn = database.conectar_db()
+            try:
+                total = conn.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+                rollup = conn.execute("SELECT COUNT(*) FROM actividad_diaria").fetchone()[0]
+            finally:
+                conn.close()
+
+            tiempos = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for rol in roles:
+                    tiempos.append(_medir(
+                        lambda: obtener_estadisticas_por_rol(rol, usuarios[rol]), args.repeticiones
+                    ))
+            print(f"{total:>13} {rollup:>13} " + " ".join(f"{t:>10.2f}ms" for t in tiempos))
+
+        # Verificación: lo mantenido por triggers == reconstrucción completa
+        conn = database.conectar_db()
+        try:
+            incremental = _contenido_actividad(conn)
+        finally:
+            conn.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.reconstruir_actividad_diaria()
+            from db_writer import detener_escritor
+            detener_escritor()
+        conn = database.conectar_db()
+        try:
+            reconstruido = _contenido_actividad(conn)
+        finally:
+            conn.close()
+        database.cerrar_pool_conexiones()
+
+    if [tuple(r) for r in incremental] != [tuple(r) for r in reconstruido]:
+        print("❌ actividad_diaria difiere de la reconstrucción completa")
+        return 1
+    print("✅ actividad_diaria coincide con la reconstrucción completa")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+BENCH_ARBOL_GERENTE.PY - Árbol del gerente: consulta por nodo vs WITH RECURSIVE
+===============================================================================
+
+Sobre una COPIA temporal de loansi.db agrega una jerarquía sintética de
+varios niveles (--ramas 10 20 30: 10 hijos del gerente, 20 por cada uno,
+30 por cada uno de esos), evaluaciones para todos (algunas desembolsadas),
+un asesor compartido por dos supervisores y mide:
+
+- antes:   recorrido en Python con una consulta de hijos y una de métricas
+           por nodo (como armaban el árbol obtener_jerarquia_gerente y
+           obtener_estadisticas_gerente)
+- después: obtener_arbol_estadisticas(), una sola sentencia
+
+Verifica que los subtotales de cada nodo coinciden con la suma de las
+métricas de los usuarios distintos de su subárbol, y que una asignación
+circular no hace crecer el árbol.
+
+Uso:
+    python benchmarks/bench_arbol_gerente.py
+    python benchmarks/bench_arbol_gerente.py --ramas 5 10 10 20 --evaluaciones 10
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+GERENTE = "bench_arbol_ger"
+METRICAS = ('evaluaciones', 'aprobadas', 'pendientes', 'desembolsados', 'monto_desembolsado')
+
+
+def _poblar(conn, ramas, evaluaciones_por_usuario):
+    rnd = random.Random(15)
+    ahora = datetime.now()
+    usuarios = [(GERENTE, 'gerente')]
+    aristas = []
+    nivel = [GERENTE]
+    for profundidad, hijos in enumerate(ramas, start=1):
+        rol = 'asesor' if profundidad == len(ramas) else 'supervisor'
+        siguiente = []
+        for padre in nivel:
+            for h in range(hijos):
+                hijo = f"{padre}_{h}" if padre != GERENTE else f"bench_arbol_{h}"
+                usuarios.append((hijo, rol))
+                aristas.append((padre, hijo))
+                siguiente.append(hijo)
+        nivel = siguiente
+    # Asesor compartido: cuelga de dos supervisores del primer nivel
+    if len(ramas) > 1 and ramas[0] > 1:
+        aristas.append(("bench_arbol_1", nivel[0]))
+
+    evaluaciones = []
+    for username, _rol in usuarios:
+        for n in range(evaluaciones_por_usuario):
+            estado = rnd.choice([None, 'pending', 'approved', 'rejected'])
+            final = rnd.choice([None, 'desembolsado']) if estado == 'approved' else None
+            fecha = ahora - timedelta(days=rnd.randint(0, 90))
+            evaluaciones.append((
+                f"{username}-{n}", username, estado, final, rnd.randint(1, 50) * 100000,
+                fecha.strftime('%Y-%m-%d %H:%M:%S'),
+            ))
+
+    conn.executemany(
+        "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', ?, ?)",
+        [(u, rol, u.replace('_', ' ').title()) for u, rol in usuarios],
+    )
+    conn.executemany(
+        "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+        aristas,
+    )
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, estado_final, "
+        "monto_solicitado, fecha_creacion) VALUES (?, ?, '{}', ?, ?, ?, ?)",
+        evaluaciones,
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return len(usuarios)
+
+
+def _arbol_por_nodo(raiz):
+    """Implementación por nodo: hijos y métricas con una consulta cada uno."""
+    conn = database.conectar_db()
+    try:
+        def nodo(username, camino):
+            fila = conn.execute("""
+                SELECT COUNT(*),
+                       COALESCE(SUM(estado_comite = 'approved'), 0),
+                       COALESCE(SUM(estado_comite = 'pending'), 0),
+                       COALESCE(SUM(estado_final = 'desembolsado'), 0),
+                       COALESCE(SUM(CASE WHEN estado_final = 'desembolsado' THEN monto_solicitado END), 0)
+                FROM evaluaciones WHERE asesor = ?
+            """, (username,)).fetchone()
+            hijos = conn.execute("""
+                SELECT ua.member_username FROM user_assignments ua
+                LEFT JOIN usuarios u ON u.username = ua.member_username
+                WHERE ua.manager_username = ? AND ua.activo = 1
+                ORDER BY COALESCE(u.nombre_completo, ''), ua.member_username
+            """, (username,)).fetchall()
+            return {
+                'username': username,
+                'propias': dict(zip(METRICAS, fila)),
+                'subordinados': [
+                    nodo(hijo, camino | {hijo}) for (hijo,) in hijos if hijo not in camino
+                ],
+            }
+        return nodo(raiz, {raiz})
+    finally:
+        conn.close()
+
+
+def _usuarios_subarbol(nodo, acumulado):
+    acumulado[nodo['username']] = nodo['propias']
+    for hijo in nodo['subordinados']:
+        _usuarios_subarbol(hijo, acumulado)
+    return acumulado
+
+
+def _verificar(nuevo, referencia, errores):
+    """Propias == referencia y totales == suma de usuarios distintos del subárbol."""
+    if nuevo['username'] != referencia['username'] or nuevo['propias'] != referencia['propias']:
+        errores.append(f"{nuevo['username']}: métricas propias distintas")
+    subarbol = _usuarios_subarbol(referencia, {})
+    esperado = {m: sum(p[m] for p in subarbol.values()) for m in METRICAS}
+    esperado['usuarios'] = len(subarbol)
+    if nuevo['totales'] != esperado:
+        errores.append(f"{nuevo['username']}: totales {nuevo['totales']} != {esperado}")
+    if len(nuevo['subordinados']) != len(referencia['subordinados']):
+        errores.append(f"{nuevo['username']}: hijos distintos")
+    for hijo_nuevo, hijo_ref in zip(nuevo['subordinados'], referencia['subordinados']):
+        _verificar(hijo_nuevo, hijo_ref, errores)
+
+
+def _contar_nodos(nodo):
+    return 1 + sum(_contar_nodos(hijo) for hijo in nodo['subordinados'])
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del árbol con subtotales")
+    parser.add_argument("--ramas", type=int, nargs="+", default=[10, 20, 30],
+                        help="Hijos por nodo en cada nivel")
+    parser.add_argument("--evaluaciones", type=int, default=5,
+                        help="Evaluaciones por usuario")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+        conn = database.conectar_db()
+        try:
+            total_usuarios = _poblar(conn, args.ramas, args.evaluaciones)
+        finally:
+            conn.close()
+
+        from db_helpers_dashboard import obtener_arbol_estadisticas, obtener_jerarquia_gerente
+
+        nuevo = obtener_arbol_estadisticas(GERENTE)
+        referencia = _arbol_por_nodo(GERENTE)
+        errores = []
+        _verificar(nuevo, referencia, errores)
+        if errores:
+            print("❌ El árbol difiere de la implementación por nodo:")
+            for error in errores[:10]:
+                print(f"   {error}")
+            return 1
+
+        nodos = _contar_nodos(nuevo)
+        antes = _medir(lambda: _arbol_por_nodo(GERENTE), args.repeticiones)
+        despues = _medir(lambda: obtener_arbol_estadisticas(GERENTE), args.repeticiones)
+        jerarquia = _medir(lambda: obtener_jerarquia_gerente(GERENTE), args.repeticiones)
+        print(f"Usuarios: {total_usuarios}  nodos del árbol: {nodos}  niveles: {len(args.ramas)}")
+        print(f"  por nodo ({nodos * 2} consultas): {antes:>9.2f} ms")
+        print(f"  WITH RECURSIVE (1 consulta): {despues:>9.2f} ms  ({antes / despues:.1f}x)")
+        print(f"  obtener_jerarquia_gerente:   {jerarquia:>9.2f} ms")
+
+        # Ciclo: la hoja más profunda pasa a "supervisar" al gerente
+        hoja = nuevo
+        while hoja['subordinados']:
+            hoja = hoja['subordinados'][-1]
+        conn = database.conectar_db()
+        try:
+            conn.execute(
+                "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+                (hoja['username'], GERENTE),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        con_ciclo = obtener_arbol_estadisticas(GERENTE)
+        database.cerrar_pool_conexiones()
+
+    if con_ciclo is None or _contar_nodos(con_ciclo) != nodos or con_ciclo['totales'] != nuevo['totales']:
+        print("❌ La asignación circular cambió el árbol")
+        return 1
+    print(f"✅ Subtotales == implementación por nodo; el ciclo {hoja['username']} -> {GERENTE} se corta")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
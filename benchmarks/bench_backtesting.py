@@ -0,0 +1,216 @@
+"""
+BENCH_BACKTESTING.PY - Re-scoring histórico con una configuración borrador
+===========================================================================
+
+Crea sobre una COPIA temporal de loansi.db N evaluaciones sintéticas de una
+línea (1M por defecto) con valores_criterios y el resultado que da el
+motor de scoring vigente, y ejecuta backtesting_scoring.ejecutar_backtest
+con un borrador que cambia el puntaje mínimo, dos pesos y los niveles:
+
+- por fila:    CompiledScoringModel.calcular fila por fila, 1 proceso
+- vectorizado: calcular_scoring_lote por bloque, 1 proceso
+- pool:        vectorizado con --procesos procesos (spawn)
+
+Reporta evaluaciones/s de cada modo y el pico de memoria Python
+(tracemalloc) de un backtest en un proceso sobre el 10% y el 100% de las
+filas: debe ser el mismo, solo depende del tamaño de bloque. No se usa el
+RSS porque incluye las páginas del archivo mapeadas por SQLite (mmap_size).
+
+Verifica además que los tres modos den el mismo resumen y que un borrador
+vacío (la configuración vigente) no cambie ninguna decisión.
+
+Uso:
+    python benchmarks/bench_backtesting.py
+    python benchmarks/bench_backtesting.py --filas 200000 --procesos 4
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import random
+import tracemalloc
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+# Las filas sintéticas van antes de las evaluaciones reales de loansi.db;
+# los backtests se filtran a su rango de fechas
+INICIO = datetime(2023, 1, 1)
+SEGUNDOS_ENTRE_FILAS = 20
+
+
+def _pico_memoria_mb(funcion):
+    """Pico de memoria Python (MB) mientras corre `funcion`."""
+    tracemalloc.start()
+    try:
+        funcion()
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def _valores(rnd, config, modelo):
+    """Un rango al azar de cada criterio y un valor dentro de él."""
+    valores = {}
+    for criterio in config["criterios"]:
+        rangos = criterio.get("rangos") or ()
+        if not rangos or rnd.random() < 0.03:
+            continue  # Criterio sin diligenciar
+        rango = rnd.choice(rangos)
+        if "valor" in rango:
+            valores[criterio["codigo"]] = rango["valor"]
+        else:
+            valores[criterio["codigo"]] = str(rnd.randint(int(rango["min"]), int(rango["max"])))
+    for factor in modelo.rechazos:
+        # ~5% de las filas trae un valor cerca del umbral de cada factor
+        if factor.criterio not in valores and isinstance(factor.umbral, float) and rnd.random() < 0.05:
+            valores[factor.criterio] = str(round(factor.umbral * rnd.uniform(0.5, 1.5)))
+    return valores
+
+
+def _evaluaciones(rnd, config, modelo, linea, asesores, filas):
+    for i in range(filas):
+        valores = _valores(rnd, config, modelo)
+        resultado = modelo.calcular(valores)
+        yield {
+            "timestamp": (INICIO + timedelta(seconds=i * SEGUNDOS_ENTRE_FILAS)).isoformat(),
+            "asesor": asesores[i % len(asesores)],
+            "nombre_cliente": f"Cliente {i}",
+            "cedula": str(10_000_000 + i),
+            "linea_credito": linea,
+            "resultado": {
+                "score": resultado["score"],
+                "score_normalizado": resultado["score_normalizado"],
+                "nivel": resultado["nivel"],
+                "aprobado": resultado["aprobado"],
+                "rechazo_automatico": resultado["rechazo_automatico"],
+            },
+            "valores_criterios": valores,
+            "origen": "Manual",
+        }
+
+
+def _borrador(config):
+    """Borrador: puntaje mínimo -5, dos pesos x2 y un nivel más bajo."""
+    borrador = {
+        "puntaje_minimo_aprobacion": max(0, config.get("puntaje_minimo_aprobacion", 17) - 5),
+        "criterios": copy.deepcopy(config["criterios"]),
+        "niveles_riesgo": copy.deepcopy(config["niveles_riesgo"]),
+    }
+    for criterio in borrador["criterios"][:2]:
+        criterio["peso"] = criterio.get("peso", 5) * 2
+    minimo = min(nivel.get("min", 0) for nivel in borrador["niveles_riesgo"])
+    borrador["niveles_riesgo"].append({"nombre": "Muy alto riesgo", "min": 0, "max": minimo - 0.1})
+    return borrador
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del backtesting de configuraciones de scoring")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--linea", default="LoansiFlex")
+    parser.add_argument("--procesos", type=int, default=2)
+    parser.add_argument("--semilla", type=int, default=25)
+    args = parser.parse_args()
+    rnd = random.Random(args.semilla)
+
+    tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+    copia = Path(tmpdir) / "loansi.db"
+    shutil.copy2(database.DB_PATH, copia)
+    database.DB_PATH = copia
+
+    try:
+        # Los prints de la app se silencian para no medir la consola
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app.services.motor_scoring import obtener_motor_scoring
+            from backtesting_scoring import ejecutar_backtest
+            from db_helpers import guardar_evaluaciones_bulk
+            from db_helpers_scoring_linea import cargar_scoring_por_linea
+
+            # Migraciones: columnas derivadas y version_datos
+            database.aplicar_migraciones()
+            modelo, _ = obtener_motor_scoring().modelo_para(args.linea)
+            config = cargar_scoring_por_linea(args.linea)
+            conn = database.conectar_db()
+            try:
+                # evaluaciones.asesor referencia usuarios.username
+                asesores = [fila[0] for fila in conn.execute("SELECT username FROM usuarios")]
+            finally:
+                conn.close()
+
+            inicio = time.perf_counter()
+            carga = guardar_evaluaciones_bulk(
+                _evaluaciones(rnd, config, modelo, args.linea, asesores, args.filas), diferir_indices=True
+            )
+            segundos_carga = time.perf_counter() - inicio
+
+            borrador = _borrador(config)
+            fechas = {
+                "desde": INICIO.date().isoformat(),
+                "hasta": (INICIO + timedelta(seconds=args.filas * SEGUNDOS_ENTRE_FILAS)).date().isoformat(),
+            }
+            modos = (
+                ("por fila", {"procesos": 1, "vectorizado": False}),
+                ("vectorizado", {"procesos": 1, "vectorizado": True}),
+                (f"pool x{args.procesos}", {"procesos": args.procesos, "vectorizado": True}),
+            )
+            resultados = {}
+            for nombre, opciones in modos:
+                resultados[nombre] = ejecutar_backtest(borrador, linea_credito=args.linea, **fechas, **opciones)
+            memoria = {
+                filas: _pico_memoria_mb(lambda filas=filas: ejecutar_backtest(
+                    borrador, linea_credito=args.linea, limite=filas, procesos=1, **fechas
+                ))
+                for filas in (max(1, args.filas // 10), args.filas)
+            }
+            vigente = ejecutar_backtest({}, linea_credito=args.linea, procesos=1, **fechas)
+
+        print(f"📊 Backtest de {args.filas:,} evaluaciones sintéticas de {args.linea} "
+              f"(carga {carga['insertadas']:,} filas en {segundos_carga:.1f}s)\n")
+        for nombre, r in resultados.items():
+            print(f"{nombre:>12}: {r['segundos']:>7}s | {r['evaluaciones_por_segundo']:>9,} eval/s")
+        print("Pico de memoria Python, 1 proceso: " + " | ".join(
+            f"{filas:,} filas {mb} MB" for filas, mb in memoria.items()
+        ))
+
+        r = resultados["vectorizado"]
+        aprobacion = r["aprobacion"]
+        print(f"\nAprobación {aprobacion['guardado']['tasa']}% -> {aprobacion['borrador']['tasa']}% "
+              f"({aprobacion['diferencia_pp']:+} pp) | delta score promedio {r['delta_score']['promedio']:+}")
+        migracion = r["migracion_niveles"]
+        for nivel, fila in zip(migracion["guardado"], migracion["matriz"]):
+            print(f"   {nivel:>16} -> " + ", ".join(
+                f"{destino} {filas:,}" for destino, filas in zip(migracion["borrador"], fila) if filas
+            ))
+
+        claves = ("evaluadas", "aprobacion", "migracion_niveles", "distribucion_score")
+        iguales = all(
+            {c: resultado[c] for c in claves} == {c: r[c] for c in claves}
+            for resultado in resultados.values()
+        )
+        sin_cambios = (
+            vigente["aprobacion"]["aprobada_a_rechazada"] == 0
+            and vigente["aprobacion"]["rechazada_a_aprobada"] == 0
+            and vigente["delta_score"]["maximo"] == 0 == vigente["delta_score"]["minimo"]
+        )
+        print(f"\n{'✅' if iguales else '❌'} Mismo resumen en los tres modos")
+        print(f"{'✅' if sin_cambios else '❌'} Borrador vacío: ninguna decisión ni score cambia")
+    finally:
+        from db_writer import detener_escritor
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+BENCH_COLUMNAS_DERIVADAS.PY - json_extract vs columnas derivadas indexadas
+===========================================================================
+
+Crea una tabla evaluaciones sintética (1M filas por defecto) en un archivo
+temporal y mide las consultas típicas de dashboards/historial:
+
+- antes:   leyendo score/aprobado/decisión desde el JSON con json_extract
+- después: aplicando las columnas derivadas, su backfill y sus índices
+           (las mismas definiciones que usa la migración de database.py)
+
+Uso:
+    python benchmarks/bench_columnas_derivadas.py
+    python benchmarks/bench_columnas_derivadas.py --filas 200000 --repeticiones 5
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+CONSULTAS_ANTES = {
+    "conteo_aprobados": """
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE json_extract(resultado, '$.aprobado') = 1
+    """,
+    "score_promedio_asesor": """
+        SELECT asesor, AVG(CAST(json_extract(resultado, '$.score') AS REAL))
+        FROM evaluaciones GROUP BY asesor
+    """,
+    "historial_aprobados_pag1": """
+        SELECT id, timestamp FROM evaluaciones
+        WHERE json_extract(resultado, '$.aprobado') = 1
+        ORDER BY timestamp DESC, id DESC LIMIT 20
+    """,
+    "decisiones_del_dia": """
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE DATE(json_extract(decision_admin, '$.timestamp')) = '2025-06-15'
+    """,
+    "rechazos_automaticos": """
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE json_type(resultado, '$.rechazo_automatico') = 'text'
+    """,
+}
+
+CONSULTAS_DESPUES = {
+    "conteo_aprobados": "SELECT COUNT(*) FROM evaluaciones WHERE aprobado = 1",
+    "score_promedio_asesor": """
+        SELECT asesor, AVG(score) FROM evaluaciones GROUP BY asesor
+    """,
+    "historial_aprobados_pag1": """
+        SELECT id, timestamp FROM evaluaciones
+        WHERE aprobado = 1
+        ORDER BY timestamp DESC, id DESC LIMIT 20
+    """,
+    "decisiones_del_dia": """
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE decision_admin_fecha >= '2025-06-15' AND decision_admin_fecha < '2025-06-16'
+    """,
+    "rechazos_automaticos": "SELECT COUNT(*) FROM evaluaciones WHERE rechazo_automatico = 1",
+}
+
+
+def _poblar(conn, filas, asesores=200):
+    conn.execute("""
+        CREATE TABLE evaluaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT UNIQUE NOT NULL,
+            asesor TEXT NOT NULL,
+            resultado TEXT NOT NULL,
+            estado_comite TEXT,
+            decision_admin TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX idx_evaluaciones_asesor ON evaluaciones(asesor)")
+    conn.execute("CREATE INDEX idx_evaluaciones_ts_id ON evaluaciones(timestamp DESC, id DESC)")
+
+    rnd = random.Random(42)
+    inicio = datetime(2024, 1, 1)
+
+    def generar():
+        for i in range(filas):
+            ts = inicio + timedelta(seconds=i * 60)
+            score = round(rnd.uniform(0, 40), 1)
+            aprobado = score > 18
+            rechazo = "Mora en telcos" if rnd.random() < 0.05 else None
+            resultado = json.dumps({
+                "score": score,
+                "score_normalizado": round(score / 40 * 100, 1),
+                "nivel": "Riesgo bajo" if score > 25 else "Riesgo moderado",
+                "aprobado": aprobado,
+                "rechazo_automatico": rechazo,
+            })
+            decision = None
+            estado = None
+            if rnd.random() < 0.1:
+                estado = "approved" if aprobado else "rejected"
+                decision = json.dumps({
+                    "accion": "aprobado" if aprobado else "rechazado",
+                    "admin": "admin",
+                    "timestamp": (ts + timedelta(hours=3)).isoformat(),
+                })
+            yield (ts.isoformat(), f"asesor{i % asesores}", resultado, estado, decision)
+
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, decision_admin) "
+        "VALUES (?, ?, ?, ?, ?)",
+        generar(),
+    )
+    conn.commit()
+
+
+def _aplicar_columnas_derivadas(conn):
+    for columna, tipo, _origen, _expresion in database.COLUMNAS_DERIVADAS_EVALUACION:
+        conn.execute(f"ALTER TABLE evaluaciones ADD COLUMN {columna} {tipo}")
+    conn.execute(f"UPDATE evaluaciones SET {database._sql_set_columnas_derivadas()}")
+    for indice_sql in database.INDICES_COLUMNAS_DERIVADAS_SQL:
+        conn.execute(indice_sql)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def _medir(conn, consultas, repeticiones):
+    resultados = {}
+    for nombre, sql in consultas.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            conn.execute(sql).fetchall()
+            tiempos.append(time.perf_counter() - inicio)
+        resultados[nombre] = statistics.median(tiempos) * 1000
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de columnas derivadas")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        conn = sqlite3.connect(Path(tmpdir) / "bench.db")
+        database.aplicar_pragmas(conn)
+
+        t0 = time.perf_counter()
+        _poblar(conn, args.filas)
+        print(f"📊 {args.filas:,} filas generadas en {time.perf_counter() - t0:.1f}s")
+
+        antes = _medir(conn, CONSULTAS_ANTES, args.repeticiones)
+
+        t0 = time.perf_counter()
+        _aplicar_columnas_derivadas(conn)
+        print(f"🔨 Migración (columnas + backfill + índices): {time.perf_counter() - t0:.1f}s\n")
+
+        despues = _medir(conn, CONSULTAS_DESPUES, args.repeticiones)
+        conn.close()
+
+    print(f"{'consulta':<26} {'antes (ms)':>12} {'después (ms)':>14} {'mejora':>9}")
+    for nombre in CONSULTAS_ANTES:
+        mejora = antes[nombre] / despues[nombre] if despues[nombre] else float("inf")
+        print(f"{nombre:<26} {antes[nombre]:>12.2f} {despues[nombre]:>14.2f} {mejora:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
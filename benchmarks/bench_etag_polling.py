@@ -0,0 +1,309 @@
+"""
+BENCH_ETAG_POLLING.PY - Polling de pestañas con y sin GET condicional
+=====================================================================
+
+Sobre una COPIA temporal de loansi.db simula --pestanas pestañas abiertas
+(repartidas entre los usuarios activos más --asesores asesores sintéticos)
+que en cada ronda consultan
+/api/badge-count, /api/session-status y, las de asesores,
+/asesor/api/casos-comite/cambios; cada --dashboard-cada rondas recargan
+/dashboard. Entre rondas se hacen --escrituras cambios sobre evaluaciones
+de asesores al azar (casos vistos / decisiones de comité).
+
+- antes:   las vistas sin el decorador respuesta_condicional
+- después: las vistas con el decorador; cada pestaña reenvía el último
+           ETag en If-None-Match, como hace el navegador
+
+Antes de simular agrega --evaluaciones evaluaciones sintéticas repartidas
+entre todos los asesores (el costo de badge-count para comité crece
+con los casos pendientes). Mide el tiempo dentro de la app WSGI y cuenta las sentencias SQL por
+endpoint (trace callback de las conexiones del pool; los lotes de lectura
+corren en línea) y verifica que toda respuesta 200 de "después" coincide
+con la de "antes" para la misma pestaña y ronda.
+
+Uso:
+    python benchmarks/bench_etag_polling.py
+    python benchmarks/bench_etag_polling.py --pestanas 500 --rondas 20 --escrituras 5
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+ENDPOINTS = {
+    "/api/badge-count": "api.api_badge_count",
+    "/api/session-status": "api.api_session_status",
+    "/asesor/api/casos-comite/cambios": "asesor.verificar_cambios_casos",
+    "/dashboard": "main.dashboard",
+}
+
+_sentencias = [0]
+_segundos_servidor = [0.0]
+
+
+def _contar_sentencias(sql):
+    if not sql.lstrip().upper().startswith("PRAGMA"):
+        _sentencias[0] += 1
+
+
+def _instrumentar_conexiones():
+    """Cada conexión física nueva cuenta sus sentencias."""
+    abrir = database._abrir_conexion_fisica
+
+    def abrir_con_traza():
+        conn = abrir()
+        conn.set_trace_callback(_contar_sentencias)
+        return conn
+
+    database.cerrar_pool_conexiones()
+    database._abrir_conexion_fisica = abrir_con_traza
+
+
+def _poblar(asesores, evaluaciones):
+    """Asesores y evaluaciones sintéticas (pasan por los triggers)."""
+    rnd = random.Random(190)
+    conn = database.conectar_db()
+    try:
+        conn.executemany(
+            "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', 'asesor', ?)",
+            ((f"bench_etag{n}", f"Asesor Etag {n}") for n in range(asesores)),
+        )
+        asesores = [row[0] for row in conn.execute(
+            "SELECT username FROM usuarios WHERE rol = 'asesor' AND activo = 1"
+        )]
+        ahora = datetime.now()
+        conn.executemany(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, fecha_creacion, "
+            "monto_solicitado, visto_por_asesor) VALUES (?, ?, '{}', ?, ?, ?, ?)",
+            (
+                (f"bench-etag-{n}", rnd.choice(asesores),
+                 rnd.choices([None, "pending", "approved", "rejected"], [60, 10, 20, 10])[0],
+                 (ahora - timedelta(days=rnd.randint(0, 365))).strftime("%Y-%m-%d %H:%M:%S"),
+                 rnd.randint(1, 50) * 100000, rnd.randint(0, 1))
+                for n in range(evaluaciones)
+            ),
+        )
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def _medir_servidor(app):
+    """Acumula el tiempo dentro de la app WSGI (sin el costo del cliente de prueba)."""
+    wsgi_app = app.wsgi_app
+
+    def medida(environ, start_response):
+        inicio = time.perf_counter()
+        try:
+            return list(wsgi_app(environ, start_response))
+        finally:
+            _segundos_servidor[0] += time.perf_counter() - inicio
+
+    app.wsgi_app = medida
+
+
+def _crear_pestanas(app, cantidad):
+    conn = database.conectar_db()
+    try:
+        usuarios = conn.execute(
+            "SELECT username, rol, nombre_completo FROM usuarios WHERE activo = 1 ORDER BY username"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    pestanas = []
+    for n in range(cantidad):
+        username, rol, nombre = usuarios[n % len(usuarios)]
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion.update(autorizado=True, username=username, rol=rol, nombre_completo=nombre)
+        urls = ["/api/badge-count", "/api/session-status"]
+        if rol == "asesor":
+            urls.append("/asesor/api/casos-comite/cambios")
+        # El template del dashboard de comité falla hoy ('now' indefinido)
+        pestanas.append({"cliente": cliente, "urls": urls, "etags": {},
+                         "dashboard": rol != "comite_credito"})
+    return pestanas, [u[0] for u in usuarios if u[1] == "asesor"]
+
+
+def _escribir(rnd, asesores, cantidad):
+    """Cambios reales sobre evaluaciones (pasan por los triggers)."""
+    conn = database.conectar_db()
+    try:
+        for _ in range(cantidad):
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM evaluaciones WHERE asesor = ? ORDER BY id", (rnd.choice(asesores),)
+            )]
+            if not ids:
+                continue
+            if rnd.random() < 0.5:
+                conn.execute(
+                    "UPDATE evaluaciones SET visto_por_asesor = 1 - COALESCE(visto_por_asesor, 0) WHERE id = ?",
+                    (rnd.choice(ids),),
+                )
+            else:
+                conn.execute(
+                    "UPDATE evaluaciones SET estado_comite = ? WHERE id = ?",
+                    (rnd.choice(["pending", "approved", "rejected"]), rnd.choice(ids)),
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _simular(app, args, condicional):
+    """Corre las rondas; retorna métricas y los cuerpos 200 por (pestaña, ronda, url)."""
+    rnd = random.Random(19)
+    pestanas, asesores = _crear_pestanas(app, args.pestanas)
+    cuerpos = {}
+    metricas = {url: {"requests": 0, "304": 0, "bytes": 0, "sql": 0, "segundos": 0.0}
+                for url in ENDPOINTS}
+
+    for ronda in range(args.rondas):
+        if ronda and asesores:
+            _escribir(rnd, asesores, args.escrituras)
+        recargar = ronda % args.dashboard_cada == 0
+        for indice, pestana in enumerate(pestanas):
+            urls = pestana["urls"] + (["/dashboard"] if recargar and pestana["dashboard"] else [])
+            for url in urls:
+                cabeceras = {}
+                if condicional and url in pestana["etags"]:
+                    cabeceras["If-None-Match"] = pestana["etags"][url]
+                m = metricas[url]
+                _sentencias[0] = 0
+                _segundos_servidor[0] = 0.0
+                respuesta = pestana["cliente"].get(url, headers=cabeceras)
+                m["segundos"] += _segundos_servidor[0]
+                m["sql"] += _sentencias[0]
+                m["requests"] += 1
+                m["bytes"] += len(respuesta.data)
+                if respuesta.status_code == 304:
+                    m["304"] += 1
+                    continue
+                if respuesta.headers.get("ETag"):
+                    pestana["etags"][url] = respuesta.headers["ETag"]
+                cuerpos[(indice, ronda, url)] = respuesta.data
+    return metricas, cuerpos
+
+
+def _total(metricas):
+    return {clave: sum(m[clave] for m in metricas.values())
+            for clave in ("requests", "304", "bytes", "sql", "segundos")}
+
+
+def _sin_volatiles(cuerpo):
+    """Quita la hora del dashboard de admin (cambia entre corridas)."""
+    import re
+    return re.sub(rb"\d{2}/\d{2}/\d{4} \d{2}:\d{2}", b"", cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de GET condicional con pestañas en polling")
+    parser.add_argument("--pestanas", type=int, default=200)
+    parser.add_argument("--rondas", type=int, default=10)
+    parser.add_argument("--asesores", type=int, default=150,
+                        help="Asesores sintéticos (cada uno con su pestaña)")
+    parser.add_argument("--evaluaciones", type=int, default=20000,
+                        help="Evaluaciones sintéticas agregadas antes de simular")
+    parser.add_argument("--escrituras", type=int, default=2,
+                        help="Evaluaciones modificadas entre rondas")
+    parser.add_argument("--dashboard-cada", type=int, default=5,
+                        help="Cada cuántas rondas recargan /dashboard las pestañas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        from db_writer import detener_escritor
+
+        # Base de partida: migrada y con las evaluaciones sintéticas
+        plantilla = Path(tmpdir) / "plantilla.db"
+        shutil.copy2(database.DB_PATH, plantilla)
+        database.DB_PATH = plantilla
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+            _poblar(args.asesores, args.evaluaciones)
+            detener_escritor()
+        database.cerrar_pool_conexiones()
+        conn = sqlite3.connect(plantilla)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(plantilla, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app
+            app = create_app()
+        app.config["TESTING"] = True
+
+        import db_lectura
+        db_lectura.MAX_HILOS_LECTURA = 0  # Lotes en la conexión del request (contables)
+        _instrumentar_conexiones()
+        _medir_servidor(app)
+
+        decoradas = {endpoint: app.view_functions[endpoint] for endpoint in ENDPOINTS.values()}
+        resultados = {}
+        for nombre, condicional in (("antes", False), ("después", True)):
+            # Mismo punto de partida para los dos recorridos
+            detener_escritor()
+            database.cerrar_pool_conexiones()
+            for sufijo in ("-wal", "-shm"):
+                Path(f"{copia}{sufijo}").unlink(missing_ok=True)
+            shutil.copy2(plantilla, copia)
+            for endpoint, vista in decoradas.items():
+                app.view_functions[endpoint] = vista if condicional else vista.__wrapped__
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultados[nombre] = _simular(app, args, condicional)
+
+        db_lectura.cerrar_lectores()
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+
+    (antes, cuerpos_antes), (despues, cuerpos_despues) = resultados["antes"], resultados["después"]
+    distintos = [
+        clave for clave, cuerpo in cuerpos_despues.items()
+        if _sin_volatiles(cuerpo) != _sin_volatiles(cuerpos_antes.get(clave, b""))
+    ]
+    if distintos:
+        print(f"❌ {len(distintos)} respuestas 200 difieren del recorrido sin ETag "
+              f"(p. ej. {distintos[0]})")
+        return 1
+
+    print(f"{args.pestanas} pestañas, {args.rondas} rondas, {args.escrituras} escrituras por ronda, "
+          f"dashboard cada {args.dashboard_cada} rondas, "
+          f"+{args.asesores} asesores y {args.evaluaciones} evaluaciones")
+    print(f"{'endpoint':>34} {'':>8} {'requests':>9} {'304':>6} {'SQL':>7} {'KB':>8} "
+          f"{'tiempo (s)':>11} {'ms/request':>11}")
+    filas = [(url, antes[url], despues[url]) for url in ENDPOINTS]
+    filas.append(("total", _total(antes), _total(despues)))
+    for url, m_antes, m_despues in filas:
+        if not m_antes["requests"]:
+            continue
+        for nombre, m in (("antes", m_antes), ("después", m_despues)):
+            print(f"{url if nombre == 'antes' else '':>34} {nombre:>8} {m['requests']:>9} {m['304']:>6} "
+                  f"{m['sql']:>7} {m['bytes'] / 1024:>8.0f} {m['segundos']:>11.2f} "
+                  f"{m['segundos'] * 1000 / m['requests']:>11.3f}")
+    total_antes, total_despues = filas[-1][1], filas[-1][2]
+    print(f"Reducción total: SQL {1 - total_despues['sql'] / total_antes['sql']:.0%}, "
+          f"tiempo {1 - total_despues['segundos'] / total_antes['segundos']:.0%}, "
+          f"bytes {1 - total_despues['bytes'] / total_antes['bytes']:.0%}")
+    print("✅ Las respuestas completas coinciden con las vistas sin ETag")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
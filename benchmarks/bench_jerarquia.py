@@ -0,0 +1,227 @@
+"""
+BENCH_JERARQUIA.PY - Recorrido de user_assignments vs índice de jerarquía
+=========================================================================
+
+Sobre una COPIA temporal de loansi.db agrega una jerarquía sintética
+(gerentes -> supervisores -> asesores, más un ciclo mal asignado) y mide
+los usuarios visibles de cada manager:
+
+- antes:   get_assigned_usernames_recursive() previa (CREATE TABLE/INDEX,
+           lectura completa de user_assignments y BFS en cada llamada,
+           replicada aquí para poder comparar)
+- después: índice de jerarquía en memoria (clausura transitiva)
+
+Luego aplica altas y bajas aleatorias con add_assignment/remove_assignment
+y verifica que la clausura mantenida incrementalmente coincide con una
+reconstrucción completa y que el índice da el mismo resultado que el BFS.
+
+Uso:
+    python benchmarks/bench_jerarquia.py
+    python benchmarks/bench_jerarquia.py --gerentes 10 --supervisores 20 --asesores 50
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+def _visibles_anterior(manager_username, max_depth=5):
+    """Implementación previa: DDL + tabla completa + BFS por llamada."""
+    conn = database.conectar_db()
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_assignments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                manager_username TEXT NOT NULL,
+                member_username TEXT NOT NULL,
+                activo BOOLEAN DEFAULT 1,
+                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(manager_username, member_username)
+            )
+        """)
+        for columna in ("manager_username", "member_username", "activo"):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_assign_{columna.split('_')[0]} "
+                f"ON user_assignments({columna})"
+            )
+        conn.commit()
+        rows = conn.execute(
+            "SELECT manager_username, member_username FROM user_assignments WHERE activo = 1"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    graph = {}
+    for mgr, mem in rows:
+        graph.setdefault(mgr, set()).add(mem)
+    visited = {manager_username}
+    result = set()
+    frontier = [manager_username]
+    depth = 0
+    while frontier and depth < max_depth:
+        next_frontier = []
+        for mgr in frontier:
+            for mem in graph.get(mgr, set()):
+                if mem not in visited:
+                    visited.add(mem)
+                    result.add(mem)
+                    next_frontier.append(mem)
+        frontier = next_frontier
+        depth += 1
+    return sorted(result)
+
+
+def _poblar(conn, gerentes, supervisores, asesores):
+    usuarios, aristas = [], []
+    for g in range(gerentes):
+        gerente = f"bench_ger{g}"
+        usuarios.append((gerente, 'gerente', f"Gerente {g}"))
+        for s in range(supervisores):
+            supervisor = f"bench_sup{g}_{s}"
+            usuarios.append((supervisor, 'supervisor', f"Supervisor {g}-{s}"))
+            aristas.append((gerente, supervisor))
+            for a in range(asesores):
+                asesor = f"bench_ase{g}_{s}_{a}"
+                usuarios.append((asesor, 'asesor', f"Asesor {a}"))
+                aristas.append((supervisor, asesor))
+    # Asignación circular (supervisor -> gerente) y cadena profunda
+    aristas.append(("bench_sup0_0", "bench_ger0"))
+    cadena = [f"bench_cadena{n}" for n in range(8)]
+    usuarios += [(u, 'supervisor', None) for u in cadena]
+    aristas += list(zip(["bench_ger0"] + cadena, cadena))
+
+    conn.executemany(
+        "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', ?, ?)",
+        usuarios,
+    )
+    conn.executemany(
+        "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+        aristas,
+    )
+    conn.commit()
+    return [u for u, rol, _ in usuarios if rol != 'asesor'], [u for u, *_ in usuarios]
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def _clausura(conn):
+    return conn.execute(
+        "SELECT ancestor, descendant, depth FROM user_assignments_closure ORDER BY 1, 2"
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de jerarquía")
+    parser.add_argument("--gerentes", type=int, default=5)
+    parser.add_argument("--supervisores", type=int, default=20)
+    parser.add_argument("--asesores", type=int, default=50)
+    parser.add_argument("--cambios", type=int, default=300,
+                        help="Altas/bajas aleatorias para verificar la clausura")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+            conn = database.conectar_db()
+            try:
+                managers, usuarios = _poblar(conn, args.gerentes, args.supervisores, args.asesores)
+            finally:
+                conn.close()
+            import db_helpers
+            import db_jerarquia
+            db_jerarquia.reconstruir_clausura()
+
+        conn = database.conectar_db()
+        try:
+            aristas = conn.execute("SELECT COUNT(*) FROM user_assignments WHERE activo = 1").fetchone()[0]
+            pares = conn.execute("SELECT COUNT(*) FROM user_assignments_closure").fetchone()[0]
+        finally:
+            conn.close()
+        print(f"Asignaciones activas: {aristas}  pares en la clausura: {pares}")
+
+        gerente, supervisor = "bench_ger0", "bench_sup0_1"
+        print(f"{'consulta':>28} {'antes (ms)':>12} {'después (ms)':>14} {'mejora':>8}")
+        casos = [
+            ("visibles gerente", lambda: _visibles_anterior(gerente),
+             lambda: db_helpers.get_assigned_usernames_recursive(gerente)),
+            ("visibles supervisor", lambda: _visibles_anterior(supervisor),
+             lambda: db_helpers.get_assigned_usernames_recursive(supervisor)),
+        ]
+        for nombre, antes, despues in casos:
+            if antes() != despues():
+                print(f"❌ {nombre}: resultados distintos")
+                return 1
+            t_antes = _medir(antes, args.repeticiones)
+            t_despues = _medir(despues, args.repeticiones)
+            print(f"{nombre:>28} {t_antes:>12.3f} {t_despues:>14.3f} {t_antes / t_despues:>7.1f}x")
+
+        from db_helpers_dashboard import obtener_jerarquia_gerente
+        t_arbol = _medir(lambda: obtener_jerarquia_gerente(gerente), args.repeticiones)
+        print(f"{'obtener_jerarquia_gerente':>28} {'':>12} {t_arbol:>14.3f}")
+
+        # Altas y bajas aleatorias: clausura incremental == reconstrucción
+        rnd = random.Random(14)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(args.cambios):
+                manager, miembro = rnd.choice(managers), rnd.choice(usuarios)
+                if rnd.random() < 0.5:
+                    db_helpers.add_assignment(manager, miembro)
+                else:
+                    hijos = db_helpers.get_assigned_usernames(manager)
+                    if hijos:
+                        db_helpers.remove_assignment(manager, rnd.choice(hijos))
+
+        for manager in managers:
+            if db_helpers.get_assigned_usernames_recursive(manager) != _visibles_anterior(manager):
+                print(f"❌ Visibles de {manager} difieren del BFS tras los cambios")
+                return 1
+
+        conn = database.conectar_db()
+        try:
+            incremental = _clausura(conn)
+        finally:
+            conn.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_jerarquia.reconstruir_clausura()
+            from db_writer import detener_escritor
+            detener_escritor()
+        conn = database.conectar_db()
+        try:
+            reconstruida = _clausura(conn)
+        finally:
+            conn.close()
+        database.cerrar_pool_conexiones()
+
+    if [tuple(r) for r in incremental] != [tuple(r) for r in reconstruida]:
+        print("❌ La clausura incremental difiere de la reconstrucción completa")
+        return 1
+    print(f"✅ {args.cambios} cambios: clausura incremental == reconstrucción; visibles == BFS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+BENCH_LOTES_DASHBOARD.PY - Consultas de dashboard en serie vs en paralelo
+=========================================================================
+
+Sobre una COPIA temporal de loansi.db mide la latencia de pared de los
+dashboards de admin, gerente y auditor:
+
+- antes:   las consultas del lote una tras otra en la conexión del
+           llamador (db_lectura.MAX_HILOS_LECTURA = 0, lo que hacían
+           los builders antes de declararlas como lote)
+- después: el lote repartido en el pool de conexiones mode=ro
+
+Se mide dos veces: con los datos tal cual y tras agregar un rollup
+actividad_diaria sintético grande (--dias x --asesores x 3 líneas), donde
+cada consulta recorre muchas filas y el paralelismo compensa el costo de
+despachar al pool. Verifica que ambos modos dan el mismo resultado.
+
+Uso:
+    python benchmarks/bench_lotes_dashboard.py
+    python benchmarks/bench_lotes_dashboard.py --dias 730 --asesores 500 --hilos 8
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+LINEAS = ('LoansiFlex', 'Microflex', 'LoansiMoto')
+
+
+def _poblar_rollup(conn, dias, asesores):
+    """Filas sintéticas de actividad_diaria (usuarios reales + sintéticos)."""
+    rnd = random.Random(17)
+    nombres = [row[0] for row in conn.execute("SELECT username FROM usuarios")]
+    nombres += [f"bench_lote{n}" for n in range(max(0, asesores - len(nombres)))]
+    hoy = date.today()
+    filas = (
+        ((hoy - timedelta(days=d)).isoformat(), asesor, linea,
+         rnd.randint(0, 5), rnd.randint(0, 20), rnd.randint(0, 2), rnd.randint(0, 2), rnd.randint(0, 1))
+        for d in range(dias) for asesor in nombres for linea in LINEAS
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO actividad_diaria (fecha, asesor, linea, evaluaciones, simulaciones, "
+        "aprobadas, rechazadas, pendientes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        filas,
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn.execute("SELECT COUNT(*) FROM actividad_diaria").fetchone()[0]
+
+
+def _usuarios():
+    conn = database.conectar_db()
+    try:
+        gerente = conn.execute(
+            "SELECT u.username FROM usuarios u JOIN user_assignments ua "
+            "ON ua.manager_username = u.username AND ua.activo = 1 "
+            "WHERE u.rol = 'gerente' GROUP BY u.username ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+        auditor = conn.execute("SELECT username FROM usuarios WHERE rol = 'auditor' LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return (gerente[0] if gerente else None), (auditor[0] if auditor else None)
+
+
+def _medir(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def _sin_volatiles(stats):
+    return {k: v for k, v in stats.items() if k not in ('fecha_actual', 'jerarquia')}
+
+
+def _comparar(casos, repeticiones, hilos):
+    import db_lectura
+
+    print(f"{'dashboard':>16} {'serie (ms)':>12} {'paralelo (ms)':>15} {'mejora':>8}")
+    for nombre, funcion in casos:
+        db_lectura.MAX_HILOS_LECTURA = 0
+        serie = _sin_volatiles(funcion())
+        t_serie = _medir(funcion, repeticiones)
+
+        db_lectura.cerrar_lectores()
+        db_lectura.MAX_HILOS_LECTURA = hilos
+        paralelo = _sin_volatiles(funcion())
+        t_paralelo = _medir(funcion, repeticiones)
+
+        if serie != paralelo:
+            print(f"❌ {nombre}: el resultado en paralelo difiere del resultado en serie")
+            return False
+        print(f"{nombre:>16} {t_serie:>12.2f} {t_paralelo:>15.2f} {t_serie / t_paralelo:>7.1f}x")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lotes de lectura en dashboards")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--asesores", type=int, default=300)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+
+        import db_lectura
+        from db_helpers_dashboard import (
+            obtener_estadisticas_admin,
+            obtener_estadisticas_auditor,
+            obtener_estadisticas_gerente,
+        )
+
+        gerente, auditor = _usuarios()
+        casos = [("admin", obtener_estadisticas_admin),
+                 ("auditor global", lambda: obtener_estadisticas_auditor(None))]
+        if auditor:
+            casos.append(("auditor", lambda: obtener_estadisticas_auditor(auditor)))
+        if gerente:
+            casos.append(("gerente", lambda: obtener_estadisticas_gerente(gerente)))
+
+        ok = True
+        try:
+            conn = database.conectar_db()
+            try:
+                filas = conn.execute("SELECT COUNT(*) FROM actividad_diaria").fetchone()[0]
+            finally:
+                conn.close()
+            print(f"Datos actuales (actividad_diaria: {filas} filas)")
+            ok = _comparar(casos, args.repeticiones, args.hilos)
+
+            if ok:
+                conn = database.conectar_db()
+                try:
+                    filas = _poblar_rollup(conn, args.dias, args.asesores)
+                finally:
+                    conn.close()
+                print(f"\nRollup grande (actividad_diaria: {filas} filas)")
+                ok = _comparar(casos, args.repeticiones, args.hilos)
+        finally:
+            db_lectura.cerrar_lectores()
+            database.cerrar_pool_conexiones()
+
+    if not ok:
+        return 1
+    print("✅ Paralelo == serie en todos los dashboards")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
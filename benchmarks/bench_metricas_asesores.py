@@ -0,0 +1,241 @@
+"""
+BENCH_METRICAS_ASESORES.PY - Vista con JOIN vs tabla metricas_asesores
+======================================================================
+
+Sobre una COPIA temporal de loansi.db agrega evaluaciones y simulaciones
+sintéticas (por defecto 100k y 500k repartidas entre 50 asesores) y mide:
+
+- antes:   la vista anterior (evaluaciones LEFT JOIN simulaciones por
+           asesor + COUNT(DISTINCT)); su costo es evaluaciones x
+           simulaciones de cada asesor, así que se corta tras
+           --limite-segundos y se mide además por asesor en una muestra
+- después: vista_metricas_asesores sobre la tabla materializada y
+           obtener_metricas_asesores()
+
+Verifica que la tabla mantenida por los triggers coincide con una
+reconstrucción completa, con subconsultas agregadas por separado y, en
+la muestra, con los conteos de la vista anterior.
+
+Uso:
+    python benchmarks/bench_metricas_asesores.py
+    python benchmarks/bench_metricas_asesores.py --evaluaciones 100000 --simulaciones 500000 --asesores 200
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+VISTA_ANTERIOR_SQL = """
+SELECT
+    e.asesor,
+    COUNT(DISTINCT e.id) as total_evaluaciones,
+    COUNT(DISTINCT CASE WHEN e.estado_comite = 'approved' THEN e.id END) as casos_aprobados,
+    COUNT(DISTINCT CASE WHEN e.estado_comite = 'rejected' THEN e.id END) as casos_rechazados,
+    COUNT(DISTINCT CASE WHEN e.estado_comite = 'pending' THEN e.id END) as casos_pendientes,
+    AVG(e.score) as score_promedio,
+    COUNT(DISTINCT s.id) as total_simulaciones
+FROM evaluaciones e
+LEFT JOIN simulaciones s ON e.asesor = s.asesor
+{filtro}
+GROUP BY e.asesor
+"""
+
+# Referencia correcta: cada tabla agregada por separado
+METRICAS_DIRECTAS_SQL = """
+SELECT e.asesor, e.total, e.aprobados, e.rechazados, e.pendientes, e.score,
+       COALESCE(s.total, 0)
+FROM (
+    SELECT asesor, COUNT(*) AS total,
+           SUM(estado_comite IS 'approved') AS aprobados,
+           SUM(estado_comite IS 'rejected') AS rechazados,
+           SUM(estado_comite IS 'pending') AS pendientes,
+           AVG(score) AS score
+    FROM evaluaciones GROUP BY asesor
+) e
+LEFT JOIN (SELECT asesor, COUNT(*) AS total FROM simulaciones GROUP BY asesor) s
+       ON s.asesor = e.asesor
+ORDER BY e.asesor
+"""
+
+
+def _poblar(conn, evaluaciones, simulaciones, asesores):
+    rnd = random.Random(16)
+    nombres = [f"bench_met{n}" for n in range(asesores)]
+    conn.executemany(
+        "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', 'asesor', ?)",
+        [(u, u.title()) for u in nombres],
+    )
+    linea = conn.execute("SELECT nombre FROM lineas_credito ORDER BY id LIMIT 1").fetchone()[0]
+    ahora = datetime.now()
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, fecha_creacion, monto_solicitado) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (f"bench-met-{n}", rnd.choice(nombres),
+             f'{{"score": {rnd.uniform(10, 90):.2f}}}' if rnd.random() < 0.9 else '{}',
+             rnd.choice([None, 'pending', 'approved', 'rejected']),
+             (ahora - timedelta(days=rnd.randint(0, 365))).strftime('%Y-%m-%d %H:%M:%S'),
+             rnd.randint(1, 50) * 100000)
+            for n in range(evaluaciones)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) VALUES (?, ?, ?, 12, ?)",
+        (
+            ((ahora - timedelta(minutes=n)).isoformat(), rnd.choice(nombres), rnd.randint(1, 50) * 100000, linea)
+            for n in range(simulaciones)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return nombres
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def _con_limite(conn, sql, params, segundos):
+    """Ejecuta sql cortándola tras `segundos`; retorna (filas, ms) o (None, ms)."""
+    inicio = time.perf_counter()
+    conn.set_progress_handler(lambda: time.perf_counter() - inicio > segundos, 100000)
+    try:
+        filas = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        filas = None
+    finally:
+        conn.set_progress_handler(None, 0)
+    return filas, (time.perf_counter() - inicio) * 1000
+
+
+def _mismas(a, b):
+    """Filas iguales, con tolerancia en los promedios (REAL)."""
+    if len(a) != len(b):
+        return False
+    for fila_a, fila_b in zip(a, b):
+        for x, y in zip(fila_a, fila_b):
+            if isinstance(x, float) or isinstance(y, float):
+                if x is None or y is None or abs(x - y) > 1e-6:
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de metricas_asesores")
+    parser.add_argument("--evaluaciones", type=int, default=100000)
+    parser.add_argument("--simulaciones", type=int, default=500000)
+    parser.add_argument("--asesores", type=int, default=50)
+    parser.add_argument("--muestra", type=int, default=1,
+                        help="Asesores medidos individualmente con la vista anterior")
+    parser.add_argument("--limite-segundos", type=float, default=20.0)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+
+        conn = database.conectar_db()
+        try:
+            inicio = time.perf_counter()
+            nombres = _poblar(conn, args.evaluaciones, args.simulaciones, args.asesores)
+            print(f"Carga (con triggers): {args.evaluaciones} evaluaciones + "
+                  f"{args.simulaciones} simulaciones en {time.perf_counter() - inicio:.1f} s")
+
+            incremental = conn.execute(
+                "SELECT * FROM vista_metricas_asesores ORDER BY asesor"
+            ).fetchall()
+            directas = conn.execute(METRICAS_DIRECTAS_SQL).fetchall()
+            if not _mismas(incremental, directas):
+                print("❌ metricas_asesores difiere de las subconsultas agregadas por separado")
+                return 1
+
+            # Vista anterior: completa (con límite) y por asesor en una muestra
+            completa, ms_completa = _con_limite(
+                conn, VISTA_ANTERIOR_SQL.format(filtro=""), (), args.limite_segundos
+            )
+            muestra = nombres[:args.muestra]
+            tiempos_muestra = []
+            for asesor in muestra:
+                filas, ms = _con_limite(
+                    conn, VISTA_ANTERIOR_SQL.format(filtro="WHERE e.asesor = ?"), (asesor,),
+                    args.limite_segundos,
+                )
+                tiempos_muestra.append(ms)
+                correcta = next(f for f in directas if f[0] == asesor)
+                if filas and not _mismas(filas, [correcta]):
+                    print(f"❌ Métricas distintas para {asesor}")
+                    return 1
+
+            despues_vista = _medir(
+                lambda: conn.execute("SELECT * FROM vista_metricas_asesores").fetchall(),
+                args.repeticiones,
+            )
+        finally:
+            conn.close()
+
+        from db_helpers_dashboard import obtener_metricas_asesores
+        despues_api = _medir(lambda: obtener_metricas_asesores(), args.repeticiones)
+        despues_equipo = _medir(
+            lambda: obtener_metricas_asesores(nombres[:10], orden='score_promedio'), args.repeticiones
+        )
+
+        por_asesor = statistics.median(tiempos_muestra)
+        print(f"\nVista anterior (JOIN): completa "
+              + (f"{ms_completa:.0f} ms" if completa is not None
+                 else f"> {args.limite_segundos:.0f} s (interrumpida)")
+              + f"; {por_asesor:.0f} ms por asesor (muestra de {len(muestra)},"
+              f" ≈ {por_asesor * args.asesores / 1000:.0f} s para {args.asesores})")
+        print(f"metricas_asesores:     vista {despues_vista:.2f} ms;"
+              f" obtener_metricas_asesores() {despues_api:.2f} ms;"
+              f" 10 asesores {despues_equipo:.2f} ms")
+
+        # Triggers == reconstrucción completa
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.reconstruir_metricas_asesores()
+            from db_writer import detener_escritor
+            detener_escritor()
+        conn = database.conectar_db()
+        try:
+            reconstruida = conn.execute(
+                "SELECT * FROM vista_metricas_asesores ORDER BY asesor"
+            ).fetchall()
+        finally:
+            conn.close()
+        database.cerrar_pool_conexiones()
+
+    if not _mismas(incremental, reconstruida):
+        print("❌ metricas_asesores difiere de la reconstrucción completa")
+        return 1
+    print("✅ metricas_asesores == subconsultas por separado == reconstrucción completa")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+BENCH_MOTOR_SCORING.PY - POST /scoring con el motor de modelos por línea
+=========================================================================
+
+Envía N evaluaciones a POST /scoring rotando entre todas las líneas de
+crédito (y una sin línea, que usa el modelo global) y compara:
+
+- recarga: se vacía el registro del motor y el cache de scoring por línea
+           antes de cada request, de modo que cada evaluación vuelve a
+           leer y compilar la configuración de su línea
+- motor:   estado estable, modelos compilados por línea y versión
+
+Para cada modo reporta latencia, lecturas de configuración por línea
+(llamadas a cargar_scoring_por_linea), compilaciones y el promedio de
+cada etapa del motor (encabezado Server-Timing).
+
+Trabaja sobre una COPIA temporal de loansi.db (cada POST guarda una
+evaluación).
+
+Uso:
+    python benchmarks/bench_motor_scoring.py
+    python benchmarks/bench_motor_scoring.py --requests 500
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+from bench_scoring_post import _formulario, _usuario_con_permiso  # noqa: E402
+
+
+def _etapas(encabezado):
+    """{etapa: ms} desde 'scoring-<etapa>;dur=<ms>, ...'."""
+    etapas = {}
+    for parte in encabezado.split(","):
+        nombre, _, duracion = parte.strip().partition(";dur=")
+        etapas[nombre.replace("scoring-", "")] = float(duracion)
+    return etapas
+
+
+def medir(cliente, snapshot, lineas, requests, recarga, lecturas):
+    from app.services.motor_scoring import obtener_motor_scoring
+    from db_helpers_scoring_linea import invalidar_cache_scoring_linea
+
+    motor = obtener_motor_scoring()
+    compilaciones = motor.estadisticas()["registro"]["cargas"]
+    lecturas[0] = 0
+
+    latencias = []
+    etapas = {}
+    for n in range(requests):
+        if recarga:
+            motor.invalidar()
+            invalidar_cache_scoring_linea()
+        datos = _formulario(snapshot, n)
+        datos["linea_credito"] = lineas[n % len(lineas)]
+
+        inicio = time.perf_counter()
+        respuesta = cliente.post("/scoring", data=datos)
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status_code != 200:
+            raise SystemExit(f"❌ POST /scoring respondió {respuesta.status_code}")
+        for etapa, ms in _etapas(respuesta.headers["Server-Timing"]).items():
+            etapas.setdefault(etapa, []).append(ms)
+
+    latencias.sort()
+    return {
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p99_ms": round(latencias[max(0, int(len(latencias) * 0.99) - 1)] * 1000, 2),
+        "promedio_ms": round(statistics.mean(latencias) * 1000, 2),
+        "lecturas_config": lecturas[0],
+        "compilaciones": motor.estadisticas()["registro"]["cargas"] - compilaciones,
+        "etapas_ms": {etapa: round(statistics.mean(v), 4) for etapa, v in etapas.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de scoring en POST /scoring")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+    copia = Path(tmpdir) / "loansi.db"
+    shutil.copy2(database.DB_PATH, copia)
+    database.DB_PATH = copia
+
+    try:
+        # Los prints de la app se silencian para no medir la consola
+        with contextlib.redirect_stdout(io.StringIO()):
+            import db_helpers_scoring_linea
+            from app import create_app
+            from db_helpers import cargar_configuracion, obtener_snapshot_scoring
+
+            # Cuenta las lecturas de configuración por línea
+            lecturas = [0]
+            cargar_original = db_helpers_scoring_linea.cargar_scoring_por_linea
+
+            def cargar_contando(linea_nombre):
+                lecturas[0] += 1
+                return cargar_original(linea_nombre)
+
+            db_helpers_scoring_linea.cargar_scoring_por_linea = cargar_contando
+
+            app = create_app()
+            app.config["WTF_CSRF_ENABLED"] = False
+            username = _usuario_con_permiso(app)
+            snapshot = obtener_snapshot_scoring()
+            lineas = list(cargar_configuracion().get("LINEAS_CREDITO", {})) + [""]
+
+            cliente = app.test_client()
+            with cliente.session_transaction() as sesion:
+                sesion["usuario"] = username
+                sesion["username"] = username
+                sesion["autorizado"] = True
+
+            medir(cliente, snapshot, lineas, 10, False, lecturas)  # Calentamiento
+            resultados = {
+                "recarga": medir(cliente, snapshot, lineas, args.requests, True, lecturas),
+                "motor": medir(cliente, snapshot, lineas, args.requests, False, lecturas),
+            }
+
+        print(f"📊 POST /scoring x {args.requests} (usuario {username}, "
+              f"{len(lineas)} líneas: {', '.join(l or 'global' for l in lineas)})\n")
+        for modo, r in resultados.items():
+            print(
+                f"{modo:>8}: p50 {r['p50_ms']} ms | p99 {r['p99_ms']} ms | "
+                f"promedio {r['promedio_ms']} ms | lecturas config {r['lecturas_config']} | "
+                f"compilaciones {r['compilaciones']}"
+            )
+            print(f"{'':>10}etapas (ms): " + ", ".join(
+                f"{etapa} {ms}" for etapa, ms in r["etapas_ms"].items()
+            ))
+    finally:
+        from db_writer import detener_escritor
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+BENCH_NAVBAR.PY - Costo en base de datos del resumen del navbar por página
+==========================================================================
+
+Sobre una COPIA temporal de loansi.db (con historial sintético) mide, por
+rol, cuánto tiempo de base y cuántas consultas agrega el resumen del navbar
+a cada página renderizada:
+
+- antes:    obtener_resumen_navbar() en cada render_template
+- perezoso: la página no lee navbar_stats (ninguna consulta)
+- acierto:  la página lo lee y está en cache (consulta a version_datos)
+- fallo:    cache vencido o invalidado (resumen completo)
+
+Al final verifica que una evaluación nueva invalida el cache y que
+GET /api/navbar-resumen responde con los items del usuario.
+
+Uso:
+    python benchmarks/bench_navbar.py
+    python benchmarks/bench_navbar.py --filas 100000 --repeticiones 50
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+class _ContadorConsultas:
+    """Cuenta las sentencias que ejecutan las conexiones de conectar_db()."""
+
+    def __init__(self):
+        self.total = 0
+        self._modulos = {}
+
+    def __enter__(self):
+        import db_helpers_dashboard
+
+        original = database.conectar_db
+
+        def conectar_con_conteo():
+            conn = original()
+            conn.set_trace_callback(self._contar)
+            return conn
+
+        for modulo in (db_helpers_dashboard, database):
+            self._modulos[modulo] = modulo.conectar_db
+            modulo.conectar_db = conectar_con_conteo
+        return self
+
+    def _contar(self, sql):
+        if not sql.lstrip().upper().startswith(("BEGIN", "COMMIT", "PRAGMA")):
+            self.total += 1
+
+    def __exit__(self, *exc):
+        for modulo, original in self._modulos.items():
+            modulo.conectar_db = original
+        conn = database.conectar_db()
+        conn.set_trace_callback(None)
+        conn.close()
+
+
+def _medir(funcion, repeticiones):
+    """Mediana en ms y consultas por llamada."""
+    tiempos = []
+    with _ContadorConsultas() as contador:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, contador.total / repeticiones
+
+
+def _usuarios_por_rol():
+    conn = database.conectar_db()
+    try:
+        usuarios = {}
+        for rol, username in conn.execute(
+            "SELECT u.rol, u.username FROM usuarios u "
+            "LEFT JOIN user_assignments ua ON ua.manager_username = u.username AND ua.activo = 1 "
+            "WHERE u.activo = 1 GROUP BY u.username ORDER BY COUNT(ua.id) DESC"
+        ).fetchall():
+            usuarios.setdefault(rol, username)
+        return usuarios
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cache del navbar")
+    parser.add_argument("--filas", type=int, default=50000,
+                        help="Evaluaciones (y simulaciones) sintéticas a agregar")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app
+            import explain_dashboard
+
+            app = create_app()
+            conn = database.conectar_db()
+            try:
+                explain_dashboard._poblar(conn, args.filas)
+            finally:
+                conn.close()
+
+        import db_helpers_dashboard as dashboard
+
+        usuarios = _usuarios_por_rol()
+        print(f"{'rol':>15} {'antes':>16} {'perezoso':>10} {'acierto':>16} {'fallo':>16}")
+        for rol, username in sorted(usuarios.items()):
+            antes = _medir(lambda: dashboard.obtener_resumen_navbar(rol, username), args.repeticiones)
+            perezoso = _medir(lambda: dashboard.ResumenNavbarPerezoso(rol, username), args.repeticiones)
+            dashboard.obtener_resumen_navbar_cacheado(rol, username)
+            acierto = _medir(
+                lambda: dict(dashboard.ResumenNavbarPerezoso(rol, username)), args.repeticiones
+            )
+
+            def fallo():
+                dashboard.invalidar_resumen_navbar()
+                dict(dashboard.ResumenNavbarPerezoso(rol, username))
+
+            fallo = _medir(fallo, args.repeticiones)
+            print(f"{rol:>15} " + " ".join(
+                f"{ms:>7.2f}ms/{consultas:<4.0f}" if ancho > 10 else f"{consultas:>8.0f} q"
+                for (ms, consultas), ancho in ((antes, 16), (perezoso, 10), (acierto, 16), (fallo, 16))
+            ))
+
+        # Invalidación: una evaluación nueva cambia version_datos['actividad']
+        rol, username = 'asesor', usuarios.get('asesor')
+        previo = dashboard.obtener_resumen_navbar_cacheado(rol, username)
+        conn = database.conectar_db()
+        try:
+            conn.execute(
+                "INSERT INTO evaluaciones (timestamp, asesor, resultado) VALUES ('bench-navbar', ?, '{}')",
+                (username,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        nuevo = dashboard.obtener_resumen_navbar_cacheado(rol, username)
+        if nuevo is previo or nuevo['items'][0]['valor'] != previo['items'][0]['valor'] + 1:
+            print("❌ La evaluación nueva no invalidó el resumen cacheado")
+            return 1
+
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion['username'] = username
+            sesion['rol'] = rol
+            sesion['autorizado'] = True
+        respuesta = cliente.get('/api/navbar-resumen')
+        if respuesta.status_code != 200 or respuesta.get_json()['items'] != nuevo['items']:
+            print(f"❌ /api/navbar-resumen respondió {respuesta.status_code}")
+            return 1
+
+        print("\n✅ Invalidación por evaluación nueva y /api/navbar-resumen OK")
+        print(f"   {dashboard.obtener_estadisticas_resumen_navbar()}")
+        database.cerrar_pool_conexiones()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
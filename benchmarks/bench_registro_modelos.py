@@ -0,0 +1,218 @@
+"""
+BENCH_REGISTRO_MODELOS.PY - ScoringService con el registro de modelos
+======================================================================
+
+1. Latencia de ScoringService.calcular_scoring(valores, linea) rotando
+   entre las líneas de crédito:
+   - recarga:  se vacía el registro antes de cada llamada, de modo que
+               cada cálculo vuelve a cargar la configuración de la línea
+               y a compilar el modelo (comportamiento anterior)
+   - registro: estado estable, modelo por línea y versión
+2. Carga única: N hilos piden a la vez una línea que no está en el
+   registro; debe haber una sola lectura de configuración. Como la carga
+   real dura ~1 ms, también se mide un RegistroModelos aislado con una
+   carga de 50 ms, donde los demás hilos sí quedan esperando
+3. LRU: con capacidad para la mitad de las líneas y una línea que recibe
+   el 70% de las evaluaciones, desalojos y tasa de aciertos
+
+Reporta las lecturas de configuración por línea (llamadas a
+cargar_scoring_por_linea) de cada escenario.
+
+Trabaja sobre una COPIA temporal de loansi.db.
+
+Uso:
+    python benchmarks/bench_registro_modelos.py
+    python benchmarks/bench_registro_modelos.py --llamadas 5000 --hilos 64
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+from bench_scoring_compilado import config_servicio, valores_realistas  # noqa: E402
+
+
+def medir(servicio, registro, lineas, valores, llamadas, recarga):
+    latencias = []
+    for n in range(llamadas):
+        if recarga:
+            registro.invalidar()
+        inicio = time.perf_counter()
+        servicio.calcular_scoring(valores[n % len(valores)], lineas[n % len(lineas)])
+        latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    return {
+        "p50_us": round(statistics.median(latencias) * 1e6, 1),
+        "p99_us": round(latencias[max(0, int(len(latencias) * 0.99) - 1)] * 1e6, 1),
+        "promedio_us": round(statistics.mean(latencias) * 1e6, 1),
+    }
+
+
+def carga_concurrente(registro, linea, valores, hilos):
+    """Todos los hilos calculan a la vez una línea fría."""
+    from app.services.scoring_service import ScoringService
+    from db_helpers_scoring_linea import invalidar_cache_scoring_linea
+
+    # Fría también en el cache de db_helpers_scoring_linea
+    registro.invalidar()
+    invalidar_cache_scoring_linea()
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def trabajar():
+        servicio = ScoringService()
+        barrera.wait()
+        try:
+            servicio.calcular_scoring(valores, linea)
+        except Exception as e:
+            errores.append(e)
+
+    antes = registro.estadisticas()
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+    if errores:
+        raise SystemExit(f"❌ {len(errores)} hilos fallaron: {errores[0]}")
+    despues = registro.estadisticas()
+    return {clave: despues[clave] - antes[clave] for clave in ("cargas", "esperas", "aciertos")}
+
+
+def carga_lenta(hilos, segundos=0.05):
+    """N hilos piden la misma clave fría de un registro cuya carga tarda `segundos`."""
+    from app.services.registro_modelos import RegistroModelos
+
+    registro = RegistroModelos()
+    barrera = threading.Barrier(hilos)
+    valores = []
+
+    def cargar():
+        time.sleep(segundos)
+        return object()
+
+    def trabajar():
+        barrera.wait()
+        valores.append(registro.obtener("linea", (1, 1), cargar))
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+    estadisticas = registro.estadisticas()
+    return {
+        "cargas": estadisticas["cargas"],
+        "esperas": estadisticas["esperas"],
+        "mismo_valor": len({id(v) for v in valores}) == 1,
+        "ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del registro de modelos de scoring")
+    parser.add_argument("--llamadas", type=int, default=2000)
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--semilla", type=int, default=24)
+    args = parser.parse_args()
+    rnd = random.Random(args.semilla)
+
+    tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+    copia = Path(tmpdir) / "loansi.db"
+    shutil.copy2(database.DB_PATH, copia)
+    database.DB_PATH = copia
+
+    try:
+        # Los prints de la app se silencian para no medir la consola
+        with contextlib.redirect_stdout(io.StringIO()):
+            import db_helpers_scoring_linea
+            from app import create_app
+            from app.services.registro_modelos import obtener_registro_modelos
+            from app.services.scoring_service import ScoringService
+            from db_helpers import cargar_configuracion, cargar_scoring
+
+            # Cuenta las lecturas de configuración por línea
+            lecturas = [0]
+            cargar_original = db_helpers_scoring_linea.cargar_scoring_por_linea
+
+            def cargar_contando(linea_nombre):
+                lecturas[0] += 1
+                return cargar_original(linea_nombre)
+
+            db_helpers_scoring_linea.cargar_scoring_por_linea = cargar_contando
+
+            # Migraciones (version_datos): sin versiones el registro no guarda nada
+            create_app()
+            registro = obtener_registro_modelos()
+            lineas = list(cargar_configuracion().get("LINEAS_CREDITO", {}))
+            config = config_servicio(cargar_scoring())
+            valores = [valores_realistas(rnd, config) for _ in range(200)]
+            servicio = ScoringService()
+
+            # 1. Latencia por llamada
+            medir(servicio, registro, lineas, valores, 50, False)  # Calentamiento
+            resultados = {}
+            for modo, recarga in (("recarga", True), ("registro", False)):
+                lecturas[0] = 0
+                resultados[modo] = medir(servicio, registro, lineas, valores, args.llamadas, recarga)
+                resultados[modo]["lecturas"] = lecturas[0]
+
+            # 2. Carga única
+            lecturas[0] = 0
+            concurrente = carga_concurrente(registro, lineas[0], valores[0], args.hilos)
+            concurrente["lecturas"] = lecturas[0]
+            lenta = carga_lenta(args.hilos)
+
+            # 3. LRU con capacidad para la mitad de las líneas; la primera
+            # línea recibe el 70% de las evaluaciones
+            secuencia = [
+                lineas[0] if rnd.random() < 0.7 else rnd.choice(lineas[1:])
+                for _ in range(args.llamadas)
+            ]
+            capacidad = registro.capacidad
+            registro.capacidad = max(1, len(lineas) // 2)
+            registro.invalidar()
+            antes = registro.estadisticas()
+            lecturas[0] = 0
+            medir(servicio, registro, secuencia, valores, args.llamadas, False)
+            despues = registro.estadisticas()
+            lru = {clave: despues[clave] - antes[clave] for clave in ("aciertos", "fallos", "desalojos")}
+            lru["lecturas"] = lecturas[0]
+            registro.capacidad = capacidad
+
+        print(f"📊 ScoringService.calcular_scoring x {args.llamadas} ({len(lineas)} líneas)\n")
+        for modo, r in resultados.items():
+            print(f"{modo:>9}: p50 {r['p50_us']} µs | p99 {r['p99_us']} µs | "
+                  f"promedio {r['promedio_us']} µs | lecturas config {r['lecturas']}")
+        print(f"\n🔀 {args.hilos} hilos sobre '{lineas[0]}' fría: cargas {concurrente['cargas']}, "
+              f"esperas {concurrente['esperas']}, aciertos {concurrente['aciertos']}, "
+              f"lecturas config {concurrente['lecturas']}")
+        print(f"🔀 {args.hilos} hilos, registro aislado con carga de 50 ms: cargas {lenta['cargas']}, "
+              f"esperas {lenta['esperas']}, mismo valor {lenta['mismo_valor']}, {lenta['ms']} ms en total")
+        print(f"♻️ LRU capacidad {max(1, len(lineas) // 2)} con {len(lineas)} líneas (70% en '{lineas[0]}'): "
+              f"aciertos {lru['aciertos']}, fallos {lru['fallos']}, desalojos {lru['desalojos']}, "
+              f"lecturas config {lru['lecturas']}")
+        print(f"\nRegistro: {registro.estadisticas()}")
+    finally:
+        from db_writer import detener_escritor
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+BENCH_SCORING_COMPILADO.PY - ScoringService lineal vs modelo compilado
+=======================================================================
+
+Microbenchmark por evaluación de ScoringService.calcular_scoring:
+
+- lineal:    copia del cálculo anterior (recorre los rangos de cada
+             criterio y relee la configuración en cada evaluación)
+- compilado: CompiledScoringModel (bisect sobre límites ordenados, dicts
+             de opciones, pesos precalculados)
+
+Antes de medir comprueba que ambos dan exactamente el mismo resultado
+sobre la configuración real (ver config_servicio) y sobre
+configuraciones sintéticas con rangos solapados, huecos, límites
+abiertos y valores mal formados.
+
+Trabaja sobre una COPIA temporal de loansi.db.
+
+Uso:
+    python benchmarks/bench_scoring_compilado.py
+    python benchmarks/bench_scoring_compilado.py --evaluaciones 20000 --rangos 40
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+# ============================================================================
+# IMPLEMENTACIÓN LINEAL (referencia, copia de ScoringService antes del modelo)
+# ============================================================================
+
+def _evaluar_criterio_lineal(valor, criterio_config):
+    peso = criterio_config.get("peso", 5)
+    rangos = criterio_config.get("rangos", [])
+    tipo_campo = criterio_config.get("tipo_campo", "numerico")
+    puntaje = 0
+    detalle = ""
+    if tipo_campo == "numerico":
+        try:
+            valor_num = float(str(valor).replace(",", ".").replace("$", "").replace(".", ""))
+        except (ValueError, TypeError):
+            valor_num = 0
+        for rango in rangos:
+            min_val = rango.get("min", float("-inf"))
+            max_val = rango.get("max", float("inf"))
+            if min_val <= valor_num <= max_val:
+                puntaje = rango.get("puntaje", 0)
+                detalle = rango.get("descripcion", "")
+                break
+    elif tipo_campo == "seleccion":
+        for rango in rangos:
+            if str(rango.get("valor", "")).lower() == str(valor).lower():
+                puntaje = rango.get("puntaje", 0)
+                detalle = rango.get("descripcion", "")
+                break
+    elif tipo_campo == "booleano":
+        valor_bool = str(valor).lower() in ["true", "1", "si", "sí", "yes"]
+        for rango in rangos:
+            if rango.get("valor") == valor_bool:
+                puntaje = rango.get("puntaje", 0)
+                detalle = rango.get("descripcion", "")
+                break
+    return puntaje, puntaje * (peso / 100.0), peso, detalle
+
+
+def _rechazo_lineal(config, valores):
+    for factor in config.get("factores_rechazo_automatico", []):
+        criterio = factor.get("criterio")
+        operador = factor.get("operador", "<")
+        umbral = factor.get("valor", 0)
+        if criterio not in valores:
+            continue
+        valor = valores[criterio]
+        try:
+            valor_num = float(str(valor).replace(",", "."))
+            umbral_num = float(umbral)
+        except (ValueError, TypeError):
+            continue
+        rechazado = (
+            (operador == "<" and valor_num < umbral_num)
+            or (operador == "<=" and valor_num <= umbral_num)
+            or (operador == ">" and valor_num > umbral_num)
+            or (operador == ">=" and valor_num >= umbral_num)
+            or (operador == "==" and valor_num == umbral_num)
+        )
+        if rechazado:
+            return {"rechazo": True, "razon": factor.get("mensaje", "Rechazo automático"),
+                    "factor": criterio, "valor": valor, "umbral": umbral}
+    return {"rechazo": False, "razon": None, "factor": None}
+
+
+def _nivel_lineal(config, score):
+    for nivel in config.get("niveles_riesgo", []):
+        min_score = nivel.get("min", 0)
+        max_score = nivel.get("max", 100)
+        if min_score <= score <= max_score:
+            return {"nombre": nivel.get("nombre", "Sin clasificar"),
+                    "color": nivel.get("color", "#808080"),
+                    "tasa_ea": nivel.get("tasa_ea"),
+                    "tasa_nominal_mensual": nivel.get("tasa_nominal_mensual"),
+                    "aval_porcentaje": nivel.get("aval_porcentaje"),
+                    "min": min_score, "max": max_score}
+    return {"nombre": "Sin clasificar", "color": "#808080", "tasa_ea": None,
+            "tasa_nominal_mensual": None, "aval_porcentaje": None}
+
+
+def calcular_lineal(config, valores):
+    escala_max = config.get("escala_max", 100)
+    puntaje_minimo = config.get("puntaje_minimo_aprobacion", 17)
+    rechazo = _rechazo_lineal(config, valores)
+    evaluaciones = []
+    score_total = 0
+    peso_total = 0
+    for codigo, criterio in config.get("criterios", {}).items():
+        if not criterio.get("activo", True):
+            continue
+        valor = valores.get(codigo)
+        if valor is None:
+            continue
+        puntaje, ponderado, peso, detalle = _evaluar_criterio_lineal(valor, criterio)
+        evaluaciones.append({"codigo": codigo, "nombre": criterio.get("nombre", codigo),
+                             "valor": valor, "puntaje": puntaje, "peso": peso, "detalle": detalle})
+        score_total += ponderado
+        peso_total += peso
+    score_normalizado = (score_total / peso_total) * escala_max if peso_total > 0 else 0
+    score_normalizado = min(escala_max, max(0, score_normalizado))
+    nivel = _nivel_lineal(config, score_normalizado)
+    return {
+        "score": round(score_total, 2),
+        "score_normalizado": round(score_normalizado, 2),
+        "nivel": nivel["nombre"],
+        "nivel_detalle": nivel,
+        "aprobado": not rechazo["rechazo"] and score_normalizado >= puntaje_minimo,
+        "rechazo_automatico": rechazo["rechazo"],
+        "razon_rechazo": rechazo["razon"],
+        "factor_rechazo": rechazo["factor"],
+        "criterios_evaluados": evaluaciones,
+        "puntaje_minimo": puntaje_minimo,
+        "escala_max": escala_max,
+    }
+
+
+# ============================================================================
+# CONFIGURACIONES Y VALORES
+# ============================================================================
+
+TIPOS_NUMERICOS = ("number", "currency", "percentage", "numerico")
+
+
+def config_servicio(config):
+    """
+    Configuración de loansi.db en el formato que lee ScoringService
+    (tipo_campo numerico/seleccion, 'puntaje' y 'valor' en los factores).
+    """
+    criterios = {}
+    for codigo, criterio in config["criterios"].items():
+        numerico = criterio.get("tipo_campo") in TIPOS_NUMERICOS
+        rangos = []
+        for rango in criterio.get("rangos", ()):
+            nuevo = {"descripcion": rango.get("descripcion", ""), "puntaje": rango.get("puntos", 0)}
+            if numerico:
+                nuevo.update(min=rango.get("min", 0), max=rango.get("max", 0))
+            else:
+                nuevo["valor"] = str(rango.get("min", ""))
+            rangos.append(nuevo)
+        criterios[codigo] = {"nombre": criterio.get("nombre", codigo), "peso": criterio.get("peso", 5),
+                             "activo": criterio.get("activo", True), "rangos": rangos,
+                             "tipo_campo": "numerico" if numerico else "seleccion"}
+    factores = [
+        {"criterio": f["criterio"], "operador": f.get("operador", "<"),
+         "valor": f.get("valor_limite", f.get("valor_exacto")), "mensaje": f.get("mensaje", "")}
+        for f in config.get("factores_rechazo_automatico", ())
+        if "valor_limite" in f or "valor_exacto" in f
+    ]
+    return {"criterios": criterios, "niveles_riesgo": [dict(n) for n in config.get("niveles_riesgo", ())],
+            "factores_rechazo_automatico": factores,
+            "puntaje_minimo_aprobacion": config.get("puntaje_minimo_aprobacion", 17)}
+
+
+def config_sintetica(rnd, n_criterios, n_rangos):
+    """Criterios con rangos solapados, huecos, límites abiertos y tipos mezclados."""
+    criterios = {}
+    for c in range(n_criterios):
+        tipo = rnd.choice(("numerico", "numerico", "numerico", "seleccion", "booleano", "texto"))
+        rangos = []
+        for r in range(n_rangos):
+            rango = {"puntaje": rnd.choice((rnd.randint(-10, 25), rnd.uniform(0, 25))),
+                     "descripcion": f"r{r}"}
+            if tipo == "numerico":
+                inicio = rnd.randint(-50, 1000)
+                if rnd.random() > 0.1:
+                    rango["min"] = inicio
+                if rnd.random() > 0.1:
+                    rango["max"] = inicio + rnd.choice((0, rnd.randint(0, 200), rnd.uniform(0, 50)))
+            elif tipo == "seleccion":
+                rango["valor"] = rnd.choice(("A", "b", "Opción", "1", "x"))
+            else:
+                rango["valor"] = rnd.choice((True, False, 1, 0, "true"))
+            rangos.append(rango)
+        criterios[f"c{c}"] = {"nombre": f"Criterio {c}", "peso": rnd.choice((0, 1, 5, 13, 2.5)),
+                              "activo": rnd.random() > 0.1, "tipo_campo": tipo, "rangos": rangos}
+    niveles = [{"nombre": "Alto", "min": 0, "max": 30}, {"nombre": "Medio", "min": 30.1, "max": 70},
+               {"nombre": "Bajo", "min": 60, "max": 100}]
+    factores = [{"criterio": f"c{rnd.randrange(n_criterios)}", "operador": rnd.choice(("<", "<=", ">", ">=", "==", "!=")),
+                 "valor": rnd.choice((10, "50", "x", 0)), "mensaje": "rechazo"} for _ in range(4)]
+    return {"criterios": criterios, "niveles_riesgo": niveles, "factores_rechazo_automatico": factores,
+            "puntaje_minimo_aprobacion": rnd.choice((17, 40)), "escala_max": 100}
+
+
+def valor_aleatorio(rnd):
+    return rnd.choice((
+        rnd.randint(-60, 1300), rnd.randint(0, 30), rnd.uniform(-5, 1200), str(rnd.randint(0, 999)),
+        f"${rnd.randint(0, 9)}.{rnd.randint(100, 999)}.000", "1,5", "nan", "inf", "-inf", "abc", "",
+        True, False, "Sí", "A", "opción", "X", None,
+    ))
+
+
+def _valores(rnd, config):
+    return {codigo: valor_aleatorio(rnd) for codigo in config["criterios"] if rnd.random() > 0.05}
+
+
+def valores_realistas(rnd, config):
+    valores = {}
+    for codigo, criterio in config["criterios"].items():
+        rangos = criterio["rangos"]
+        if criterio["tipo_campo"] == "numerico" and rangos:
+            rango = rnd.choice(rangos)
+            valores[codigo] = str(rnd.randint(int(rango["min"]), int(rango["max"])))
+        elif rangos:
+            valores[codigo] = rnd.choice(rangos)["valor"]
+    return valores
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def _verificar(config, lotes):
+    from app.services.scoring_service import ScoringService
+
+    servicio = ScoringService(config)
+    for valores in lotes:
+        esperado = calcular_lineal(config, valores)
+        obtenido = servicio.calcular_scoring(valores)
+        if repr(esperado) != repr(obtenido):
+            print("❌ Resultado distinto")
+            print(f"   valores:   {valores}")
+            print(f"   lineal:    {esperado}")
+            print(f"   compilado: {obtenido}")
+            return False
+    return True
+
+
+def _medir(nombre, config, lotes):
+    from app.services.scoring_service import ScoringService
+
+    servicio = ScoringService(config)
+    inicio = time.perf_counter()
+    for valores in lotes:
+        calcular_lineal(config, valores)
+    lineal = (time.perf_counter() - inicio) / len(lotes) * 1e6
+    inicio = time.perf_counter()
+    for valores in lotes:
+        servicio.calcular_scoring(valores)
+    compilado = (time.perf_counter() - inicio) / len(lotes) * 1e6
+    inicio = time.perf_counter()
+    ScoringService(config)
+    compilacion = (time.perf_counter() - inicio) * 1000
+    print(f"{nombre:<34} {lineal:>9.1f} µs {compilado:>9.1f} µs {lineal / compilado:>7.2f}x"
+          f" {compilacion:>9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScoringService lineal vs modelo compilado")
+    parser.add_argument("--evaluaciones", type=int, default=10000)
+    parser.add_argument("--rangos", type=int, default=25,
+                        help="Rangos por criterio en la configuración sintética grande")
+    parser.add_argument("--semilla", type=int, default=21)
+    args = parser.parse_args()
+    rnd = random.Random(args.semilla)
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            from db_helpers import cargar_scoring
+            config_real = config_servicio(cargar_scoring())
+        database.cerrar_pool_conexiones()
+
+    # 1. Paridad exacta
+    casos = [(config_real, [_valores(rnd, config_real) for _ in range(2000)]
+              + [valores_realistas(rnd, config_real) for _ in range(2000)])]
+    for _ in range(200):
+        config = config_sintetica(rnd, rnd.randint(1, 12), rnd.randint(0, 12))
+        casos.append((config, [_valores(rnd, config) for _ in range(50)]))
+    total = sum(len(lotes) for _, lotes in casos)
+    if not all(_verificar(config, lotes) for config, lotes in casos):
+        return 1
+    print(f"✅ Paridad exacta en {total} evaluaciones ({len(casos)} configuraciones)\n")
+
+    # 2. Tiempo por evaluación
+    print(f"{'Configuración':<34} {'lineal':>12} {'compilado':>12} {'mejora':>8} {'compilar':>12}")
+    n = args.evaluaciones
+    _medir(f"loansi.db ({len(config_real['criterios'])} criterios)", config_real,
+           [valores_realistas(rnd, config_real) for _ in range(n)])
+    for n_rangos in sorted({8, args.rangos}):
+        config = config_sintetica(random.Random(n_rangos), 20, n_rangos)
+        for criterio in config["criterios"].values():
+            criterio["activo"] = True
+        _medir(f"sintética (20 criterios × {n_rangos} rangos)", config,
+               [_valores(rnd, config) for _ in range(n)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
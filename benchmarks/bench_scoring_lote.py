@@ -0,0 +1,213 @@
+"""
+BENCH_SCORING_LOTE.PY - Scoring por lotes (NumPy) vs calcular_scoring por fila
+===============================================================================
+
+1. Paridad: compara fila por fila calcular_scoring_lote con
+   ScoringService.calcular_scoring (score, score_normalizado, nivel,
+   aprobado, rechazo, factor y puntaje de cada criterio) con igualdad
+   exacta de floats, sobre:
+   - la configuración real de loansi.db (adaptada al formato del
+     servicio, ver bench_scoring_compilado.config_servicio) con columnas
+     como listas mixtas, arreglos NumPy tipados, CSV y JSONL con claves
+     faltantes
+   - configuraciones sintéticas con rangos solapados, huecos, pesos 0,
+     valores mal formados y ambas normalizaciones ("peso" y "maximo")
+2. Throughput: filas por segundo de ambos caminos sobre un lote realista
+
+Trabaja sobre una COPIA temporal de loansi.db.
+
+Uso:
+    python benchmarks/bench_scoring_lote.py
+    python benchmarks/bench_scoring_lote.py --filas 100000
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import numpy as np  # noqa: E402
+
+import database  # noqa: E402
+from bench_scoring_compilado import (  # noqa: E402
+    config_servicio, config_sintetica, valor_aleatorio, valores_realistas,
+)
+
+
+def _igual(a, b):
+    """Igualdad exacta de floats (NaN == NaN)."""
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b and repr(float(a)) == repr(float(b))
+
+
+def _verificar(servicio, columnas, etiqueta):
+    from app.services.scoring_lote import calcular_scoring_lote
+
+    lote = calcular_scoring_lote(servicio.modelo, columnas, desglose=True)
+    listas = {c: (v.tolist() if isinstance(v, np.ndarray) else v) for c, v in columnas.items()}
+    n = len(lote)
+    for i in range(n):
+        valores = {c: v[i] for c, v in listas.items()}
+        esperado = servicio.calcular_scoring(valores)
+        fila = lote.fila(i)
+        puntajes = {e["codigo"]: e["puntaje"] for e in esperado["criterios_evaluados"]}
+        obtenidos = {c: p for c, p in fila["desglose"].items() if not math.isnan(p)}
+        diferencias = [
+            campo for campo in ("score", "score_normalizado")
+            if not _igual(float(esperado[campo]), fila[campo])
+        ] + [
+            campo for campo, clave in (("nivel", "nivel"), ("aprobado", "aprobado"),
+                                       ("rechazo_automatico", "rechazo_automatico"),
+                                       ("factor_rechazo", "factor_rechazo"))
+            if esperado[clave] != fila[campo]
+        ]
+        if puntajes.keys() != obtenidos.keys() or any(
+            not _igual(float(puntajes[c]), obtenidos[c]) for c in puntajes
+        ):
+            diferencias.append("desglose")
+        if diferencias:
+            print(f"❌ {etiqueta}: fila {i} difiere en {diferencias}")
+            print(f"   valores: {valores}")
+            print(f"   escalar: { {k: esperado[k] for k in ('score', 'score_normalizado', 'nivel', 'aprobado', 'factor_rechazo')} }")
+            print(f"   lote:    { {k: fila[k] for k in ('score', 'score_normalizado', 'nivel', 'aprobado', 'factor_rechazo')} }")
+            return 0, False
+    return n, True
+
+
+def _columnas(filas, codigos):
+    return {c: [f.get(c) for f in filas] for c in codigos}
+
+
+def _tipadas(servicio, columnas):
+    """Las mismas columnas como arreglos NumPy: int64 si son enteros, texto si no."""
+    tipadas = {}
+    for codigo, valores in columnas.items():
+        if all(type(v) is int for v in valores):
+            tipadas[codigo] = np.array(valores, dtype=np.int64)
+        elif all(type(v) is str for v in valores):
+            tipadas[codigo] = np.array(valores, dtype=str)
+        elif all(type(v) is float for v in valores):
+            tipadas[codigo] = np.array(valores, dtype=np.float64)
+        else:
+            tipadas[codigo] = np.array(valores, dtype=object)
+    return tipadas
+
+
+def _archivos(tmpdir, filas, codigos):
+    """CSV (todo texto, celdas vacías) y JSONL (claves faltantes) de las filas."""
+    from app.services.scoring_lote import leer_columnas
+
+    ruta_csv = Path(tmpdir) / "leads.csv"
+    with open(ruta_csv, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=codigos)
+        escritor.writeheader()
+        for fila in filas:
+            escritor.writerow({c: ("" if fila.get(c) is None else fila[c]) for c in codigos})
+
+    ruta_jsonl = Path(tmpdir) / "leads.jsonl"
+    with open(ruta_jsonl, "w", encoding="utf-8") as archivo:
+        for fila in filas:
+            archivo.write(json.dumps({c: v for c, v in fila.items() if v is not None}) + "\n")
+
+    return leer_columnas(ruta_csv), leer_columnas(ruta_jsonl)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring por lotes vs por fila")
+    parser.add_argument("--filas", type=int, default=50000)
+    parser.add_argument("--semilla", type=int, default=22)
+    args = parser.parse_args()
+    rnd = random.Random(args.semilla)
+
+    from app.services.scoring_service import ScoringService
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            from db_helpers import cargar_scoring
+            config_real = config_servicio(cargar_scoring())
+        database.cerrar_pool_conexiones()
+
+        servicio = ScoringService(config_real)
+        codigos = list(config_real["criterios"]) + ["capacidad_pago"]
+
+        # 1. Paridad
+        verificadas = 0
+        mixtas = [
+            {c: valor_aleatorio(rnd) for c in codigos if rnd.random() > 0.05} for _ in range(3000)
+        ] + [valores_realistas(rnd, config_real) for _ in range(3000)]
+        realistas_int = [
+            {c: (int(v) if v.isdigit() else v) for c, v in valores_realistas(rnd, config_real).items()}
+            for _ in range(3000)
+        ]
+        for etiqueta, columnas in (
+            ("listas mixtas", _columnas(mixtas, codigos)),
+            ("arreglos tipados", _tipadas(servicio, _columnas(realistas_int, list(config_real["criterios"])))),
+            ("arreglos float", {c: np.array([rnd.choice((0.0, -0.0, 1.5, 3.0, 1e20, float("nan"), float(rnd.randint(0, 999))))
+                                              for _ in range(3000)]) for c in codigos}),
+        ) + tuple(zip(("CSV", "JSONL"), _archivos(tmpdir, mixtas[:3000], codigos))):
+            filas, ok = _verificar(servicio, columnas, etiqueta)
+            if not ok:
+                return 1
+            verificadas += filas
+
+        for _ in range(200):
+            config = config_sintetica(rnd, rnd.randint(1, 12), rnd.randint(0, 12))
+            config["normalizacion"] = rnd.choice(("peso", "maximo"))
+            sintetico = ScoringService(config)
+            columnas = _columnas(
+                [{c: valor_aleatorio(rnd) for c in config["criterios"] if rnd.random() > 0.05}
+                 for _ in range(40)],
+                list(config["criterios"]),
+            )
+            filas, ok = _verificar(sintetico, columnas, "sintética")
+            if not ok:
+                return 1
+            verificadas += filas
+        print(f"✅ Paridad exacta en {verificadas} filas (escalar vs lote)\n")
+
+    # 2. Throughput
+    from app.services.scoring_lote import calcular_scoring_lote
+
+    filas = [valores_realistas(rnd, config_real) for _ in range(args.filas)]
+    columnas = _columnas(filas, list(config_real["criterios"]))
+    muestra = filas[: min(len(filas), 10000)]
+
+    inicio = time.perf_counter()
+    for valores in muestra:
+        servicio.calcular_scoring(valores)
+    por_fila = len(muestra) / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    calcular_scoring_lote(servicio.modelo, columnas)
+    lote = args.filas / (time.perf_counter() - inicio)
+
+    tipadas = {c: np.array(v, dtype=str) for c, v in columnas.items()}
+    inicio = time.perf_counter()
+    calcular_scoring_lote(servicio.modelo, tipadas)
+    lote_tipado = args.filas / (time.perf_counter() - inicio)
+
+    print(f"{args.filas:,} filas, {len(servicio.modelo.criterios)} criterios:")
+    print(f"  calcular_scoring por fila:       {por_fila:>12,.0f} filas/s")
+    print(f"  calcular_scoring_lote (listas):  {lote:>12,.0f} filas/s ({lote / por_fila:.1f}x)")
+    print(f"  calcular_scoring_lote (NumPy):   {lote_tipado:>12,.0f} filas/s ({lote_tipado / por_fila:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+BENCH_SCORING_POST.PY - Latencia de POST /scoring con y sin snapshot
+=====================================================================
+
+Envía N evaluaciones a POST /scoring con el test client de Flask y
+compara:
+
+- sin_cache: se invalida el snapshot antes de cada request, de modo que
+             cada evaluación vuelve a consultar, parsear y ordenar la
+             configuración de scoring (comportamiento anterior)
+- snapshot:  la configuración se sirve del registro compilado por versión
+
+Trabaja sobre una COPIA temporal de loansi.db (cada POST guarda una
+evaluación).
+
+Uso:
+    python benchmarks/bench_scoring_post.py
+    python benchmarks/bench_scoring_post.py --requests 500
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+def _usuario_con_permiso(app, permiso="sco_ejecutar"):
+    """Primer usuario activo que puede ejecutar scoring."""
+    from permisos import obtener_permisos_usuario_completos
+
+    conn = database.conectar_db()
+    try:
+        usuarios = [
+            row[0] for row in conn.execute(
+                "SELECT username FROM usuarios WHERE activo = 1 ORDER BY id"
+            ).fetchall()
+        ]
+    finally:
+        conn.close()
+
+    with app.test_request_context():
+        for username in usuarios:
+            if permiso in obtener_permisos_usuario_completos(username):
+                return username
+    raise SystemExit(f"❌ Ningún usuario tiene el permiso {permiso}")
+
+
+def _formulario(snapshot, n):
+    """Formulario con un valor válido para cada criterio activo."""
+    datos = {
+        "nombre_cliente": f"Cliente bench {n}",
+        "cedula": str(90000000 + n),
+        "linea_credito": "",
+        "monto_solicitado": "3000000",
+    }
+    for codigo, criterio in snapshot.criterios_activos:
+        rangos = criterio.get("rangos") or ()
+        rango = rangos[n % len(rangos)] if rangos else {}
+        valor = rango.get("valor", rango.get("min", 0))
+        datos[codigo] = str(valor if valor is not None else 0)
+    return datos
+
+
+def medir(cliente, snapshot, requests, sin_cache):
+    from db_helpers import invalidar_cache_scoring
+
+    latencias = []
+    for n in range(requests):
+        if sin_cache:
+            invalidar_cache_scoring()
+        inicio = time.perf_counter()
+        respuesta = cliente.post("/scoring", data=_formulario(snapshot, n))
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status_code != 200:
+            raise SystemExit(f"❌ POST /scoring respondió {respuesta.status_code}")
+
+    latencias.sort()
+    return {
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p99_ms": round(latencias[max(0, int(len(latencias) * 0.99) - 1)] * 1000, 2),
+        "promedio_ms": round(statistics.mean(latencias) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de POST /scoring")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+    copia = Path(tmpdir) / "loansi.db"
+    shutil.copy2(database.DB_PATH, copia)
+    database.DB_PATH = copia
+
+    try:
+        # Los prints de la app se silencian para no medir la consola
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app
+            from db_helpers import obtener_snapshot_scoring
+
+            app = create_app()
+            app.config["WTF_CSRF_ENABLED"] = False
+            username = _usuario_con_permiso(app)
+            snapshot = obtener_snapshot_scoring()
+
+            cliente = app.test_client()
+            with cliente.session_transaction() as sesion:
+                sesion["usuario"] = username
+                sesion["username"] = username
+                sesion["autorizado"] = True
+
+            medir(cliente, snapshot, 10, sin_cache=False)  # Calentamiento
+            resultados = {
+                "sin_cache": medir(cliente, snapshot, args.requests, sin_cache=True),
+                "snapshot": medir(cliente, snapshot, args.requests, sin_cache=False),
+            }
+
+        print(f"📊 POST /scoring x {args.requests} (usuario {username})\n")
+        for modo, r in resultados.items():
+            print(
+                f"{modo:>10}: p50 {r['p50_ms']} ms | p99 {r['p99_ms']} ms | "
+                f"promedio {r['promedio_ms']} ms"
+            )
+    finally:
+        from db_writer import detener_escritor
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
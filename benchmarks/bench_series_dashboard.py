@@ -0,0 +1,226 @@
+"""
+BENCH_SERIES_DASHBOARD.PY - Series de tendencia del dashboard
+=============================================================
+
+Sobre una COPIA temporal de loansi.db:
+
+1. Inserta evaluaciones (con decisiones y desembolsos) y simulaciones
+   sintéticas por los triggers y verifica que obtener_series_dashboard()
+   coincide, periodo a periodo, con agrupar las tablas base directamente
+2. Agrega un rollup actividad_diaria grande (--dias x --asesores x 3
+   líneas) y mide la latencia sin cache (fallo) y con cache (acierto) para
+   365 días sobre todo el equipo, por día y por semana, en total, por
+   asesor y por línea
+
+Uso:
+    python benchmarks/bench_series_dashboard.py
+    python benchmarks/bench_series_dashboard.py --asesores 1000 --evaluaciones 50000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+LINEAS = ('LoansiFlex', 'Microflex', 'LoansiMoto')
+
+
+def _poblar_tablas(conn, evaluaciones, simulaciones, asesores):
+    """Filas reales (pasan por los triggers) en los últimos 120 días."""
+    rnd = random.Random(18)
+    nombres = [f"bench_serie{n}" for n in range(asesores)]
+    conn.executemany(
+        "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', 'asesor', ?)",
+        [(u, u.title()) for u in nombres],
+    )
+    linea_sim = conn.execute("SELECT nombre FROM lineas_credito ORDER BY id LIMIT 1").fetchone()[0]
+    ahora = datetime.now()
+
+    filas = []
+    for n in range(evaluaciones):
+        creada = ahora - timedelta(days=rnd.randint(0, 120), minutes=rnd.randint(0, 1440))
+        estado = rnd.choice([None, 'pending', 'approved', 'rejected'])
+        decision = creada + timedelta(days=rnd.randint(0, 3)) if estado in ('approved', 'rejected') else None
+        desembolso = None
+        if estado == 'approved' and rnd.random() < 0.5:
+            desembolso = (decision + timedelta(days=rnd.randint(0, 5))).strftime('%Y-%m-%d %H:%M:%S')
+        filas.append((
+            f"bench-serie-{n}", rnd.choice(nombres), rnd.choice(LINEAS), estado,
+            creada.strftime('%Y-%m-%d %H:%M:%S'),
+            None if decision is None else f'{{"fecha": "{decision.isoformat()}"}}',
+            'desembolsado' if desembolso else None, desembolso, rnd.randint(1, 50) * 100000,
+        ))
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, tipo_credito, resultado, estado_comite, "
+        "fecha_creacion, decision_admin, estado_final, fecha_desembolso, monto_solicitado) "
+        "VALUES (?, ?, ?, '{}', ?, ?, ?, ?, ?, ?)",
+        filas,
+    )
+    conn.executemany(
+        "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) VALUES (?, ?, 1000000, 12, ?)",
+        (
+            ((ahora - timedelta(days=rnd.randint(0, 120), minutes=n % 1440)).isoformat(),
+             rnd.choice(nombres), linea_sim)
+            for n in range(simulaciones)
+        ),
+    )
+    conn.commit()
+    return nombres
+
+
+def _referencia(conn, asesores, desde, hasta, periodos, semana):
+    """Series totales agrupando las tablas base (sin rollup)."""
+    def periodo(sql_fecha):
+        return f"date({sql_fecha}, 'weekday 0', '-6 days')" if semana else sql_fecha
+
+    alcance = "asesor IN (SELECT value FROM json_each(?))"
+    import json
+    params = (json.dumps(asesores), desde, hasta)
+    consultas = {
+        'evaluaciones': f"""
+            SELECT {periodo("date(fecha_creacion, '-5 hours')")} p, COUNT(*) FROM evaluaciones
+            WHERE {alcance} AND date(fecha_creacion, '-5 hours') >= ? AND date(fecha_creacion, '-5 hours') < ?
+            GROUP BY p""",
+        'aprobaciones': f"""
+            SELECT {periodo("substr(decision_admin_fecha, 1, 10)")} p, COUNT(*) FROM evaluaciones
+            WHERE {alcance} AND estado_comite = 'approved'
+              AND substr(decision_admin_fecha, 1, 10) >= ? AND substr(decision_admin_fecha, 1, 10) < ?
+            GROUP BY p""",
+        'simulaciones': f"""
+            SELECT {periodo("substr(timestamp, 1, 10)")} p, COUNT(*) FROM simulaciones
+            WHERE {alcance} AND substr(timestamp, 1, 10) >= ? AND substr(timestamp, 1, 10) < ?
+            GROUP BY p""",
+        'desembolsos': f"""
+            SELECT {periodo("substr(fecha_desembolso, 1, 10)")} p, COUNT(*) FROM evaluaciones
+            WHERE {alcance} AND estado_final = 'desembolsado'
+              AND fecha_desembolso >= ? AND fecha_desembolso < ?
+            GROUP BY p""",
+        'monto_desembolsado': f"""
+            SELECT {periodo("substr(fecha_desembolso, 1, 10)")} p, SUM(monto_solicitado) FROM evaluaciones
+            WHERE {alcance} AND estado_final = 'desembolsado'
+              AND fecha_desembolso >= ? AND fecha_desembolso < ?
+            GROUP BY p""",
+    }
+    posicion = {p: i for i, p in enumerate(periodos)}
+    series = {}
+    for metrica, sql in consultas.items():
+        valores = [0] * len(periodos)
+        for p, total in conn.execute(sql, params):
+            if p in posicion:
+                valores[posicion[p]] = total
+        series[metrica] = valores
+    return series
+
+
+def _poblar_rollup(conn, dias, asesores):
+    """Rollup sintético grande (asesores bench_rollup*)."""
+    rnd = random.Random(181)
+    nombres = [f"bench_rollup{n}" for n in range(asesores)]
+    hoy = date.today()
+    conn.executemany(
+        "INSERT OR IGNORE INTO actividad_diaria (fecha, asesor, linea, evaluaciones, simulaciones, "
+        "decisiones_aprobadas) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            ((hoy - timedelta(days=d)).isoformat(), asesor, linea,
+             rnd.randint(0, 5), rnd.randint(0, 20), rnd.randint(0, 2))
+            for d in range(dias) for asesor in nombres for linea in LINEAS
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return nombres
+
+
+def _medir(funcion, repeticiones, antes=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de series de tendencia")
+    parser.add_argument("--evaluaciones", type=int, default=20000)
+    parser.add_argument("--simulaciones", type=int, default=50000)
+    parser.add_argument("--asesores", type=int, default=500,
+                        help="Asesores del rollup grande")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+
+        import db_helpers_dashboard as dashboard
+        import db_lectura
+
+        conn = database.conectar_db()
+        try:
+            reales = _poblar_tablas(conn, args.evaluaciones, args.simulaciones, 40)
+
+            # 1. Paridad con las tablas base
+            errores = []
+            for granularidad in dashboard.GRANULARIDADES_SERIES:
+                for dias in dashboard.RANGOS_SERIES:
+                    serie = dashboard.obtener_series_dashboard(reales, dias, granularidad)
+                    hasta = (date.fromisoformat(serie['hasta']) + timedelta(days=1)).isoformat()
+                    esperado = _referencia(conn, reales, serie['desde'], hasta, serie['periodos'],
+                                           granularidad == 'semana')
+                    total = serie['series'][0]
+                    for metrica, valores in esperado.items():
+                        if total[metrica] != valores:
+                            errores.append(f"{granularidad}/{dias}: {metrica}")
+            if errores:
+                print("❌ Series distintas a las tablas base: " + ", ".join(errores))
+                return 1
+            print(f"✅ Paridad con las tablas base ({args.evaluaciones} evaluaciones, "
+                  f"{args.simulaciones} simulaciones; día/semana x 30/90/365)")
+
+            # 2. Latencia con un rollup grande
+            equipo = _poblar_rollup(conn, args.dias, args.asesores)
+            filas = conn.execute("SELECT COUNT(*) FROM actividad_diaria").fetchone()[0]
+        finally:
+            conn.close()
+
+        print(f"\nRollup: {filas} filas; equipo de {len(equipo)} asesores, 365 días")
+        print(f"{'consulta':>22} {'sin cache (ms)':>15} {'con cache (ms)':>15} {'series':>7} {'puntos':>8}")
+        vaciar = dashboard._series_cache.clear
+        for granularidad in dashboard.GRANULARIDADES_SERIES:
+            for agrupar in dashboard.AGRUPACIONES_SERIES:
+                def llamada():
+                    return dashboard.obtener_series_dashboard(equipo, 365, granularidad, agrupar)
+                frio = _medir(llamada, args.repeticiones, antes=vaciar)
+                caliente = _medir(llamada, args.repeticiones)
+                resultado = llamada()
+                puntos = len(resultado['series']) * len(resultado['periodos'])
+                print(f"{granularidad + '/' + str(agrupar or 'total'):>22} {frio:>15.2f} "
+                      f"{caliente:>15.3f} {len(resultado['series']):>7} {puntos:>8}")
+
+        db_lectura.cerrar_lectores()
+        database.cerrar_pool_conexiones()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+BENCH_SSE_EVENTOS.PY - Suscriptores SSE inactivos y entrega de eventos
+======================================================================
+
+Levanta la app sobre una COPIA temporal de loansi.db con el servidor de
+Werkzeug con hilos (el mismo de run.py) en un puerto local y:
+
+1. Abre --suscriptores conexiones a /api/eventos (sockets crudos con una
+   cookie de sesión firmada), repartidas entre --asesores asesores
+   sintéticos y un 10 % de miembros del comité
+2. Las deja inactivas --inactivo segundos con pings cada --keepalive
+   segundos y mide CPU del proceso, memoria (RSS), hilos y pings recibidos
+3. Publica --eventos decisiones de comité (publicar_decision_comite, con
+   el recálculo de badges) y mide la latencia hasta que cada destinatario
+   recibe su evento
+4. Como referencia, mide el costo de un poll a
+   /asesor/api/casos-comite/cambios por el mismo servidor y estima la
+   carga de que las mismas pestañas consultaran cada 15 segundos
+
+Uso:
+    python benchmarks/bench_sse_eventos.py
+    python benchmarks/bench_sse_eventos.py --suscriptores 800 --inactivo 30
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import resource
+import selectors
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+INTERVALO_POLLING = 15.0  # Segundos entre polls de mis_casos_comite.html
+
+
+def _rss_kb():
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith("VmRSS:"):
+                return int(linea.split()[1])
+    return 0
+
+
+def _cpu():
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    return uso.ru_utime + uso.ru_stime
+
+
+class Lector:
+    """Un hilo con selectors que lee todas las conexiones SSE del benchmark."""
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.pings = 0
+        self.conectados = 0
+        self.recibidos = {}       # id de evento -> [instante de recepción]
+        self._buffers = {}
+        self._activo = True
+        self._hilo = threading.Thread(target=self._leer, daemon=True)
+        self._hilo.start()
+
+    def agregar(self, sock):
+        sock.setblocking(False)
+        self._buffers[sock] = b""
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def _procesar(self, bloque):
+        ahora = time.perf_counter()
+        if b": ping" in bloque:
+            self.pings += 1
+        elif b": conectado" in bloque:
+            self.conectados += 1
+        for linea in bloque.split(b"\n"):
+            if linea.startswith(b"id: "):
+                self.recibidos.setdefault(int(linea[4:]), []).append(ahora)
+
+    def _leer(self):
+        while self._activo:
+            for clave, _ in self.selector.select(timeout=0.2):
+                sock = clave.fileobj
+                try:
+                    datos = sock.recv(65536)
+                except (BlockingIOError, ConnectionError):
+                    continue
+                if not datos:
+                    self.selector.unregister(sock)
+                    continue
+                buffer = self._buffers[sock] + datos
+                *bloques, resto = buffer.split(b"\n\n")
+                self._buffers[sock] = resto
+                for bloque in bloques:
+                    self._procesar(bloque)
+
+    def cerrar(self):
+        self._activo = False
+        self._hilo.join()
+        for sock in list(self._buffers):
+            sock.close()
+
+
+def _cookie_sesion(app, username, rol):
+    serializador = app.session_interface.get_signing_serializer(app)
+    valor = serializador.dumps({"autorizado": True, "username": username, "rol": rol})
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={valor}"
+
+
+def _abrir(puerto, cookie):
+    sock = socket.create_connection(("127.0.0.1", puerto))
+    sock.sendall(
+        f"GET /api/eventos HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n"
+        f"Cookie: {cookie}\r\n\r\n".encode()
+    )
+    return sock
+
+
+def _medir_poll(puerto, cookie, repeticiones):
+    """Tiempo de pared y CPU por GET /asesor/api/casos-comite/cambios."""
+    import http.client
+    conn = http.client.HTTPConnection("127.0.0.1", puerto)
+    tiempos, cpu_inicio = [], _cpu()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conn.request("GET", "/asesor/api/casos-comite/cambios", headers={"Cookie": cookie})
+        respuesta = conn.getresponse()
+        respuesta.read()
+        tiempos.append(time.perf_counter() - inicio)
+        if respuesta.getheader("Connection", "").lower() == "close" or respuesta.version == 10:
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", puerto)
+    conn.close()
+    return statistics.median(tiempos) * 1000, (_cpu() - cpu_inicio) / repeticiones * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de suscriptores SSE")
+    parser.add_argument("--suscriptores", type=int, default=400)
+    parser.add_argument("--asesores", type=int, default=150)
+    parser.add_argument("--inactivo", type=float, default=10.0,
+                        help="Segundos de la fase inactiva")
+    parser.add_argument("--keepalive", type=float, default=2.0,
+                        help="Segundos entre pings (en producción: bus_eventos.KEEPALIVE_SEGUNDOS)")
+    parser.add_argument("--eventos", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+
+        from werkzeug.serving import make_server
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app
+            app = create_app()
+        import bus_eventos
+        bus_eventos.KEEPALIVE_SEGUNDOS = args.keepalive
+        bus_eventos.MAX_SUSCRIPCIONES = max(bus_eventos.MAX_SUSCRIPCIONES, args.suscriptores + 10)
+
+        asesores = [f"bench_sse{n}" for n in range(args.asesores)]
+        conn = database.conectar_db()
+        try:
+            conn.executemany(
+                "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', 'asesor', ?)",
+                [(u, u.title()) for u in asesores],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        servidor = make_server("127.0.0.1", 0, app, threaded=True)
+        puerto = servidor.server_port
+        hilo_servidor = threading.Thread(target=servidor.serve_forever, daemon=True)
+        hilo_servidor.start()
+
+        lector = Lector()
+        rss_inicio, hilos_inicio = _rss_kb(), threading.active_count()
+        inicio = time.perf_counter()
+        destinos = []
+        for n in range(args.suscriptores):
+            if n % 10 == 9:
+                username, rol = f"bench_comite{n}", "comite_credito"
+            else:
+                username, rol = asesores[n % len(asesores)], "asesor"
+            destinos.append((username, rol))
+            lector.agregar(_abrir(puerto, _cookie_sesion(app, username, rol)))
+        while lector.conectados < args.suscriptores and time.perf_counter() - inicio < 30:
+            time.sleep(0.05)
+        conexion_s = time.perf_counter() - inicio
+        if lector.conectados < args.suscriptores:
+            print(f"❌ Solo {lector.conectados}/{args.suscriptores} suscriptores conectados")
+            return 1
+        print(f"✅ {args.suscriptores} suscriptores conectados en {conexion_s:.2f} s")
+
+        # 1. Fase inactiva
+        time.sleep(0.5)
+        pings_inicio, cpu_inicio = lector.pings, _cpu()
+        time.sleep(args.inactivo)
+        cpu_inactivo = _cpu() - cpu_inicio
+        pings = lector.pings - pings_inicio
+        rss_delta = _rss_kb() - rss_inicio
+        hilos = threading.active_count() - hilos_inicio
+        esperados = args.suscriptores * args.inactivo / args.keepalive
+        stats_bus = bus_eventos.obtener_estadisticas_bus()
+        print(f"\nInactivos {args.inactivo:.0f} s (ping cada {args.keepalive:g} s):")
+        print(f"  CPU del proceso: {cpu_inactivo * 1000:.0f} ms "
+              f"({cpu_inactivo / args.inactivo:.1%} de un núcleo; incluye el lector del benchmark)")
+        print(f"  Pings recibidos: {pings} (esperados ≈ {esperados:.0f})")
+        print(f"  Memoria: +{rss_delta / 1024:.1f} MB RSS (≈ {rss_delta / args.suscriptores:.0f} KB"
+              f" por conexión), +{hilos} hilos")
+        print(f"  Suscripciones abiertas en el bus: {stats_bus['suscripciones_abiertas']}")
+
+        # 2. Entrega de eventos (decisiones de comité con recálculo de badges)
+        rnd = random.Random(20)
+        latencias, esperados_por_evento = [], []
+        for n in range(args.eventos):
+            asesor = rnd.choice(asesores)
+            receptores = sum(1 for u, r in destinos if u == asesor or r == "comite_credito")
+            publicado = time.perf_counter()
+            id_previo = bus_eventos.obtener_estadisticas_bus()["ultimo_id"]
+            bus_eventos.publicar_decision_comite(
+                {"timestamp": f"bench-sse-{n}", "asesor": asesor, "nombre_cliente": "Cliente"},
+                rnd.choice(["approved", "rejected"]),
+            )
+            id_evento = id_previo + 1
+            limite = time.perf_counter() + 5
+            while len(lector.recibidos.get(id_evento, ())) < receptores and time.perf_counter() < limite:
+                time.sleep(0.001)
+            llegadas = lector.recibidos.get(id_evento, [])
+            latencias += [(t - publicado) * 1000 for t in llegadas]
+            esperados_por_evento.append((receptores, len(llegadas)))
+        perdidos = sum(e - r for e, r in esperados_por_evento)
+        latencias.sort()
+        print(f"\n{args.eventos} decisiones publicadas ({sum(e for e, _ in esperados_por_evento)} entregas):")
+        print(f"  Latencia publicar→recibir: p50 {latencias[len(latencias) // 2]:.1f} ms, "
+              f"p95 {latencias[int(len(latencias) * 0.95)]:.1f} ms, máx {latencias[-1]:.1f} ms")
+        if perdidos:
+            print(f"❌ {perdidos} entregas no llegaron")
+
+        # 3. Referencia: polling de las mismas pestañas
+        ms_poll, cpu_poll = _medir_poll(puerto, _cookie_sesion(app, asesores[0], "asesor"), 200)
+        polls_por_segundo = args.suscriptores / INTERVALO_POLLING
+        print(f"\nReferencia polling (cada {INTERVALO_POLLING:g} s): {ms_poll:.2f} ms y "
+              f"{cpu_poll:.2f} ms de CPU por poll → {polls_por_segundo:.0f} requests/s, "
+              f"≈ {polls_por_segundo * cpu_poll / 1000:.1%} de un núcleo y "
+              f"{polls_por_segundo:.0f} consultas/s a la base")
+
+        lector.cerrar()
+        servidor.shutdown()
+        bus_eventos.cerrar_suscripciones()
+        from db_writer import detener_escritor
+        with contextlib.redirect_stdout(io.StringIO()):
+            detener_escritor()
+        database.cerrar_pool_conexiones()
+
+    return 1 if perdidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
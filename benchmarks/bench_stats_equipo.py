@@ -0,0 +1,179 @@
+"""
+BENCH_STATS_EQUIPO.PY - Stats por usuario (N+1) vs stats de equipo agrupadas
+=============================================================================
+
+Sobre una COPIA temporal de loansi.db agrega supervisores sintéticos con
+equipos de 10, 100 y 1000 asesores (con evaluaciones y simulaciones) y mide
+obtener_usuarios_asignados_detalle():
+
+- antes:   seis COUNT/MAX por asesor (implementación previa de
+           obtener_stats_usuario_rapido, replicada aquí con los mismos
+           rangos de fecha en hora Colombia para poder comparar resultados)
+- después: obtener_stats_equipo(), dos consultas agrupadas para el equipo
+
+Uso:
+    python benchmarks/bench_stats_equipo.py
+    python benchmarks/bench_stats_equipo.py --tamanos 10 100 1000 --evaluaciones 40
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+def _stats_por_usuario_anterior(cursor, username, limites):
+    """Implementación previa: seis consultas por usuario."""
+    stats = {}
+    cursor.execute("""
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE asesor = ? AND fecha_creacion >= ? AND fecha_creacion < ?
+    """, (username, limites['hoy_utc'], limites['manana_utc']))
+    stats['evaluaciones_hoy'] = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE asesor = ? AND fecha_creacion >= ?
+    """, (username, limites['semana_utc']))
+    stats['evaluaciones_semana'] = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE asesor = ? AND fecha_creacion >= ?
+    """, (username, limites['mes_utc']))
+    stats['evaluaciones_mes'] = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM simulaciones
+        WHERE asesor = ? AND timestamp >= ? AND timestamp < ?
+    """, (username, limites['hoy'], limites['manana']))
+    stats['simulaciones_hoy'] = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM evaluaciones
+        WHERE asesor = ? AND estado_comite = 'pending'
+    """, (username,))
+    stats['casos_pendientes'] = cursor.fetchone()[0]
+    cursor.execute("SELECT MAX(fecha_creacion) FROM evaluaciones WHERE asesor = ?", (username,))
+    stats['ultima_actividad'] = cursor.fetchone()[0]
+    stats['activo_hoy'] = stats['evaluaciones_hoy'] > 0 or stats['simulaciones_hoy'] > 0
+    return stats
+
+
+def _poblar(conn, max_equipo, evaluaciones_por_asesor):
+    linea = conn.execute("SELECT nombre FROM lineas_credito ORDER BY id LIMIT 1").fetchone()[0]
+    rnd = random.Random(7)
+    ahora = datetime.now()
+
+    for tamano in (10, 100, 1000):
+        if tamano > max_equipo:
+            break
+        supervisor = f"bench_sup{tamano}"
+        conn.execute(
+            "INSERT INTO usuarios (username, password_hash, rol) VALUES (?, 'x', 'supervisor')",
+            (supervisor,),
+        )
+        for i in range(tamano):
+            asesor = f"bench_ase{tamano}_{i}"
+            conn.execute(
+                "INSERT INTO usuarios (username, password_hash, rol, nombre_completo) VALUES (?, 'x', 'asesor', ?)",
+                (asesor, f"Asesor {i}"),
+            )
+            conn.execute(
+                "INSERT INTO user_assignments (manager_username, member_username) VALUES (?, ?)",
+                (supervisor, asesor),
+            )
+            for n in range(evaluaciones_por_asesor):
+                fecha = ahora - timedelta(days=rnd.randint(0, 90), minutes=rnd.randint(0, 600))
+                conn.execute(
+                    "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, fecha_creacion) "
+                    "VALUES (?, ?, '{}', ?, ?)",
+                    (f"{asesor}-{n}", asesor, rnd.choice([None, 'pending', 'approved']),
+                     fecha.strftime('%Y-%m-%d %H:%M:%S')),
+                )
+                conn.execute(
+                    "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+                    "VALUES (?, ?, 1000000, 12, ?)",
+                    (fecha.isoformat(), asesor, linea),
+                )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de stats de equipo")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--evaluaciones", type=int, default=40,
+                        help="Evaluaciones (y simulaciones) por asesor")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_bench_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+        conn = sqlite3.connect(database.DB_PATH)
+        _poblar(conn, max(args.tamanos), args.evaluaciones)
+        conn.close()
+
+        from db_helpers_dashboard import (
+            _limites_periodos,
+            obtener_stats_equipo,
+            obtener_usuarios_asignados_detalle,
+        )
+        limites = _limites_periodos()
+
+        print(f"{'equipo':>7} {'antes (ms)':>12} {'después (ms)':>14} {'consultas antes':>16} {'mejora':>8}")
+        for tamano in args.tamanos:
+            supervisor = f"bench_sup{tamano}"
+            conn = database.conectar_db()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT member_username FROM user_assignments WHERE manager_username = ?",
+                    (supervisor,),
+                )
+                equipo = [row[0] for row in cursor.fetchall()]
+
+                # Verificación: ambas implementaciones deben coincidir
+                nuevas = obtener_stats_equipo(cursor, equipo)
+                for username in equipo:
+                    if _stats_por_usuario_anterior(cursor, username, limites) != nuevas[username]:
+                        raise SystemExit(f"❌ Stats distintas para {username}")
+
+                antes = _medir(
+                    lambda: [_stats_por_usuario_anterior(cursor, u, limites) for u in equipo],
+                    args.repeticiones,
+                )
+            finally:
+                conn.close()
+
+            despues = _medir(lambda: obtener_usuarios_asignados_detalle(supervisor), args.repeticiones)
+            print(f"{tamano:>7} {antes:>12.2f} {despues:>14.2f} {tamano * 6:>16} {antes / despues:>7.1f}x")
+
+        database.cerrar_pool_conexiones()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+BENCH_WRITE_BEHIND.PY - Tiempo de respuesta del simulador con write-behind
+==========================================================================
+
+Envía simulaciones de asesor (POST /calcular_asesor con caso de origen, que
+guarda la simulación en el historial) desde varios hilos y compara:
+
+- sincrono:     la simulación se confirma antes de renderizar
+- write_behind: la simulación se encola y se persiste en segundo plano
+
+Trabaja sobre una COPIA temporal de loansi.db y verifica al final que todas
+las simulaciones diferidas quedaron guardadas.
+
+Uso:
+    python benchmarks/bench_write_behind.py
+    python benchmarks/bench_write_behind.py --hilos 8 --requests 100
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+def _usuario_con_permiso(app, permiso="sim_usar"):
+    """Primer usuario activo con el permiso indicado."""
+    from permisos import obtener_permisos_usuario_completos
+
+    conn = database.conectar_db()
+    try:
+        usuarios = [
+            row[0] for row in conn.execute(
+                "SELECT username FROM usuarios WHERE activo = 1 ORDER BY id"
+            ).fetchall()
+        ]
+    finally:
+        conn.close()
+
+    with app.test_request_context():
+        for username in usuarios:
+            if permiso in obtener_permisos_usuario_completos(username):
+                return username
+    raise SystemExit(f"❌ Ningún usuario tiene el permiso {permiso}")
+
+
+def _formulario_base():
+    """Línea de crédito y caso de origen reales para el formulario."""
+    from db_helpers import cargar_configuracion
+
+    linea, datos = next(iter(cargar_configuracion()["LINEAS_CREDITO"].items()))
+    conn = database.conectar_db()
+    try:
+        caso = conn.execute(
+            "SELECT timestamp FROM evaluaciones ORDER BY timestamp DESC LIMIT 1"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        "tipo_credito": linea,
+        "monto": str(int(datos["monto_min"])),
+        "plazo": str(int(datos["plazo_min"])),
+        "fecha_nacimiento": "1990-01-01",
+        "modalidad_desembolso": "completo",
+        "timestamp_caso": caso,
+        "nombre_cliente": "Cliente bench",
+        "cedula_cliente": "1000000",
+    }
+
+
+def _contar_simulaciones():
+    conn = database.conectar_db()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM simulaciones").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def medir(app, username, formulario, hilos, requests):
+    """Lanza `hilos` clientes con `requests` simulaciones cada uno."""
+    latencias = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(hilos)
+
+    def trabajador():
+        cliente = app.test_client()
+        with cliente.session_transaction() as sesion:
+            sesion["username"] = username
+            sesion["autorizado"] = True
+        propias = []
+        barrera.wait()
+        for _ in range(requests):
+            inicio = time.perf_counter()
+            respuesta = cliente.post("/calcular_asesor", data=formulario)
+            propias.append(time.perf_counter() - inicio)
+            if respuesta.status_code != 200:
+                raise SystemExit(f"❌ /calcular_asesor respondió {respuesta.status_code}")
+        with lock:
+            latencias.extend(propias)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p99_ms": round(latencias[max(0, int(len(latencias) * 0.99) - 1)] * 1000, 2),
+        "req_por_s": round(len(latencias) / duracion, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de write-behind de simulaciones")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="Requests por hilo")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+    copia = Path(tmpdir) / "loansi.db"
+    shutil.copy2(database.DB_PATH, copia)
+    database.DB_PATH = copia
+    total = args.hilos * args.requests
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import create_app
+            from db_escritura_diferida import (
+                configurar_escritura_diferida,
+                detener_escritura_diferida,
+                obtener_estadisticas_escritura_diferida,
+            )
+
+            app = create_app()
+            app.config["WTF_CSRF_ENABLED"] = False
+            username = _usuario_con_permiso(app)
+            with app.app_context():
+                formulario = _formulario_base()
+
+            medir(app, username, formulario, 1, 5)  # Calentamiento
+            antes = _contar_simulaciones()
+            sincrono = medir(app, username, formulario, args.hilos, args.requests)
+
+            configurar_escritura_diferida(Path(tmpdir) / "spill")
+            intermedio = _contar_simulaciones()
+            diferido = medir(app, username, formulario, args.hilos, args.requests)
+            detener_escritura_diferida()
+            stats = obtener_estadisticas_escritura_diferida()
+            final = _contar_simulaciones()
+
+        print(f"📊 POST /calcular_asesor: {args.hilos} hilos x {args.requests} requests\n")
+        for modo, r in (("sincrono", sincrono), ("write_behind", diferido)):
+            print(f"{modo:>13}: p50 {r['p50_ms']} ms | p99 {r['p99_ms']} ms | {r['req_por_s']} req/s")
+        print(f"\n✍️ Guardadas: síncrono {intermedio - antes}/{total}, "
+              f"write-behind {final - intermedio}/{total}")
+        print(f"   Write-behind: {stats}")
+    finally:
+        from db_writer import detener_escritor
+        detener_escritor()
+        database.cerrar_pool_conexiones()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
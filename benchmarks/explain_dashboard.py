@@ -0,0 +1,239 @@
+"""
+EXPLAIN_DASHBOARD.PY - Verifica que las consultas de dashboard usen índices
+===========================================================================
+
+Ejecuta los helpers de dashboard y de estados para cada rol sobre una COPIA
+temporal de loansi.db (con migraciones aplicadas y filas sintéticas para que
+el planificador tenga volumen real), captura cada SELECT que emiten y corre
+EXPLAIN QUERY PLAN sobre él.
+
+Falla (código de salida 1) si alguna consulta con WHERE recorre completas
+evaluaciones, simulaciones o actividad_diaria (SCAN, aunque sea sobre un índice cubriente)
+en lugar de buscar por índice (SEARCH), por ejemplo al volver a envolver
+la columna en DATE() o strftime().
+
+Uso:
+    python benchmarks/explain_dashboard.py
+    python benchmarks/explain_dashboard.py --filas 50000 --verbose
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import re
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+TABLAS_VIGILADAS = {"evaluaciones", "simulaciones", "actividad_diaria"}
+
+# "SCAN evaluaciones" / "SCAN e USING COVERING INDEX ..." recorren todas las filas
+_RE_SCAN = re.compile(r"^SCAN (\w+)\b")
+_RE_ALIAS = re.compile(r"\b(evaluaciones|simulaciones|actividad_diaria)\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+_PALABRAS_SQL = {"where", "left", "join", "inner", "group", "order", "limit", "on", "set"}
+
+
+def _poblar(conn, filas):
+    """Agrega evaluaciones y simulaciones sintéticas repartidas en 90 días."""
+    asesores = [row[0] for row in conn.execute(
+        "SELECT username FROM usuarios WHERE activo = 1"
+    ).fetchall()]
+    linea = conn.execute("SELECT nombre FROM lineas_credito ORDER BY id LIMIT 1").fetchone()[0]
+    rnd = random.Random(11)
+    ahora = datetime.now()
+
+    evaluaciones, simulaciones = [], []
+    for n in range(filas):
+        asesor = rnd.choice(asesores)
+        fecha = ahora - timedelta(days=rnd.randint(0, 90), minutes=rnd.randint(0, 1440))
+        estado = rnd.choice([None, None, 'pending', 'approved', 'rejected'])
+        decision = fecha.isoformat() if estado in ('approved', 'rejected') else None
+        final = rnd.choice([None, None, 'desembolsado', 'desistido']) if estado == 'approved' else None
+        evaluaciones.append((
+            f"explain-{n}", asesor, estado, fecha.strftime('%Y-%m-%d %H:%M:%S'),
+            None if decision is None else f'{{"fecha": "{decision}"}}', final,
+        ))
+        simulaciones.append((fecha.isoformat() + "-05:00", asesor, linea))
+
+    conn.executemany(
+        "INSERT INTO evaluaciones (timestamp, asesor, resultado, estado_comite, fecha_creacion, "
+        "decision_admin, estado_final) VALUES (?, ?, '{}', ?, ?, ?, ?)",
+        evaluaciones,
+    )
+    conn.executemany(
+        "INSERT INTO simulaciones (timestamp, asesor, monto, plazo, linea_credito) "
+        "VALUES (?, ?, 1000000, 12, ?)",
+        simulaciones,
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def _capturar_consultas(llamadas):
+    """Ejecuta las llamadas registrando cada SELECT (o WITH) emitido por sus conexiones."""
+    import db_helpers_dashboard
+    import db_helpers_estados
+    import db_lectura
+
+    consultas = {}
+    originales = {}
+    conectar_db = database.conectar_db
+    # Lotes en línea (sin pool): sus consultas pasan por database.conectar_db
+    hilos_lectura, db_lectura.MAX_HILOS_LECTURA = db_lectura.MAX_HILOS_LECTURA, 0
+
+    def conectar_con_traza():
+        conn = conectar_db()
+        conn.set_trace_callback(
+            lambda sql: consultas.setdefault(" ".join(sql.split()), etiqueta)
+            if sql.lstrip().upper().startswith(("SELECT", "WITH")) else None
+        )
+        return conn
+
+    for modulo in (db_helpers_dashboard, db_helpers_estados, database):
+        originales[modulo] = modulo.conectar_db
+        modulo.conectar_db = conectar_con_traza
+    try:
+        for etiqueta, funcion, args in llamadas:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcion(*args)
+    finally:
+        for modulo, original in originales.items():
+            modulo.conectar_db = original
+        db_lectura.MAX_HILOS_LECTURA = hilos_lectura
+        conn = database.conectar_db()
+        conn.set_trace_callback(None)
+        conn.close()
+    return consultas
+
+
+def _recorridos_completos(cursor, sql):
+    """Pasos del plan que recorren completa una tabla vigilada."""
+    nombres = set(TABLAS_VIGILADAS)
+    for tabla, alias in _RE_ALIAS.findall(sql):
+        if alias.lower() not in _PALABRAS_SQL:
+            nombres.add(alias)
+
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+    plan = [row[3] for row in cursor.fetchall()]
+    if " WHERE " not in sql.upper():
+        return plan, []  # Totales sin filtro: recorrer es lo esperado
+
+    malos = []
+    for detalle in plan:
+        match = _RE_SCAN.match(detalle)
+        if match and match.group(1) in nombres:
+            malos.append(detalle)
+    return plan, malos
+
+
+def _llamadas():
+    """Funciones de dashboard a verificar, con un usuario real por rol."""
+    from db_helpers_dashboard import (
+        obtener_estadisticas_por_rol,
+        obtener_jerarquia_gerente,
+        obtener_resumen_navbar,
+        obtener_series_dashboard,
+        obtener_usuarios_asignados_detalle,
+    )
+    from db_helpers_estados import (
+        obtener_casos_por_estado_final,
+        obtener_estadisticas_estados,
+        obtener_resumen_asesor,
+    )
+
+    conn = database.conectar_db()
+    try:
+        usuarios = {}
+        for rol, username in conn.execute(
+            "SELECT u.rol, u.username FROM usuarios u "
+            "LEFT JOIN user_assignments ua ON ua.manager_username = u.username AND ua.activo = 1 "
+            "WHERE u.activo = 1 GROUP BY u.username ORDER BY COUNT(ua.id) DESC"
+        ).fetchall():
+            usuarios.setdefault(rol, username)
+    finally:
+        conn.close()
+
+    hoy = datetime.now().strftime('%Y-%m-%d')
+    llamadas = []
+    for rol, username in sorted(usuarios.items()):
+        llamadas.append((f"por_rol[{rol}]", obtener_estadisticas_por_rol, (rol, username)))
+        llamadas.append((f"navbar[{rol}]", obtener_resumen_navbar, (rol, username)))
+        if rol in ('supervisor', 'gerente'):
+            llamadas.append((f"asignados[{rol}]", obtener_usuarios_asignados_detalle, (username,)))
+        if rol == 'gerente':
+            llamadas.append(("jerarquia[gerente]", obtener_jerarquia_gerente, (username,)))
+
+    asesor = usuarios.get('asesor', next(iter(usuarios.values())))
+    llamadas += [
+        ("estados.resumen_asesor", obtener_resumen_asesor, (asesor,)),
+        ("estados.estadisticas", obtener_estadisticas_estados, ()),
+        ("series[todos]", obtener_series_dashboard, (None, 90, 'semana', 'linea')),
+        ("series[asesor]", obtener_series_dashboard, ([asesor], 30, 'dia')),
+        ("estados.casos", obtener_casos_por_estado_final, (
+            'pendiente_desembolso', {'asesor': asesor, 'fecha_desde': hoy, 'fecha_hasta': hoy},
+        )),
+    ]
+    return llamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN de las consultas de dashboard")
+    parser.add_argument("--filas", type=int, default=20000,
+                        help="Evaluaciones (y simulaciones) sintéticas a agregar")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar el plan de cada consulta")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loansi_explain_") as tmpdir:
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+        conn = database.conectar_db()
+        try:
+            _poblar(conn, args.filas)
+        finally:
+            conn.close()
+
+        consultas = _capturar_consultas(_llamadas())
+
+        conn = database.conectar_db()
+        fallas = []
+        try:
+            cursor = conn.cursor()
+            for sql, etiqueta in consultas.items():
+                if not any(tabla in sql for tabla in TABLAS_VIGILADAS):
+                    continue
+                plan, malos = _recorridos_completos(cursor, sql)
+                if malos:
+                    fallas.append((etiqueta, sql, malos))
+                if args.verbose or malos:
+                    icono = "❌" if malos else "✅"
+                    print(f"{icono} [{etiqueta}] {sql[:110]}")
+                    for detalle in plan:
+                        print(f"      {detalle}")
+        finally:
+            conn.close()
+            database.cerrar_pool_conexiones()
+
+    revisadas = sum(1 for sql in consultas if any(t in sql for t in TABLAS_VIGILADAS))
+    if fallas:
+        print(f"\n❌ {len(fallas)} de {revisadas} consultas recorren la tabla completa")
+        return 1
+    print(f"✅ {revisadas} consultas de dashboard filtran por índice")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
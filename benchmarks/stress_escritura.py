@@ -0,0 +1,190 @@
+"""
+STRESS_ESCRITURA.PY - Benchmark de escrituras concurrentes
+===========================================================
+
+Lanza N hilos escritores simultáneos contra loansi.db y compara:
+
+- directo:  cada escritor abre su propia conexión y hace su commit
+            (comportamiento anterior a db_writer)
+- escritor: todas las escrituras pasan por el escritor único con
+            group commit y reintentos
+
+Por defecto trabaja sobre una COPIA temporal de loansi.db para no
+ensuciar los datos reales; usar --en-sitio para escribir en la base real.
+
+Uso:
+    python benchmarks/stress_escritura.py --escritores 16 --operaciones 200
+    python benchmarks/stress_escritura.py --modo escritor --escritores 32
+"""
+
+import argparse
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+# Asesor y línea reales (las FKs de simulaciones están activas)
+DATOS_BASE = {"asesor": None, "linea_credito": None}
+
+
+def _cargar_datos_base():
+    conn = database.conectar_db()
+    try:
+        DATOS_BASE["asesor"] = conn.execute(
+            "SELECT username FROM usuarios ORDER BY id LIMIT 1"
+        ).fetchone()[0]
+        DATOS_BASE["linea_credito"] = conn.execute(
+            "SELECT nombre FROM lineas_credito ORDER BY id LIMIT 1"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _simulacion_prueba(escritor_id, n):
+    return {
+        "timestamp": f"bench-{escritor_id}-{n}-{time.time_ns()}",
+        "asesor": DATOS_BASE["asesor"],
+        "cliente": f"Cliente {escritor_id}",
+        "cedula": str(1000000 + n),
+        "monto": 5000000,
+        "plazo": 24,
+        "linea_credito": DATOS_BASE["linea_credito"],
+        "tasa_ea": 24.5,
+        "tasa_mensual": 1.85,
+        "cuota_mensual": 265000,
+        "nivel_riesgo": "Bajo",
+        "total_financiar": 5200000,
+    }
+
+
+def _guardar_directo(simulacion):
+    """Réplica del guardado previo: conexión propia + commit por operación."""
+    conn = sqlite3.connect(database.DB_PATH, timeout=5.0)
+    try:
+        conn.execute(
+            """
+            INSERT INTO simulaciones (timestamp, asesor, cliente, cedula, monto,
+                plazo, linea_credito, tasa_ea, tasa_mensual, cuota_mensual,
+                nivel_riesgo, total_financiar)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            (
+                simulacion["timestamp"], simulacion["asesor"], simulacion["cliente"],
+                simulacion["cedula"], simulacion["monto"], simulacion["plazo"],
+                simulacion["linea_credito"], simulacion["tasa_ea"],
+                simulacion["tasa_mensual"], simulacion["cuota_mensual"],
+                simulacion["nivel_riesgo"], simulacion["total_financiar"],
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def ejecutar_modo(modo, escritores, operaciones):
+    """Ejecuta un modo y retorna métricas de throughput, latencia y errores."""
+    from db_helpers import guardar_simulacion
+
+    guardar = _guardar_directo if modo == "directo" else guardar_simulacion
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(escritores)
+
+    def trabajador(escritor_id):
+        propias, fallos = [], []
+        barrera.wait()
+        for n in range(operaciones):
+            inicio = time.perf_counter()
+            try:
+                guardar(_simulacion_prueba(escritor_id, n))
+            except Exception as e:
+                fallos.append(str(e))
+            propias.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(propias)
+            errores.extend(fallos)
+
+    hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(escritores)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    total = escritores * operaciones
+    return {
+        "modo": modo,
+        "operaciones": total,
+        "duracion_s": round(duracion, 3),
+        "ops_por_s": round(total / duracion, 1) if duracion else 0,
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 2),
+        "max_ms": round(latencias[-1] * 1000, 2),
+        "errores": len(errores),
+        "errores_bloqueo": sum(1 for e in errores if "locked" in e or "busy" in e),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test de escrituras SQLite")
+    parser.add_argument("--escritores", type=int, default=16)
+    parser.add_argument("--operaciones", type=int, default=100,
+                        help="Operaciones por escritor")
+    parser.add_argument("--modo", choices=["directo", "escritor", "ambos"], default="ambos")
+    parser.add_argument("--en-sitio", action="store_true",
+                        help="Escribir sobre loansi.db en lugar de una copia")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if not args.en_sitio:
+        tmpdir = tempfile.mkdtemp(prefix="loansi_bench_")
+        copia = Path(tmpdir) / "loansi.db"
+        shutil.copy2(database.DB_PATH, copia)
+        database.DB_PATH = copia
+
+    print(f"📊 Base de datos: {database.DB_PATH}")
+    print(f"   {args.escritores} escritores x {args.operaciones} operaciones\n")
+
+    # Activa WAL antes de medir para que ambos modos partan igual
+    _cargar_datos_base()
+
+    modos = ["directo", "escritor"] if args.modo == "ambos" else [args.modo]
+    try:
+        for modo in modos:
+            r = ejecutar_modo(modo, args.escritores, args.operaciones)
+            print(
+                f"{r['modo']:>9}: {r['ops_por_s']:>8} ops/s | "
+                f"p50 {r['p50_ms']} ms | p99 {r['p99_ms']} ms | max {r['max_ms']} ms | "
+                f"errores {r['errores']} (bloqueo {r['errores_bloqueo']})"
+            )
+        if "escritor" in modos:
+            from db_writer import obtener_estadisticas_escritor, detener_escritor
+            print(f"\n✍️ Escritor: {obtener_estadisticas_escritor()}")
+            detener_escritor()
+    finally:
+        if args.en_sitio:
+            conn = database.conectar_db()
+            conn.execute("DELETE FROM simulaciones WHERE timestamp LIKE 'bench-%'")
+            conn.commit()
+            conn.close()
+        else:
+            database.cerrar_pool_conexiones()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
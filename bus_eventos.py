@@ -0,0 +1,386 @@
+"""
+BUS_EVENTOS.PY - Bus de eventos en proceso para notificaciones (SSE)
+=====================================================================
+
+Los asesores descubrían las decisiones del comité consultando cada pocos
+segundos /asesor/api/casos-comite/cambios (una consulta por poll y por
+pestaña). Aquí las escrituras que cambian un caso publican un evento y el
+endpoint /api/eventos (Server-Sent Events) lo entrega solo a quien le
+corresponde:
+
+1. publicar(tipo, datos, usuarios=..., roles=...) agrega el evento a la
+   cola de cada suscripción destino y la despierta (sin consultas)
+2. Cada conexión SSE es una Suscripcion: una cola acotada y una condición.
+   Mientras no hay eventos, el hilo de la conexión espera bloqueado (sin
+   CPU ni conexión a la base) y cada KEEPALIVE_SEGUNDOS envía un
+   comentario de ping para que proxies y navegador no la den por muerta
+3. Los eventos llevan id incremental; los últimos MAX_HISTORIAL quedan en
+   memoria para reenviar lo perdido cuando el navegador se reconecta con
+   Last-Event-ID. Si ya no están, la suscripción recibe 'resync' y el
+   cliente consulta una vez por polling
+
+Tipos de evento:
+- caso_aprobado / caso_rechazado: al asesor del caso y a los roles de comité
+- nuevo_pendiente: evaluación enviada a comité (roles de comité)
+- estado_final: desembolsado / desistido / revertido (asesor del caso)
+- badge: contadores nuevos {'casos_nuevos'} o {'pendientes_comite'}
+- resync: se perdieron eventos; el cliente debe recargar por polling
+
+El bus es de proceso (run.py sirve la app en un solo proceso con hilos).
+Con varios workers cada uno entrega solo los eventos de sus propias
+escrituras; para eso el cliente (static/js/eventos-loansi.js) mantiene,
+con el stream abierto, un polling de respaldo lento sobre los endpoints con
+GET condicional.
+
+Uso:
+    from bus_eventos import publicar, suscribir
+
+    publicar('caso_aprobado', {'timestamp': ts}, usuarios=[asesor], roles=ROLES_COMITE)
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+KEEPALIVE_SEGUNDOS = 20          # Ping a conexiones sin eventos
+REINTENTO_MS = 5000              # 'retry:' sugerido al navegador al reconectar
+MAX_COLA_SUSCRIPCION = 100       # Eventos sin leer por conexión (al llenarse: resync)
+MAX_SUSCRIPCIONES = 2000         # Conexiones SSE simultáneas por proceso
+MAX_HISTORIAL = 500              # Eventos recientes para reenviar con Last-Event-ID
+DURACION_MAXIMA_SEGUNDOS = 1800  # La conexión se cierra y el navegador reconecta
+                                 # (vuelve a validar la sesión)
+
+# Roles que ven la cola del comité (mismo criterio que /api/badge-count)
+ROLES_COMITE = ("admin", "admin_tecnico", "comite_credito")
+
+TIPOS_EVENTO = (
+    "caso_aprobado", "caso_rechazado", "nuevo_pendiente", "estado_final", "badge", "resync",
+)
+
+
+class Suscripcion:
+    """
+    Conexión SSE de un usuario: cola acotada de eventos pendientes.
+
+    Args:
+        username (str): Usuario de la sesión
+        rol (str): Rol de la sesión
+    """
+
+    __slots__ = ("username", "rol", "_cola", "_condicion", "cerrada", "descartados", "creada")
+
+    def __init__(self, username, rol):
+        self.username = username
+        self.rol = rol
+        self._cola = deque(maxlen=MAX_COLA_SUSCRIPCION)
+        self._condicion = threading.Condition(threading.Lock())
+        self.cerrada = False
+        self.descartados = 0
+        self.creada = time.monotonic()
+
+    def entregar(self, evento):
+        with self._condicion:
+            if len(self._cola) == self._cola.maxlen:
+                # Cliente que no lee: se descarta lo pendiente y se pide resync
+                self.descartados += len(self._cola)
+                self._cola.clear()
+                self._cola.append((evento[0], "resync", "{}"))
+            else:
+                self._cola.append(evento)
+            self._condicion.notify()
+
+    def cerrar(self):
+        with self._condicion:
+            self.cerrada = True
+            self._condicion.notify()
+
+    def esperar(self, timeout):
+        """
+        Bloquea hasta que haya eventos, la suscripción se cierre o venza
+        `timeout`.
+
+        Returns:
+            list: Eventos pendientes (vacía si venció el plazo)
+        """
+        with self._condicion:
+            if not self._cola and not self.cerrada:
+                self._condicion.wait(timeout)
+            eventos = list(self._cola)
+            self._cola.clear()
+        return eventos
+
+
+# ============================================================================
+# ESTADO DEL BUS
+# ============================================================================
+
+_lock = threading.Lock()
+_por_usuario = {}                      # username -> set(Suscripcion)
+_por_rol = {}                          # rol -> set(Suscripcion)
+_historial = deque(maxlen=MAX_HISTORIAL)
+_ids = itertools.count(1)
+_abiertas = [0]
+_stats = {
+    "publicados": 0,
+    "entregas": 0,
+    "sin_destinatarios": 0,
+    "suscripciones_totales": 0,
+    "rechazadas_por_limite": 0,
+    "reenviados": 0,
+    "resyncs": 0,
+}
+
+
+def _destinos(usuarios, roles):
+    """Suscripciones destino (sin duplicados); requiere _lock."""
+    destinos = set()
+    for username in usuarios:
+        destinos |= _por_usuario.get(username, set())
+    for rol in roles:
+        destinos |= _por_rol.get(rol, set())
+    return destinos
+
+
+def hay_suscriptores(usuarios=(), roles=()):
+    """True si algún usuario o rol indicado tiene una conexión abierta."""
+    with _lock:
+        return any(_por_usuario.get(u) for u in usuarios) or any(_por_rol.get(r) for r in roles)
+
+
+def publicar(tipo, datos=None, usuarios=(), roles=()):
+    """
+    Publica un evento para los usuarios y roles indicados.
+
+    Args:
+        tipo (str): Uno de TIPOS_EVENTO
+        datos (dict): Carga del evento (serializable a JSON)
+        usuarios (iterable): Usernames destino
+        roles (iterable): Roles destino (todas sus conexiones)
+
+    Returns:
+        int: Conexiones a las que se entregó
+    """
+    if tipo not in TIPOS_EVENTO:
+        raise ValueError(f"Tipo de evento inválido: {tipo}")
+    usuarios = tuple(u for u in usuarios if u)
+    roles = tuple(roles)
+    with _lock:
+        evento = (next(_ids), tipo, json.dumps(datos or {}, ensure_ascii=False, default=str))
+        _historial.append((evento, frozenset(usuarios), frozenset(roles)))
+        destinos = _destinos(usuarios, roles)
+        _stats["publicados"] += 1
+        _stats["entregas"] += len(destinos)
+        _stats["sin_destinatarios"] += int(not destinos)
+    for suscripcion in destinos:
+        suscripcion.entregar(evento)
+    return len(destinos)
+
+
+def suscribir(username, rol, ultimo_id=None):
+    """
+    Registra una conexión SSE.
+
+    Args:
+        username (str): Usuario de la sesión
+        rol (str): Rol de la sesión
+        ultimo_id (int, optional): Last-Event-ID del navegador al reconectar
+
+    Returns:
+        Suscripcion | None: None si se alcanzó MAX_SUSCRIPCIONES
+    """
+    suscripcion = Suscripcion(username, rol)
+    with _lock:
+        if _abiertas[0] >= MAX_SUSCRIPCIONES:
+            _stats["rechazadas_por_limite"] += 1
+            return None
+        _por_usuario.setdefault(username, set()).add(suscripcion)
+        _por_rol.setdefault(rol, set()).add(suscripcion)
+        _abiertas[0] += 1
+        _stats["suscripciones_totales"] += 1
+
+        if ultimo_id is not None:
+            ultimo_actual = _historial[-1][0][0] if _historial else 0
+            primero = _historial[0][0][0] if _historial else ultimo_actual + 1
+            if ultimo_id > ultimo_actual or primero > ultimo_id + 1:
+                # Parte de lo perdido ya salió del historial (o el proceso
+                # se reinició y los ids volvieron a empezar)
+                _stats["resyncs"] += 1
+                perdidos = [(ultimo_actual, "resync", "{}")]
+            else:
+                perdidos = [
+                    evento for evento, usuarios, roles in _historial
+                    if evento[0] > ultimo_id and (username in usuarios or rol in roles)
+                ]
+                _stats["reenviados"] += len(perdidos)
+    if ultimo_id is not None:
+        for evento in perdidos:
+            suscripcion.entregar(evento)
+    return suscripcion
+
+
+def desuscribir(suscripcion):
+    """Quita una conexión del bus (al cerrarse el stream); es idempotente."""
+    suscripcion.cerrar()
+    with _lock:
+        if suscripcion not in _por_usuario.get(suscripcion.username, ()):
+            return
+        _abiertas[0] -= 1
+        for indice, clave in ((_por_usuario, suscripcion.username), (_por_rol, suscripcion.rol)):
+            conjunto = indice.get(clave)
+            if conjunto is not None:
+                conjunto.discard(suscripcion)
+                if not conjunto:
+                    del indice[clave]
+
+
+def cerrar_suscripciones():
+    """Cierra todas las conexiones (los streams terminan y el navegador reconecta)."""
+    with _lock:
+        todas = [s for conjunto in _por_usuario.values() for s in conjunto]
+    for suscripcion in todas:
+        desuscribir(suscripcion)
+    return len(todas)
+
+
+# ============================================================================
+# STREAM SSE
+# ============================================================================
+
+def _formatear(evento):
+    id_evento, tipo, datos = evento
+    return f"id: {id_evento}\nevent: {tipo}\ndata: {datos}\n\n"
+
+
+def generar_stream(suscripcion, keepalive=None, duracion_maxima=None):
+    """
+    Generador del cuerpo text/event-stream de una suscripción. Termina al
+    cerrarse la suscripción, al vencer la duración máxima o cuando el
+    servidor no puede escribir (cliente desconectado: GeneratorExit).
+    """
+    keepalive = KEEPALIVE_SEGUNDOS if keepalive is None else keepalive
+    duracion_maxima = DURACION_MAXIMA_SEGUNDOS if duracion_maxima is None else duracion_maxima
+    try:
+        yield f"retry: {REINTENTO_MS}\n: conectado\n\n"
+        while not suscripcion.cerrada:
+            if time.monotonic() - suscripcion.creada > duracion_maxima:
+                break
+            eventos = suscripcion.esperar(keepalive)
+            if eventos:
+                yield "".join(_formatear(evento) for evento in eventos)
+            elif not suscripcion.cerrada:
+                yield ": ping\n\n"
+    finally:
+        desuscribir(suscripcion)
+
+
+# ============================================================================
+# PUBLICACIONES DE DOMINIO
+# ============================================================================
+
+def _contar_pendientes_comite():
+    from database import conectar_db
+    conn = conectar_db()
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM evaluaciones WHERE estado_comite = 'pending'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def publicar_badges(asesor=None, comite=False):
+    """
+    Publica los contadores de badge que cambiaron. Cada contador se
+    calcula una vez por escritura (no una vez por pestaña y poll) y solo
+    si hay alguien conectado que lo vea.
+    """
+    try:
+        if asesor and hay_suscriptores(usuarios=(asesor,)):
+            from db_helpers import contar_casos_nuevos_asesor
+            publicar("badge", {"casos_nuevos": contar_casos_nuevos_asesor(asesor)}, usuarios=(asesor,))
+        if comite and hay_suscriptores(roles=ROLES_COMITE):
+            publicar("badge", {"pendientes_comite": _contar_pendientes_comite()}, roles=ROLES_COMITE)
+    except Exception as e:
+        # La escritura ya se confirmó; el cliente se pone al día por polling
+        print(f"⚠️ No se pudieron publicar los badges: {e}")
+
+
+def publicar_decision_comite(evaluacion, estado):
+    """
+    Decisión del comité sobre una evaluación ('approved' / 'rejected').
+
+    Args:
+        evaluacion (dict): Evaluación antes de la decisión (timestamp, asesor, nombre_cliente)
+        estado (str): Nuevo estado_comite
+    """
+    tipo = "caso_aprobado" if estado == "approved" else "caso_rechazado"
+    asesor = evaluacion.get("asesor")
+    publicar(tipo, {
+        "timestamp": evaluacion.get("timestamp"),
+        "asesor": asesor,
+        "nombre_cliente": evaluacion.get("nombre_cliente"),
+        "estado_comite": estado,
+    }, usuarios=(asesor,), roles=ROLES_COMITE)
+    publicar_badges(asesor, comite=True)
+
+
+_publicador = None
+_publicador_lock = threading.Lock()
+
+
+def publicar_en_segundo_plano(publicacion, *args):
+    """
+    Ejecuta una publicación de dominio en el hilo del bus.
+
+    Para callbacks de Futures del escritor (db_writer): esos callbacks
+    corren en el hilo escritor, y los contadores de badge consultan la
+    base; hacerlo ahí detendría todas las escrituras mientras tanto.
+    """
+    global _publicador
+    if _publicador is None:
+        with _publicador_lock:
+            if _publicador is None:
+                _publicador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="loansi-bus")
+    _publicador.submit(publicacion, *args)
+
+
+def publicar_nuevo_pendiente(evaluacion):
+    """Evaluación enviada al comité (estado_comite = 'pending')."""
+    publicar("nuevo_pendiente", {
+        "timestamp": evaluacion.get("timestamp"),
+        "asesor": evaluacion.get("asesor"),
+        "nombre_cliente": evaluacion.get("nombre_cliente"),
+    }, roles=ROLES_COMITE)
+    publicar_badges(comite=True)
+
+
+def publicar_estado_final(timestamp, asesor, estado_final):
+    """Transición de estado_final (desembolsado, desistido o None al revertir)."""
+    publicar("estado_final", {
+        "timestamp": timestamp,
+        "asesor": asesor,
+        "estado_final": estado_final,
+    }, usuarios=(asesor,))
+
+
+def obtener_estadisticas_bus():
+    """Contadores del bus y conexiones abiertas por rol."""
+    with _lock:
+        stats = dict(_stats)
+        stats["suscripciones_abiertas"] = _abiertas[0]
+        stats["por_rol"] = {rol: len(s) for rol, s in _por_rol.items()}
+        stats["ultimo_id"] = _historial[-1][0][0] if _historial else 0
+    stats["keepalive_segundos"] = KEEPALIVE_SEGUNDOS
+    return stats
@@ -0,0 +1,208 @@
+"""
+CARGA_MASIVA.PY - Importación masiva de evaluaciones y simulaciones
+====================================================================
+
+Carga exportaciones legacy (evaluaciones_log.json, simulaciones_log.json)
+o archivos de aliados en SQLite usando guardar_evaluaciones_bulk() /
+guardar_simulaciones_bulk().
+
+El archivo se lee en streaming, de modo que la memoria no crece con su
+tamaño. Formatos soportados:
+- Arreglo JSON:  [{...}, {...}, ...]
+- JSONL:         un objeto JSON por línea
+
+Uso:
+    python -m carga_masiva evaluaciones evaluaciones_log.json
+    python -m carga_masiva simulaciones simulaciones.jsonl --lote 10000 --diferir-indices
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import argparse
+import itertools
+import json
+import re
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+TAMANO_BLOQUE_LECTURA = 1 << 20  # 1 MB de texto por lectura
+MAX_TAMANO_ELEMENTO = 64 << 20  # Un elemento del arreglo no puede superar 64 MB
+
+_SEPARADORES = re.compile(r"[\s,]*")
+
+
+# ============================================================================
+# LECTURA EN STREAMING
+# ============================================================================
+
+def _leer_arreglo_json(archivo, buffer):
+    """
+    Genera los elementos de un arreglo JSON sin cargarlo completo.
+
+    Decodifica un elemento a la vez con raw_decode sobre un buffer que se
+    recorta a medida que avanza; solo se lee más texto cuando el elemento
+    actual quedó cortado al final del buffer.
+
+    Un elemento mal formado falla en el mismo punto aunque se lea más
+    texto; en ese caso (o si supera MAX_TAMANO_ELEMENTO) se lanza
+    ValueError en lugar de seguir llenando el buffer hasta el final del
+    archivo.
+    """
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    numero = 0
+    error_previo = None  # (mensaje, posición relativa) del último intento
+
+    while True:
+        pos = _SEPARADORES.match(buffer, pos).end()
+        if pos >= len(buffer):
+            bloque = archivo.read(TAMANO_BLOQUE_LECTURA)
+            if not bloque:
+                raise ValueError("Arreglo JSON incompleto: falta ']'")
+            buffer, pos = buffer[pos:] + bloque, 0
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            elemento, fin = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            error = (e.msg, e.pos - pos)
+            # Un string largo cortado reporta siempre su inicio: no es
+            # señal de error hasta llegar al tope de tamaño
+            mal_formado = error == error_previo and not e.msg.startswith("Unterminated string")
+            if mal_formado or len(buffer) - pos > MAX_TAMANO_ELEMENTO:
+                raise ValueError(f"Elemento {numero + 1} del arreglo JSON no es válido: {e}") from e
+            bloque = archivo.read(TAMANO_BLOQUE_LECTURA)
+            if not bloque:
+                raise ValueError(f"Elemento {numero + 1} del arreglo JSON no es válido: {e}") from e
+            buffer, pos = buffer[pos:] + bloque, 0
+            error_previo = error
+            continue
+
+        yield elemento
+        numero += 1
+        error_previo = None
+        pos = fin
+        if pos > TAMANO_BLOQUE_LECTURA:
+            buffer, pos = buffer[pos:], 0
+
+
+def _leer_jsonl(archivo, bloque):
+    """Genera un objeto por cada línea no vacía."""
+    # El primer bloque ya leído puede terminar a mitad de una línea
+    completas, _, pendiente = bloque.rpartition("\n")
+    lineas = itertools.chain(
+        completas.splitlines(), [pendiente + archivo.readline()], archivo
+    )
+    for numero, linea in enumerate(lineas, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            yield json.loads(linea)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Línea {numero} no es JSON válido: {e}") from e
+
+
+def leer_registros(ruta):
+    """
+    Itera los registros de un archivo JSON (arreglo) o JSONL.
+
+    El formato se detecta por el primer carácter: '[' es un arreglo JSON,
+    cualquier otro se trata como JSONL. Se lee por bloques, así que
+    también funciona con un arreglo minificado en una sola línea.
+
+    Args:
+        ruta (str | Path): Archivo a leer
+
+    Yields:
+        dict: Un registro por iteración
+    """
+    with open(ruta, "r", encoding="utf-8-sig") as archivo:
+        contenido = ""
+        while not contenido:
+            bloque = archivo.read(TAMANO_BLOQUE_LECTURA)
+            if not bloque:
+                return
+            contenido = bloque.lstrip()
+
+        if contenido.startswith("["):
+            yield from _leer_arreglo_json(archivo, contenido)
+        else:
+            yield from _leer_jsonl(archivo, contenido)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _imprimir_progreso(leidas, insertadas, segundos):
+    velocidad = insertadas / segundos if segundos else 0
+    print(f"   📦 {leidas:,} leídas | {insertadas:,} guardadas | {velocidad:,.0f} filas/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m carga_masiva",
+        description="Importa evaluaciones o simulaciones desde JSON/JSONL",
+    )
+    parser.add_argument("tipo", choices=["evaluaciones", "simulaciones"])
+    parser.add_argument("archivo", type=Path)
+    parser.add_argument("--lote", type=int, default=None,
+                        help="Filas por executemany (por defecto 5000)")
+    parser.add_argument("--diferir-indices", action="store_true",
+                        help="Reconstruir los índices al final en lugar de mantenerlos por fila")
+    parser.add_argument("--silencioso", action="store_true",
+                        help="No mostrar el progreso por lote")
+    args = parser.parse_args(argv)
+
+    if not args.archivo.exists():
+        parser.error(f"No existe el archivo: {args.archivo}")
+
+    from database import aplicar_migraciones
+    from db_helpers import (
+        TAMANO_LOTE_BULK,
+        guardar_evaluaciones_bulk,
+        guardar_simulaciones_bulk,
+    )
+    from db_writer import detener_escritor
+
+    # Las columnas derivadas y sus triggers deben existir antes de insertar
+    aplicar_migraciones()
+
+    guardar = (
+        guardar_evaluaciones_bulk if args.tipo == "evaluaciones" else guardar_simulaciones_bulk
+    )
+
+    print(f"📥 Importando {args.tipo} desde {args.archivo}")
+    try:
+        resultado = guardar(
+            leer_registros(args.archivo),
+            tamano_lote=args.lote or TAMANO_LOTE_BULK,
+            diferir_indices=args.diferir_indices,
+            progreso=None if args.silencioso else _imprimir_progreso,
+        )
+    finally:
+        detener_escritor()
+
+    icono = "✅" if resultado["success"] else "⚠️"
+    print(f"{icono} {resultado['message']} en {resultado['segundos']}s")
+    for timestamp, error in resultado["detalle_errores"][:20]:
+        print(f"   ❌ {timestamp or '(sin timestamp)'}: {error}")
+    if resultado["errores"] > 20:
+        print(f"   ... y {resultado['errores'] - 20} errores más")
+
+    return 0 if resultado["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,9 @@ import json
 from datetime import datetime
 from pathlib import Path
 import shutil
+import re
+import queue
+import threading
 
 # Ruta de la base de datos
 DB_PATH = Path(__file__).parent / 'loansi.db'
@@ -176,6 +179,15 @@ CREATE TABLE IF NOT EXISTS evaluaciones (
     puntaje_datacredito INTEGER,
     datacredito INTEGER,  -- Alias de puntaje_datacredito
 
+    -- Campos derivados de resultado / decision_admin (mantenidos por triggers)
+    score REAL,
+    score_normalizado REAL,
+    nivel_resultado TEXT,
+    aprobado INTEGER,
+    rechazo_automatico INTEGER,
+    decision_admin_usuario TEXT,
+    decision_admin_fecha TEXT,
+
     -- Timestamps
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -195,6 +207,8 @@ CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_comite ON evaluaciones(estado
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_visto ON evaluaciones(visto_por_asesor);
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_cedula ON evaluaciones(cedula);
 CREATE INDEX IF NOT EXISTS idx_evaluaciones_cliente ON evaluaciones(nombre_cliente);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_ts_id ON evaluaciones(timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_ts_id ON evaluaciones(asesor, timestamp DESC, id DESC);
 
 
 -- ============================================================================
@@ -285,8 +299,110 @@ CREATE TABLE IF NOT EXISTS user_assignments (
 CREATE INDEX IF NOT EXISTS idx_assign_manager ON user_assignments(manager_username);
 CREATE INDEX IF NOT EXISTS idx_assign_member ON user_assignments(member_username);
 CREATE INDEX IF NOT EXISTS idx_assign_activo ON user_assignments(activo);
+CREATE INDEX IF NOT EXISTS idx_assign_manager_activo ON user_assignments(manager_username, activo, member_username);
+"""
 
 
+# ============================================================================
+# COLUMNAS DERIVADAS DE JSON (resultado / decision_admin)
+# ============================================================================
+# Los campos más consultados del JSON se copian a columnas reales indexadas.
+# Los triggers las mantienen al insertar o al modificar resultado /
+# decision_admin, así conteos y promedios no requieren json_extract por fila.
+
+# (columna, tipo, columna JSON de origen, expresión sobre el origen)
+COLUMNAS_DERIVADAS_EVALUACION = (
+    ("score", "REAL", "resultado", "CAST(json_extract({0}, '$.score') AS REAL)"),
+    ("score_normalizado", "REAL", "resultado",
+     "CAST(json_extract({0}, '$.score_normalizado') AS REAL)"),
+    ("nivel_resultado", "TEXT", "resultado", "json_extract({0}, '$.nivel')"),
+    # aprobado llega como booleano JSON o como 0/1 (cargas e importaciones)
+    ("aprobado", "INTEGER", "resultado",
+     "CASE json_type({0}, '$.aprobado') WHEN 'true' THEN 1 WHEN 'false' THEN 0 "
+     "WHEN 'integer' THEN json_extract({0}, '$.aprobado') != 0 END"),
+    # rechazo_automatico puede ser motivo (texto), booleano, 0/1 o null
+    ("rechazo_automatico", "INTEGER", "resultado",
+     "CASE json_type({0}, '$.rechazo_automatico') "
+     "WHEN 'true' THEN 1 WHEN 'text' THEN json_extract({0}, '$.rechazo_automatico') != '' "
+     "WHEN 'integer' THEN json_extract({0}, '$.rechazo_automatico') != 0 "
+     "ELSE 0 END"),
+    ("decision_admin_usuario", "TEXT", "decision_admin", "json_extract({0}, '$.admin')"),
+    ("decision_admin_fecha", "TEXT", "decision_admin", "json_extract({0}, '$.timestamp')"),
+)
+
+
+def _sql_set_columnas_derivadas(prefijo=""):
+    """
+    Genera la lista SET de las columnas derivadas.
+
+    Args:
+        prefijo (str): 'NEW.' dentro de triggers, '' para backfill
+    """
+    asignaciones = []
+    for columna, _tipo, origen, expresion in COLUMNAS_DERIVADAS_EVALUACION:
+        fuente = f"{prefijo}{origen}"
+        asignaciones.append(
+            f"{columna} = CASE WHEN json_valid({fuente}) THEN {expresion.format(fuente)} END"
+        )
+    return ",\n        ".join(asignaciones)
+
+
+TRIGGERS_COLUMNAS_DERIVADAS_SQL = (
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_evaluaciones_derivadas_insert
+AFTER INSERT ON evaluaciones
+BEGIN
+    UPDATE evaluaciones SET
+        {_sql_set_columnas_derivadas('NEW.')}
+    WHERE id = NEW.id;
+END;
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_evaluaciones_derivadas_update
+AFTER UPDATE OF resultado, decision_admin ON evaluaciones
+BEGIN
+    UPDATE evaluaciones SET
+        {_sql_set_columnas_derivadas('NEW.')}
+    WHERE id = NEW.id;
+END;
+""",
+)
+
+INDICES_COLUMNAS_DERIVADAS_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_aprobado_ts "
+    "ON evaluaciones(aprobado, timestamp DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_aprobado_score "
+    "ON evaluaciones(asesor, aprobado, score)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_rechazo_automatico "
+    "ON evaluaciones(rechazo_automatico)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_decision_fecha "
+    "ON evaluaciones(decision_admin_fecha)",
+)
+
+SCHEMA_SQL += "\n".join(TRIGGERS_COLUMNAS_DERIVADAS_SQL)
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in INDICES_COLUMNAS_DERIVADAS_SQL)
+
+# Índices de actividad para los dashboards: los filtros por fecha son rangos
+# semiabiertos (col >= ? AND col < ?), así que la fecha va como segunda
+# columna detrás del filtro de igualdad (asesor / estado_comite).
+INDICES_ACTIVIDAD_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_fecha "
+    "ON evaluaciones(asesor, fecha_creacion)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_fecha_creacion "
+    "ON evaluaciones(fecha_creacion)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_asesor "
+    "ON evaluaciones(estado_comite, asesor)",
+    "CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_decision_fecha "
+    "ON evaluaciones(estado_comite, decision_admin_fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_simulaciones_asesor_ts "
+    "ON simulaciones(asesor, timestamp)",
+)
+
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in INDICES_ACTIVIDAD_SQL)
+
+
+# Vistas (leen las columnas derivadas en lugar del JSON)
+VISTAS_SQL = """
 -- ============================================================================
 -- VISTA: casos_comite (facilita queries)
 -- ============================================================================
@@ -299,34 +415,477 @@ SELECT
     e.cedula,
     e.tipo_credito,
     e.monto_solicitado,
-    json_extract(e.resultado, '$.score') as score,
-    json_extract(e.resultado, '$.nivel') as nivel,
+    e.score,
+    e.nivel_resultado as nivel,
     e.estado_comite,
     e.visto_por_asesor,
-    json_extract(e.decision_admin, '$.admin') as admin_decisor,
-    json_extract(e.decision_admin, '$.timestamp') as fecha_decision,
+    e.decision_admin_usuario as admin_decisor,
+    e.decision_admin_fecha as fecha_decision,
     e.fecha_envio_comite
 FROM evaluaciones e
 WHERE e.estado_comite IS NOT NULL;
+"""
 
+SCHEMA_SQL += VISTAS_SQL
+
+
+# ============================================================================
+# VERSIONES DE DATOS (invalidación de caches entre procesos)
+# ============================================================================
+# Cada conjunto de datos cacheado en memoria tiene un contador en
+# version_datos. Triggers sobre sus tablas lo incrementan en cualquier
+# escritura, venga de este proceso o de otro worker, así comparar el
+# número basta para saber si un cache quedó obsoleto.
+
+# Conjunto de datos -> tablas cuyas escrituras lo invalidan
+TABLAS_VERSIONADAS = {
+    "configuracion": ("lineas_credito", "costos_asociados", "configuracion_sistema"),
+    # USUARIOS del snapshot de configuración (db_helpers), versionado aparte
+    # para no invalidar los modelos de scoring en cada cambio de usuario
+    "usuarios": ("usuarios",),
+    # Las tablas *_linea las crea el módulo de scoring multi-línea; solo se
+    # les ponen triggers si existen al aplicar la migración.
+    "scoring": (
+        "configuracion_sistema", "configuracion_scoring", "scoring_config_linea",
+        "niveles_riesgo_linea", "criterios_scoring_master", "criterios_linea_credito",
+        "factores_rechazo_linea", "secciones_scoring",
+    ),
+    # Resumen del navbar (db_helpers_dashboard): evaluaciones, decisiones de
+    # comité, casos vistos y asignaciones de equipo
+    "actividad": ("evaluaciones", "user_assignments"),
+    # Índice de jerarquía (db_jerarquia): asignaciones y nombres/roles
+    "jerarquia": ("user_assignments", "usuarios"),
+    # Series de tendencia (db_helpers_dashboard): evaluaciones, decisiones,
+    # desembolsos y simulaciones
+    "series": ("evaluaciones", "simulaciones"),
+    # Permisos por rol y por usuario (menús de los dashboards). Las tablas las
+    # crea permisos.py; solo se les ponen triggers si existen al migrar.
+    "permisos": ("permisos", "rol_permisos", "usuario_permisos"),
+}
+
+VERSION_DATOS_SQL = """
+CREATE TABLE IF NOT EXISTS version_datos (
+    nombre TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _sql_triggers_version(nombre, tablas_existentes=None):
+    """
+    Genera los triggers que incrementan version_datos[nombre].
+
+    Args:
+        nombre (str): Conjunto de datos de TABLAS_VERSIONADAS
+        tablas_existentes (set, optional): Si se indica, omite las tablas
+            que no estén en el conjunto
+    """
+    sentencias = [
+        f"INSERT OR IGNORE INTO version_datos (nombre, version) VALUES ('{nombre}', 0)"
+    ]
+    for tabla in TABLAS_VERSIONADAS[nombre]:
+        if tablas_existentes is not None and tabla not in tablas_existentes:
+            continue
+        for operacion in ("INSERT", "UPDATE", "DELETE"):
+            sentencias.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_{nombre}_{tabla}_{operacion.lower()}
+AFTER {operacion} ON {tabla}
+BEGIN
+    UPDATE version_datos
+    SET version = version + 1, fecha_modificacion = CURRENT_TIMESTAMP
+    WHERE nombre = '{nombre}';
+END""")
+    return sentencias
+
+
+SCHEMA_SQL += VERSION_DATOS_SQL
+_TABLAS_ESQUEMA = set(re.findall(r"CREATE TABLE IF NOT EXISTS (\w+)", SCHEMA_SQL))
+for _nombre in TABLAS_VERSIONADAS:
+    SCHEMA_SQL += "".join(
+        f"{sql};\n" for sql in _sql_triggers_version(_nombre, _TABLAS_ESQUEMA)
+    )
+
+
+# Contador por asesor: cambia con cualquier escritura sobre sus
+# evaluaciones (nuevas, decisiones de comité, casos vistos). Los endpoints
+# de polling de un asesor lo usan como validador HTTP (ETag) sin que las
+# escrituras de los demás asesores invaliden su respuesta. El contador
+# 'comite' de version_datos hace lo mismo para la cola de pendientes.
+
+VERSION_ASESOR_SQL = """
+CREATE TABLE IF NOT EXISTS version_asesor (
+    asesor TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+"""
+
+
+def _sql_upsert_version_asesor(ref):
+    return f"""
+    INSERT INTO version_asesor (asesor, version) VALUES ({ref}asesor, 1)
+    ON CONFLICT (asesor) DO UPDATE SET
+        version = version + 1, fecha_modificacion = CURRENT_TIMESTAMP;"""
+
+
+def _sql_triggers_version_asesor():
+    """Triggers INSERT/UPDATE/DELETE de evaluaciones que mantienen version_asesor."""
+    return [
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_asesor_insert
+AFTER INSERT ON evaluaciones
+WHEN NEW.asesor IS NOT NULL
+BEGIN{_sql_upsert_version_asesor('NEW.')}
+END""",
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_asesor_update
+AFTER UPDATE ON evaluaciones
+WHEN NEW.asesor IS NOT NULL
+BEGIN{_sql_upsert_version_asesor('NEW.')}
+END""",
+        # Reasignación: también cambia la respuesta del asesor anterior
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_asesor_update_anterior
+AFTER UPDATE OF asesor ON evaluaciones
+WHEN OLD.asesor IS NOT NULL AND OLD.asesor IS NOT NEW.asesor
+BEGIN{_sql_upsert_version_asesor('OLD.')}
+END""",
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_asesor_delete
+AFTER DELETE ON evaluaciones
+WHEN OLD.asesor IS NOT NULL
+BEGIN{_sql_upsert_version_asesor('OLD.')}
+END""",
+    ]
+
+
+def _sql_triggers_version_comite():
+    """
+    Contador version_datos['comite']: solo cambia cuando puede cambiar la
+    cola del comité (evaluaciones nuevas o borradas, cambios de
+    estado_comite), no con casos vistos ni otras columnas.
+    """
+    incrementar = """
+    UPDATE version_datos
+    SET version = version + 1, fecha_modificacion = CURRENT_TIMESTAMP
+    WHERE nombre = 'comite';"""
+    return [
+        "INSERT OR IGNORE INTO version_datos (nombre, version) VALUES ('comite', 0)",
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_comite_insert
+AFTER INSERT ON evaluaciones
+BEGIN{incrementar}
+END""",
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_comite_update
+AFTER UPDATE OF estado_comite ON evaluaciones
+WHEN OLD.estado_comite IS NOT NEW.estado_comite
+BEGIN{incrementar}
+END""",
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_version_comite_delete
+AFTER DELETE ON evaluaciones
+BEGIN{incrementar}
+END""",
+    ]
+
+
+SCHEMA_SQL += VERSION_ASESOR_SQL
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in _sql_triggers_version_asesor())
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in _sql_triggers_version_comite())
+
+
+# ============================================================================
+# ACTIVIDAD DIARIA (rollup para dashboards)
+# ============================================================================
+# Conteos por día (hora Colombia), asesor y línea de crédito. Triggers sobre
+# evaluaciones y simulaciones aplican el delta de cada fila insertada,
+# modificada o borrada, así los dashboards suman días en lugar de recontar
+# el historial.
+#
+# - Evaluación: día de fecha_creacion (UTC -> Colombia). aprobadas /
+#   rechazadas / pendientes reflejan el estado_comite ACTUAL de las
+#   evaluaciones creadas ese día.
+# - Decisión de comité: día de decision_admin_fecha.
+# - Simulación: día de su timestamp (ISO en hora Colombia).
+#
+# INSERT OR REPLACE (guardar_evaluacion) borra la fila anterior; SQLite
+# solo dispara el trigger DELETE si recursive_triggers está activo, por eso
+# forma parte de PRAGMAS_CONEXION.
+
+ACTIVIDAD_DIARIA_SQL = """
+CREATE TABLE IF NOT EXISTS actividad_diaria (
+    fecha TEXT NOT NULL,                              -- YYYY-MM-DD hora Colombia
+    asesor TEXT NOT NULL,
+    linea TEXT NOT NULL DEFAULT '',
+    evaluaciones INTEGER NOT NULL DEFAULT 0,
+    simulaciones INTEGER NOT NULL DEFAULT 0,
+    aprobadas INTEGER NOT NULL DEFAULT 0,
+    rechazadas INTEGER NOT NULL DEFAULT 0,
+    pendientes INTEGER NOT NULL DEFAULT 0,
+    decisiones_aprobadas INTEGER NOT NULL DEFAULT 0,  -- Decididas ese día
+    decisiones_rechazadas INTEGER NOT NULL DEFAULT 0,
+    monto_total INTEGER NOT NULL DEFAULT 0,           -- Monto solicitado (evaluaciones)
+    monto_simulado INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (asesor, fecha, linea)                -- Rangos por asesor sin lookup
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_actividad_fecha ON actividad_diaria(fecha);
+
+-- Respuestas del comité que el asesor aún no ve (contador de su panel):
+-- el costo depende de lo no visto, no del historial del asesor
+CREATE INDEX IF NOT EXISTS idx_evaluaciones_respuestas_no_vistas
+ON evaluaciones(asesor, estado_comite, visto_por_asesor)
+WHERE estado_comite IN ('approved', 'rejected')
+  AND (visto_por_asesor = 0 OR visto_por_asesor IS NULL);
+"""
+
+# Columnas de cada tabla que cambian el aporte de una fila
+_COLUMNAS_APORTE_ACTIVIDAD = {
+    "evaluaciones": ("fecha_creacion", "asesor", "tipo_credito", "monto_solicitado",
+                     "estado_comite", "decision_admin_fecha"),
+    "simulaciones": ("timestamp", "asesor", "linea_credito", "monto"),
+}
+
+
+def _aportes_actividad(tabla, ref=""):
+    """
+    Aportes de una fila a actividad_diaria.
+
+    Args:
+        tabla (str): 'evaluaciones' o 'simulaciones'
+        ref (str): 'NEW.' / 'OLD.' dentro de triggers, '' para la reconstrucción
+
+    Returns:
+        list: (fecha, asesor, linea, condicion, {columna: valor})
+    """
+    asesor = f"COALESCE({ref}asesor, '')"
+    if tabla == "evaluaciones":
+        linea = f"COALESCE({ref}tipo_credito, '')"
+        return [
+            (f"COALESCE(date({ref}fecha_creacion, '-5 hours'), '')", asesor, linea, "1", {
+                "evaluaciones": "1",
+                "aprobadas": f"{ref}estado_comite IS 'approved'",
+                "rechazadas": f"{ref}estado_comite IS 'rejected'",
+                "pendientes": f"{ref}estado_comite IS 'pending'",
+                "monto_total": f"COALESCE({ref}monto_solicitado, 0)",
+            }),
+            (f"substr({ref}decision_admin_fecha, 1, 10)", asesor, linea,
+             f"{ref}decision_admin_fecha IS NOT NULL "
+             f"AND {ref}estado_comite IN ('approved', 'rejected')", {
+                 "decisiones_aprobadas": f"{ref}estado_comite IS 'approved'",
+                 "decisiones_rechazadas": f"{ref}estado_comite IS 'rejected'",
+             }),
+        ]
+    return [
+        (f"COALESCE(substr({ref}timestamp, 1, 10), '')", asesor,
+         f"COALESCE({ref}linea_credito, '')", "1", {
+             "simulaciones": "1",
+             "monto_simulado": f"COALESCE({ref}monto, 0)",
+         }),
+    ]
+
+
+def _sql_upsert_actividad(aporte, agregado="", origen=""):
+    """
+    INSERT ... ON CONFLICT que suma un aporte a actividad_diaria.
+
+    Args:
+        aporte (tuple): Elemento de _aportes_actividad()
+        agregado (str): '' / '-' en triggers, 'SUM' en la reconstrucción
+        origen (str): 'FROM tabla' para la reconstrucción
+    """
+    fecha, asesor, linea, condicion, valores = aporte
+    columnas = ", ".join(valores)
+    select = ", ".join(f"{agregado}({valor})" for valor in valores.values())
+    agrupar = "GROUP BY 1, 2, 3" if origen else ""
+    actualizar = ", ".join(f"{col} = {col} + excluded.{col}" for col in valores)
+    return f"""
+    INSERT INTO actividad_diaria (fecha, asesor, linea, {columnas})
+    SELECT {fecha}, {asesor}, {linea}, {select}
+    {origen} WHERE {condicion} {agrupar}
+    ON CONFLICT (asesor, fecha, linea) DO UPDATE SET {actualizar}"""
+
+
+def _sql_triggers_actividad():
+    """Triggers INSERT/UPDATE/DELETE que mantienen actividad_diaria."""
+    sentencias = []
+    for tabla, columnas in _COLUMNAS_APORTE_ACTIVIDAD.items():
+        sumar = "".join(
+            f"{_sql_upsert_actividad(a)};" for a in _aportes_actividad(tabla, "NEW.")
+        )
+        restar = "".join(
+            f"{_sql_upsert_actividad(a, '-')};" for a in _aportes_actividad(tabla, "OLD.")
+        )
+        cambio = " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in columnas)
+        sentencias += [
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_actividad_{tabla}_insert
+AFTER INSERT ON {tabla}
+BEGIN{sumar}
+END""",
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_actividad_{tabla}_update
+AFTER UPDATE OF {', '.join(columnas)} ON {tabla}
+WHEN {cambio}
+BEGIN{restar}{sumar}
+END""",
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_actividad_{tabla}_delete
+AFTER DELETE ON {tabla}
+BEGIN{restar}
+END""",
+        ]
+    return sentencias
+
+
+def _reconstruir_actividad_diaria(conn):
+    """Recalcula actividad_diaria desde cero (operación del escritor)."""
+    conn.execute("DELETE FROM actividad_diaria")
+    for tabla in _COLUMNAS_APORTE_ACTIVIDAD:
+        for aporte in _aportes_actividad(tabla):
+            conn.execute(_sql_upsert_actividad(aporte, "SUM", f"FROM {tabla}"))
+    return conn.execute("SELECT COUNT(*) FROM actividad_diaria").fetchone()[0]
+
+
+SCHEMA_SQL += ACTIVIDAD_DIARIA_SQL
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in _sql_triggers_actividad())
+
+
+# ============================================================================
+# CLAUSURA DE LA JERARQUÍA (user_assignments)
+# ============================================================================
+# Un par por cada (ancestro, descendiente) conectados por asignaciones
+# activas, con la profundidad del camino más corto. La mantienen
+# add_assignment / remove_assignment (ver db_jerarquia).
+
+USER_ASSIGNMENTS_CLOSURE_SQL = """
+CREATE TABLE IF NOT EXISTS user_assignments_closure (
+    ancestor TEXT NOT NULL,
+    descendant TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor, descendant)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_closure_descendant ON user_assignments_closure(descendant);
+"""
+
+SCHEMA_SQL += USER_ASSIGNMENTS_CLOSURE_SQL
+
+
+# ============================================================================
+# MÉTRICAS POR ASESOR (materializadas)
+# ============================================================================
+# Totales históricos por asesor, mantenidos por triggers con el delta de
+# cada fila (como actividad_diaria). Reemplaza a la vista que unía
+# evaluaciones con simulaciones por asesor: el JOIN multiplicaba filas
+# (costo evaluaciones x simulaciones por asesor, con COUNT(DISTINCT) para
+# compensar) en cada lectura.
+# vista_metricas_asesores se conserva, con las mismas columnas, sobre la tabla.
+# evaluaciones_aprobadas (aprobado = 1 del scoring, no el comité) sirve las
+# tarjetas y el filtro de asesores del historial sin recorrer evaluaciones.
+
+METRICAS_ASESORES_SQL = """
+CREATE TABLE IF NOT EXISTS metricas_asesores (
+    asesor TEXT PRIMARY KEY,
+    total_evaluaciones INTEGER NOT NULL DEFAULT 0,
+    casos_aprobados INTEGER NOT NULL DEFAULT 0,
+    casos_rechazados INTEGER NOT NULL DEFAULT 0,
+    casos_pendientes INTEGER NOT NULL DEFAULT 0,
+    evaluaciones_con_score INTEGER NOT NULL DEFAULT 0,  -- Divisor de score_promedio
+    suma_score REAL NOT NULL DEFAULT 0,
+    total_simulaciones INTEGER NOT NULL DEFAULT 0,
+    evaluaciones_aprobadas INTEGER NOT NULL DEFAULT 0   -- aprobado = 1 (historial)
+) WITHOUT ROWID;
 
--- ============================================================================
--- VISTA: metricas_asesores (para dashboards)
--- ============================================================================
 CREATE VIEW IF NOT EXISTS vista_metricas_asesores AS
 SELECT
-    e.asesor,
-    COUNT(DISTINCT e.id) as total_evaluaciones,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'approved' THEN e.id END) as casos_aprobados,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'rejected' THEN e.id END) as casos_rechazados,
-    COUNT(DISTINCT CASE WHEN e.estado_comite = 'pending' THEN e.id END) as casos_pendientes,
-    AVG(CAST(json_extract(e.resultado, '$.score') AS REAL)) as score_promedio,
-    COUNT(DISTINCT s.id) as total_simulaciones
-FROM evaluaciones e
-LEFT JOIN simulaciones s ON e.asesor = s.asesor
-GROUP BY e.asesor;
+    asesor,
+    total_evaluaciones,
+    casos_aprobados,
+    casos_rechazados,
+    casos_pendientes,
+    suma_score / NULLIF(evaluaciones_con_score, 0) AS score_promedio,
+    total_simulaciones
+FROM metricas_asesores
+WHERE total_evaluaciones > 0;
 """
 
+# Tabla -> (columnas que cambian el aporte, {columna de métricas: valor})
+_APORTES_METRICAS = {
+    "evaluaciones": (("asesor", "estado_comite", "score", "aprobado"), {
+        "total_evaluaciones": "1",
+        "casos_aprobados": "{ref}estado_comite IS 'approved'",
+        "casos_rechazados": "{ref}estado_comite IS 'rejected'",
+        "casos_pendientes": "{ref}estado_comite IS 'pending'",
+        "evaluaciones_con_score": "{ref}score IS NOT NULL",
+        "suma_score": "COALESCE({ref}score, 0)",
+        "evaluaciones_aprobadas": "{ref}aprobado IS 1",
+    }),
+    "simulaciones": (("asesor",), {
+        "total_simulaciones": "1",
+    }),
+}
+
+
+def _sql_upsert_metricas(tabla, ref="", agregado="", origen=""):
+    """
+    INSERT ... ON CONFLICT que suma el aporte de una fila (o de toda la
+    tabla, con agregado='SUM' y origen='FROM tabla') a metricas_asesores.
+    """
+    valores = {
+        columna: valor.format(ref=ref) for columna, valor in _APORTES_METRICAS[tabla][1].items()
+    }
+    columnas = ", ".join(valores)
+    select = ", ".join(f"{agregado}({valor})" for valor in valores.values())
+    agrupar = "WHERE true GROUP BY 1" if origen else ""
+    actualizar = ", ".join(f"{col} = {col} + excluded.{col}" for col in valores)
+    return f"""
+    INSERT INTO metricas_asesores (asesor, {columnas})
+    SELECT COALESCE({ref}asesor, ''), {select}
+    {origen} {agrupar}
+    ON CONFLICT (asesor) DO UPDATE SET {actualizar}"""
+
+
+def _sql_triggers_metricas():
+    """Triggers INSERT/UPDATE/DELETE que mantienen metricas_asesores."""
+    sentencias = []
+    for tabla, (columnas, _valores) in _APORTES_METRICAS.items():
+        sumar = f"{_sql_upsert_metricas(tabla, 'NEW.')};"
+        restar = f"{_sql_upsert_metricas(tabla, 'OLD.', '-')};"
+        cambio = " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in columnas)
+        sentencias += [
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_metricas_{tabla}_insert
+AFTER INSERT ON {tabla}
+BEGIN{sumar}
+END""",
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_metricas_{tabla}_update
+AFTER UPDATE OF {', '.join(columnas)} ON {tabla}
+WHEN {cambio}
+BEGIN{restar}{sumar}
+END""",
+            f"""
+CREATE TRIGGER IF NOT EXISTS trg_metricas_{tabla}_delete
+AFTER DELETE ON {tabla}
+BEGIN{restar}
+END""",
+        ]
+    return sentencias
+
+
+def _reconstruir_metricas_asesores(conn):
+    """Recalcula metricas_asesores desde cero (operación del escritor)."""
+    conn.execute("DELETE FROM metricas_asesores")
+    for tabla in _APORTES_METRICAS:
+        conn.execute(_sql_upsert_metricas(tabla, agregado="SUM", origen=f"FROM {tabla}"))
+    return conn.execute("SELECT COUNT(*) FROM metricas_asesores").fetchone()[0]
+
+
+SCHEMA_SQL += METRICAS_ASESORES_SQL
+SCHEMA_SQL += "".join(f"{sql};\n" for sql in _sql_triggers_metricas())
+
 
 # ============================================================================
 # FUNCIONES HELPER
@@ -357,22 +916,315 @@ def crear_backup_json(ruta_json):
     return True
 
 
-def conectar_db():
+# ============================================================================
+# GESTOR DE CONEXIONES (por request + pool acotado)
+# ============================================================================
+
+# PRAGMAs aplicados una sola vez por conexión física
+PRAGMAS_CONEXION = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("foreign_keys", "ON"),
+    ("busy_timeout", 5000),        # ms de espera antes de "database is locked"
+    ("cache_size", -16000),        # ~16 MB de caché de páginas
+    ("mmap_size", 134217728),      # 128 MB mapeados en memoria
+    ("temp_store", "MEMORY"),
+    ("recursive_triggers", "ON"),  # REPLACE dispara los triggers DELETE (actividad_diaria)
+)
+
+# Conexiones ociosas que se conservan para reutilizar
+POOL_MAX_CONEXIONES = 8
+
+_pool_conexiones = queue.LifoQueue(maxsize=POOL_MAX_CONEXIONES)
+_conexion_local = threading.local()
+_stats_lock = threading.Lock()
+_stats_conexiones = {
+    "aperturas_fisicas": 0,
+    "cierres_fisicos": 0,
+    "solicitudes": 0,
+    "reutilizadas_pool": 0,
+    "requests": 0,
+    "max_solicitudes_request": 0,
+}
+
+
+class ConexionLoansi(sqlite3.Connection):
     """
-    Conecta a la base de datos SQLite.
+    Conexión SQLite administrada por el gestor.
 
-    Returns:
-        sqlite3.Connection: Conexión a la DB
+    close() no cierra la conexión física: decrementa el contador de uso y,
+    cuando nadie más la usa, la devuelve al request actual o al pool.
+
+    Usos anidados: si un helper pide la conexión mientras su llamador
+    tiene una transacción abierta, su uso corre dentro de un SAVEPOINT.
+    commit() y rollback() del helper actúan solo sobre ese SAVEPOINT (no
+    confirman ni revierten el trabajo a medias del llamador) y close()
+    descarta lo que el helper dejó sin commit, igual que una conexión
+    independiente.
     """
-    conn = sqlite3.connect(DB_PATH)
+
+    def _savepoint_propio(self):
+        """Nombre del SAVEPOINT del uso actual, o None si no es anidado."""
+        savepoints = self._savepoints
+        if savepoints and savepoints[-1][0] == self._usos:
+            return savepoints[-1][1]
+        return None
+
+    def commit(self):
+        nombre = self._savepoint_propio()
+        if nombre is None:
+            return super().commit()
+        # Confirma lo del helper dentro de la transacción del llamador
+        self.execute(f"RELEASE SAVEPOINT {nombre}")
+        self.execute(f"SAVEPOINT {nombre}")
+
+    def rollback(self):
+        nombre = self._savepoint_propio()
+        if nombre is None:
+            return super().rollback()
+        self.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+
+    def __exit__(self, tipo, valor, traza):
+        if self._savepoint_propio() is None:
+            return super().__exit__(tipo, valor, traza)
+        if tipo is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def close(self):
+        _liberar_conexion(self)
+
+    def cerrar_fisicamente(self):
+        """Cierra realmente la conexión SQLite."""
+        with _stats_lock:
+            _stats_conexiones["cierres_fisicos"] += 1
+        super().close()
+
+
+def _incrementar_stat(clave, valor=1):
+    with _stats_lock:
+        _stats_conexiones[clave] += valor
+
+
+def aplicar_pragmas(conn):
+    """Aplica PRAGMAS_CONEXION a una conexión recién abierta."""
+    for pragma, valor in PRAGMAS_CONEXION:
+        try:
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+        except sqlite3.OperationalError as e:
+            # journal_mode=WAL requiere un lock breve; no es fatal
+            print(f"⚠️ No se pudo aplicar PRAGMA {pragma}: {e}")
+
+
+def _abrir_conexion_fisica():
+    """Abre una conexión nueva y aplica los PRAGMAs de rendimiento."""
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=ConexionLoansi,
+        check_same_thread=False,  # Las conexiones viajan entre hilos vía pool
+        timeout=5.0,
+    )
     conn.row_factory = sqlite3.Row  # Para acceder por nombre de columna
+    aplicar_pragmas(conn)
+
+    conn._usos = 0
+    conn._savepoints = []  # (nivel de uso, nombre) de los usos anidados
+    _incrementar_stat("aperturas_fisicas")
+    return conn
+
+
+def _tomar_del_pool():
+    """Obtiene una conexión ociosa del pool o abre una nueva."""
+    try:
+        conn = _pool_conexiones.get_nowait()
+        _incrementar_stat("reutilizadas_pool")
+        return conn, False
+    except queue.Empty:
+        return _abrir_conexion_fisica(), True
+
+
+def _devolver_al_pool(conn):
+    """Limpia la conexión y la devuelve al pool (o la cierra si está lleno)."""
+    try:
+        if conn.in_transaction:
+            # Mismo efecto que cerrar sin commit: se descarta lo pendiente
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        conn._usos = 0
+        conn._savepoints = []
+        _pool_conexiones.put_nowait(conn)
+    except queue.Full:
+        conn.cerrar_fisicamente()
+    except sqlite3.Error:
+        conn.cerrar_fisicamente()
+
+
+def _contexto_request():
+    """Retorna flask.g si hay un app context activo, si no None."""
+    try:
+        from flask import g, has_app_context
+    except ImportError:
+        return None
+    return g if has_app_context() else None
 
-    # Habilitar foreign keys (deshabilitadas por defecto en SQLite)
-    conn.execute("PRAGMA foreign_keys = ON")
 
+def conectar_db():
+    """
+    Obtiene la conexión SQLite administrada.
+
+    Dentro de Flask se comparte una única conexión por request (guardada en
+    flask.g). Fuera de Flask se comparte por hilo mientras esté en uso y se
+    recicla a través de un pool acotado. Llamar conn.close() libera la
+    conexión en lugar de cerrarla.
+
+    Returns:
+        ConexionLoansi: Conexión a la DB (compatible con sqlite3.Connection)
+    """
+    _incrementar_stat("solicitudes")
+    ctx = _contexto_request()
+
+    if ctx is not None:
+        conn = ctx.get("_loansi_db")
+        if conn is None:
+            conn, nueva = _tomar_del_pool()
+            ctx._loansi_db = conn
+            ctx._loansi_db_stats = {"solicitudes": 0, "aperturas": int(nueva)}
+        ctx._loansi_db_stats["solicitudes"] += 1
+    else:
+        conn = getattr(_conexion_local, "conn", None)
+        if conn is None:
+            conn, _ = _tomar_del_pool()
+            _conexion_local.conn = conn
+
+    conn._usos += 1
+    if conn._usos > 1 and conn.in_transaction:
+        # El llamador tiene una transacción abierta: el helper trabaja en
+        # su propio SAVEPOINT (ver ConexionLoansi)
+        nombre = f"uso_{conn._usos}"
+        conn.execute(f"SAVEPOINT {nombre}")
+        conn._savepoints.append((conn._usos, nombre))
     return conn
 
 
+def _liberar_conexion(conn):
+    """Libera un uso de la conexión (invocado por ConexionLoansi.close)."""
+    nombre = conn._savepoint_propio()
+    if nombre is not None:
+        # Lo que el helper no confirmó se descarta; lo confirmado queda
+        # en la transacción del llamador
+        conn._savepoints.pop()
+        try:
+            conn.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+            conn.execute(f"RELEASE SAVEPOINT {nombre}")
+        except sqlite3.Error:
+            pass
+    conn._usos = max(0, getattr(conn, "_usos", 1) - 1)
+    if conn._usos > 0:
+        return
+
+    # Sin usuarios activos: descartar transacción abierta sin commit,
+    # igual que hacía el close() de una conexión independiente.
+    if conn.in_transaction:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    ctx = _contexto_request()
+    if ctx is not None and ctx.get("_loansi_db") is conn:
+        # Se conserva para el resto del request; se libera en el teardown
+        return
+
+    if getattr(_conexion_local, "conn", None) is conn:
+        _conexion_local.conn = None
+    _devolver_al_pool(conn)
+
+
+def obtener_memo_request(nombre):
+    """
+    Retorna un dict de memoización que vive solo durante el request actual.
+
+    Args:
+        nombre (str): Espacio de nombres del memo (ej. 'contexto_riesgo')
+
+    Returns:
+        dict | None: Memo del request o None fuera de un contexto Flask
+    """
+    ctx = _contexto_request()
+    if ctx is None:
+        return None
+    memos = ctx.get("_loansi_memos")
+    if memos is None:
+        memos = ctx._loansi_memos = {}
+    return memos.setdefault(nombre, {})
+
+
+def obtener_estadisticas_conexiones():
+    """
+    Retorna contadores globales del gestor de conexiones.
+
+    Returns:
+        dict: Aperturas/cierres físicos, solicitudes lógicas, reutilización
+              del pool y promedio de solicitudes por request.
+    """
+    with _stats_lock:
+        stats = dict(_stats_conexiones)
+    stats["pool_ociosas"] = _pool_conexiones.qsize()
+    stats["pool_max"] = POOL_MAX_CONEXIONES
+    stats["promedio_solicitudes_request"] = (
+        round(stats["solicitudes"] / stats["requests"], 2) if stats["requests"] else 0
+    )
+    return stats
+
+
+def cerrar_pool_conexiones():
+    """Cierra físicamente todas las conexiones ociosas del pool."""
+    cerradas = 0
+    while True:
+        try:
+            conn = _pool_conexiones.get_nowait()
+        except queue.Empty:
+            break
+        conn.cerrar_fisicamente()
+        cerradas += 1
+    return cerradas
+
+
+def init_app(app):
+    """
+    Registra los hooks del gestor de conexiones en la aplicación Flask.
+
+    - after_request: agrega el header X-DB-Connections con los conteos
+    - teardown_appcontext: devuelve la conexión del request al pool
+    """
+    from flask import g
+
+    @app.after_request
+    def _reportar_conexiones_request(response):
+        stats = g.get("_loansi_db_stats")
+        if stats:
+            response.headers["X-DB-Connections"] = (
+                f"solicitudes={stats['solicitudes']}; aperturas={stats['aperturas']}"
+            )
+        return response
+
+    @app.teardown_appcontext
+    def _liberar_conexion_request(exc):
+        conn = g.pop("_loansi_db", None)
+        stats = g.pop("_loansi_db_stats", None)
+        if stats:
+            with _stats_lock:
+                _stats_conexiones["requests"] += 1
+                if stats["solicitudes"] > _stats_conexiones["max_solicitudes_request"]:
+                    _stats_conexiones["max_solicitudes_request"] = stats["solicitudes"]
+        if conn is not None:
+            _devolver_al_pool(conn)
+
+    return app
+
+
 def crear_base_datos():
     """
     Crea la base de datos con el esquema completo.
@@ -400,6 +1252,402 @@ def crear_base_datos():
         return False
 
 
+# ============================================================================
+# MIGRACIONES INCREMENTALES
+# ============================================================================
+
+def _migracion_indices_historial_keyset(cursor):
+    """Índices compuestos para la paginación keyset del historial."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_evaluaciones_ts_id
+        ON evaluaciones(timestamp DESC, id DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_evaluaciones_asesor_ts_id
+        ON evaluaciones(asesor, timestamp DESC, id DESC)
+    """)
+
+
+def _recrear_triggers_columnas_derivadas(cursor):
+    cursor.execute("DROP TRIGGER IF EXISTS trg_evaluaciones_derivadas_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_evaluaciones_derivadas_update")
+    for trigger_sql in TRIGGERS_COLUMNAS_DERIVADAS_SQL:
+        cursor.execute(trigger_sql)
+
+
+def _migracion_columnas_derivadas_evaluacion(cursor):
+    """
+    Agrega las columnas derivadas de resultado/decision_admin, sus triggers
+    e índices, rellena las filas existentes y recrea las vistas.
+    """
+    cursor.execute("PRAGMA table_info(evaluaciones)")
+    existentes = {row[1] for row in cursor.fetchall()}
+
+    for columna, tipo, _origen, _expresion in COLUMNAS_DERIVADAS_EVALUACION:
+        if columna not in existentes:
+            cursor.execute(f"ALTER TABLE evaluaciones ADD COLUMN {columna} {tipo}")
+
+    _recrear_triggers_columnas_derivadas(cursor)
+
+    # Backfill de las filas existentes
+    cursor.execute(f"UPDATE evaluaciones SET {_sql_set_columnas_derivadas()}")
+
+    for indice_sql in INDICES_COLUMNAS_DERIVADAS_SQL:
+        cursor.execute(indice_sql)
+
+    cursor.execute("DROP VIEW IF EXISTS vista_casos_comite")
+    cursor.execute("DROP VIEW IF EXISTS vista_metricas_asesores")
+    for vista_sql in VISTAS_SQL.split(";"):
+        if "CREATE VIEW" in vista_sql:
+            cursor.execute(vista_sql)
+
+
+def _migracion_version_configuracion(cursor):
+    """Tabla version_datos y triggers del conjunto 'configuracion'."""
+    cursor.execute(VERSION_DATOS_SQL)
+    for sql in _sql_triggers_version("configuracion"):
+        cursor.execute(sql)
+
+
+def _migracion_version_scoring(cursor):
+    """Triggers del conjunto 'scoring' sobre las tablas que existan."""
+    cursor.execute(VERSION_DATOS_SQL)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existentes = {row[0] for row in cursor.fetchall()}
+    for sql in _sql_triggers_version("scoring", existentes):
+        cursor.execute(sql)
+
+
+def _migracion_version_actividad(cursor):
+    """Triggers del conjunto 'actividad' (cache del resumen del navbar)."""
+    cursor.execute(VERSION_DATOS_SQL)
+    for sql in _sql_triggers_version("actividad"):
+        cursor.execute(sql)
+
+
+def _migracion_indices_actividad(cursor):
+    """Índices compuestos para los filtros por rango de fecha de los dashboards."""
+    for sql in INDICES_ACTIVIDAD_SQL:
+        cursor.execute(sql)
+
+    # estado_final lo agregan los helpers de estados; no está en SCHEMA_SQL
+    cursor.execute("PRAGMA table_info(evaluaciones)")
+    if "estado_final" in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_final "
+            "ON evaluaciones(estado_final)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluaciones_estado_comite_final "
+            "ON evaluaciones(estado_comite, estado_final)"
+        )
+    cursor.execute("ANALYZE evaluaciones")
+    cursor.execute("ANALYZE simulaciones")
+
+
+def _migracion_actividad_diaria(cursor):
+    """Tabla actividad_diaria, sus triggers y el backfill desde el historial."""
+    for sql in ACTIVIDAD_DIARIA_SQL.split(";"):
+        if sql.strip():
+            cursor.execute(sql)
+    for sql in _sql_triggers_actividad():
+        cursor.execute(sql)
+    _reconstruir_actividad_diaria(cursor)
+
+
+def _migracion_jerarquia_clausura(cursor):
+    """Tabla user_assignments_closure, triggers de 'jerarquia' y backfill."""
+    from db_jerarquia import _reconstruir_clausura
+
+    for sql in USER_ASSIGNMENTS_CLOSURE_SQL.split(";"):
+        if sql.strip():
+            cursor.execute(sql)
+    cursor.execute(VERSION_DATOS_SQL)
+    for sql in _sql_triggers_version("jerarquia"):
+        cursor.execute(sql)
+    _reconstruir_clausura(cursor)
+
+
+def _migracion_indices_arbol_jerarquia(cursor):
+    """Índices del árbol de jerarquía con subtotales (obtener_arbol_estadisticas)."""
+    # Paso recursivo: miembros activos de un manager sin leer la tabla
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_assign_manager_activo "
+        "ON user_assignments(manager_username, activo, member_username)"
+    )
+    # estado_final lo agregan los helpers de estados; no está en SCHEMA_SQL
+    cursor.execute("PRAGMA table_info(evaluaciones)")
+    if "estado_final" in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluaciones_desembolsos "
+            "ON evaluaciones(asesor, monto_solicitado) WHERE estado_final = 'desembolsado'"
+        )
+
+
+def _migracion_metricas_asesores(cursor):
+    """metricas_asesores, sus triggers, el backfill y la vista compatible."""
+    cursor.execute("DROP VIEW IF EXISTS vista_metricas_asesores")
+    for sql in METRICAS_ASESORES_SQL.split(";"):
+        if sql.strip():
+            cursor.execute(sql)
+    for sql in _sql_triggers_metricas():
+        cursor.execute(sql)
+    _reconstruir_metricas_asesores(cursor)
+
+
+def _migracion_series_dashboard(cursor):
+    """Triggers de 'series' e índice de desembolsos por fecha (obtener_series_dashboard)."""
+    cursor.execute(VERSION_DATOS_SQL)
+    for sql in _sql_triggers_version("series"):
+        cursor.execute(sql)
+    # estado_final y fecha_desembolso los agregan los helpers de estados
+    cursor.execute("PRAGMA table_info(evaluaciones)")
+    if {"estado_final", "fecha_desembolso"} <= {row[1] for row in cursor.fetchall()}:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluaciones_desembolso_fecha "
+            "ON evaluaciones(fecha_desembolso, asesor, tipo_credito, monto_solicitado) "
+            "WHERE estado_final = 'desembolsado'"
+        )
+
+
+def _migracion_versiones_condicionales(cursor):
+    """Triggers de 'permisos', 'comite' y contador version_asesor (validadores ETag)."""
+    cursor.execute(VERSION_DATOS_SQL)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existentes = {row[0] for row in cursor.fetchall()}
+    for sql in _sql_triggers_version("permisos", existentes):
+        cursor.execute(sql)
+    cursor.execute(VERSION_ASESOR_SQL)
+    for sql in _sql_triggers_version_asesor() + _sql_triggers_version_comite():
+        cursor.execute(sql)
+
+
+def _migracion_derivadas_booleanos_enteros(cursor):
+    """
+    Triggers que leen aprobado / rechazo_automatico guardados como 0/1 y
+    re-cálculo de las filas afectadas (antes quedaban NULL / 0).
+    """
+    _recrear_triggers_columnas_derivadas(cursor)
+    cursor.execute(f"""
+        UPDATE evaluaciones SET {_sql_set_columnas_derivadas()}
+        WHERE json_valid(resultado)
+        AND 'integer' IN (json_type(resultado, '$.aprobado'),
+                          json_type(resultado, '$.rechazo_automatico'))
+    """)
+
+
+def _migracion_metricas_aprobadas(cursor):
+    """metricas_asesores.evaluaciones_aprobadas, triggers que la mantienen y backfill."""
+    cursor.execute("PRAGMA table_info(metricas_asesores)")
+    if "evaluaciones_aprobadas" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(
+            "ALTER TABLE metricas_asesores "
+            "ADD COLUMN evaluaciones_aprobadas INTEGER NOT NULL DEFAULT 0"
+        )
+    for operacion in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_metricas_evaluaciones_{operacion}")
+    for sql in _sql_triggers_metricas():
+        cursor.execute(sql)
+    _reconstruir_metricas_asesores(cursor)
+
+
+def _migracion_version_usuarios(cursor):
+    """Saca usuarios del conjunto 'configuracion' y le da su propio contador."""
+    for operacion in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_version_configuracion_usuarios_{operacion}")
+    cursor.execute(VERSION_DATOS_SQL)
+    for sql in _sql_triggers_version("usuarios"):
+        cursor.execute(sql)
+
+
+# Orden de aplicación: agregar siempre al final, nunca renombrar
+MIGRACIONES = [
+    ("2026_10_indices_historial_keyset", _migracion_indices_historial_keyset),
+    ("2026_10_columnas_derivadas_evaluacion", _migracion_columnas_derivadas_evaluacion),
+    ("2026_10_version_configuracion", _migracion_version_configuracion),
+    ("2026_10_version_scoring", _migracion_version_scoring),
+    ("2026_10_indices_actividad", _migracion_indices_actividad),
+    ("2026_10_actividad_diaria", _migracion_actividad_diaria),
+    ("2026_10_version_actividad", _migracion_version_actividad),
+    ("2026_10_jerarquia_clausura", _migracion_jerarquia_clausura),
+    ("2026_10_indices_arbol_jerarquia", _migracion_indices_arbol_jerarquia),
+    ("2026_10_metricas_asesores", _migracion_metricas_asesores),
+    ("2026_10_series_dashboard", _migracion_series_dashboard),
+    ("2026_10_versiones_condicionales", _migracion_versiones_condicionales),
+    ("2026_10_derivadas_booleanos_enteros", _migracion_derivadas_booleanos_enteros),
+    ("2026_10_version_usuarios", _migracion_version_usuarios),
+    ("2026_10_metricas_aprobadas", _migracion_metricas_aprobadas),
+]
+
+
+def aplicar_migraciones():
+    """
+    Aplica las migraciones pendientes sobre la base existente.
+
+    Cada migración corre en su propia transacción y queda registrada en
+    schema_migraciones, de modo que se ejecuta una sola vez.
+
+    Returns:
+        list: Nombres de las migraciones aplicadas en esta llamada
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+    aplicadas = []
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migraciones (
+                nombre TEXT PRIMARY KEY,
+                fecha_aplicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        cursor.execute("SELECT nombre FROM schema_migraciones")
+        existentes = {row[0] for row in cursor.fetchall()}
+
+        for nombre, migracion in MIGRACIONES:
+            if nombre in existentes:
+                continue
+            try:
+                migracion(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migraciones (nombre) VALUES (?)", (nombre,)
+                )
+                conn.commit()
+                aplicadas.append(nombre)
+                print(f"✅ Migración aplicada: {nombre}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error en migración {nombre}: {e}")
+                raise
+
+        return aplicadas
+
+    finally:
+        conn.close()
+
+
+def obtener_version_datos(nombre):
+    """
+    Lee el contador de versión de un conjunto de datos (consulta por PK).
+
+    Args:
+        nombre (str): Conjunto de datos (ver TABLAS_VERSIONADAS)
+
+    Returns:
+        int | None: Versión actual o None si la tabla/registro no existe
+    """
+    conn = conectar_db()
+    try:
+        row = conn.execute(
+            "SELECT version FROM version_datos WHERE nombre = ?", (nombre,)
+        ).fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        # Base sin migrar: sin versión, los caches recargan siempre
+        return None
+    finally:
+        conn.close()
+
+
+def obtener_versiones(conjuntos=(), asesor=None):
+    """
+    Lee en una sola consulta (por PK) varios contadores de versión y el
+    contador del asesor, para armar validadores HTTP (ETag / Last-Modified).
+
+    Args:
+        conjuntos (iterable): Nombres de version_datos (TABLAS_VERSIONADAS
+                              y 'comite'); None = todos
+        asesor (str, optional): Username cuyo contador de version_asesor
+                                se incluye bajo la clave 'asesor'
+
+    Returns:
+        tuple: (dict nombre -> versión, última fecha_modificacion UTC
+                'YYYY-MM-DD HH:MM:SS' o None). Los contadores sin registro
+                no aparecen en el dict; (None, None) si la base no tiene
+                las tablas de versiones (sin migrar).
+    """
+    partes, params = [], []
+    if conjuntos is None:
+        partes.append("SELECT nombre, version, fecha_modificacion FROM version_datos")
+    elif conjuntos:
+        conjuntos = list(conjuntos)
+        marcas = ", ".join("?" * len(conjuntos))
+        partes.append(
+            f"SELECT nombre, version, fecha_modificacion FROM version_datos WHERE nombre IN ({marcas})"
+        )
+        params += conjuntos
+    if asesor is not None:
+        partes.append(
+            "SELECT 'asesor', version, fecha_modificacion FROM version_asesor WHERE asesor = ?"
+        )
+        params.append(asesor)
+    if not partes:
+        return {}, None
+
+    conn = conectar_db()
+    try:
+        filas = conn.execute(" UNION ALL ".join(partes), params).fetchall()
+    except sqlite3.OperationalError:
+        # Base sin migrar: sin versiones, las respuestas no se validan
+        return None, None
+    finally:
+        conn.close()
+    versiones = {nombre: version for nombre, version, _fecha in filas}
+    fechas = [fecha for _nombre, _version, fecha in filas if fecha]
+    return versiones, max(fechas) if fechas else None
+
+
+def incrementar_version_datos(nombre):
+    """
+    Incrementa manualmente la versión de un conjunto de datos, para
+    cambios que no pasan por las tablas con triggers.
+    """
+    from db_writer import ejecutar_escritura
+
+    def _incrementar(conn):
+        conn.execute(
+            """
+            INSERT INTO version_datos (nombre, version) VALUES (?, 1)
+            ON CONFLICT(nombre) DO UPDATE SET
+                version = version + 1,
+                fecha_modificacion = CURRENT_TIMESTAMP
+        """,
+            (nombre,),
+        )
+
+    ejecutar_escritura(_incrementar)
+
+
+def reconstruir_actividad_diaria(timeout=600.0):
+    """
+    Recalcula actividad_diaria desde evaluaciones y simulaciones, en una
+    sola transacción del escritor. Para backfill o si se escribió a la base
+    sin los triggers (p. ej. desde otra herramienta).
+
+    Returns:
+        int: Filas (día, asesor, línea) resultantes
+    """
+    from db_writer import ejecutar_escritura
+
+    return ejecutar_escritura(_reconstruir_actividad_diaria, timeout=timeout)
+
+
+def reconstruir_metricas_asesores(timeout=600.0):
+    """
+    Recalcula metricas_asesores desde evaluaciones y simulaciones, en una
+    sola transacción del escritor (refresco bajo demanda; los triggers la
+    mantienen al día en cada escritura).
+
+    Returns:
+        int: Asesores resultantes
+    """
+    from db_writer import ejecutar_escritura
+
+    return ejecutar_escritura(_reconstruir_metricas_asesores, timeout=timeout)
+
+
 def verificar_integridad_db():
     """
     Verifica la integridad de la base de datos.
@@ -546,6 +1794,15 @@ def test_database():
 # ============================================================================
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Base de datos Loansi")
+    parser.add_argument("--reconstruir-actividad", action="store_true",
+                        help="Recalcular actividad_diaria desde el historial (backfill)")
+    parser.add_argument("--reconstruir-metricas", action="store_true",
+                        help="Recalcular metricas_asesores desde el historial")
+    args = parser.parse_args()
+
     print("""
 ╔══════════════════════════════════════════════════════════════════╗
 ║                  SISTEMA DE BASE DE DATOS - LOANSI               ║
@@ -553,4 +1810,19 @@ if __name__ == "__main__":
 ╚══════════════════════════════════════════════════════════════════╝
     """)
 
-    test_database()
+    if args.reconstruir_actividad:
+        from db_writer import detener_escritor
+
+        aplicar_migraciones()
+        filas = reconstruir_actividad_diaria()
+        detener_escritor()
+        print(f"✅ actividad_diaria reconstruida: {filas} filas (día, asesor, línea)")
+    elif args.reconstruir_metricas:
+        from db_writer import detener_escritor
+
+        aplicar_migraciones()
+        asesores = reconstruir_metricas_asesores()
+        detener_escritor()
+        print(f"✅ metricas_asesores reconstruida: {asesores} asesores")
+    else:
+        test_database()
@@ -0,0 +1,428 @@
+"""
+DB_ESCRITURA_DIFERIDA.PY - Persistencia write-behind de simulaciones
+=====================================================================
+
+El historial de simulaciones es telemetría de solo inserción: el asesor no
+necesita esperar el COMMIT (y su fsync) para ver el resultado de la
+simulación. Con este modo activo:
+
+1. La simulación se anota en un archivo de respaldo local (spill, JSONL)
+   y se encola en memoria; la request responde de inmediato
+2. Un hilo de fondo toma lo encolado por lotes y lo inserta con
+   guardar_simulaciones_bulk() a través del escritor único
+3. Un segmento de spill se borra cuando todas sus simulaciones quedaron
+   confirmadas; al iniciar se reinsertan los segmentos que hayan quedado
+   de una caída (de forma idempotente)
+4. Si la cola está llena la simulación se guarda de forma síncrona
+5. Un lote que sigue fallando tras MAX_REINTENTOS_LOTE reintentos se
+   inserta simulación por simulación; las que aún fallan se mueven a un
+   archivo de descarte (descartadas-*.jsonl, dead-letter) que no se
+   reinserta al iniciar
+6. Al apagar el proceso se drena la cola
+
+El spill se escribe con flush (sobrevive a la caída del proceso); con
+fsync_spill=True también sobrevive a una caída del sistema operativo, a
+costa de un fsync por simulación.
+
+Se activa con SIMULACIONES_WRITE_BEHIND=true (ver app/config.py) y viene
+desactivado: solo mejora la latencia con un cliente. Con varios clientes
+concurrentes el p99 EMPEORA (benchmarks/bench_write_behind.py, 8 clientes:
+p99 53 -> 66 ms), porque el hilo de fondo compite por el GIL con el
+render de las requests.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+MAX_COLA_DEFECTO = 1000          # Simulaciones pendientes antes de desbordar
+MAX_LOTE = 200                   # Simulaciones por inserción
+ESPERA_LOTE = 0.05               # Segundos que se espera para completar un lote
+MAX_BYTES_SEGMENTO = 1 << 20     # Rotación del archivo de spill (1 MB)
+BACKOFF_MAX = 5.0                # Tope de espera entre reintentos de un lote
+MAX_REINTENTOS_LOTE = 5          # Reintentos antes de aislar las simulaciones
+
+_FIN = object()  # Centinela para detener el hilo
+
+
+class _Segmento:
+    """Archivo de spill con el conteo de simulaciones aún no confirmadas."""
+
+    __slots__ = ("ruta", "archivo", "pendientes", "abierto")
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, "a", encoding="utf-8")
+        self.pendientes = 0
+        self.abierto = True
+
+
+# ============================================================================
+# PERSISTENCIA DIFERIDA
+# ============================================================================
+
+class EscrituraDiferida:
+    """
+    Cola acotada + hilo de fondo que persiste simulaciones por lotes.
+
+    encolar() retorna False cuando la simulación no se pudo diferir (cola
+    llena o hilo detenido); el llamador debe guardarla de forma síncrona.
+    """
+
+    def __init__(self, directorio_spill, max_cola=MAX_COLA_DEFECTO,
+                 max_lote=MAX_LOTE, fsync_spill=False):
+        self.directorio_spill = Path(directorio_spill)
+        self.max_lote = max_lote
+        self.fsync_spill = fsync_spill
+
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._segmento = None
+        self._numero_segmento = 0
+        self._stats = {
+            "encoladas": 0,
+            "persistidas": 0,
+            "desbordes": 0,
+            "errores_fila": 0,
+            "reintentos": 0,
+            "descartadas": 0,
+            "recuperadas": 0,
+            "lotes": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Recupera el spill pendiente e inicia el hilo de fondo."""
+        with self._lock:
+            if self.activo:
+                return self
+            self.directorio_spill.mkdir(parents=True, exist_ok=True)
+            self._recuperar_spill()
+            self._hilo = threading.Thread(
+                target=self._bucle, name="loansi-simulaciones-wb", daemon=True
+            )
+            self._hilo.start()
+        return self
+
+    def detener(self, timeout=30.0):
+        """Drena la cola (persistiendo lo pendiente) y detiene el hilo."""
+        with self._lock:
+            hilo = self._hilo
+            if hilo is None:
+                return
+            self._hilo = None
+        # Bloqueante: la cola puede estar llena mientras el hilo la vacía
+        self._cola.put(_FIN)
+        hilo.join(timeout)
+        if hilo.is_alive():
+            print("⚠️ Write-behind de simulaciones no terminó de drenar; "
+                  "lo pendiente queda en el spill")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def encolar(self, simulacion):
+        """
+        Difiere la persistencia de una simulación.
+
+        Returns:
+            bool: True si quedó encolada y anotada en el spill
+        """
+        linea = json.dumps(simulacion, ensure_ascii=False, default=str) + "\n"
+
+        with self._lock:
+            if not self.activo or self._cola.full():
+                self._stats["desbordes"] += 1
+                return False
+
+            segmento = self._segmento_para_escribir()
+            segmento.archivo.write(linea)
+            segmento.archivo.flush()
+            if self.fsync_spill:
+                os.fsync(segmento.archivo.fileno())
+            segmento.pendientes += 1
+
+            # Solo este método agrega elementos y lo hace bajo el lock,
+            # así que tras full() == False hay espacio garantizado.
+            self._cola.put_nowait((simulacion, segmento))
+            self._stats["encoladas"] += 1
+        return True
+
+    def estadisticas(self):
+        """Contadores de simulaciones encoladas, persistidas y desbordes."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pendientes"] = self._cola.qsize()
+        stats["activo"] = self.activo
+        return stats
+
+    # ------------------------------------------------------------------
+    # Spill
+    # ------------------------------------------------------------------
+
+    def _segmento_para_escribir(self):
+        segmento = self._segmento
+        if segmento is not None and segmento.archivo.tell() < MAX_BYTES_SEGMENTO:
+            return segmento
+        if segmento is not None:
+            self._cerrar_segmento(segmento)
+
+        self._numero_segmento += 1
+        ruta = self.directorio_spill / (
+            f"simulaciones-{os.getpid()}-{time.time_ns()}-{self._numero_segmento}.jsonl"
+        )
+        self._segmento = _Segmento(ruta)
+        return self._segmento
+
+    def _cerrar_segmento(self, segmento):
+        """Cierra el archivo; si ya no tiene pendientes lo elimina."""
+        if segmento.abierto:
+            segmento.archivo.close()
+            segmento.abierto = False
+        if self._segmento is segmento:
+            self._segmento = None
+        if segmento.pendientes == 0:
+            segmento.ruta.unlink(missing_ok=True)
+
+    def _confirmar(self, items):
+        """Descuenta simulaciones confirmadas y libera segmentos completos."""
+        with self._lock:
+            for _simulacion, segmento in items:
+                segmento.pendientes -= 1
+                if segmento.pendientes == 0:
+                    self._cerrar_segmento(segmento)
+
+    def _recuperar_spill(self):
+        """Reinserta segmentos dejados por una ejecución anterior."""
+        from db_helpers import guardar_simulaciones_bulk
+
+        for ruta in sorted(self.directorio_spill.glob("simulaciones-*.jsonl")):
+            pid = int(ruta.name.split("-")[1])
+            if pid != os.getpid() and _proceso_vivo(pid):
+                continue  # Segmento en uso por otro worker
+
+            simulaciones = []
+            with open(ruta, "r", encoding="utf-8") as archivo:
+                for linea in archivo:
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        simulaciones.append(json.loads(linea))
+                    except json.JSONDecodeError:
+                        # Última línea truncada por la caída
+                        continue
+
+            nuevas = _filtrar_ya_persistidas(simulaciones)
+            if nuevas:
+                resultado = guardar_simulaciones_bulk(nuevas)
+                self._stats["recuperadas"] += resultado["insertadas"]
+                self._stats["errores_fila"] += resultado["errores"]
+            ruta.unlink()
+            print(f"♻️ Spill recuperado: {ruta.name} ({len(nuevas)} de {len(simulaciones)} simulaciones)")
+
+    # ------------------------------------------------------------------
+    # Hilo de fondo
+    # ------------------------------------------------------------------
+
+    def _bucle(self):
+        detener = False
+        while not detener:
+            item = self._cola.get()
+            if item is _FIN:
+                break
+
+            lote = [item]
+            limite = time.monotonic() + ESPERA_LOTE
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                try:
+                    siguiente = (
+                        self._cola.get(timeout=restante) if restante > 0
+                        else self._cola.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if siguiente is _FIN:
+                    detener = True
+                    break
+                lote.append(siguiente)
+
+            self._persistir(lote)
+
+        with self._lock:
+            if self._segmento is not None:
+                self._cerrar_segmento(self._segmento)
+
+    def _persistir(self, lote):
+        """
+        Inserta el lote; reintenta con backoff hasta MAX_REINTENTOS_LOTE
+        veces. Si sigue fallando, inserta cada simulación por separado y
+        las que fallan van al archivo de descarte.
+        """
+        from db_helpers import guardar_simulaciones_bulk
+
+        simulaciones = [simulacion for simulacion, _segmento in lote]
+        espera = 0.05
+        for intento in range(MAX_REINTENTOS_LOTE + 1):
+            try:
+                resultado = guardar_simulaciones_bulk(simulaciones, tamano_lote=len(lote))
+                break
+            except Exception as e:
+                if intento == MAX_REINTENTOS_LOTE:
+                    print(f"❌ Write-behind: lote de {len(lote)} simulaciones falló "
+                          f"{intento + 1} veces ({e}); se inserta una por una")
+                    resultado = self._persistir_una_por_una(simulaciones)
+                    break
+                with self._lock:
+                    self._stats["reintentos"] += 1
+                print(f"⚠️ Write-behind: lote de {len(lote)} simulaciones falló ({e}); reintentando")
+                time.sleep(espera)
+                espera = min(BACKOFF_MAX, espera * 2)
+
+        for timestamp, error in resultado["detalle_errores"]:
+            print(f"❌ Simulación {timestamp} descartada: {error}")
+
+        with self._lock:
+            self._stats["lotes"] += 1
+            self._stats["persistidas"] += resultado["insertadas"]
+            self._stats["errores_fila"] += resultado["errores"]
+        self._confirmar(lote)
+
+    def _persistir_una_por_una(self, simulaciones):
+        """Un intento por simulación; las que fallan van al descarte."""
+        from db_helpers import guardar_simulaciones_bulk
+
+        resultado = {"insertadas": 0, "errores": 0, "detalle_errores": []}
+        descartadas = []
+        for simulacion in simulaciones:
+            try:
+                parcial = guardar_simulaciones_bulk([simulacion], tamano_lote=1)
+            except Exception as e:
+                descartadas.append(simulacion)
+                resultado["detalle_errores"].append((simulacion.get("timestamp"), str(e)))
+                continue
+            resultado["insertadas"] += parcial["insertadas"]
+            resultado["errores"] += parcial["errores"]
+            resultado["detalle_errores"] += parcial["detalle_errores"]
+
+        if descartadas:
+            self._descartar(descartadas)
+        return resultado
+
+    def _descartar(self, simulaciones):
+        """Anota simulaciones que no se pudieron insertar en el archivo de descarte."""
+        ruta = self.directorio_spill / f"descartadas-{os.getpid()}.jsonl"
+        with open(ruta, "a", encoding="utf-8") as archivo:
+            for simulacion in simulaciones:
+                archivo.write(json.dumps(simulacion, ensure_ascii=False, default=str) + "\n")
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        with self._lock:
+            self._stats["descartadas"] += len(simulaciones)
+        print(f"🗑️ Write-behind: {len(simulaciones)} simulaciones movidas a {ruta.name}")
+
+
+def _proceso_vivo(pid):
+    """Indica si existe un proceso con ese PID."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _filtrar_ya_persistidas(simulaciones):
+    """Descarta las simulaciones del spill que ya están en la DB (timestamp + asesor)."""
+    from database import conectar_db
+
+    if not simulaciones:
+        return []
+    conn = conectar_db()
+    try:
+        timestamps = sorted({s.get("timestamp") for s in simulaciones if s.get("timestamp")})
+        existentes = set()
+        for i in range(0, len(timestamps), 500):
+            parte = timestamps[i:i + 500]
+            existentes.update(
+                (row[0], row[1]) for row in conn.execute(
+                    f"SELECT timestamp, asesor FROM simulaciones "
+                    f"WHERE timestamp IN ({','.join('?' * len(parte))})",
+                    parte,
+                ).fetchall()
+            )
+    finally:
+        conn.close()
+    return [
+        s for s in simulaciones
+        if (s.get("timestamp"), s.get("asesor")) not in existentes
+    ]
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+_escritura_diferida = None
+_escritura_diferida_lock = threading.Lock()
+
+
+def configurar_escritura_diferida(directorio_spill, max_cola=MAX_COLA_DEFECTO,
+                                  fsync_spill=False):
+    """
+    Activa el modo write-behind en el proceso (idempotente).
+
+    Returns:
+        EscrituraDiferida: Instancia global ya iniciada
+    """
+    global _escritura_diferida
+    with _escritura_diferida_lock:
+        if _escritura_diferida is None:
+            _escritura_diferida = EscrituraDiferida(
+                directorio_spill, max_cola=max_cola, fsync_spill=fsync_spill
+            ).iniciar()
+            atexit.register(detener_escritura_diferida)
+            print(f"✅ Write-behind de simulaciones activo (cola {max_cola})")
+    return _escritura_diferida
+
+
+def obtener_escritura_diferida():
+    """Instancia global o None si el modo write-behind no está activo."""
+    return _escritura_diferida
+
+
+def detener_escritura_diferida(timeout=30.0):
+    """Drena y detiene la instancia global."""
+    if _escritura_diferida is not None:
+        _escritura_diferida.detener(timeout)
+
+
+def obtener_estadisticas_escritura_diferida():
+    """Estadísticas del write-behind (vacías si no está activo)."""
+    if _escritura_diferida is None:
+        return {"activo": False}
+    return _escritura_diferida.estadisticas()
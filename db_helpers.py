@@ -7,11 +7,26 @@ en flask_app.py. Mantiene la misma API para minimizar cambios.
 
 """
 
+import base64
+import bisect
+import itertools
 import json
 import sqlite3
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from database import conectar_db, DB_PATH
+from types import MappingProxyType
+from database import conectar_db, obtener_memo_request, obtener_version_datos, obtener_versiones, DB_PATH
+from db_writer import enviar_escritura, ejecutar_escritura
+from bus_eventos import publicar_en_segundo_plano, publicar_nuevo_pendiente
+from db_jerarquia import (
+    agregar_arista_clausura,
+    invalidar_indice_jerarquia,
+    obtener_indice_jerarquia,
+    quitar_arista_clausura,
+)
 
 
 # ============================================================================
@@ -19,11 +34,145 @@ from database import conectar_db, DB_PATH
 # ============================================================================
 
 
+# ============================================================================
+# SNAPSHOT DE CONFIGURACIÓN (cache versionado en proceso)
+# ============================================================================
+# cargar_configuracion() se llama en casi todas las rutas. El resultado se
+# guarda como snapshot inmutable y solo se reconstruye cuando cambia
+# version_datos['configuracion'] (triggers sobre lineas_credito,
+# costos_asociados y configuracion_sistema) o version_datos['usuarios'],
+# incluso si el cambio lo hizo otro worker. Los usuarios van en su propio
+# contador para que un cambio de usuario no invalide los caches que
+# dependen solo de la configuración (modelos de scoring por línea).
+
+_CONFIG_SNAPSHOT = None
+_CONFIG_SNAPSHOT_LOCK = threading.Lock()
+
+
+def congelar(valor):
+    """Convierte dicts/listas anidados en estructuras de solo lectura."""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def descongelar(valor):
+    """Copia mutable (dict/list) de una estructura congelada."""
+    if isinstance(valor, MappingProxyType):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+class ConfiguracionSnapshot:
+    """
+    Configuración inmutable asociada a una versión de datos.
+
+    Se puede leer como un mapping (snapshot["LINEAS_CREDITO"], .get()).
+    Para modificar y guardar usar como_dict(), que retorna una copia.
+    `version` es la de 'configuracion'; `version_usuarios` la de USUARIOS.
+    """
+
+    __slots__ = ("version", "version_usuarios", "datos", "creado")
+
+    def __init__(self, version, datos, version_usuarios=None):
+        self.version = version
+        self.version_usuarios = version_usuarios
+        self.datos = congelar(datos)
+        self.creado = time.time()
+
+    def __getitem__(self, clave):
+        return self.datos[clave]
+
+    def __contains__(self, clave):
+        return clave in self.datos
+
+    def get(self, clave, defecto=None):
+        return self.datos.get(clave, defecto)
+
+    def como_dict(self):
+        """Copia mutable con el mismo formato que config.json."""
+        return descongelar(self.datos)
+
+
+def obtener_snapshot_configuracion():
+    """
+    Retorna el snapshot de configuración vigente.
+
+    Dentro de un request se resuelve una sola vez (memo del request); fuera
+    de él cuesta una consulta por PK a version_datos. Solo si la versión
+    cambió se vuelven a ejecutar las consultas de configuración.
+
+    Returns:
+        ConfiguracionSnapshot
+    """
+    global _CONFIG_SNAPSHOT
+
+    memo = obtener_memo_request("configuracion")
+    if memo is not None and "snapshot" in memo:
+        return memo["snapshot"]
+
+    versiones, _ = obtener_versiones(("configuracion", "usuarios"))
+    versiones = versiones or {}
+    version = versiones.get("configuracion")
+    version_usuarios = versiones.get("usuarios")
+    vigente = version is not None and version_usuarios is not None
+
+    def _desactualizado(snapshot):
+        return (
+            snapshot is None or not vigente
+            or snapshot.version != version or snapshot.version_usuarios != version_usuarios
+        )
+
+    snapshot = _CONFIG_SNAPSHOT
+
+    if _desactualizado(snapshot):
+        with _CONFIG_SNAPSHOT_LOCK:
+            snapshot = _CONFIG_SNAPSHOT
+            if _desactualizado(snapshot):
+                snapshot = ConfiguracionSnapshot(version, _leer_configuracion_db(), version_usuarios)
+                if vigente:
+                    _CONFIG_SNAPSHOT = snapshot
+                print(f"🔄 Snapshot de configuración reconstruido "
+                      f"(versión {version}, usuarios {version_usuarios})")
+
+    if memo is not None:
+        memo["snapshot"] = snapshot
+    return snapshot
+
+
+def invalidar_cache_configuracion():
+    """Descarta el snapshot del proceso y el memo del request actual."""
+    global _CONFIG_SNAPSHOT
+    with _CONFIG_SNAPSHOT_LOCK:
+        _CONFIG_SNAPSHOT = None
+    memo = obtener_memo_request("configuracion")
+    if memo:
+        memo.clear()
+
+
 def cargar_configuracion():
     """
-    Carga configuración completa desde SQLite.
+    Carga configuración completa.
     Reemplaza la función que leía config.json.
 
+    Retorna una copia mutable nueva del snapshot versionado en cada
+    llamada: modificarla no cambia lo que ven las demás llamadas del
+    request. Para solo leer usar obtener_snapshot_configuracion().
+
+    Returns:
+        dict: Configuración en el mismo formato que config.json
+    """
+    return obtener_snapshot_configuracion().como_dict()
+
+
+def _leer_configuracion_db():
+    """
+    Lee la configuración completa desde SQLite (6 consultas).
+
     Returns:
         dict: Configuración en el mismo formato que config.json
     """
@@ -352,6 +501,10 @@ def guardar_configuracion(config):
         conn.commit()
         print("✅ Configuración completa guardada en SQLite")
 
+        # Los triggers ya incrementaron la versión; descartar el snapshot
+        # local evita esperar a la siguiente verificación
+        invalidar_cache_configuracion()
+
     except Exception as e:
         conn.rollback()
         print(f"❌ Error guardando configuración: {e}")
@@ -380,26 +533,20 @@ def eliminar_linea_credito_db(nombre_linea):
     Returns:
         bool: True si se eliminó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
+    def _desactivar(conn):
         # Verificar que la línea existe
-        cursor.execute(
+        linea = conn.execute(
             "SELECT id FROM lineas_credito WHERE nombre = ? AND activo = 1",
             (nombre_linea,),
-        )
-        linea = cursor.fetchone()
-
+        ).fetchone()
         if not linea:
-            print(f"⚠️ Línea '{nombre_linea}' no encontrada o ya está inactiva")
-            return False
+            return None
 
         linea_id = linea[0]
 
         # Soft delete: marcar como inactiva (no eliminar físicamente)
         # Esto preserva integridad referencial con evaluaciones históricas
-        cursor.execute(
+        conn.execute(
             """
             UPDATE lineas_credito
             SET activo = 0,
@@ -410,7 +557,7 @@ def eliminar_linea_credito_db(nombre_linea):
         )
 
         # También desactivar costos asociados
-        cursor.execute(
+        conn.execute(
             """
             UPDATE costos_asociados
             SET activo = 0
@@ -418,24 +565,27 @@ def eliminar_linea_credito_db(nombre_linea):
         """,
             (linea_id,),
         )
+        return linea_id
 
-        conn.commit()
-        print(
-            f"✅ Línea '{nombre_linea}' marcada como inactiva en SQLite (soft delete)"
-        )
-        print(f"   - Línea ID: {linea_id}")
-        print(f"   - Costos asociados también desactivados")
-        return True
-
+    try:
+        linea_id = ejecutar_escritura(_desactivar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error al eliminar línea de crédito: {e}")
         import traceback
 
         traceback.print_exc()
         return False
-    finally:
-        conn.close()
+
+    if linea_id is None:
+        print(f"⚠️ Línea '{nombre_linea}' no encontrada o ya está inactiva")
+        return False
+    invalidar_cache_configuracion()
+    print(
+        f"✅ Línea '{nombre_linea}' marcada como inactiva en SQLite (soft delete)"
+    )
+    print(f"   - Línea ID: {linea_id}")
+    print(f"   - Costos asociados también desactivados")
+    return True
 
 
 def reactivar_linea_credito_db(nombre_linea):
@@ -450,25 +600,19 @@ def reactivar_linea_credito_db(nombre_linea):
     Returns:
         bool: True si se reactivó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
+    def _reactivar(conn):
         # Verificar que la línea existe pero está inactiva
-        cursor.execute(
+        linea = conn.execute(
             "SELECT id FROM lineas_credito WHERE nombre = ? AND activo = 0",
             (nombre_linea,),
-        )
-        linea = cursor.fetchone()
-
+        ).fetchone()
         if not linea:
-            print(f"⚠️ Línea '{nombre_linea}' no encontrada o ya está activa")
-            return False
+            return None
 
         linea_id = linea[0]
 
         # Reactivar línea
-        cursor.execute(
+        conn.execute(
             """
             UPDATE lineas_credito
             SET activo = 1,
@@ -479,7 +623,7 @@ def reactivar_linea_credito_db(nombre_linea):
         )
 
         # Reactivar costos asociados
-        cursor.execute(
+        conn.execute(
             """
             UPDATE costos_asociados
             SET activo = 1
@@ -487,17 +631,20 @@ def reactivar_linea_credito_db(nombre_linea):
         """,
             (linea_id,),
         )
+        return linea_id
 
-        conn.commit()
-        print(f"✅ Línea '{nombre_linea}' reactivada en SQLite")
-        return True
-
+    try:
+        linea_id = ejecutar_escritura(_reactivar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error al reactivar línea: {e}")
         return False
-    finally:
-        conn.close()
+
+    if linea_id is None:
+        print(f"⚠️ Línea '{nombre_linea}' no encontrada o ya está activa")
+        return False
+    invalidar_cache_configuracion()
+    print(f"✅ Línea '{nombre_linea}' reactivada en SQLite")
+    return True
 
 
 def listar_lineas_eliminadas():
@@ -540,11 +687,193 @@ def listar_lineas_eliminadas():
 # ============================================================================
 
 
+# ============================================================================
+# SNAPSHOT DE SCORING (registro compilado por versión)
+# ============================================================================
+# cargar_scoring() hacía 11 consultas, parseaba el JSON y reordenaba los
+# criterios en cada carga de /scoring y en cada evaluación. El snapshot se
+# construye una vez por version_datos['scoring'] (triggers sobre
+# configuracion_sistema, configuracion_scoring y las tablas de scoring por
+# línea) y expone tablas de consulta listas para el cálculo.
+
+_SCORING_SNAPSHOT = None
+_SCORING_SNAPSHOT_LOCK = threading.Lock()
+
+
+class ScoringSnapshot(ConfiguracionSnapshot):
+    """
+    Configuración de scoring inmutable con tablas de consulta precalculadas.
+
+    Attributes:
+        criterios_por_codigo: código -> criterio (en orden de 'orden')
+        criterios_activos: tupla de (código, criterio) con activo=True
+        criterios_por_seccion: sección -> tupla de criterios con su 'id'
+        niveles_ordenados: niveles de riesgo ordenados por 'min'
+        limites_niveles: 'min' de cada nivel (para bisect)
+        rechazos_por_criterio: criterio -> tupla de factores de rechazo
+    """
+
+    __slots__ = (
+        "criterios_por_codigo",
+        "criterios_activos",
+        "criterios_por_seccion",
+        "niveles_ordenados",
+        "limites_niveles",
+        "rechazos_por_criterio",
+    )
+
+    def __init__(self, version, datos):
+        super().__init__(version, datos)
+
+        criterios = self.datos.get("criterios", MappingProxyType({}))
+        self.criterios_por_codigo = criterios
+        self.criterios_activos = tuple(
+            (codigo, criterio)
+            for codigo, criterio in criterios.items()
+            if criterio.get("activo", True)
+        )
+
+        por_seccion = {}
+        for codigo, criterio in criterios.items():
+            por_seccion.setdefault(criterio.get("seccion", "otros"), []).append(
+                MappingProxyType({"id": codigo, **criterio})
+            )
+        self.criterios_por_seccion = MappingProxyType(
+            {seccion: tuple(lista) for seccion, lista in por_seccion.items()}
+        )
+
+        self.niveles_ordenados = tuple(
+            sorted(self.datos.get("niveles_riesgo", ()), key=lambda n: float(n.get("min", 0)))
+        )
+        self.limites_niveles = tuple(float(n.get("min", 0)) for n in self.niveles_ordenados)
+
+        rechazos = {}
+        for factor in self.datos.get("factores_rechazo_automatico", ()):
+            rechazos.setdefault(factor.get("criterio"), []).append(factor)
+        self.rechazos_por_criterio = MappingProxyType(
+            {criterio: tuple(lista) for criterio, lista in rechazos.items()}
+        )
+
+    def nivel_para_score(self, score):
+        """
+        Nivel de riesgo cuyo rango [min, max] contiene el score.
+
+        Returns:
+            Mapping | None: Nivel encontrado o None si cae fuera de los rangos
+        """
+        indice = bisect.bisect_right(self.limites_niveles, score) - 1
+        if indice < 0:
+            return None
+        nivel = self.niveles_ordenados[indice]
+        if score <= nivel.get("max", 100):
+            return nivel
+        return None
+
+    def agrupar_criterios(self):
+        """Estructura [{'seccion', 'criterios'}] que usa scoring.html."""
+        agrupados = []
+        for seccion in self.datos.get("secciones", ()):
+            criterios_seccion = self.criterios_por_seccion.get(seccion.get("id", ""))
+            if criterios_seccion:
+                agrupados.append({"seccion": seccion, "criterios": criterios_seccion})
+
+        sin_seccion = self.criterios_por_seccion.get("otros")
+        if sin_seccion:
+            agrupados.append({
+                "seccion": {"id": "otros", "nombre": "Otros Criterios", "icono": "bi-gear"},
+                "criterios": sin_seccion,
+            })
+        return agrupados
+
+
+def obtener_snapshot_scoring():
+    """
+    Retorna el snapshot de scoring vigente.
+
+    Igual que obtener_snapshot_configuracion(): memo del request, consulta
+    por PK a version_datos y reconstrucción solo si la versión cambió.
+
+    Returns:
+        ScoringSnapshot
+    """
+    global _SCORING_SNAPSHOT
+
+    memo = obtener_memo_request("scoring")
+    if memo is not None and "snapshot" in memo:
+        return memo["snapshot"]
+
+    version = obtener_version_datos("scoring")
+    snapshot = _SCORING_SNAPSHOT
+
+    if snapshot is None or version is None or snapshot.version != version:
+        with _SCORING_SNAPSHOT_LOCK:
+            snapshot = _SCORING_SNAPSHOT
+            if snapshot is None or version is None or snapshot.version != version:
+                try:
+                    snapshot = ScoringSnapshot(version, _leer_scoring_db())
+                except Exception as e:
+                    print(f"❌ Error en cargar_scoring(): {e}")
+                    import traceback
+
+                    traceback.print_exc()
+                    # Estructura mínima para evitar errores; no se guarda en
+                    # cache para reintentar la lectura en la siguiente llamada
+                    return ScoringSnapshot(None, {
+                        "criterios": {},
+                        "niveles_riesgo": [],
+                        "factores_rechazo_automatico": [],
+                        "puntaje_minimo_aprobacion": 17,
+                        "configuracion_por_linea": {},
+                    })
+                if version is not None:
+                    _SCORING_SNAPSHOT = snapshot
+                print(
+                    f"🔄 Snapshot de scoring reconstruido (versión {version}, "
+                    f"{len(snapshot.criterios_por_codigo)} criterios)"
+                )
+
+    if memo is not None:
+        memo["snapshot"] = snapshot
+    return snapshot
+
+
+def invalidar_cache_scoring(propagar=False):
+    """
+    Descarta el snapshot de scoring del proceso y el memo del request.
+
+    Args:
+        propagar (bool): Si True incrementa version_datos['scoring'] para
+            que los demás procesos también reconstruyan su snapshot
+    """
+    global _SCORING_SNAPSHOT
+    if propagar:
+        from database import incrementar_version_datos
+        incrementar_version_datos("scoring")
+    with _SCORING_SNAPSHOT_LOCK:
+        _SCORING_SNAPSHOT = None
+    memo = obtener_memo_request("scoring")
+    if memo:
+        memo.clear()
+
+
 def cargar_scoring():
     """
-    Carga configuración COMPLETA de scoring desde SQLite.
+    Carga configuración COMPLETA de scoring.
     Reemplaza la función que leía scoring.json.
 
+    Retorna una copia mutable nueva del snapshot versionado en cada
+    llamada. Para calcular sin copiar usar obtener_snapshot_scoring().
+
+    Returns:
+        dict: Configuración de scoring completa (ver _leer_scoring_db)
+    """
+    return obtener_snapshot_scoring().como_dict()
+
+
+def _leer_scoring_db():
+    """
+    Lee la configuración COMPLETA de scoring desde SQLite.
+
     IMPORTANTE: Esta función retorna la MISMA estructura que scoring.json
     para mantener compatibilidad con el frontend.
 
@@ -586,9 +915,6 @@ def cargar_scoring():
             criterios_items = list(criterios_raw.items())
             criterios_items.sort(key=lambda x: x[1].get("orden", 9999))
             scoring["criterios"] = dict(criterios_items)
-            print(
-                f"✅ cargar_scoring: {len(scoring['criterios'])} criterios cargados y ordenados"
-            )
         else:
             scoring["criterios"] = {}
             print("⚠️ cargar_scoring: No se encontraron criterios en SQLite")
@@ -746,7 +1072,6 @@ def cargar_scoring():
         row = cursor.fetchone()
         if row:
             scoring["secciones"] = json.loads(row[0])
-            print(f"✅ cargar_scoring: {len(scoring['secciones'])} secciones cargadas")
         else:
             # Secciones por defecto
             scoring["secciones"] = [
@@ -817,19 +1142,6 @@ def cargar_scoring():
         else:
             scoring["version"] = "2.0"
 
-    except Exception as e:
-        print(f"❌ Error en cargar_scoring(): {e}")
-        import traceback
-
-        traceback.print_exc()
-        # Retornar estructura mínima para evitar errores
-        scoring = {
-            "criterios": {},
-            "niveles_riesgo": [],
-            "factores_rechazo_automatico": [],
-            "puntaje_minimo_aprobacion": 17,
-            "configuracion_por_linea": {},
-        }
     finally:
         conn.close()
 
@@ -995,6 +1307,7 @@ def guardar_scoring(scoring_data):
             print(f"✅ Secciones guardadas: {len(scoring_data['secciones'])} secciones")
 
         conn.commit()
+        invalidar_cache_scoring()
         print("✅ guardar_scoring(): Configuración completa guardada en SQLite")
 
     except Exception as e:
@@ -1069,225 +1382,218 @@ def cargar_evaluaciones():
     return evaluaciones
 
 
-def guardar_evaluacion(evaluacion):
+# ============================================================================
+# HISTORIAL PAGINADO (keyset sobre timestamp DESC, id DESC)
+# ============================================================================
+
+
+def _filtros_historial_sql(filtros, incluir_resultado=True):
     """
-    Guarda una evaluación en SQLite.
-    Reemplaza la función que escribía en evaluaciones_log.json.
+    Traduce los filtros del historial (asesor, desde, hasta, resultado)
+    a una cláusula WHERE parametrizada.
 
-    Args:
-        evaluacion (dict): Evaluación a guardar
+    Returns:
+        tuple: (where_sql, params)
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
+    filtros = filtros or {}
+    condiciones = []
+    params = []
 
-    try:
-        # Preparar datos
-        timestamp = evaluacion.get("timestamp", datetime.now().isoformat())
-        asesor = evaluacion.get("asesor")
-        nombre_cliente = evaluacion.get("cliente") or evaluacion.get("nombre_cliente")
-        cedula = evaluacion.get("cedula")
-        tipo_credito = evaluacion.get("tipo_credito")
-        linea_credito = evaluacion.get("linea_credito")
-        estado_desembolso = evaluacion.get("estado_desembolso", "Pendiente")
-        origen = evaluacion.get("origen", "Automático")
-
-        resultado = json.dumps(evaluacion.get("resultado", {}))
-        criterios = json.dumps(evaluacion.get("criterios_evaluados", []))
-        monto_solicitado = evaluacion.get("monto_solicitado")
-
-        estado_comite = evaluacion.get("estado_comite")
-        decision_admin = (
-            json.dumps(evaluacion.get("decision_admin"))
-            if evaluacion.get("decision_admin")
-            else None
-        )
-        visto_por_asesor = 1 if evaluacion.get("visto_por_asesor") else 0
-        fecha_visto_asesor = evaluacion.get("fecha_visto_asesor")
-        fecha_envio_comite = evaluacion.get("fecha_envio_comite")
+    if filtros.get("asesor"):
+        condiciones.append("asesor = ?")
+        params.append(filtros["asesor"])
 
-        puntaje_datacredito = evaluacion.get("puntaje_datacredito") or evaluacion.get(
-            "datacredito"
-        )
+    # Los timestamps son ISO ('YYYY-MM-DDTHH:MM:SS'), comparables como texto
+    if filtros.get("desde"):
+        condiciones.append("timestamp >= ?")
+        params.append(filtros["desde"])
 
-        # Campos adicionales para el detalle
-        criterios_detalle = (
-            json.dumps(evaluacion.get("criterios_detalle", []))
-            if evaluacion.get("criterios_detalle")
-            else None
-        )
-        valores_criterios = (
-            json.dumps(evaluacion.get("valores_criterios", {}))
-            if evaluacion.get("valores_criterios")
-            else None
-        )
-        nivel_riesgo = evaluacion.get("nivel_riesgo")
+    if filtros.get("hasta"):
+        condiciones.append("timestamp < date(?, '+1 day')")
+        params.append(filtros["hasta"])
 
-        # Insertar o actualizar
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO evaluaciones (
-                timestamp, asesor, nombre_cliente, cedula,
-                tipo_credito, linea_credito, estado_desembolso, origen,
-                resultado, criterios_evaluados, monto_solicitado,
-                estado_comite, decision_admin, visto_por_asesor,
-                fecha_visto_asesor, fecha_envio_comite,
-                puntaje_datacredito, datacredito,
-                criterios_detalle, valores_criterios, nivel_riesgo
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                timestamp,
-                asesor,
-                nombre_cliente,
-                cedula,
-                tipo_credito,
-                linea_credito,
-                estado_desembolso,
-                origen,
-                resultado,
-                criterios,
-                monto_solicitado,
-                estado_comite,
-                decision_admin,
-                visto_por_asesor,
-                fecha_visto_asesor,
-                fecha_envio_comite,
-                puntaje_datacredito,
-                puntaje_datacredito,
-                criterios_detalle,
-                valores_criterios,
-                nivel_riesgo,
-            ),
-        )
+    if incluir_resultado and filtros.get("resultado") == "aprobado":
+        condiciones.append("aprobado = 1")
+    elif incluir_resultado and filtros.get("resultado") == "rechazado":
+        condiciones.append("COALESCE(aprobado, 0) != 1")
 
-        conn.commit()
+    where_sql = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    return where_sql, params
 
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
 
+def codificar_cursor_historial(timestamp, evaluacion_id):
+    """Codifica la clave (timestamp, id) como cursor opaco para la URL."""
+    crudo = f"{timestamp}|{evaluacion_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
 
-def actualizar_evaluacion(timestamp, datos_actualizar):
+
+def decodificar_cursor_historial(cursor):
     """
-    Actualiza campos específicos de una evaluación.
-    Útil para actualizar estado_comite, decision_admin, etc.
+    Decodifica un cursor del historial.
+
+    Returns:
+        tuple: (timestamp, id) o None si el cursor es inválido
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode("utf-8")
+        timestamp, evaluacion_id = crudo.rsplit("|", 1)
+        return timestamp, int(evaluacion_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def obtener_evaluaciones_paginadas(filtros=None, limite=20, cursor=None, direccion="siguiente"):
+    """
+    Obtiene una página del historial de evaluaciones usando keyset pagination.
+
+    El costo no depende de la posición de la página: cada consulta recorre
+    el índice (timestamp DESC, id DESC) desde el cursor y lee limite+1 filas.
+    Solo se decodifica el JSON de resultado de las filas de la página.
 
     Args:
-        timestamp (str): Timestamp de la evaluación
-        datos_actualizar (dict): Campos a actualizar
+        filtros (dict): asesor, desde, hasta, resultado
+        limite (int): Filas por página
+        cursor (str): Cursor de codificar_cursor_historial()
+        direccion (str): 'siguiente' (más antiguas) o 'anterior' (más recientes)
+
+    Returns:
+        dict: {items, cursor_siguiente, cursor_anterior, has_next, has_prev}
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
+    where_sql, params = _filtros_historial_sql(filtros)
+    clave = decodificar_cursor_historial(cursor)
+    retroceder = clave is not None and direccion == "anterior"
 
-    try:
-        # Construir query dinámicamente
-        campos_set = []
-        valores = []
-
-        for campo, valor in datos_actualizar.items():
-            if campo in [
-                "resultado",
-                "criterios_evaluados",
-                "decision_admin",
-                "criterios_detalle",
-                "valores_criterios",
-            ]:
-                # Campos JSON
-                campos_set.append(f"{campo} = ?")
-                valores.append(json.dumps(valor) if valor else None)
-            elif campo == "visto_por_asesor":
-                campos_set.append(f"{campo} = ?")
-                valores.append(1 if valor else 0)
-            else:
-                campos_set.append(f"{campo} = ?")
-                valores.append(valor)
-
-        if not campos_set:
-            return
-
-        campos_set.append("fecha_modificacion = CURRENT_TIMESTAMP")
-        valores.append(timestamp)
-
-        query = f"""
-            UPDATE evaluaciones
-            SET {', '.join(campos_set)}
-            WHERE timestamp = ?
-        """
+    if clave is not None:
+        comparador = ">" if retroceder else "<"
+        where_sql += (" AND " if where_sql else "WHERE ") + f"(timestamp, id) {comparador} (?, ?)"
+        params.extend(clave)
 
-        cursor.execute(query, valores)
-        conn.commit()
+    orden = "ASC" if retroceder else "DESC"
 
-    except Exception as e:
-        conn.rollback()
-        raise e
+    conn = conectar_db()
+    cursor_db = conn.cursor()
+
+    try:
+        cursor_db.execute(
+            f"""
+            SELECT id, timestamp, asesor, nombre_cliente, tipo_credito,
+                   linea_credito, resultado, estado_comite, estado_final
+            FROM evaluaciones
+            {where_sql}
+            ORDER BY timestamp {orden}, id {orden}
+            LIMIT ?
+        """,
+            params + [limite + 1],
+        )
+        filas = cursor_db.fetchall()
     finally:
         conn.close()
 
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    if retroceder:
+        filas.reverse()
+
+    items = [
+        {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "asesor": row["asesor"],
+            "cliente": row["nombre_cliente"] or "",
+            "nombre_cliente": row["nombre_cliente"],
+            "tipo_credito": row["tipo_credito"],
+            "linea_credito": row["linea_credito"],
+            "resultado": json.loads(row["resultado"]) if row["resultado"] else {},
+            "estado_comite": row["estado_comite"],
+            "estado_final": row["estado_final"],
+        }
+        for row in filas
+    ]
 
-# ============================================================================
-# FUNCIONES DE SIMULACIONES
-# ============================================================================
+    if retroceder:
+        has_prev, has_next = hay_mas, True
+    else:
+        has_prev, has_next = clave is not None, hay_mas
+
+    return {
+        "items": items,
+        "has_next": has_next and bool(items),
+        "has_prev": has_prev and bool(items),
+        "cursor_siguiente": (
+            codificar_cursor_historial(items[-1]["timestamp"], items[-1]["id"])
+            if items else None
+        ),
+        "cursor_anterior": (
+            codificar_cursor_historial(items[0]["timestamp"], items[0]["id"])
+            if items else None
+        ),
+    }
 
 
-def cargar_simulaciones():
+def obtener_estadisticas_historial(filtros=None):
     """
-    Carga todas las simulaciones desde SQLite.
-    Reemplaza la función que leía simulaciones_log.json.
+    Calcula las tarjetas del historial con una sola consulta agregada.
+
+    Respeta los filtros asesor/desde/hasta; el filtro de resultado no se
+    aplica para que las tarjetas muestren aprobados y rechazados a la vez.
+    Sin filtro de fechas (la vista por defecto, o solo asesor) se suman
+    las filas de metricas_asesores, una por asesor; solo un rango de
+    fechas recorre evaluaciones.
 
     Returns:
-        list: Lista de simulaciones
+        dict: {total, aprobados, rechazados, tasa_aprobacion}
     """
+    filtros = filtros or {}
+
     conn = conectar_db()
     cursor = conn.cursor()
 
-    cursor.execute(
-        """
-        SELECT timestamp, asesor, cliente, cedula,
-               monto, plazo, linea_credito, tasa_ea, tasa_mensual,
-               cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
-               total_financiar, caso_origen, modalidad_desembolso
-        FROM simulaciones
-        ORDER BY timestamp DESC
-    """
-    )
-
-    simulaciones = []
-    for row in cursor.fetchall():
-        sim = {
-            "timestamp": row[0],
-            "asesor": row[1],
-            "cliente": row[2],
-            "cedula": row[3],
-            "monto": row[4],
-            "plazo": row[5],
-            "linea_credito": row[6],
-            "tasa_ea": row[7],
-            "tasa_mensual": row[8],
-            "cuota_mensual": row[9],
-            "nivel_riesgo": row[10],
-            "aval": row[11],
-            "seguro": row[12],
-            "plataforma": row[13],
-            "total_financiar": row[14],
-            "caso_origen": row[15],
-            "modalidad_desembolso": row[16],
-        }
-        simulaciones.append(sim)
+    try:
+        if not filtros.get("desde") and not filtros.get("hasta"):
+            where_sql = "WHERE asesor = ?" if filtros.get("asesor") else ""
+            params = [filtros["asesor"]] if filtros.get("asesor") else []
+            cursor.execute(
+                f"""
+                SELECT COALESCE(SUM(total_evaluaciones), 0),
+                       COALESCE(SUM(evaluaciones_aprobadas), 0)
+                FROM metricas_asesores
+                {where_sql}
+            """,
+                params,
+            )
+        else:
+            where_sql, params = _filtros_historial_sql(filtros, incluir_resultado=False)
+            cursor.execute(
+                f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(aprobado = 1), 0)
+                FROM evaluaciones
+                {where_sql}
+            """,
+                params,
+            )
+        total, aprobados = cursor.fetchone()
+    finally:
+        conn.close()
 
-    conn.close()
-    return simulaciones
+    return {
+        "total": total,
+        "aprobados": aprobados,
+        "rechazados": total - aprobados,
+        "tasa_aprobacion": round((aprobados / total * 100) if total > 0 else 0),
+    }
 
 
-def guardar_simulacion(simulacion):
+def obtener_asesores_con_evaluaciones():
     """
-    Guarda una simulación en SQLite.
-    Reemplaza la función que escribía en simulaciones_log.json.
+    Lista de asesores distintos con evaluaciones (para el filtro).
+    Se lee de metricas_asesores (una fila por asesor, ordenada por PK).
 
-    Args:
-        simulacion (dict): Simulación a guardar
+    Returns:
+        list: Usernames ordenados alfabéticamente
     """
     conn = conectar_db()
     cursor = conn.cursor()
@@ -1295,42 +1601,504 @@ def guardar_simulacion(simulacion):
     try:
         cursor.execute(
             """
-            INSERT INTO simulaciones (
-                timestamp, asesor, cliente, cedula,
-                monto, plazo, linea_credito, tasa_ea, tasa_mensual,
-                cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
-                total_financiar, caso_origen, modalidad_desembolso
+            SELECT asesor FROM metricas_asesores
+            WHERE total_evaluaciones > 0 AND asesor != ''
+            ORDER BY asesor
+        """
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+_SQL_INSERTAR_EVALUACION = """
+    INSERT OR REPLACE INTO evaluaciones (
+        timestamp, asesor, nombre_cliente, cedula,
+        tipo_credito, linea_credito, estado_desembolso, origen,
+        resultado, criterios_evaluados, monto_solicitado,
+        estado_comite, decision_admin, visto_por_asesor,
+        fecha_visto_asesor, fecha_envio_comite,
+        puntaje_datacredito, datacredito,
+        criterios_detalle, valores_criterios, nivel_riesgo
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _params_evaluacion(evaluacion):
+    """Convierte una evaluación (formato evaluaciones_log.json) en la tupla de _SQL_INSERTAR_EVALUACION."""
+    # Preparar datos
+    timestamp = evaluacion.get("timestamp", datetime.now().isoformat())
+    asesor = evaluacion.get("asesor")
+    nombre_cliente = evaluacion.get("cliente") or evaluacion.get("nombre_cliente")
+    cedula = evaluacion.get("cedula")
+    tipo_credito = evaluacion.get("tipo_credito")
+    linea_credito = evaluacion.get("linea_credito")
+    estado_desembolso = evaluacion.get("estado_desembolso", "Pendiente")
+    origen = evaluacion.get("origen", "Automático")
+
+    resultado = json.dumps(evaluacion.get("resultado", {}))
+    criterios = json.dumps(evaluacion.get("criterios_evaluados", []))
+    monto_solicitado = evaluacion.get("monto_solicitado")
+
+    estado_comite = evaluacion.get("estado_comite")
+    decision_admin = (
+        json.dumps(evaluacion.get("decision_admin"))
+        if evaluacion.get("decision_admin")
+        else None
+    )
+    visto_por_asesor = 1 if evaluacion.get("visto_por_asesor") else 0
+    fecha_visto_asesor = evaluacion.get("fecha_visto_asesor")
+    fecha_envio_comite = evaluacion.get("fecha_envio_comite")
+
+    puntaje_datacredito = evaluacion.get("puntaje_datacredito") or evaluacion.get(
+        "datacredito"
+    )
+
+    # Campos adicionales para el detalle
+    criterios_detalle = (
+        json.dumps(evaluacion.get("criterios_detalle", []))
+        if evaluacion.get("criterios_detalle")
+        else None
+    )
+    valores_criterios = (
+        json.dumps(evaluacion.get("valores_criterios", {}))
+        if evaluacion.get("valores_criterios")
+        else None
+    )
+    nivel_riesgo = evaluacion.get("nivel_riesgo")
+
+    return (
+        timestamp,
+        asesor,
+        nombre_cliente,
+        cedula,
+        tipo_credito,
+        linea_credito,
+        estado_desembolso,
+        origen,
+        resultado,
+        criterios,
+        monto_solicitado,
+        estado_comite,
+        decision_admin,
+        visto_por_asesor,
+        fecha_visto_asesor,
+        fecha_envio_comite,
+        puntaje_datacredito,
+        puntaje_datacredito,
+        criterios_detalle,
+        valores_criterios,
+        nivel_riesgo,
+    )
+
+
+def guardar_evaluacion(evaluacion, esperar=True):
+    """
+    Guarda una evaluación en SQLite.
+    Reemplaza la función que escribía en evaluaciones_log.json.
+    La escritura se confirma a través del escritor único (db_writer).
+
+    Si la evaluación queda pendiente de comité, tras el commit se publica
+    'nuevo_pendiente' en el bus de eventos (SSE).
+
+    Args:
+        evaluacion (dict): Evaluación a guardar
+        esperar (bool): Si es False retorna el Future sin esperar el commit
+    """
+    params = _params_evaluacion(evaluacion)
+    pendiente = evaluacion.get("estado_comite") == "pending"
+
+    def _insertar(conn):
+        # Insertar o actualizar
+        conn.execute(_SQL_INSERTAR_EVALUACION, params)
+
+    if not esperar:
+        futuro = enviar_escritura(_insertar)
+        if pendiente:
+            # El callback corre en el hilo escritor: publicar desde el bus
+            futuro.add_done_callback(
+                lambda f: f.exception() is None
+                and publicar_en_segundo_plano(publicar_nuevo_pendiente, evaluacion)
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        return futuro
+    ejecutar_escritura(_insertar)
+    if pendiente:
+        publicar_nuevo_pendiente(evaluacion)
+
+
+def actualizar_evaluacion(timestamp, datos_actualizar, esperar=True):
+    """
+    Actualiza campos específicos de una evaluación.
+    Útil para actualizar estado_comite, decision_admin, etc.
+
+    Args:
+        timestamp (str): Timestamp de la evaluación
+        datos_actualizar (dict): Campos a actualizar
+        esperar (bool): Si es False retorna el Future sin esperar el commit
+    """
+    # Construir query dinámicamente
+    campos_set = []
+    valores = []
+
+    for campo, valor in datos_actualizar.items():
+        if campo in [
+            "resultado",
+            "criterios_evaluados",
+            "decision_admin",
+            "criterios_detalle",
+            "valores_criterios",
+        ]:
+            # Campos JSON
+            campos_set.append(f"{campo} = ?")
+            valores.append(json.dumps(valor) if valor else None)
+        elif campo == "visto_por_asesor":
+            campos_set.append(f"{campo} = ?")
+            valores.append(1 if valor else 0)
+        else:
+            campos_set.append(f"{campo} = ?")
+            valores.append(valor)
+
+    if not campos_set:
+        return
+
+    campos_set.append("fecha_modificacion = CURRENT_TIMESTAMP")
+    valores.append(timestamp)
+
+    query = f"""
+        UPDATE evaluaciones
+        SET {', '.join(campos_set)}
+        WHERE timestamp = ?
+    """
+
+    # El contexto de riesgo memoizado del caso deja de ser válido
+    memo = obtener_memo_request("contexto_riesgo_caso")
+    if memo:
+        memo.pop(timestamp, None)
+
+    def _actualizar(conn):
+        conn.execute(query, valores)
+
+    if not esperar:
+        return enviar_escritura(_actualizar)
+    ejecutar_escritura(_actualizar)
+
+
+# ============================================================================
+# FUNCIONES DE SIMULACIONES
+# ============================================================================
+
+
+def cargar_simulaciones():
+    """
+    Carga todas las simulaciones desde SQLite.
+    Reemplaza la función que leía simulaciones_log.json.
+
+    Returns:
+        list: Lista de simulaciones
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        SELECT timestamp, asesor, cliente, cedula,
+               monto, plazo, linea_credito, tasa_ea, tasa_mensual,
+               cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
+               total_financiar, caso_origen, modalidad_desembolso
+        FROM simulaciones
+        ORDER BY timestamp DESC
+    """
+    )
+
+    simulaciones = []
+    for row in cursor.fetchall():
+        sim = {
+            "timestamp": row[0],
+            "asesor": row[1],
+            "cliente": row[2],
+            "cedula": row[3],
+            "monto": row[4],
+            "plazo": row[5],
+            "linea_credito": row[6],
+            "tasa_ea": row[7],
+            "tasa_mensual": row[8],
+            "cuota_mensual": row[9],
+            "nivel_riesgo": row[10],
+            "aval": row[11],
+            "seguro": row[12],
+            "plataforma": row[13],
+            "total_financiar": row[14],
+            "caso_origen": row[15],
+            "modalidad_desembolso": row[16],
+        }
+        simulaciones.append(sim)
+
+    conn.close()
+    return simulaciones
+
+
+_SQL_INSERTAR_SIMULACION = """
+    INSERT INTO simulaciones (
+        timestamp, asesor, cliente, cedula,
+        monto, plazo, linea_credito, tasa_ea, tasa_mensual,
+        cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
+        total_financiar, caso_origen, modalidad_desembolso
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _params_simulacion(simulacion):
+    """Convierte una simulación (formato simulaciones_log.json) en la tupla de _SQL_INSERTAR_SIMULACION."""
+    return (
+        simulacion.get("timestamp"),
+        simulacion.get("asesor"),
+        simulacion.get("cliente"),
+        simulacion.get("cedula"),
+        simulacion.get("monto"),
+        simulacion.get("plazo"),
+        simulacion.get("linea_credito"),
+        simulacion.get("tasa_ea"),
+        simulacion.get("tasa_mensual"),
+        simulacion.get("cuota_mensual"),
+        simulacion.get("nivel_riesgo"),
+        simulacion.get("aval", 0),
+        simulacion.get("seguro", 0),
+        simulacion.get("plataforma", 0),
+        simulacion.get("total_financiar"),
+        simulacion.get("caso_origen"),
+        simulacion.get("modalidad_desembolso", "completo"),
+    )
+
+
+def guardar_simulacion(simulacion, esperar=True):
+    """
+    Guarda una simulación en SQLite.
+    Reemplaza la función que escribía en simulaciones_log.json.
+
+    Args:
+        simulacion (dict): Simulación a guardar
+        esperar (bool): Si es False retorna el Future sin esperar el commit
+    """
+    params = _params_simulacion(simulacion)
+
+    def _insertar(conn):
+        conn.execute(_SQL_INSERTAR_SIMULACION, params)
+
+    if not esperar:
+        return enviar_escritura(_insertar)
+    ejecutar_escritura(_insertar)
+
+
+def registrar_simulacion(simulacion):
+    """
+    Persiste una simulación del simulador fuera del camino de la request
+    cuando el modo write-behind está activo; si no lo está, o su cola está
+    llena, la guarda de forma síncrona con guardar_simulacion().
+
+    Args:
+        simulacion (dict): Simulación a guardar
+
+    Returns:
+        bool: True si quedó diferida, False si se guardó de forma síncrona
+    """
+    from db_escritura_diferida import obtener_escritura_diferida
+
+    escritura_diferida = obtener_escritura_diferida()
+    if escritura_diferida is not None and escritura_diferida.encolar(simulacion):
+        return True
+    guardar_simulacion(simulacion)
+    return False
+
+
+# ============================================================================
+# CARGA MASIVA (backfill de evaluaciones y simulaciones)
+# ============================================================================
+# Para importar exportaciones legacy (evaluaciones_log.json,
+# simulaciones_log.json) y archivos de aliados. Los registros se consumen
+# de un iterable en lotes: cada lote es un executemany dentro de la
+# transacción del escritor único, y mientras se escribe un lote se prepara
+# el siguiente. Solo hay _LOTES_EN_VUELO_BULK lotes en memoria a la vez.
+# El streaming desde archivo está en carga_masiva.py.
+
+TAMANO_LOTE_BULK = 5000
+_LOTES_EN_VUELO_BULK = 2
+_MAX_DETALLE_ERRORES_BULK = 100
+
+# Errores de una fila puntual (no de la transacción completa)
+_ERRORES_FILA_BULK = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError)
+
+
+def _indices_secundarios(conn, tabla):
+    """Índices explícitos no únicos de una tabla: [(nombre, sql)]."""
+    return [
+        (row[0], row[1])
+        for row in conn.execute(
+            """
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
         """,
-            (
-                simulacion.get("timestamp"),
-                simulacion.get("asesor"),
-                simulacion.get("cliente"),
-                simulacion.get("cedula"),
-                simulacion.get("monto"),
-                simulacion.get("plazo"),
-                simulacion.get("linea_credito"),
-                simulacion.get("tasa_ea"),
-                simulacion.get("tasa_mensual"),
-                simulacion.get("cuota_mensual"),
-                simulacion.get("nivel_riesgo"),
-                simulacion.get("aval", 0),
-                simulacion.get("seguro", 0),
-                simulacion.get("plataforma", 0),
-                simulacion.get("total_financiar"),
-                simulacion.get("caso_origen"),
-                simulacion.get("modalidad_desembolso", "completo"),
-            ),
-        )
+            (tabla,),
+        ).fetchall()
+        if not row[1].upper().startswith("CREATE UNIQUE")
+    ]
 
-        conn.commit()
 
-    except Exception as e:
-        conn.rollback()
-        raise e
+def _insertar_lote_bulk(conn, sql, filas):
+    """
+    Inserta un lote con executemany. Si alguna fila falla, el lote se
+    reintenta fila por fila para conservar las válidas.
+
+    Returns:
+        tuple: (filas insertadas, [(timestamp, error), ...])
+    """
+    conn.execute("SAVEPOINT lote_bulk")
+    try:
+        conn.executemany(sql, filas)
+        conn.execute("RELEASE lote_bulk")
+        return len(filas), []
+    except _ERRORES_FILA_BULK:
+        conn.execute("ROLLBACK TO lote_bulk")
+        conn.execute("RELEASE lote_bulk")
+
+    insertadas = 0
+    errores = []
+    for fila in filas:
+        try:
+            conn.execute(sql, fila)
+            insertadas += 1
+        except _ERRORES_FILA_BULK as e:
+            errores.append((fila[0], str(e)))
+    return insertadas, errores
+
+
+def _guardar_bulk(tabla, sql, convertir, registros, tamano_lote, diferir_indices, progreso):
+    """Motor común de guardar_evaluaciones_bulk / guardar_simulaciones_bulk."""
+    inicio = time.perf_counter()
+    stats = {"leidas": 0, "insertadas": 0, "errores": 0}
+    detalle_errores = []
+    pendientes = deque()
+
+    def _registrar_errores(errores):
+        stats["errores"] += len(errores)
+        espacio = _MAX_DETALLE_ERRORES_BULK - len(detalle_errores)
+        if espacio > 0:
+            detalle_errores.extend(errores[:espacio])
+
+    def _recoger(futuro):
+        insertadas, errores = futuro.result()
+        stats["insertadas"] += insertadas
+        _registrar_errores(errores)
+        if progreso:
+            progreso(stats["leidas"], stats["insertadas"], time.perf_counter() - inicio)
+
+    indices = []
+    if diferir_indices:
+        def _eliminar_indices(conn):
+            existentes = _indices_secundarios(conn, tabla)
+            for nombre, _sql in existentes:
+                conn.execute(f"DROP INDEX IF EXISTS {nombre}")
+            return existentes
+
+        indices = ejecutar_escritura(_eliminar_indices)
+        print(f"⏸️ {len(indices)} índices de {tabla} diferidos hasta el final de la carga")
+
+    try:
+        iterador = iter(registros)
+        while True:
+            lote = list(itertools.islice(iterador, tamano_lote))
+            if not lote:
+                break
+            stats["leidas"] += len(lote)
+
+            filas = []
+            errores = []
+            for registro in lote:
+                try:
+                    filas.append(convertir(registro))
+                except (AttributeError, TypeError, ValueError) as e:
+                    errores.append((None, f"Registro inválido: {e}"))
+            _registrar_errores(errores)
+            del lote
+
+            if filas:
+                pendientes.append(enviar_escritura(_insertar_lote_bulk, sql, filas))
+            while len(pendientes) >= _LOTES_EN_VUELO_BULK:
+                _recoger(pendientes.popleft())
+
+        while pendientes:
+            _recoger(pendientes.popleft())
+
     finally:
-        conn.close()
+        if indices:
+            def _recrear_indices(conn):
+                # El ordenamiento de CREATE INDEX va a disco y no a memoria
+                conn.execute("PRAGMA temp_store = FILE")
+                try:
+                    for _nombre, indice_sql in indices:
+                        conn.execute(indice_sql)
+                    conn.execute(f"ANALYZE {tabla}")
+                finally:
+                    conn.execute("PRAGMA temp_store = MEMORY")
+
+            t0 = time.perf_counter()
+            ejecutar_escritura(_recrear_indices, timeout=None)
+            print(f"🔨 Índices de {tabla} reconstruidos en {time.perf_counter() - t0:.1f}s")
+
+    segundos = time.perf_counter() - inicio
+    filas_por_segundo = round(stats["insertadas"] / segundos, 1) if segundos else 0
+    return {
+        "success": stats["errores"] == 0,
+        "message": (
+            f"{stats['insertadas']} de {stats['leidas']} registros guardados en {tabla} "
+            f"({filas_por_segundo} filas/s, {stats['errores']} errores)"
+        ),
+        **stats,
+        "detalle_errores": detalle_errores,
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": filas_por_segundo,
+    }
+
+
+def guardar_evaluaciones_bulk(evaluaciones, tamano_lote=TAMANO_LOTE_BULK,
+                              diferir_indices=False, progreso=None):
+    """
+    Guarda muchas evaluaciones con executemany por lotes.
+
+    Misma conversión e INSERT OR REPLACE que guardar_evaluacion(), así que
+    reimportar un archivo no duplica registros (clave: timestamp).
+
+    Args:
+        evaluaciones (iterable): Dicts en formato evaluaciones_log.json;
+            puede ser un generador, se consume en lotes
+        tamano_lote (int): Filas por executemany
+        diferir_indices (bool): Elimina los índices secundarios durante la
+            carga y los reconstruye al final (conviene para cargas grandes)
+        progreso (callable, optional): progreso(leidas, insertadas, segundos)
+            tras cada lote confirmado
+
+    Returns:
+        dict: success, message, leidas, insertadas, errores,
+              detalle_errores, segundos, filas_por_segundo
+    """
+    return _guardar_bulk(
+        "evaluaciones", _SQL_INSERTAR_EVALUACION, _params_evaluacion,
+        evaluaciones, tamano_lote, diferir_indices, progreso,
+    )
+
+
+def guardar_simulaciones_bulk(simulaciones, tamano_lote=TAMANO_LOTE_BULK,
+                              diferir_indices=False, progreso=None):
+    """
+    Guarda muchas simulaciones con executemany por lotes.
+
+    Args y retorno: ver guardar_evaluaciones_bulk().
+    """
+    return _guardar_bulk(
+        "simulaciones", _SQL_INSERTAR_SIMULACION, _params_simulacion,
+        simulaciones, tamano_lote, diferir_indices, progreso,
+    )
 
 
 # ============================================================================
@@ -1497,11 +2265,8 @@ def crear_usuario(username, password_hash, rol="asesor", nombre_completo=""):
     Returns:
         bool: True si se creó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute(
+    def _crear(conn):
+        conn.execute(
             """
             INSERT INTO usuarios (username, password_hash, rol, nombre_completo, activo)
             VALUES (?, ?, ?, ?, 1)
@@ -1509,20 +2274,19 @@ def crear_usuario(username, password_hash, rol="asesor", nombre_completo=""):
             (username, password_hash, rol, nombre_completo),
         )
 
-        conn.commit()
-        print(f"✅ Usuario '{username}' ({nombre_completo}) creado con rol '{rol}'")
-        return True
-
+    try:
+        ejecutar_escritura(_crear)
     except sqlite3.IntegrityError:
         # Usuario ya existe
         print(f"⚠️ Usuario '{username}' ya existe")
         return False
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error creando usuario: {e}")
         raise e
-    finally:
-        conn.close()
+
+    invalidar_cache_configuracion()
+    print(f"✅ Usuario '{username}' ({nombre_completo}) creado con rol '{rol}'")
+    return True
 
 
 def eliminar_usuario_db(username):
@@ -1538,46 +2302,36 @@ def eliminar_usuario_db(username):
     Returns:
         bool: True si se eliminó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        # No permitir eliminar admin
-        if username == "admin":
-            print(f"⚠️ No se puede eliminar el usuario admin")
-            return False
-
-        # Verificar que el usuario existe
-        cursor.execute(
-            "SELECT id FROM usuarios WHERE username = ? AND activo = 1", (username,)
-        )
-        usuario = cursor.fetchone()
-
-        if not usuario:
-            print(f"⚠️ Usuario '{username}' no encontrado o ya está inactivo")
-            return False
+    # No permitir eliminar admin
+    if username == "admin":
+        print(f"⚠️ No se puede eliminar el usuario admin")
+        return False
 
+    def _eliminar(conn):
         # Soft delete: marcar como inactivo
-        cursor.execute(
+        cursor = conn.execute(
             """
             UPDATE usuarios
             SET activo = 0,
                 fecha_modificacion = CURRENT_TIMESTAMP
-            WHERE username = ?
+            WHERE username = ? AND activo = 1
         """,
             (username,),
         )
+        return cursor.rowcount > 0
 
-        conn.commit()
-        print(f"✅ Usuario '{username}' marcado como inactivo en SQLite (soft delete)")
-        return True
-
+    try:
+        eliminado = ejecutar_escritura(_eliminar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error al eliminar usuario: {e}")
         return False
-    finally:
-        conn.close()
+
+    if not eliminado:
+        print(f"⚠️ Usuario '{username}' no encontrado o ya está inactivo")
+        return False
+    invalidar_cache_configuracion()
+    print(f"✅ Usuario '{username}' marcado como inactivo en SQLite (soft delete)")
+    return True
 
 
 # ============================================================================
@@ -1635,6 +2389,7 @@ def guardar_seguros(seguros_data):
             )
 
         conn.commit()
+        invalidar_cache_configuracion()
 
     except Exception as e:
         conn.rollback()
@@ -1735,6 +2490,63 @@ def obtener_evaluacion_por_timestamp(timestamp):
     return None
 
 
+def obtener_contexto_riesgo_caso(timestamp):
+    """
+    Obtiene solo los datos de nivel de riesgo de un caso (búsqueda por
+    timestamp sobre el índice único, sin cargar el historial completo).
+    El resultado se memoiza durante el request.
+
+    Args:
+        timestamp (str): Timestamp de la evaluación
+
+    Returns:
+        dict: {timestamp, nivel_riesgo, nivel_riesgo_ajustado, nivel_resultado,
+               nivel_efectivo} o None si el caso no existe
+    """
+    if not timestamp:
+        return None
+
+    memo = obtener_memo_request("contexto_riesgo_caso")
+    if memo is not None and timestamp in memo:
+        return memo[timestamp]
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            """
+            SELECT nivel_riesgo,
+                   CASE WHEN json_valid(decision_admin)
+                        THEN json_extract(decision_admin, '$.nivel_riesgo_ajustado')
+                   END,
+                   nivel_resultado
+            FROM evaluaciones
+            WHERE timestamp = ?
+        """,
+            (timestamp,),
+        )
+        row = cursor.fetchone()
+    finally:
+        conn.close()
+
+    contexto = None
+    if row:
+        nivel_riesgo, nivel_ajustado, nivel_resultado = row[0], row[1], row[2]
+        contexto = {
+            "timestamp": timestamp,
+            "nivel_riesgo": nivel_riesgo,
+            "nivel_riesgo_ajustado": nivel_ajustado,
+            "nivel_resultado": nivel_resultado,
+            # Prioridad: ajuste del comité > nivel guardado > nivel del scoring
+            "nivel_efectivo": nivel_ajustado or nivel_riesgo or nivel_resultado,
+        }
+
+    if memo is not None:
+        memo[timestamp] = contexto
+    return contexto
+
+
 def obtener_usuarios_completos():
     """
     Obtiene lista completa de usuarios con todos sus datos.
@@ -1786,41 +2598,34 @@ def actualizar_usuario(username, nombre_completo=None, rol=None):
     Returns:
         bool: True si se actualizó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        # Construir query dinámicamente según qué campos se actualizan
-        updates = []
-        params = []
-
-        if nombre_completo is not None:
-            updates.append("nombre_completo = ?")
-            params.append(nombre_completo)
+    # Construir query dinámicamente según qué campos se actualizan
+    updates = []
+    params = []
 
-        if rol is not None:
-            updates.append("rol = ?")
-            params.append(rol)
+    if nombre_completo is not None:
+        updates.append("nombre_completo = ?")
+        params.append(nombre_completo)
 
-        if not updates:
-            return False  # Nada que actualizar
+    if rol is not None:
+        updates.append("rol = ?")
+        params.append(rol)
 
-        updates.append("fecha_modificacion = CURRENT_TIMESTAMP")
-        params.append(username)
+    if not updates:
+        return False  # Nada que actualizar
 
-        query = f"UPDATE usuarios SET {', '.join(updates)} WHERE username = ?"
-        cursor.execute(query, params)
-
-        conn.commit()
-        print(f"✅ Usuario '{username}' actualizado")
-        return cursor.rowcount > 0
+    updates.append("fecha_modificacion = CURRENT_TIMESTAMP")
+    params.append(username)
+    query = f"UPDATE usuarios SET {', '.join(updates)} WHERE username = ?"
 
+    try:
+        actualizado = ejecutar_escritura(lambda conn: conn.execute(query, params).rowcount > 0)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error actualizando usuario: {e}")
         return False
-    finally:
-        conn.close()
+
+    invalidar_cache_configuracion()
+    print(f"✅ Usuario '{username}' actualizado")
+    return actualizado
 
 
 # ============================================================================
@@ -1839,6 +2644,7 @@ def ensure_user_assignments_table():
     try:
         cursor.execute(
             """
+            CREATE TABLE IF NOT EXISTS user_assignments (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 manager_username TEXT NOT NULL,
                 member_username TEXT NOT NULL,
@@ -1877,26 +2683,11 @@ def get_assigned_usernames(manager_username):
     Returns:
         list: Lista de usernames asignados (puede estar vacía)
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute(
-            """
-            SELECT member_username
-            FROM user_assignments
-            WHERE manager_username = ? AND activo = 1
-            ORDER BY member_username
-        """,
-            (manager_username,),
-        )
-
-        return [row[0] for row in cursor.fetchall()]
+        return sorted(obtener_indice_jerarquia().reportes_directos(manager_username))
     except Exception as e:
         print(f"❌ Error obteniendo asignaciones: {e}")
         return []
-    finally:
-        conn.close()
 
 
 def get_assigned_usernames_recursive(manager_username, max_depth: int = 5):
@@ -1908,48 +2699,11 @@ def get_assigned_usernames_recursive(manager_username, max_depth: int = 5):
     Entonces gerente ve: supervisor, asesor1, asesor2
 
     max_depth evita loops por asignaciones mal hechas.
-    """
-    ensure_user_assignments_table()
-
-    conn = conectar_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            """
-            SELECT manager_username, member_username
-            FROM user_assignments
-            WHERE activo = 1
-            """
-        )
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
 
-    # Construir mapa manager -> set(miembros)
-    graph = {}
-    for mgr, mem in rows:
-        if mgr not in graph:
-            graph[mgr] = set()
-        graph[mgr].add(mem)
-
-    visited = set([manager_username])
-    result = set()
-    frontier = [manager_username]
-    depth = 0
-
-    while frontier and depth < max_depth:
-        next_frontier = []
-        for mgr in frontier:
-            for mem in graph.get(mgr, set()):
-                if mem in visited:
-                    continue
-                visited.add(mem)
-                result.add(mem)
-                next_frontier.append(mem)
-        frontier = next_frontier
-        depth += 1
-
-    return sorted(result)
+    Se resuelve con el índice de jerarquía (clausura transitiva en memoria),
+    sin recorrer user_assignments.
+    """
+    return obtener_indice_jerarquia().usuarios_visibles(manager_username, max_depth)
 
 
 def get_all_assignments():
@@ -2006,16 +2760,13 @@ def add_assignment(manager_username, member_username):
     Returns:
         bool: True si se agregó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        # Verificar que no sea auto-asignación
-        if manager_username == member_username:
-            print("⚠️ No se permite auto-asignación")
-            return False
+    # Verificar que no sea auto-asignación
+    if manager_username == member_username:
+        print("⚠️ No se permite auto-asignación")
+        return False
 
-        cursor.execute(
+    def _asignar(conn):
+        conn.execute(
             """
             INSERT INTO user_assignments (manager_username, member_username, activo)
             VALUES (?, ?, 1)
@@ -2024,16 +2775,17 @@ def add_assignment(manager_username, member_username):
         """,
             (manager_username, member_username),
         )
+        agregar_arista_clausura(conn, manager_username, member_username)
 
-        conn.commit()
-        print(f"✅ Asignación creada: {member_username} → {manager_username}")
-        return True
+    try:
+        ejecutar_escritura(_asignar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error creando asignación: {e}")
         return False
-    finally:
-        conn.close()
+
+    invalidar_indice_jerarquia()
+    print(f"✅ Asignación creada: {member_username} → {manager_username}")
+    return True
 
 
 def remove_assignment(manager_username, member_username):
@@ -2047,11 +2799,8 @@ def remove_assignment(manager_username, member_username):
     Returns:
         bool: True si se eliminó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute(
+    def _quitar(conn):
+        cursor = conn.execute(
             """
             UPDATE user_assignments
             SET activo = 0
@@ -2059,18 +2808,22 @@ def remove_assignment(manager_username, member_username):
         """,
             (manager_username, member_username),
         )
+        eliminadas = cursor.rowcount
+        if eliminadas > 0:
+            quitar_arista_clausura(conn, manager_username)
+        return eliminadas
 
-        conn.commit()
-        if cursor.rowcount > 0:
-            print(f"✅ Asignación eliminada: {member_username} ← {manager_username}")
-            return True
-        return False
+    try:
+        eliminadas = ejecutar_escritura(_quitar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error eliminando asignación: {e}")
         return False
-    finally:
-        conn.close()
+
+    invalidar_indice_jerarquia()
+    if eliminadas > 0:
+        print(f"✅ Asignación eliminada: {member_username} ← {manager_username}")
+        return True
+    return False
 
 
 def remove_assignment_by_id(assignment_id):
@@ -2083,28 +2836,29 @@ def remove_assignment_by_id(assignment_id):
     Returns:
         bool: True si se eliminó exitosamente
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute(
+    def _quitar(conn):
+        fila = conn.execute(
             """
             UPDATE user_assignments
             SET activo = 0
             WHERE id = ?
+            RETURNING manager_username
         """,
             (assignment_id,),
-        )
+        ).fetchone()
+        if fila:
+            quitar_arista_clausura(conn, fila[0])
+        return fila is not None
 
-        conn.commit()
-        print(f"✅ Delete assignment_id={assignment_id}: rowcount={cursor.rowcount}")
-        return cursor.rowcount > 0
+    try:
+        eliminada = ejecutar_escritura(_quitar)
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error eliminando asignación: {e}")
         return False
-    finally:
-        conn.close()
+
+    invalidar_indice_jerarquia()
+    print(f"✅ Delete assignment_id={assignment_id}: rowcount={int(eliminada)}")
+    return eliminada
 
 
 def resolve_visible_usernames(
@@ -2217,6 +2971,76 @@ def obtener_simulaciones_por_asesores(lista_usernames):
         conn.close()
 
 
+def obtener_simulaciones_cliente(cedula, lista_usernames=None):
+    """
+    Obtiene las simulaciones de un cliente por cédula.
+
+    Args:
+        cedula (str): Cédula del cliente
+        lista_usernames (list): Si se indica, solo simulaciones de esos asesores
+
+    Returns:
+        list: Simulaciones (más recientes primero) con el contexto de riesgo
+              de su caso de origen cuando existe
+    """
+    if lista_usernames is not None and not lista_usernames:
+        return []
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        query = """
+            SELECT timestamp, asesor, cliente, cedula,
+                   monto, plazo, linea_credito, tasa_ea, tasa_mensual,
+                   cuota_mensual, nivel_riesgo, aval, seguro, plataforma,
+                   total_financiar, caso_origen, modalidad_desembolso
+            FROM simulaciones
+            WHERE cedula = ?
+        """
+        params = [cedula]
+
+        if lista_usernames is not None:
+            placeholders = ",".join(["?" for _ in lista_usernames])
+            query += f" AND asesor IN ({placeholders})"
+            params.extend(lista_usernames)
+
+        query += " ORDER BY timestamp DESC"
+        cursor.execute(query, params)
+        filas = cursor.fetchall()
+    except Exception as e:
+        print(f"❌ Error obteniendo simulaciones del cliente: {e}")
+        return []
+    finally:
+        conn.close()
+
+    simulaciones = []
+    for row in filas:
+        sim = {
+            "timestamp": row[0],
+            "asesor": row[1],
+            "cliente": row[2],
+            "cedula": row[3],
+            "monto": row[4],
+            "plazo": row[5],
+            "linea_credito": row[6],
+            "tasa_ea": row[7],
+            "tasa_mensual": row[8],
+            "cuota_mensual": row[9],
+            "nivel_riesgo": row[10],
+            "aval": row[11],
+            "seguro": row[12],
+            "plataforma": row[13],
+            "total_financiar": row[14],
+            "caso_origen": row[15],
+            "modalidad_desembolso": row[16],
+            "contexto_riesgo": obtener_contexto_riesgo_caso(row[15]),
+        }
+        simulaciones.append(sim)
+
+    return simulaciones
+
+
 def obtener_evaluaciones_por_asesores(lista_usernames):
     """
     Obtiene evaluaciones filtradas por lista de asesores.
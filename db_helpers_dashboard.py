@@ -2,16 +2,149 @@
 DB_HELPERS_DASHBOARD.PY - Funciones para obtener estadísticas del Dashboard
 ============================================================================
 VERSIÓN MEJORADA con:
-- Filtrado por asignaciones de equipo (user_assignments)
+- Filtrado por asignaciones de equipo (índice de jerarquía, db_jerarquia)
 - Funciones para obtener lista detallada de usuarios asignados
 - Estadísticas por usuario para supervisores/gerentes
 - Soporte completo para jerarquía organizacional
 
 """
 
+import json
 import sqlite3
+import threading
+import time
+from collections.abc import Mapping
 from datetime import datetime, timedelta
-from database import conectar_db
+from dateutil.relativedelta import relativedelta
+from database import conectar_db, obtener_version_datos
+from db_jerarquia import obtener_indice_jerarquia
+from db_lectura import Consulta, ejecutar_lote
+from app.utils.timezone import (
+    colombia_a_utc_sql,
+    fin_periodo_colombia,
+    inicio_periodo_colombia,
+    obtener_hora_colombia_naive,
+)
+
+
+# Etiquetas por strftime('%w') (0 = domingo)
+_DIAS_SEMANA = ('Dom', 'Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb')
+
+
+# ============================================================================
+# RANGOS DE FECHA (HORA COLOMBIA)
+# ============================================================================
+
+def _limites_periodos():
+    """
+    Límites de hoy, la semana y el mes en hora Colombia para filtrar con
+    rangos semiabiertos (col >= inicio AND col < fin).
+
+    Comparar la columna directamente, en lugar de DATE(col) o
+    strftime(col), permite usar los índices (asesor, fecha_creacion),
+    (asesor, timestamp), etc. Hay dos formatos:
+    - '<periodo>_utc': fecha_creacion (CURRENT_TIMESTAMP, en UTC)
+    - '<periodo>': timestamp y decision_admin_fecha (ISO en hora Colombia)
+
+    Returns:
+        dict: hoy, manana, semana, mes, mes_anterior, mes_siguiente,
+              hace_28_dias, hace_6_meses (y sus variantes *_utc)
+    """
+    ahora = obtener_hora_colombia_naive()
+    hoy = inicio_periodo_colombia('dia', ahora)
+    inicio_mes = inicio_periodo_colombia('mes', ahora)
+    fechas = {
+        'hoy': hoy,
+        'manana': fin_periodo_colombia('dia', ahora),
+        'semana': inicio_periodo_colombia('semana', ahora),
+        'mes': inicio_mes,
+        'mes_anterior': inicio_periodo_colombia('mes', inicio_mes - timedelta(days=1)),
+        'mes_siguiente': fin_periodo_colombia('mes', ahora),
+        'hace_28_dias': hoy - timedelta(days=28),
+        'hace_6_meses': hoy - relativedelta(months=6),
+    }
+    limites = {}
+    for nombre, fecha in fechas.items():
+        limites[nombre] = fecha.strftime('%Y-%m-%d')
+        limites[f'{nombre}_utc'] = colombia_a_utc_sql(fecha)
+    return limites
+
+
+def _sql_sumar_actividad(sumas, asesores=None, desde=None, agrupar=None):
+    """
+    Arma la consulta de sumas sobre actividad_diaria (rollup por día,
+    asesor y línea que mantienen los triggers de database.py). El costo
+    depende de los días leídos, no del tamaño del historial.
+
+    Args:
+        sumas (list): (columna, inicio, fin) por cada suma; inicio/fin son
+                      días 'YYYY-MM-DD' del rango [inicio, fin) o None
+        asesores (list, optional): Limitar a estos asesores (None = todos)
+        desde (str, optional): Primer día a leer (acota el recorrido)
+        agrupar (str, optional): Columna de agrupación ('asesor', 'fecha')
+
+    Returns:
+        tuple: (sql, params)
+    """
+    expresiones, params = [], []
+    for columna, inicio, fin in sumas:
+        condiciones = []
+        if inicio:
+            condiciones.append("fecha >= ?")
+            params.append(inicio)
+        if fin:
+            condiciones.append("fecha < ?")
+            params.append(fin)
+        if condiciones:
+            expresiones.append(
+                f"COALESCE(SUM(CASE WHEN {' AND '.join(condiciones)} THEN {columna} END), 0)"
+            )
+        else:
+            expresiones.append(f"COALESCE(SUM({columna}), 0)")
+
+    filtros = []
+    if asesores is not None:
+        filtros.append("asesor IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(asesores)))
+    if desde:
+        filtros.append("fecha >= ?")
+        params.append(desde)
+
+    sql = f"SELECT {agrupar + ', ' if agrupar else ''}{', '.join(expresiones)} FROM actividad_diaria"
+    if filtros:
+        sql += " WHERE " + " AND ".join(filtros)
+    if agrupar:
+        sql += f" GROUP BY {agrupar}"
+    return sql, params
+
+
+def _sumar_actividad(cursor, sumas, asesores=None, desde=None, agrupar=None):
+    """
+    Ejecuta _sql_sumar_actividad() en el cursor dado.
+
+    Returns:
+        tuple | list: Tupla de sumas, o filas (grupo, suma, ...) si se agrupa
+    """
+    cursor.execute(*_sql_sumar_actividad(sumas, asesores, desde, agrupar))
+    return cursor.fetchall() if agrupar else cursor.fetchone()
+
+
+def _consulta_actividad(sumas, asesores=None, desde=None, agrupar=None):
+    """
+    _sql_sumar_actividad() como Consulta de un lote (db_lectura). Si no
+    termina a tiempo vale ceros (o ninguna fila, si se agrupa).
+    """
+    sql, params = _sql_sumar_actividad(sumas, asesores, desde, agrupar)
+    if agrupar:
+        return Consulta(sql, params, modo='filas', defecto=[])
+    return Consulta(sql, params, modo='fila', defecto=(0,) * len(sumas))
+
+
+def _marcar_parcial(stats, lote):
+    """Copia a stats el aviso de resultados parciales de un lote."""
+    if lote.parcial:
+        stats['parcial'] = True
+        stats['consultas_incompletas'] = stats.get('consultas_incompletas', []) + lote.incompletas
 
 
 # ============================================================================
@@ -33,34 +166,23 @@ def obtener_usuarios_asignados_detalle(manager_username):
     cursor = conn.cursor()
     
     try:
-        # Obtener usuarios directamente asignados con su información
-        cursor.execute("""
-            SELECT 
-                ua.member_username,
-                u.nombre_completo,
-                u.rol,
-                u.activo,
-                ua.fecha_creacion as fecha_asignacion
-            FROM user_assignments ua
-            LEFT JOIN usuarios u ON ua.member_username = u.username
-            WHERE ua.manager_username = ? AND ua.activo = 1
-            ORDER BY u.nombre_completo, ua.member_username
-        """, (manager_username,))
+        # Usuarios directamente asignados con su información (índice de jerarquía)
+        indice = obtener_indice_jerarquia()
+        miembros = indice.reportes_directos(manager_username)
+        
+        # Estadísticas de todo el equipo con consultas agrupadas
+        stats_equipo = obtener_stats_equipo(cursor, miembros)
         
         usuarios = []
-        for row in cursor.fetchall():
-            username = row[0]
-            
-            # Obtener estadísticas del usuario
-            stats = obtener_stats_usuario_rapido(cursor, username)
-            
+        for username in miembros:
+            info = indice.info_usuario(username)
             usuarios.append({
                 'username': username,
-                'nombre_completo': row[1] or username,
-                'rol': row[2] or 'asesor',
-                'activo': bool(row[3]) if row[3] is not None else True,
-                'fecha_asignacion': row[4],
-                'stats': stats
+                'nombre_completo': info['nombre_completo'] or username,
+                'rol': info['rol'] or 'asesor',
+                'activo': bool(info['activo']) if info['activo'] is not None else True,
+                'fecha_asignacion': indice.fecha_asignacion(manager_username, username),
+                'stats': stats_equipo[username]
             })
         
         return usuarios
@@ -72,18 +194,8 @@ def obtener_usuarios_asignados_detalle(manager_username):
         conn.close()
 
 
-def obtener_stats_usuario_rapido(cursor, username):
-    """
-    Obtiene estadísticas rápidas de un usuario (usa cursor existente).
-    
-    Args:
-        cursor: Cursor de SQLite activo
-        username (str): Username del usuario
-        
-    Returns:
-        dict: Estadísticas básicas del usuario
-    """
-    stats = {
+def _stats_usuario_vacias():
+    return {
         'evaluaciones_hoy': 0,
         'evaluaciones_semana': 0,
         'evaluaciones_mes': 0,
@@ -92,59 +204,225 @@ def obtener_stats_usuario_rapido(cursor, username):
         'ultima_actividad': None,
         'activo_hoy': False
     }
-    
+
+
+def obtener_stats_equipo(cursor, usernames):
+    """
+    Obtiene las estadísticas rápidas de varios usuarios con tres consultas
+    agrupadas (conteos por periodo desde actividad_diaria, última actividad
+    y pendientes), en lugar de seis consultas por usuario.
+
+    La lista de usernames viaja como un único parámetro JSON (json_each),
+    así que no hay límite de variables sin importar el tamaño del equipo.
+
+    Args:
+        cursor: Cursor de SQLite activo
+        usernames (list): Usernames del equipo
+
+    Returns:
+        dict: {username: stats} con la misma estructura que
+              obtener_stats_usuario_rapido()
+    """
+    usernames = list(dict.fromkeys(usernames))
+    resultado = {username: _stats_usuario_vacias() for username in usernames}
+    if not usernames:
+        return resultado
+
+    lista_json = json.dumps(usernames)
+    limites = _limites_periodos()
+
     try:
-        inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-        
-        # Evaluaciones hoy
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
-        """, (username,))
-        stats['evaluaciones_hoy'] = cursor.fetchone()[0]
-        
-        # Evaluaciones semana
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND DATE(fecha_creacion) >= ?
-        """, (username, inicio_semana))
-        stats['evaluaciones_semana'] = cursor.fetchone()[0]
-        
-        # Evaluaciones mes
-        cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-        """, (username,))
-        stats['evaluaciones_mes'] = cursor.fetchone()[0]
-        
-        # Simulaciones hoy
-        cursor.execute("""
-            SELECT COUNT(*) FROM simulaciones
-            WHERE asesor = ? AND DATE(timestamp) = DATE('now', 'localtime')
-        """, (username,))
-        stats['simulaciones_hoy'] = cursor.fetchone()[0]
-        
-        # Casos pendientes comité
+        filas = _sumar_actividad(
+            cursor,
+            [
+                ('evaluaciones', limites['hoy'], limites['manana']),
+                ('evaluaciones', limites['semana'], None),
+                ('evaluaciones', limites['mes'], None),
+                ('simulaciones', limites['hoy'], limites['manana']),
+            ],
+            asesores=usernames,
+            # La semana puede empezar en el mes anterior
+            desde=min(limites['semana'], limites['mes']),
+            agrupar='asesor',
+        )
+        for row in filas:
+            stats = resultado[row[0]]
+            stats['evaluaciones_hoy'] = row[1]
+            stats['evaluaciones_semana'] = row[2]
+            stats['evaluaciones_mes'] = row[3]
+            stats['simulaciones_hoy'] = row[4]
+
+        # Un MAX por asesor: una sola búsqueda en el índice (asesor, fecha_creacion)
         cursor.execute("""
-            SELECT COUNT(*) FROM evaluaciones
-            WHERE asesor = ? AND estado_comite = 'pending'
-        """, (username,))
-        stats['casos_pendientes'] = cursor.fetchone()[0]
-        
-        # Última actividad
+            SELECT j.value, (
+                SELECT MAX(fecha_creacion) FROM evaluaciones WHERE asesor = j.value
+            )
+            FROM json_each(?) j
+        """, (lista_json,))
+        for row in cursor.fetchall():
+            resultado[row[0]]['ultima_actividad'] = row[1]
+
         cursor.execute("""
-            SELECT MAX(fecha_creacion) FROM evaluaciones WHERE asesor = ?
-        """, (username,))
-        row = cursor.fetchone()
-        stats['ultima_actividad'] = row[0] if row and row[0] else None
-        
-        # Activo hoy
-        stats['activo_hoy'] = stats['evaluaciones_hoy'] > 0 or stats['simulaciones_hoy'] > 0
-        
+            SELECT asesor, COUNT(*)
+            FROM evaluaciones
+            WHERE estado_comite = 'pending'
+              AND asesor IN (SELECT value FROM json_each(?))
+            GROUP BY asesor
+        """, (lista_json,))
+        for row in cursor.fetchall():
+            resultado[row[0]]['casos_pendientes'] = row[1]
+
+        for stats in resultado.values():
+            stats['activo_hoy'] = stats['evaluaciones_hoy'] > 0 or stats['simulaciones_hoy'] > 0
+
     except Exception as e:
-        print(f"⚠️ Error obteniendo stats rápidos para {username}: {e}")
+        print(f"⚠️ Error obteniendo stats de equipo ({len(usernames)} usuarios): {e}")
+
+    return resultado
+
+
+def obtener_stats_usuario_rapido(cursor, username):
+    """
+    Obtiene estadísticas rápidas de un usuario (usa cursor existente).
+    Para varios usuarios usar obtener_stats_equipo().
     
-    return stats
+    Args:
+        cursor: Cursor de SQLite activo
+        username (str): Username del usuario
+        
+    Returns:
+        dict: Estadísticas básicas del usuario
+    """
+    return obtener_stats_equipo(cursor, [username])[username]
+
+
+# ============================================================================
+# ÁRBOL JERÁRQUICO CON SUBTOTALES (WITH RECURSIVE)
+# ============================================================================
+
+_METRICAS_ARBOL = ('evaluaciones', 'aprobadas', 'pendientes', 'desembolsados', 'monto_desembolsado')
+
+# Una sola sentencia:
+# - arbol: expansión de user_assignments desde la raíz, con la ruta de
+#   usernames ('/raiz/sup/asesor/'). Un miembro que ya está en la ruta no
+#   se vuelve a expandir: los ciclos se cortan en SQL, sin límite de niveles
+# - propias: métricas de cada usuario distinto (actividad_diaria y el
+#   índice parcial de desembolsos), una vez aunque aparezca en varias ramas
+# - cadena: cada nodo sube sus métricas a todos sus ancestros; DISTINCT
+#   evita contar dos veces a un asesor que cuelga de dos supervisores
+_SQL_ARBOL_ESTADISTICAS = """
+WITH RECURSIVE
+arbol(username, padre, nivel, camino) AS (
+    SELECT :raiz, NULL, 0, '/' || :raiz || '/'
+    UNION ALL
+    SELECT ua.member_username, a.camino, a.nivel + 1, a.camino || ua.member_username || '/'
+    FROM arbol a
+    JOIN user_assignments ua ON ua.manager_username = a.username AND ua.activo = 1
+    WHERE instr(a.camino, '/' || ua.member_username || '/') = 0
+),
+propias AS (
+    SELECT m.username,
+           COALESCE(SUM(ad.evaluaciones), 0) AS evaluaciones,
+           COALESCE(SUM(ad.aprobadas), 0) AS aprobadas,
+           COALESCE(SUM(ad.pendientes), 0) AS pendientes,
+           (SELECT COUNT(*) FROM evaluaciones e
+            WHERE e.asesor = m.username AND e.estado_final = 'desembolsado') AS desembolsados,
+           (SELECT COALESCE(SUM(e.monto_solicitado), 0) FROM evaluaciones e
+            WHERE e.asesor = m.username AND e.estado_final = 'desembolsado') AS monto_desembolsado
+    FROM (SELECT DISTINCT username FROM arbol) m
+    LEFT JOIN actividad_diaria ad ON ad.asesor = m.username
+    GROUP BY m.username
+),
+nodos AS (
+    SELECT a.camino, a.padre, a.username, a.nivel,
+           p.evaluaciones, p.aprobadas, p.pendientes, p.desembolsados, p.monto_desembolsado
+    FROM arbol a
+    JOIN propias p ON p.username = a.username
+),
+cadena(camino, username, evaluaciones, aprobadas, pendientes, desembolsados, monto_desembolsado) AS (
+    SELECT camino, username, evaluaciones, aprobadas, pendientes, desembolsados, monto_desembolsado
+    FROM nodos
+    UNION ALL
+    SELECT n.padre, c.username, c.evaluaciones, c.aprobadas, c.pendientes,
+           c.desembolsados, c.monto_desembolsado
+    FROM cadena c
+    JOIN nodos n ON n.camino = c.camino
+    WHERE n.padre IS NOT NULL
+),
+totales AS (
+    SELECT camino, COUNT(*) AS usuarios,
+           SUM(evaluaciones) AS evaluaciones, SUM(aprobadas) AS aprobadas,
+           SUM(pendientes) AS pendientes, SUM(desembolsados) AS desembolsados,
+           SUM(monto_desembolsado) AS monto_desembolsado
+    FROM (SELECT DISTINCT * FROM cadena)
+    GROUP BY camino
+)
+SELECT n.camino, n.padre, n.username, n.nivel, u.nombre_completo, u.rol,
+       n.evaluaciones, n.aprobadas, n.pendientes, n.desembolsados, n.monto_desembolsado,
+       t.evaluaciones, t.aprobadas, t.pendientes, t.desembolsados, t.monto_desembolsado,
+       t.usuarios
+FROM nodos n
+JOIN totales t ON t.camino = n.camino
+LEFT JOIN usuarios u ON u.username = n.username
+ORDER BY n.nivel, COALESCE(u.nombre_completo, ''), n.username
+"""
+
+
+def obtener_arbol_estadisticas(raiz_username):
+    """
+    Árbol completo de asignaciones bajo un usuario (cualquier profundidad)
+    con métricas propias y subtotales acumulados de cada nodo, resuelto en
+    una sola sentencia (_SQL_ARBOL_ESTADISTICAS).
+
+    Métricas (históricas): evaluaciones, aprobadas, pendientes (de comité),
+    desembolsados y monto_desembolsado (monto solicitado de los casos con
+    estado_final = 'desembolsado').
+
+    Args:
+        raiz_username (str): Username raíz (gerente, supervisor...)
+
+    Returns:
+        dict: {
+            'username', 'nombre_completo', 'rol', 'nivel',
+            'propias': {métrica: valor},
+            'totales': {métrica: valor, 'usuarios': int},  # nodo + subárbol
+            'subordinados': [nodos con la misma forma, ordenados por nombre]
+        }
+        o None si hay error
+    """
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(_SQL_ARBOL_ESTADISTICAS, {'raiz': raiz_username})
+
+        # Filas por nivel: el padre siempre se procesa antes que sus hijos
+        nodos = {}
+        raiz = None
+        n = len(_METRICAS_ARBOL)
+        for row in cursor.fetchall():
+            nodo = {
+                'username': row[2],
+                'nombre_completo': row[4] or row[2],
+                'rol': row[5],
+                'nivel': row[3],
+                'propias': dict(zip(_METRICAS_ARBOL, row[6:6 + n])),
+                'totales': dict(zip(_METRICAS_ARBOL, row[6 + n:6 + 2 * n]), usuarios=row[6 + 2 * n]),
+                'subordinados': []
+            }
+            nodos[row[0]] = nodo
+            if row[1] is None:
+                raiz = nodo
+            else:
+                nodos[row[1]]['subordinados'].append(nodo)
+
+        return raiz
+
+    except Exception as e:
+        print(f"❌ Error obteniendo árbol de estadísticas: {e}")
+        return None
+    finally:
+        conn.close()
 
 
 def obtener_jerarquia_gerente(gerente_username):
@@ -152,6 +430,7 @@ def obtener_jerarquia_gerente(gerente_username):
     Obtiene la jerarquía completa de un gerente:
     - Supervisores asignados directamente
     - Asesores de cada supervisor
+    - Subtotales acumulados de cada nodo (obtener_arbol_estadisticas)
     
     Args:
         gerente_username (str): Username del gerente
@@ -162,11 +441,14 @@ def obtener_jerarquia_gerente(gerente_username):
                 {
                     'username': str,
                     'nombre_completo': str,
-                    'asesores': [...]
+                    'asesores': [...],
+                    'stats': {...},     # Actividad reciente (obtener_stats_equipo)
+                    'totales': {...}    # Supervisor + todo su subárbol
                 }
             ],
             'total_supervisores': int,
-            'total_asesores': int
+            'total_asesores': int,
+            'totales': {...}            # Gerente + toda su jerarquía
         }
     """
     conn = conectar_db()
@@ -176,53 +458,43 @@ def obtener_jerarquia_gerente(gerente_username):
         resultado = {
             'supervisores': [],
             'total_supervisores': 0,
-            'total_asesores': 0
+            'total_asesores': 0,
+            'totales': None
         }
         
-        # Obtener supervisores asignados al gerente
-        cursor.execute("""
-            SELECT 
-                ua.member_username,
-                u.nombre_completo,
-                u.rol
-            FROM user_assignments ua
-            LEFT JOIN usuarios u ON ua.member_username = u.username
-            WHERE ua.manager_username = ? AND ua.activo = 1
-            ORDER BY u.nombre_completo
-        """, (gerente_username,))
-        
-        supervisores = cursor.fetchall()
+        # Árbol con subtotales en una sola consulta
+        arbol = obtener_arbol_estadisticas(gerente_username)
+        if arbol is None:
+            raise RuntimeError("árbol de jerarquía no disponible")
+        supervisores = arbol['subordinados']
         resultado['total_supervisores'] = len(supervisores)
+        resultado['totales'] = arbol['totales']
+        
+        # Actividad reciente de supervisores y asesores con consultas agrupadas
+        stats_equipo = obtener_stats_equipo(
+            cursor,
+            [sup['username'] for sup in supervisores]
+            + [a['username'] for sup in supervisores for a in sup['subordinados']]
+        )
         
         for sup in supervisores:
-            sup_username = sup[0]
+            sup_username = sup['username']
             sup_data = {
                 'username': sup_username,
-                'nombre_completo': sup[1] or sup_username,
-                'rol': sup[2] or 'supervisor',
+                'nombre_completo': sup['nombre_completo'],
+                'rol': sup['rol'] or 'supervisor',
                 'asesores': [],
-                'stats': obtener_stats_usuario_rapido(cursor, sup_username)
+                'stats': stats_equipo[sup_username],
+                'totales': sup['totales']
             }
             
-            # Obtener asesores de este supervisor
-            cursor.execute("""
-                SELECT 
-                    ua.member_username,
-                    u.nombre_completo,
-                    u.rol
-                FROM user_assignments ua
-                LEFT JOIN usuarios u ON ua.member_username = u.username
-                WHERE ua.manager_username = ? AND ua.activo = 1
-                ORDER BY u.nombre_completo
-            """, (sup_username,))
-            
-            asesores = cursor.fetchall()
-            for asesor in asesores:
+            for asesor in sup['subordinados']:
                 asesor_data = {
-                    'username': asesor[0],
-                    'nombre_completo': asesor[1] or asesor[0],
-                    'rol': asesor[2] or 'asesor',
-                    'stats': obtener_stats_usuario_rapido(cursor, asesor[0])
+                    'username': asesor['username'],
+                    'nombre_completo': asesor['nombre_completo'],
+                    'rol': asesor['rol'] or 'asesor',
+                    'stats': stats_equipo[asesor['username']],
+                    'totales': asesor['totales']
                 }
                 sup_data['asesores'].append(asesor_data)
                 resultado['total_asesores'] += 1
@@ -233,11 +505,292 @@ def obtener_jerarquia_gerente(gerente_username):
         
     except Exception as e:
         print(f"❌ Error obteniendo jerarquía gerente: {e}")
-        return {'supervisores': [], 'total_supervisores': 0, 'total_asesores': 0}
+        return {'supervisores': [], 'total_supervisores': 0, 'total_asesores': 0, 'totales': None}
     finally:
         conn.close()
 
 
+# ============================================================================
+# MÉTRICAS POR ASESOR (TABLA MATERIALIZADA)
+# ============================================================================
+
+_ORDEN_METRICAS_ASESORES = (
+    'total_evaluaciones', 'casos_aprobados', 'casos_rechazados', 'casos_pendientes',
+    'score_promedio', 'total_simulaciones', 'asesor',
+)
+
+
+def obtener_metricas_asesores(usernames=None, orden='total_evaluaciones', limite=None):
+    """
+    Métricas históricas por asesor desde metricas_asesores (mantenida por
+    triggers): una lectura por PK por asesor, sin recorrer el historial.
+
+    Args:
+        usernames (list, optional): Asesores a incluir; None = todos
+        orden (str): Columna de _ORDEN_METRICAS_ASESORES (descendente,
+            salvo 'asesor')
+        limite (int, optional): Máximo de asesores
+
+    Returns:
+        list: Dicts con asesor, nombre_completo, total_evaluaciones,
+              casos_aprobados, casos_rechazados, casos_pendientes,
+              tasa_aprobacion, score_promedio, total_simulaciones
+    """
+    if orden not in _ORDEN_METRICAS_ASESORES:
+        orden = 'total_evaluaciones'
+    direccion = 'ASC' if orden == 'asesor' else 'DESC'
+
+    conn = conectar_db()
+    cursor = conn.cursor()
+
+    try:
+        filtro = ""
+        params = []
+        if usernames is not None:
+            filtro = "AND m.asesor IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(usernames)))
+        params.append(-1 if limite is None else int(limite))
+
+        cursor.execute(f"""
+            SELECT m.asesor, u.nombre_completo, m.total_evaluaciones,
+                   m.casos_aprobados, m.casos_rechazados, m.casos_pendientes,
+                   m.suma_score / NULLIF(m.evaluaciones_con_score, 0) AS score_promedio,
+                   m.total_simulaciones
+            FROM metricas_asesores m
+            LEFT JOIN usuarios u ON u.username = m.asesor
+            WHERE (m.total_evaluaciones > 0 OR m.total_simulaciones > 0) {filtro}
+            ORDER BY {orden} {direccion}, m.asesor
+            LIMIT ?
+        """, params)
+
+        metricas = []
+        for row in cursor.fetchall():
+            decididos = row[3] + row[4]
+            metricas.append({
+                'asesor': row[0],
+                'nombre_completo': row[1] or row[0],
+                'total_evaluaciones': row[2],
+                'casos_aprobados': row[3],
+                'casos_rechazados': row[4],
+                'casos_pendientes': row[5],
+                'tasa_aprobacion': round(row[3] / decididos * 100, 1) if decididos else 0,
+                'score_promedio': round(row[6], 2) if row[6] is not None else None,
+                'total_simulaciones': row[7]
+            })
+        return metricas
+
+    except Exception as e:
+        print(f"❌ Error obteniendo métricas de asesores: {e}")
+        return []
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# SERIES DE TIEMPO (TENDENCIAS)
+# ============================================================================
+# Una consulta agrupada por fuente, ambas en un lote de lectura:
+# - actividad_diaria: evaluaciones (por fecha de creación), aprobaciones
+#   (por fecha de decisión del comité) y simulaciones
+# - evaluaciones desembolsadas: cantidad y monto por fecha de desembolso
+#   (índice parcial idx_evaluaciones_desembolso_fecha)
+# SQL agrupa siempre por día; la pasada en Python lleva cada día a su
+# periodo (día o semana) y deja en cero los periodos sin actividad.
+# El resultado se cachea por (asesores, rango, granularidad, agrupación,
+# línea, día) y se descarta cuando cambia version_datos['series']
+# (triggers sobre evaluaciones y simulaciones).
+
+RANGOS_SERIES = (30, 90, 365)                 # Días hacia atrás (incluye hoy)
+GRANULARIDADES_SERIES = ('dia', 'semana')     # Semanas de lunes a domingo
+AGRUPACIONES_SERIES = (None, 'asesor', 'linea')
+METRICAS_SERIES = ('evaluaciones', 'aprobaciones', 'simulaciones', 'desembolsos', 'monto_desembolsado')
+MAX_SERIES_CACHE = 500                        # Entradas antes de vaciar el cache
+
+_series_cache = {}                            # clave -> (version, resultado)
+_series_cache_lock = threading.Lock()
+_stats_series = {"aciertos": 0, "fallos": 0}
+
+
+def _periodos_series(dias, granularidad):
+    """
+    Rango y periodos de una serie que termina hoy (Colombia). Con
+    granularidad 'semana' el rango empieza el lunes de la primera semana.
+
+    Returns:
+        tuple: (desde, hoy, periodos, posicion) donde posicion mapea cada
+               día 'YYYY-MM-DD' del rango al índice de su periodo
+    """
+    hoy = inicio_periodo_colombia('dia', obtener_hora_colombia_naive()).date()
+    desde = hoy - timedelta(days=dias - 1)
+    paso = 1
+    if granularidad == 'semana':
+        desde -= timedelta(days=desde.weekday())
+        paso = 7
+    total_dias = (hoy - desde).days + 1
+    periodos = [(desde + timedelta(days=n)).isoformat() for n in range(0, total_dias, paso)]
+    posicion = {(desde + timedelta(days=n)).isoformat(): n // paso for n in range(total_dias)}
+    return desde.isoformat(), hoy.isoformat(), periodos, posicion
+
+
+def _consultas_series(desde, hasta, agrupar, asesores, linea, con_desembolsos):
+    """Consultas del lote: actividad_diaria y desembolsos, agrupadas por día."""
+    filtros, params = ["fecha >= ?", "fecha < ?"], [desde, hasta]
+    filtros_des, params_des = [
+        "estado_final = 'desembolsado'", "fecha_desembolso >= ?", "fecha_desembolso < ?",
+    ], [desde, hasta]
+    if asesores is not None:
+        filtros.append("asesor IN (SELECT value FROM json_each(?))")
+        filtros_des.append("asesor IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(asesores)))
+        params_des.append(json.dumps(list(asesores)))
+    if linea:
+        filtros.append("linea = ?")
+        filtros_des.append("tipo_credito = ?")
+        params.append(linea)
+        params_des.append(linea)
+
+    grupo = {'asesor': 'asesor', 'linea': 'linea'}.get(agrupar, "''")
+    grupo_des = {'asesor': 'asesor', 'linea': "COALESCE(tipo_credito, '')"}.get(agrupar, "''")
+
+    consultas = {
+        'actividad': Consulta(f"""
+            SELECT fecha, {grupo} AS grupo,
+                   SUM(evaluaciones), SUM(decisiones_aprobadas), SUM(simulaciones)
+            FROM actividad_diaria
+            WHERE {' AND '.join(filtros)}
+            GROUP BY fecha, grupo
+        """, params, defecto=[]),
+    }
+    if con_desembolsos:
+        consultas['desembolsos'] = Consulta(f"""
+            SELECT substr(fecha_desembolso, 1, 10) AS dia,
+                   {grupo_des} AS grupo, COUNT(*), COALESCE(SUM(monto_solicitado), 0)
+            FROM evaluaciones
+            WHERE {' AND '.join(filtros_des)}
+            GROUP BY dia, grupo
+        """, params_des, defecto=[])
+    return consultas
+
+
+def _tiene_columnas_desembolso():
+    """estado_final y fecha_desembolso no están en SCHEMA_SQL (helpers de estados)."""
+    conn = conectar_db()
+    try:
+        columnas = {row[1] for row in conn.execute("PRAGMA table_info(evaluaciones)")}
+    finally:
+        conn.close()
+    return {'estado_final', 'fecha_desembolso'} <= columnas
+
+
+def obtener_series_dashboard(asesores=None, dias=30, granularidad='dia', agrupar=None, linea=None):
+    """
+    Series de tendencia de evaluaciones, aprobaciones, simulaciones y
+    desembolsos, con ceros en los periodos sin actividad.
+
+    Args:
+        asesores (list, optional): Asesores incluidos; None = todos
+        dias (int): Uno de RANGOS_SERIES
+        granularidad (str): 'dia' o 'semana'
+        agrupar (str, optional): None (total), 'asesor' o 'linea'
+        linea (str, optional): Limitar a una línea de crédito
+
+    Returns:
+        dict: desde, hasta, granularidad, agrupar, periodos (lista de
+              fechas de inicio), series (una por grupo, con una lista por
+              métrica de METRICAS_SERIES alineada con periodos), parcial.
+              Compartido entre llamadas: no modificar.
+    """
+    if dias not in RANGOS_SERIES:
+        raise ValueError(f"Rango no soportado: {dias}")
+    if granularidad not in GRANULARIDADES_SERIES:
+        raise ValueError(f"Granularidad no soportada: {granularidad}")
+    if agrupar not in AGRUPACIONES_SERIES:
+        raise ValueError(f"Agrupación no soportada: {agrupar}")
+
+    desde, hoy, periodos, posicion = _periodos_series(dias, granularidad)
+    hasta = (datetime.strptime(hoy, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    alcance = None if asesores is None else tuple(sorted(set(asesores)))
+    clave = (alcance, dias, granularidad, agrupar, linea or None, hoy)
+    version = obtener_version_datos("series")
+
+    entrada = _series_cache.get(clave)
+    if entrada is not None and version is not None and entrada[0] == version:
+        with _series_cache_lock:
+            _stats_series["aciertos"] += 1
+        return entrada[1]
+
+    resultado = {
+        'desde': desde,
+        'hasta': hoy,
+        'granularidad': granularidad,
+        'agrupar': agrupar,
+        'periodos': periodos,
+        'series': [],
+        'parcial': False,
+    }
+    if alcance == ():
+        return resultado
+
+    lote = ejecutar_lote(_consultas_series(
+        desde, hasta, agrupar, alcance, linea, _tiene_columnas_desembolso()
+    ))
+
+    # Relleno con ceros: una lista por métrica y grupo, una pasada por fila
+    n = len(periodos)
+    series = {}
+
+    def serie(grupo):
+        datos = series.get(grupo)
+        if datos is None:
+            datos = series[grupo] = {metrica: [0] * n for metrica in METRICAS_SERIES}
+        return datos
+
+    for dia, grupo, evaluaciones, aprobaciones, simulaciones in lote['actividad']:
+        i = posicion.get(dia)
+        if i is None:
+            continue
+        datos = serie(grupo)
+        datos['evaluaciones'][i] += evaluaciones
+        datos['aprobaciones'][i] += aprobaciones
+        datos['simulaciones'][i] += simulaciones
+    for dia, grupo, desembolsos, monto in lote.get('desembolsos', ()):
+        i = posicion.get(dia)
+        if i is None:
+            continue
+        datos = serie(grupo)
+        datos['desembolsos'][i] += desembolsos
+        datos['monto_desembolsado'][i] += monto
+
+    if agrupar is None:
+        series.setdefault('', {metrica: [0] * n for metrica in METRICAS_SERIES})
+    indice = obtener_indice_jerarquia() if agrupar == 'asesor' else None
+    for grupo in sorted(series):
+        datos = series[grupo]
+        item = {'grupo': grupo or None}
+        if indice is not None:
+            item['nombre'] = indice.info_usuario(grupo)['nombre_completo'] or grupo
+        item.update(datos)
+        item['totales'] = {metrica: sum(valores) for metrica, valores in datos.items()}
+        resultado['series'].append(item)
+    resultado['parcial'] = lote.parcial
+
+    with _series_cache_lock:
+        _stats_series["fallos"] += 1
+        if version is not None and not lote.parcial:
+            if len(_series_cache) >= MAX_SERIES_CACHE:
+                _series_cache.clear()
+            _series_cache[clave] = (version, resultado)
+    return resultado
+
+
+def obtener_estadisticas_series():
+    """Aciertos y fallos del cache de series."""
+    with _series_cache_lock:
+        stats = dict(_stats_series)
+        stats["entradas"] = len(_series_cache)
+    return stats
+
+
 # ============================================================================
 # FUNCIONES DE ESTADÍSTICAS POR ROL
 # ============================================================================
@@ -255,7 +808,7 @@ def obtener_estadisticas_asesor(username):
     conn = conectar_db()
     cursor = conn.cursor()
 
-    inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
+    limites = _limites_periodos()
 
     stats = {
         'rol': 'asesor',
@@ -264,66 +817,28 @@ def obtener_estadisticas_asesor(username):
         'color': 'primary'
     }
 
-    # Simulaciones de hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE asesor = ? AND DATE(timestamp) = DATE('now', 'localtime')
-    """, (username,))
-    stats['simulaciones_hoy'] = cursor.fetchone()[0]
-
-    # Simulaciones esta semana
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE asesor = ? AND DATE(timestamp) >= ?
-    """, (username, inicio_semana))
-    stats['simulaciones_semana'] = cursor.fetchone()[0]
-
-    # Total simulaciones
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones WHERE asesor = ?
-    """, (username,))
-    stats['simulaciones_total'] = cursor.fetchone()[0]
-
-    # Evaluaciones de hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
-    """, (username,))
-    stats['evaluaciones_hoy'] = cursor.fetchone()[0]
-
-    # Evaluaciones esta semana
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND DATE(fecha_creacion) >= ?
-    """, (username, inicio_semana))
-    stats['evaluaciones_semana'] = cursor.fetchone()[0]
-
-    # Total evaluaciones
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones WHERE asesor = ?
-    """, (username,))
-    stats['evaluaciones_total'] = cursor.fetchone()[0]
-
-    # Casos enviados a comité (pendientes)
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'pending'
-    """, (username,))
-    stats['casos_pendientes_comite'] = cursor.fetchone()[0]
-
-    # Casos aprobados por comité
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'approved'
-    """, (username,))
-    stats['casos_aprobados'] = cursor.fetchone()[0]
-
-    # Casos rechazados por comité
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE asesor = ? AND estado_comite = 'rejected'
-    """, (username,))
-    stats['casos_rechazados'] = cursor.fetchone()[0]
+    # Simulaciones, evaluaciones y estado de comité (rollup diario)
+    (
+        stats['simulaciones_hoy'],
+        stats['simulaciones_semana'],
+        stats['simulaciones_total'],
+        stats['evaluaciones_hoy'],
+        stats['evaluaciones_semana'],
+        stats['evaluaciones_total'],
+        stats['casos_pendientes_comite'],
+        stats['casos_aprobados'],
+        stats['casos_rechazados'],
+    ) = _sumar_actividad(cursor, [
+        ('simulaciones', limites['hoy'], limites['manana']),
+        ('simulaciones', limites['semana'], None),
+        ('simulaciones', None, None),
+        ('evaluaciones', limites['hoy'], limites['manana']),
+        ('evaluaciones', limites['semana'], None),
+        ('evaluaciones', None, None),
+        ('pendientes', None, None),
+        ('aprobadas', None, None),
+        ('rechazadas', None, None),
+    ], asesores=[username])
 
     # Casos con respuesta no vistos
     cursor.execute("""
@@ -359,7 +874,7 @@ def obtener_estadisticas_supervisor(username=None):
     conn = conectar_db()
     cursor = conn.cursor()
 
-    inicio_semana = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
+    limites = _limites_periodos()
 
     stats = {
         'rol': 'supervisor',
@@ -373,26 +888,18 @@ def obtener_estadisticas_supervisor(username=None):
     # === OBTENER ASESORES ASIGNADOS A ESTE SUPERVISOR ===
     asesores = []
     asesores_data = []
+    nombres = {}
     if username:
-        cursor.execute("""
-            SELECT 
-                ua.member_username,
-                u.nombre_completo,
-                u.rol,
-                u.activo
-            FROM user_assignments ua
-            LEFT JOIN usuarios u ON ua.member_username = u.username
-            WHERE ua.manager_username = ? AND ua.activo = 1
-            ORDER BY u.nombre_completo
-        """, (username,))
-        
-        for row in cursor.fetchall():
-            asesores.append(row[0])
+        indice = obtener_indice_jerarquia()
+        for asesor in indice.reportes_directos(username):
+            info = indice.info_usuario(asesor)
+            asesores.append(asesor)
+            nombres[asesor] = info['nombre_completo']
             asesores_data.append({
-                'username': row[0],
-                'nombre_completo': row[1] or row[0],
-                'rol': row[2] or 'asesor',
-                'activo': bool(row[3]) if row[3] is not None else True
+                'username': asesor,
+                'nombre_completo': info['nombre_completo'] or asesor,
+                'rol': info['rol'] or 'asesor',
+                'activo': bool(info['activo']) if info['activo'] is not None else True
             })
 
     # Si no hay asignaciones, retornar stats vacías con mensaje
@@ -409,83 +916,46 @@ def obtener_estadisticas_supervisor(username=None):
         conn.close()
         return stats
 
-    # Placeholder para queries IN
-    ph = ','.join('?' * len(asesores))
-
     # Asesores activos (de los asignados)
     stats['asesores_activos'] = len(asesores)
 
-    # Agregar estadísticas a cada asesor
+    # Agregar estadísticas a cada asesor (consultas agrupadas para todo el equipo)
+    stats_equipo = obtener_stats_equipo(cursor, asesores)
     for asesor_info in asesores_data:
-        asesor_stats = obtener_stats_usuario_rapido(cursor, asesor_info['username'])
-        asesor_info['stats'] = asesor_stats
+        asesor_info['stats'] = stats_equipo[asesor_info['username']]
     
     stats['lista_asesores'] = asesores_data
 
-    # Asesores que han trabajado hoy (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(DISTINCT asesor) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-          AND asesor IN ({ph})
-    """, asesores)
-    stats['asesores_activos_hoy'] = cursor.fetchone()[0]
-
-    # Simulaciones del equipo hoy (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) = DATE('now', 'localtime')
-          AND asesor IN ({ph})
-    """, asesores)
-    stats['simulaciones_equipo_hoy'] = cursor.fetchone()[0]
-
-    # Simulaciones del equipo esta semana (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) >= ?
-          AND asesor IN ({ph})
-    """, [inicio_semana] + asesores)
-    stats['simulaciones_equipo_semana'] = cursor.fetchone()[0]
-
-    # Evaluaciones del equipo hoy (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-          AND asesor IN ({ph})
-    """, asesores)
-    stats['evaluaciones_equipo_hoy'] = cursor.fetchone()[0]
+    # Actividad de la semana por asesor (DE LOS ASIGNADOS, rollup diario)
+    semana = {
+        row[0]: row[1:]
+        for row in _sumar_actividad(cursor, [
+            ('evaluaciones', limites['hoy'], limites['manana']),
+            ('evaluaciones', None, None),
+            ('simulaciones', limites['hoy'], limites['manana']),
+            ('simulaciones', None, None),
+        ], asesores=asesores, desde=limites['semana'], agrupar='asesor')
+    }
 
-    # Evaluaciones del equipo esta semana (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) >= ?
-          AND asesor IN ({ph})
-    """, [inicio_semana] + asesores)
-    stats['evaluaciones_equipo_semana'] = cursor.fetchone()[0]
+    stats['asesores_activos_hoy'] = sum(1 for fila in semana.values() if fila[0] > 0)
+    stats['evaluaciones_equipo_hoy'] = sum(fila[0] for fila in semana.values())
+    stats['evaluaciones_equipo_semana'] = sum(fila[1] for fila in semana.values())
+    stats['simulaciones_equipo_hoy'] = sum(fila[2] for fila in semana.values())
+    stats['simulaciones_equipo_semana'] = sum(fila[3] for fila in semana.values())
 
     # Total casos pendientes de comité (DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE estado_comite = 'pending'
-          AND asesor IN ({ph})
-    """, asesores)
-    stats['casos_pendientes_total'] = cursor.fetchone()[0]
+    stats['casos_pendientes_total'] = sum(
+        stats_equipo[asesor]['casos_pendientes'] for asesor in dict.fromkeys(asesores)
+    )
 
     # Top asesores de la semana (SOLO DE LOS ASIGNADOS)
-    cursor.execute(f"""
-        SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, 
-               e.asesor as username,
-               COUNT(*) as total
-        FROM evaluaciones e
-        LEFT JOIN usuarios u ON e.asesor = u.username
-        WHERE DATE(e.fecha_creacion) >= ?
-          AND e.asesor IN ({ph})
-        GROUP BY e.asesor
-        ORDER BY total DESC
-        LIMIT 5
-    """, [inicio_semana] + asesores)
+    top = sorted(
+        ((asesor, fila[1]) for asesor, fila in semana.items() if fila[1] > 0),
+        key=lambda item: item[1], reverse=True
+    )[:5]
     stats['top_asesores'] = [
-        {'nombre': row[0] or 'Sin nombre', 'username': row[1], 'total': row[2]} 
-        for row in cursor.fetchall()
+        {'nombre': nombres.get(asesor) or 'Sin nombre', 'username': asesor, 'total': total}
+        for asesor, total in top
     ]
 
     conn.close()
@@ -509,39 +979,27 @@ def obtener_estadisticas_comite():
         'color': 'dark'
     }
 
-    # Casos pendientes de decisión
+    limites = _limites_periodos()
+
+    # Casos pendientes de decisión (índice por estado: solo lee los pendientes)
     cursor.execute("""
         SELECT COUNT(*) FROM evaluaciones
         WHERE estado_comite = 'pending'
     """)
     stats['casos_pendientes'] = cursor.fetchone()[0]
 
-    # Casos aprobados hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE estado_comite = 'approved'
-          AND DATE(fecha_modificacion) = DATE('now', 'localtime')
-          AND decision_admin IS NOT NULL
-    """)
-    stats['aprobados_hoy'] = cursor.fetchone()[0]
-
-    # Casos rechazados hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE estado_comite = 'rejected'
-          AND DATE(fecha_modificacion) = DATE('now', 'localtime')
-          AND decision_admin IS NOT NULL
-    """)
-    stats['rechazados_hoy'] = cursor.fetchone()[0]
-
-    # Total decisiones del mes
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE estado_comite IN ('approved', 'rejected')
-          AND decision_admin IS NOT NULL
-          AND strftime('%Y-%m', fecha_modificacion) = strftime('%Y-%m', 'now')
-    """)
-    stats['decisiones_mes'] = cursor.fetchone()[0]
+    # Decisiones de hoy y del mes (rollup diario por fecha de decisión)
+    aprobadas_mes, rechazadas_mes = 0, 0
+    stats['aprobados_hoy'], stats['rechazados_hoy'] = 0, 0
+    for fecha, aprobadas, rechazadas in _sumar_actividad(cursor, [
+        ('decisiones_aprobadas', None, limites['mes_siguiente']),
+        ('decisiones_rechazadas', None, limites['mes_siguiente']),
+    ], desde=limites['mes'], agrupar='fecha'):
+        aprobadas_mes += aprobadas
+        rechazadas_mes += rechazadas
+        if fecha == limites['hoy']:
+            stats['aprobados_hoy'], stats['rechazados_hoy'] = aprobadas, rechazadas
+    stats['decisiones_mes'] = aprobadas_mes + rechazadas_mes
 
     # Distribución por nivel de riesgo (pendientes)
     cursor.execute("""
@@ -583,9 +1041,6 @@ def obtener_estadisticas_auditor(username=None):
     Returns:
         dict: Estadísticas de auditoría
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     stats = {
         'rol': 'auditor',
         'titulo': 'Panel de Auditoría',
@@ -595,119 +1050,75 @@ def obtener_estadisticas_auditor(username=None):
         'scope': 'global'
     }
 
-    # Obtener usuarios asignados (supervisores y sus asesores)
-    supervisores_asignados = []
-    if username:
-        cursor.execute("""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username = ? AND activo = 1
-        """, (username,))
-        supervisores_asignados = [row[0] for row in cursor.fetchall()]
-
+    # Obtener usuarios asignados (asesores de sus supervisores)
     asesores_asignados = []
-    if supervisores_asignados:
-        ph_supervisores = ','.join('?' * len(supervisores_asignados))
-        cursor.execute(f"""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username IN ({ph_supervisores}) AND activo = 1
-        """, supervisores_asignados)
-        asesores_asignados = [row[0] for row in cursor.fetchall()]
+    if username:
+        asesores_asignados = obtener_indice_jerarquia().reportes_nivel(username, 2)
 
     # Determinar scope
     usar_filtro = len(asesores_asignados) > 0
     if usar_filtro:
-        ph = ','.join('?' * len(asesores_asignados))
         stats['scope'] = 'equipo'
         stats['usuarios_en_scope'] = len(asesores_asignados)
     else:
         stats['scope'] = 'global'
+    alcance = asesores_asignados if usar_filtro else None
+    limites = _limites_periodos()
 
-    # Total evaluaciones
+    # Distribución por asesor (top 10)
+    params = []
+    filtro = ""
     if usar_filtro:
-        cursor.execute(f"SELECT COUNT(*) FROM evaluaciones WHERE asesor IN ({ph})", asesores_asignados)
-    else:
-        cursor.execute("SELECT COUNT(*) FROM evaluaciones")
-    stats['total_evaluaciones'] = cursor.fetchone()[0]
+        filtro = "WHERE a.asesor IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(asesores_asignados))
+
+    # Consultas independientes: en paralelo (db_lectura)
+    lote = ejecutar_lote({
+        # Totales y tasa de aprobación (rollup diario)
+        'totales': _consulta_actividad(
+            [('evaluaciones', None, None), ('simulaciones', None, None),
+             ('aprobadas', None, None), ('rechazadas', None, None)],
+            asesores=alcance,
+        ),
+        # Evaluaciones por día de los últimos 6 meses
+        'por_dia': _consulta_actividad(
+            [('evaluaciones', None, None)],
+            asesores=alcance, desde=limites['hace_6_meses'], agrupar='fecha',
+        ),
+        'distribucion': Consulta(f"""
+            SELECT COALESCE(u.nombre_completo, a.asesor) as nombre, SUM(a.evaluaciones) as total
+            FROM actividad_diaria a
+            LEFT JOIN usuarios u ON a.asesor = u.username
+            {filtro}
+            GROUP BY a.asesor
+            HAVING total > 0
+            ORDER BY total DESC
+            LIMIT 10
+        """, params, defecto=[]),
+    })
+    _marcar_parcial(stats, lote)
 
-    # Total simulaciones
-    if usar_filtro:
-        cursor.execute(f"SELECT COUNT(*) FROM simulaciones WHERE asesor IN ({ph})", asesores_asignados)
-    else:
-        cursor.execute("SELECT COUNT(*) FROM simulaciones")
-    stats['total_simulaciones'] = cursor.fetchone()[0]
+    stats['total_evaluaciones'], stats['total_simulaciones'], aprobados, rechazados = lote['totales']
 
     # Evaluaciones por mes (últimos 6 meses)
-    if usar_filtro:
-        cursor.execute(f"""
-            SELECT strftime('%Y-%m', fecha_creacion) as mes, COUNT(*) as total
-            FROM evaluaciones
-            WHERE fecha_creacion >= date('now', '-6 months')
-              AND asesor IN ({ph})
-            GROUP BY mes
-            ORDER BY mes DESC
-        """, asesores_asignados)
-    else:
-        cursor.execute("""
-            SELECT strftime('%Y-%m', fecha_creacion) as mes, COUNT(*) as total
-            FROM evaluaciones
-            WHERE fecha_creacion >= date('now', '-6 months')
-            GROUP BY mes
-            ORDER BY mes DESC
-        """)
-    stats['evaluaciones_por_mes'] = [{'mes': row[0], 'total': row[1]} for row in cursor.fetchall()]
+    por_mes = {}
+    for fecha, total in lote['por_dia']:
+        if total:
+            por_mes[fecha[:7]] = por_mes.get(fecha[:7], 0) + total
+    stats['evaluaciones_por_mes'] = [
+        {'mes': mes, 'total': total} for mes, total in sorted(por_mes.items(), reverse=True)
+    ]
 
-    # Tasa de aprobación
-    if usar_filtro:
-        cursor.execute(f"""
-            SELECT
-                SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-                SUM(CASE WHEN estado_comite = 'rejected' THEN 1 ELSE 0 END) as rechazados
-            FROM evaluaciones
-            WHERE estado_comite IN ('approved', 'rejected')
-              AND asesor IN ({ph})
-        """, asesores_asignados)
-    else:
-        cursor.execute("""
-            SELECT
-                SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-                SUM(CASE WHEN estado_comite = 'rejected' THEN 1 ELSE 0 END) as rechazados
-            FROM evaluaciones
-            WHERE estado_comite IN ('approved', 'rejected')
-        """)
-    row = cursor.fetchone()
-    aprobados = row[0] or 0
-    rechazados = row[1] or 0
     total = aprobados + rechazados
     stats['tasa_aprobacion'] = round((aprobados / total * 100), 1) if total > 0 else 0
     stats['total_aprobados'] = aprobados
     stats['total_rechazados'] = rechazados
 
-    # Distribución por asesor (top 10)
-    if usar_filtro:
-        cursor.execute(f"""
-            SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, COUNT(*) as total
-            FROM evaluaciones e
-            LEFT JOIN usuarios u ON e.asesor = u.username
-            WHERE e.asesor IN ({ph})
-            GROUP BY e.asesor
-            ORDER BY total DESC
-            LIMIT 10
-        """, asesores_asignados)
-    else:
-        cursor.execute("""
-            SELECT COALESCE(u.nombre_completo, e.asesor) as nombre, COUNT(*) as total
-            FROM evaluaciones e
-            LEFT JOIN usuarios u ON e.asesor = u.username
-            GROUP BY e.asesor
-            ORDER BY total DESC
-            LIMIT 10
-        """)
     stats['distribucion_asesores'] = [
         {'nombre': row[0] or 'Sin nombre', 'total': row[1]}
-        for row in cursor.fetchall()
+        for row in lote['distribucion']
     ]
 
-    conn.close()
     return stats
 
 
@@ -722,9 +1133,6 @@ def obtener_estadisticas_gerente(username=None):
     Returns:
         dict: Estadísticas ejecutivas del equipo jerárquico
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     stats = {
         'rol': 'gerente',
         'titulo': 'Panel Ejecutivo',
@@ -738,24 +1146,12 @@ def obtener_estadisticas_gerente(username=None):
     if username:
         stats['jerarquia'] = obtener_jerarquia_gerente(username)
     
-    # Obtener supervisores asignados
-    supervisores_asignados = []
-    if username:
-        cursor.execute("""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username = ? AND activo = 1
-        """, (username,))
-        supervisores_asignados = [row[0] for row in cursor.fetchall()]
-
-    # Obtener asesores de esos supervisores
-    asesores_asignados = []
-    if supervisores_asignados:
-        ph_supervisores = ','.join('?' * len(supervisores_asignados))
-        cursor.execute(f"""
-            SELECT member_username FROM user_assignments
-            WHERE manager_username IN ({ph_supervisores}) AND activo = 1
-        """, supervisores_asignados)
-        asesores_asignados = [row[0] for row in cursor.fetchall()]
+    # Supervisores asignados y los asesores de esos supervisores (del árbol)
+    jerarquia = stats['jerarquia'] or {}
+    supervisores_asignados = [sup['username'] for sup in jerarquia.get('supervisores', [])]
+    asesores_asignados = list(dict.fromkeys(
+        asesor['username'] for sup in jerarquia.get('supervisores', []) for asesor in sup['asesores']
+    ))
 
     # Si no hay asignaciones, retornar stats vacías
     if not asesores_asignados:
@@ -772,40 +1168,44 @@ def obtener_estadisticas_gerente(username=None):
         stats['sin_asignaciones'] = True
         stats['supervisores_asignados'] = 0
         stats['asesores_en_jerarquia'] = 0
-        conn.close()
         return stats
 
     ph = ','.join('?' * len(asesores_asignados))
+    limites = _limites_periodos()
 
     # Info de jerarquía
     stats['supervisores_asignados'] = len(supervisores_asignados)
     stats['asesores_en_jerarquia'] = len(asesores_asignados)
 
-    # Métricas generales (del equipo jerárquico)
-    cursor.execute(f"SELECT COUNT(*) FROM simulaciones WHERE asesor IN ({ph})", asesores_asignados)
-    stats['total_simulaciones'] = cursor.fetchone()[0]
-
-    cursor.execute(f"SELECT COUNT(*) FROM evaluaciones WHERE asesor IN ({ph})", asesores_asignados)
-    stats['total_evaluaciones'] = cursor.fetchone()[0]
-
-    cursor.execute(f"SELECT COUNT(*) FROM usuarios WHERE activo = 1 AND username IN ({ph})", asesores_asignados)
-    stats['usuarios_activos'] = cursor.fetchone()[0]
-
-    # Actividad del mes actual
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-          AND asesor IN ({ph})
-    """, asesores_asignados)
-    stats['evaluaciones_mes'] = cursor.fetchone()[0]
-
-    # Comparativa con mes anterior
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', date('now', '-1 month'))
-          AND asesor IN ({ph})
-    """, asesores_asignados)
-    stats['evaluaciones_mes_anterior'] = cursor.fetchone()[0]
+    # Consultas independientes sobre el equipo: en paralelo (db_lectura)
+    lote = ejecutar_lote({
+        # Métricas generales y de comité (rollup diario del equipo jerárquico)
+        'totales': _consulta_actividad([
+            ('simulaciones', None, None),
+            ('evaluaciones', None, None),
+            ('evaluaciones', limites['mes'], limites['mes_siguiente']),
+            ('evaluaciones', limites['mes_anterior'], limites['mes']),
+            ('aprobadas', None, None),
+            ('pendientes', None, None),
+        ], asesores=asesores_asignados),
+        'activos': Consulta(
+            f"SELECT COUNT(*) FROM usuarios WHERE activo = 1 AND username IN ({ph})",
+            asesores_asignados, modo='valor', defecto=0,
+        ),
+        # Evaluaciones por día de las últimas 4 semanas
+        'por_dia': _consulta_actividad(
+            [('evaluaciones', None, None)],
+            asesores=asesores_asignados, desde=limites['hace_28_dias'], agrupar='fecha',
+        ),
+    })
+    _marcar_parcial(stats, lote)
+
+    (
+        stats['total_simulaciones'], stats['total_evaluaciones'],
+        stats['evaluaciones_mes'], stats['evaluaciones_mes_anterior'],
+        aprobados, pendientes,
+    ) = lote['totales']
+    stats['usuarios_activos'] = lote['activos']
 
     # Crecimiento
     if stats['evaluaciones_mes_anterior'] > 0:
@@ -817,41 +1217,20 @@ def obtener_estadisticas_gerente(username=None):
         stats['crecimiento'] = 0
 
     # Métricas de conversión comité
-    cursor.execute(f"""
-        SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN estado_comite = 'approved' THEN 1 ELSE 0 END) as aprobados,
-            SUM(CASE WHEN estado_comite = 'pending' THEN 1 ELSE 0 END) as pendientes
-        FROM evaluaciones
-        WHERE asesor IN ({ph})
-    """, asesores_asignados)
-    row = cursor.fetchone()
-    stats['total_comite'] = row[0] or 0
-    stats['aprobados_comite'] = row[1] or 0
-    stats['pendientes_comite'] = row[2] or 0
+    stats['total_comite'] = stats['total_evaluaciones']
+    stats['aprobados_comite'] = aprobados
+    stats['pendientes_comite'] = pendientes
 
     # Actividad por día de la semana (últimas 4 semanas)
-    cursor.execute(f"""
-        SELECT
-            CASE strftime('%w', fecha_creacion)
-                WHEN '0' THEN 'Dom'
-                WHEN '1' THEN 'Lun'
-                WHEN '2' THEN 'Mar'
-                WHEN '3' THEN 'Mié'
-                WHEN '4' THEN 'Jue'
-                WHEN '5' THEN 'Vie'
-                WHEN '6' THEN 'Sáb'
-            END as dia,
-            COUNT(*) as total
-        FROM evaluaciones
-        WHERE fecha_creacion >= date('now', '-28 days')
-          AND asesor IN ({ph})
-        GROUP BY strftime('%w', fecha_creacion)
-        ORDER BY strftime('%w', fecha_creacion)
-    """, asesores_asignados)
-    stats['actividad_semanal'] = [{'dia': row[0], 'total': row[1]} for row in cursor.fetchall()]
+    por_dia = {}
+    for fecha, total in lote['por_dia']:
+        if total:
+            dia = (datetime.strptime(fecha, '%Y-%m-%d').weekday() + 1) % 7  # 0 = domingo
+            por_dia[dia] = por_dia.get(dia, 0) + total
+    stats['actividad_semanal'] = [
+        {'dia': _DIAS_SEMANA[dia], 'total': total} for dia, total in sorted(por_dia.items())
+    ]
 
-    conn.close()
     return stats
 
 
@@ -862,9 +1241,6 @@ def obtener_estadisticas_admin():
     Returns:
         dict: Estadísticas de administración
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-
     stats = {
         'rol': 'admin',
         'titulo': 'Panel de Administración',
@@ -872,59 +1248,58 @@ def obtener_estadisticas_admin():
         'color': 'danger'
     }
 
-    # Totales generales
-    cursor.execute("SELECT COUNT(*) FROM usuarios WHERE activo = 1")
-    stats['total_usuarios'] = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM simulaciones")
-    stats['total_simulaciones'] = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM evaluaciones")
-    stats['total_evaluaciones'] = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM lineas_credito WHERE activo = 1")
-    stats['lineas_activas'] = cursor.fetchone()[0]
-
-    # Usuarios por rol
-    cursor.execute("""
-        SELECT rol, COUNT(*) FROM usuarios
-        WHERE activo = 1
-        GROUP BY rol
-    """)
-    stats['usuarios_por_rol'] = {row[0]: row[1] for row in cursor.fetchall()}
-
-    # Actividad hoy
-    cursor.execute("""
-        SELECT COUNT(*) FROM simulaciones
-        WHERE DATE(timestamp) = DATE('now', 'localtime')
-    """)
-    stats['simulaciones_hoy'] = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones
-        WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-    """)
-    stats['evaluaciones_hoy'] = cursor.fetchone()[0]
-
-    # Casos de comité
-    cursor.execute("""
-        SELECT estado_comite, COUNT(*) FROM evaluaciones
-        WHERE estado_comite IS NOT NULL AND estado_comite != ''
-        GROUP BY estado_comite
-    """)
-    stats['casos_comite'] = {row[0]: row[1] for row in cursor.fetchall()}
-
-    # Pendientes comité
-    cursor.execute("""
-        SELECT COUNT(*) FROM evaluaciones WHERE estado_comite = 'pending'
-    """)
-    stats['pendientes_comite'] = cursor.fetchone()[0]
+    # Consultas independientes: en paralelo (db_lectura)
+    limites = _limites_periodos()
+    lote = ejecutar_lote({
+        # Totales generales
+        'usuarios': Consulta(
+            "SELECT COUNT(*) FROM usuarios WHERE activo = 1", modo='valor', defecto=0
+        ),
+        'lineas': Consulta(
+            "SELECT COUNT(*) FROM lineas_credito WHERE activo = 1", modo='valor', defecto=0
+        ),
+        # Usuarios por rol
+        'por_rol': Consulta("""
+            SELECT rol, COUNT(*) FROM usuarios
+            WHERE activo = 1
+            GROUP BY rol
+        """, defecto=[]),
+        # Totales, actividad de hoy y casos de comité (rollup diario)
+        'actividad': _consulta_actividad([
+            ('simulaciones', None, None),
+            ('evaluaciones', None, None),
+            ('simulaciones', limites['hoy'], limites['manana']),
+            ('evaluaciones', limites['hoy'], limites['manana']),
+            ('aprobadas', None, None),
+            ('rechazadas', None, None),
+            ('pendientes', None, None),
+        ]),
+        # Pendientes comité
+        'pendientes': Consulta("""
+            SELECT COUNT(*) FROM evaluaciones WHERE estado_comite = 'pending'
+        """, modo='valor', defecto=0),
+    })
+    _marcar_parcial(stats, lote)
+
+    stats['total_usuarios'] = lote['usuarios']
+    stats['lineas_activas'] = lote['lineas']
+    stats['usuarios_por_rol'] = {row[0]: row[1] for row in lote['por_rol']}
+
+    (
+        stats['total_simulaciones'], stats['total_evaluaciones'],
+        stats['simulaciones_hoy'], stats['evaluaciones_hoy'],
+        aprobados, rechazados, pendientes,
+    ) = lote['actividad']
+
+    casos = {'approved': aprobados, 'pending': pendientes, 'rejected': rechazados}
+    stats['casos_comite'] = {estado: total for estado, total in casos.items() if total}
+
+    stats['pendientes_comite'] = lote['pendientes']
 
     # Sistema
     stats['version_sistema'] = 'v72.8'
     stats['fecha_actual'] = datetime.now().strftime('%d/%m/%Y %H:%M')
 
-    conn.close()
     return stats
 
 
@@ -1011,6 +1386,7 @@ def obtener_resumen_navbar(rol, username=None):
         cursor = conn.cursor()
 
         resumen = {'items': []}
+        limites = _limites_periodos()
 
         if rol in ['admin', 'admin_tecnico']:
             # Pendientes de comité
@@ -1028,11 +1404,9 @@ def obtener_resumen_navbar(rol, username=None):
                 })
 
             # Evaluaciones hoy
-            cursor.execute("""
-                SELECT COUNT(*) FROM evaluaciones
-                WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-            """)
-            evals_hoy = cursor.fetchone()[0]
+            evals_hoy, = _sumar_actividad(
+                cursor, [('evaluaciones', None, limites['manana'])], desde=limites['hoy']
+            )
             resumen['items'].append({
                 'icono': 'bi-graph-up',
                 'valor': evals_hoy,
@@ -1044,29 +1418,18 @@ def obtener_resumen_navbar(rol, username=None):
             # === FILTRAR POR ASIGNACIONES ===
             asesores = []
             if username:
-                cursor.execute("""
-                    SELECT member_username FROM user_assignments
-                    WHERE manager_username = ? AND activo = 1
-                """, (username,))
-                asesores = [r[0] for r in cursor.fetchall()]
+                asesores = obtener_indice_jerarquia().reportes_directos(username)
 
             if asesores:
-                ph = ','.join('?' * len(asesores))
-                # Asesores que han trabajado hoy (del equipo)
-                cursor.execute(f"""
-                    SELECT COUNT(DISTINCT asesor) FROM evaluaciones
-                    WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-                      AND asesor IN ({ph})
-                """, asesores)
-                activos = cursor.fetchone()[0]
-
-                # Evaluaciones equipo hoy
-                cursor.execute(f"""
-                    SELECT COUNT(*) FROM evaluaciones
-                    WHERE DATE(fecha_creacion) = DATE('now', 'localtime')
-                      AND asesor IN ({ph})
-                """, asesores)
-                evals = cursor.fetchone()[0]
+                # Asesores que han trabajado hoy y evaluaciones del equipo hoy
+                evals_por_asesor = [
+                    total for _asesor, total in _sumar_actividad(
+                        cursor, [('evaluaciones', None, limites['manana'])],
+                        asesores=asesores, desde=limites['hoy'], agrupar='asesor'
+                    ) if total
+                ]
+                activos = len(evals_por_asesor)
+                evals = sum(evals_por_asesor)
             else:
                 activos = 0
                 evals = 0
@@ -1090,19 +1453,9 @@ def obtener_resumen_navbar(rol, username=None):
             supervisores = []
             asesores = []
             if username:
-                cursor.execute("""
-                    SELECT member_username FROM user_assignments
-                    WHERE manager_username = ? AND activo = 1
-                """, (username,))
-                supervisores = [r[0] for r in cursor.fetchall()]
-                
-                if supervisores:
-                    ph_sup = ','.join('?' * len(supervisores))
-                    cursor.execute(f"""
-                        SELECT member_username FROM user_assignments
-                        WHERE manager_username IN ({ph_sup}) AND activo = 1
-                    """, supervisores)
-                    asesores = [r[0] for r in cursor.fetchall()]
+                indice = obtener_indice_jerarquia()
+                supervisores = indice.reportes_directos(username)
+                asesores = indice.reportes_nivel(username, 2)
 
             # Mostrar cantidad de supervisores
             resumen['items'].append({
@@ -1113,14 +1466,11 @@ def obtener_resumen_navbar(rol, username=None):
             })
 
             if asesores:
-                ph = ','.join('?' * len(asesores))
                 # Evaluaciones del mes
-                cursor.execute(f"""
-                    SELECT COUNT(*) FROM evaluaciones
-                    WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-                      AND asesor IN ({ph})
-                """, asesores)
-                evals_mes = cursor.fetchone()[0]
+                evals_mes, = _sumar_actividad(
+                    cursor, [('evaluaciones', None, limites['mes_siguiente'])],
+                    asesores=asesores, desde=limites['mes']
+                )
                 
                 resumen['items'].append({
                     'icono': 'bi-graph-up-arrow',
@@ -1145,11 +1495,9 @@ def obtener_resumen_navbar(rol, username=None):
 
         elif rol == 'auditor':
             # Total evaluaciones mes
-            cursor.execute("""
-                SELECT COUNT(*) FROM evaluaciones
-                WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-            """)
-            mes = cursor.fetchone()[0]
+            mes, = _sumar_actividad(
+                cursor, [('evaluaciones', None, limites['mes_siguiente'])], desde=limites['mes']
+            )
             resumen['items'].append({
                 'icono': 'bi-file-earmark-text',
                 'valor': mes,
@@ -1161,11 +1509,10 @@ def obtener_resumen_navbar(rol, username=None):
             # Asesor
             if username:
                 # Mis evaluaciones hoy
-                cursor.execute("""
-                    SELECT COUNT(*) FROM evaluaciones
-                    WHERE asesor = ? AND DATE(fecha_creacion) = DATE('now', 'localtime')
-                """, (username,))
-                evals_hoy = cursor.fetchone()[0]
+                evals_hoy, = _sumar_actividad(
+                    cursor, [('evaluaciones', None, limites['manana'])],
+                    asesores=[username], desde=limites['hoy']
+                )
                 resumen['items'].append({
                     'icono': 'bi-clipboard-check',
                     'valor': evals_hoy,
@@ -1194,4 +1541,119 @@ def obtener_resumen_navbar(rol, username=None):
 
     except Exception as e:
         print(f"❌ Error en obtener_resumen_navbar: {e}")
-        return {'items': []}
+        return {'items': [], 'error': str(e)}
+
+
+# ============================================================================
+# CACHE DEL RESUMEN DEL NAVBAR
+# ============================================================================
+# El resumen se pide en cada render. Se guarda por usuario durante
+# TTL_RESUMEN_NAVBAR segundos y se descarta antes si cambia
+# version_datos['actividad'] (triggers sobre evaluaciones y
+# user_assignments: nuevas evaluaciones, decisiones de comité, casos vistos,
+# reasignaciones), venga el cambio de este worker o de otro.
+# El TTL cubre lo que depende solo del reloj (cambio de día o de mes).
+
+TTL_RESUMEN_NAVBAR = 30          # Segundos
+MAX_RESUMENES_NAVBAR = 5000      # Usuarios en cache antes de vaciarlo
+
+_resumenes_navbar = {}           # (rol, username) -> (version, expira, resumen)
+_resumenes_navbar_lock = threading.Lock()
+_stats_resumen_navbar = {"aciertos": 0, "fallos": 0, "invalidaciones": 0}
+
+
+def obtener_resumen_navbar_cacheado(rol, username=None):
+    """
+    Resumen del navbar desde el cache por usuario.
+
+    Un acierto cuesta una consulta por PK a version_datos; un fallo
+    ejecuta obtener_resumen_navbar().
+
+    Args:
+        rol (str): Rol del usuario
+        username (str): Username
+
+    Returns:
+        dict: Resumen compacto con lista 'items' (no modificar: es compartido)
+    """
+    clave = (rol, username)
+    version = obtener_version_datos("actividad")
+    ahora = time.monotonic()
+
+    entrada = _resumenes_navbar.get(clave)
+    if entrada is not None and version is not None and entrada[0] == version and entrada[1] > ahora:
+        with _resumenes_navbar_lock:
+            _stats_resumen_navbar["aciertos"] += 1
+        return entrada[2]
+
+    resumen = obtener_resumen_navbar(rol, username)
+    with _resumenes_navbar_lock:
+        _stats_resumen_navbar["fallos"] += 1
+        if version is not None and 'error' not in resumen:
+            if len(_resumenes_navbar) >= MAX_RESUMENES_NAVBAR:
+                _resumenes_navbar.clear()
+            _resumenes_navbar[clave] = (version, ahora + TTL_RESUMEN_NAVBAR, resumen)
+    return resumen
+
+
+def invalidar_resumen_navbar(username=None):
+    """
+    Descarta resúmenes cacheados en este proceso (los demás workers lo
+    detectan por version_datos o al vencer el TTL).
+
+    Args:
+        username (str, optional): Solo los de este usuario (None = todos)
+    """
+    with _resumenes_navbar_lock:
+        _stats_resumen_navbar["invalidaciones"] += 1
+        if username is None:
+            _resumenes_navbar.clear()
+            return
+        for clave in [c for c in _resumenes_navbar if c[1] == username]:
+            del _resumenes_navbar[clave]
+
+
+def obtener_estadisticas_resumen_navbar():
+    """Aciertos, fallos e invalidaciones del cache del navbar."""
+    with _resumenes_navbar_lock:
+        stats = dict(_stats_resumen_navbar)
+        stats["entradas"] = len(_resumenes_navbar)
+    total = stats["aciertos"] + stats["fallos"]
+    stats["tasa_aciertos"] = round(stats["aciertos"] / total, 3) if total else 0
+    stats["ttl_segundos"] = TTL_RESUMEN_NAVBAR
+    return stats
+
+
+class ResumenNavbarPerezoso(Mapping):
+    """
+    Resumen del navbar que se calcula recién cuando el template lo lee.
+
+    Los context processors corren en cada render_template (incluidas las
+    páginas de error); con este objeto las páginas que no muestran
+    navbar_stats no consultan la base.
+    """
+
+    __slots__ = ("_rol", "_username", "_resumen")
+
+    def __init__(self, rol, username=None):
+        self._rol = rol
+        self._username = username
+        self._resumen = None
+
+    def _cargar(self):
+        if self._resumen is None:
+            try:
+                self._resumen = obtener_resumen_navbar_cacheado(self._rol, self._username)
+            except Exception as e:
+                print(f"⚠️ Error obteniendo navbar stats: {e}")
+                self._resumen = {'items': []}
+        return self._resumen
+
+    def __getitem__(self, clave):
+        return self._cargar()[clave]
+
+    def __iter__(self):
+        return iter(self._cargar())
+
+    def __len__(self):
+        return len(self._cargar())
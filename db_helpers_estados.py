@@ -15,8 +15,10 @@ Version: 1.0
 """
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from database import conectar_db
+from db_writer import ejecutar_escritura
+from bus_eventos import publicar_estado_final
 
 
 # ============================================================================
@@ -44,13 +46,15 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
     Returns:
         dict: {'success': bool, 'message': str, 'data': dict}
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-    
-    try:
+    caso = {}  # Asesor del caso, para notificarlo tras el commit
+
+    def _marcar(conn):
+        # Lectura, validación y escritura en la misma transacción del escritor
+        cursor = conn.cursor()
+        
         # Verificar que la evaluación existe y está aprobada
         cursor.execute("""
-            SELECT estado_comite, estado_final, nombre_cliente, monto_solicitado
+            SELECT estado_comite, estado_final, nombre_cliente, monto_solicitado, asesor
             FROM evaluaciones 
             WHERE timestamp = ?
         """, (timestamp,))
@@ -64,6 +68,7 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
         estado_final_actual = row[1]
         nombre_cliente = row[2]
         monto = row[3]
+        caso['asesor'] = row[4]
         
         # Validar estado
         if estado_comite != 'approved':
@@ -90,8 +95,6 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
             WHERE timestamp = ?
         """, (fecha_actual, usuario_registrador, timestamp))
         
-        conn.commit()
-        
         # Registrar en auditoría
         cursor.execute("""
             INSERT INTO auditoria (usuario, accion, tabla_afectada, registro_id, datos_nuevos)
@@ -109,8 +112,6 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
             })
         ))
         
-        conn.commit()
-        
         return {
             'success': True, 
             'message': f'Crédito marcado como desembolsado para {nombre_cliente}',
@@ -122,11 +123,13 @@ def marcar_desembolsado(timestamp, usuario_registrador, comentario=None):
             }
         }
         
+    try:
+        resultado = ejecutar_escritura(_marcar)
     except Exception as e:
-        conn.rollback()
         return {'success': False, 'message': f'Error: {str(e)}'}
-    finally:
-        conn.close()
+    if resultado.get('success'):
+        publicar_estado_final(timestamp, caso.get('asesor'), 'desembolsado')
+    return resultado
 
 
 def marcar_desistido(timestamp, usuario_registrador, motivo=None):
@@ -141,13 +144,15 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
     Returns:
         dict: {'success': bool, 'message': str, 'data': dict}
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-    
-    try:
+    caso = {}  # Asesor del caso, para notificarlo tras el commit
+
+    def _marcar(conn):
+        # Lectura, validación y escritura en la misma transacción del escritor
+        cursor = conn.cursor()
+        
         # Verificar que la evaluación existe
         cursor.execute("""
-            SELECT estado_comite, estado_final, nombre_cliente, resultado
+            SELECT estado_comite, estado_final, nombre_cliente, aprobado, asesor
             FROM evaluaciones 
             WHERE timestamp = ?
         """, (timestamp,))
@@ -160,7 +165,8 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
         estado_comite = row[0]
         estado_final_actual = row[1]
         nombre_cliente = row[2]
-        resultado = json.loads(row[3]) if row[3] else {}
+        aprobado_scoring = row[3] == 1
+        caso['asesor'] = row[4]
         
         # Validar que no esté ya desembolsado
         if estado_final_actual == 'desembolsado':
@@ -177,7 +183,7 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
         puede_desistir = (
             estado_comite == 'approved' or 
             estado_comite == 'pending' or
-            (resultado.get('aprobado') == True and not estado_comite)
+            (aprobado_scoring and not estado_comite)
         )
         
         if not puede_desistir:
@@ -199,8 +205,6 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
             WHERE timestamp = ?
         """, (fecha_actual, motivo, usuario_registrador, timestamp))
         
-        conn.commit()
-        
         # Registrar en auditoría
         cursor.execute("""
             INSERT INTO auditoria (usuario, accion, tabla_afectada, registro_id, datos_nuevos)
@@ -217,8 +221,6 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
             })
         ))
         
-        conn.commit()
-        
         return {
             'success': True, 
             'message': f'Crédito marcado como desistido para {nombre_cliente}',
@@ -231,11 +233,13 @@ def marcar_desistido(timestamp, usuario_registrador, motivo=None):
             }
         }
         
+    try:
+        resultado = ejecutar_escritura(_marcar)
     except Exception as e:
-        conn.rollback()
         return {'success': False, 'message': f'Error: {str(e)}'}
-    finally:
-        conn.close()
+    if resultado.get('success'):
+        publicar_estado_final(timestamp, caso.get('asesor'), 'desistido')
+    return resultado
 
 
 def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
@@ -251,13 +255,15 @@ def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
     Returns:
         dict: {'success': bool, 'message': str}
     """
-    conn = conectar_db()
-    cursor = conn.cursor()
-    
-    try:
+    caso = {}  # Asesor del caso, para notificarlo tras el commit
+
+    def _revertir(conn):
+        # Lectura, validación y escritura en la misma transacción del escritor
+        cursor = conn.cursor()
+        
         # Verificar que la evaluación existe
         cursor.execute("""
-            SELECT estado_final, nombre_cliente
+            SELECT estado_final, nombre_cliente, asesor
             FROM evaluaciones 
             WHERE timestamp = ?
         """, (timestamp,))
@@ -269,6 +275,7 @@ def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
         
         estado_final_actual = row[0]
         nombre_cliente = row[1]
+        caso['asesor'] = row[2]
         
         if not estado_final_actual:
             return {'success': False, 'message': 'Este caso no tiene estado final que revertir'}
@@ -288,8 +295,6 @@ def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
             WHERE timestamp = ?
         """, (timestamp,))
         
-        conn.commit()
-        
         # Registrar en auditoría
         cursor.execute("""
             INSERT INTO auditoria (usuario, accion, tabla_afectada, registro_id, datos_anteriores, datos_nuevos)
@@ -303,18 +308,18 @@ def revertir_estado_final(timestamp, usuario_registrador, motivo=None):
             json.dumps({'motivo_reversion': motivo})
         ))
         
-        conn.commit()
-        
         return {
             'success': True, 
             'message': f'Estado revertido para {nombre_cliente}. Estado anterior: {estado_anterior}'
         }
         
+    try:
+        resultado = ejecutar_escritura(_revertir)
     except Exception as e:
-        conn.rollback()
         return {'success': False, 'message': f'Error: {str(e)}'}
-    finally:
-        conn.close()
+    if resultado.get('success'):
+        publicar_estado_final(timestamp, caso.get('asesor'), None)
+    return resultado
 
 
 # ============================================================================
@@ -367,8 +372,16 @@ def obtener_casos_por_estado_final(estado_final, filtros=None):
             params.append(filtros['fecha_desde'])
         
         if 'fecha_hasta' in filtros:
-            query += " AND timestamp <= ?"
-            params.append(filtros['fecha_hasta'])
+            fecha_hasta = filtros['fecha_hasta']
+            if len(fecha_hasta) == 10:
+                # Solo fecha: rango semiabierto hasta el inicio del día siguiente
+                # (timestamp <= 'YYYY-MM-DD' excluía el propio día)
+                dia_siguiente = datetime.strptime(fecha_hasta, '%Y-%m-%d') + timedelta(days=1)
+                query += " AND timestamp < ?"
+                params.append(dia_siguiente.strftime('%Y-%m-%d'))
+            else:
+                query += " AND timestamp <= ?"
+                params.append(fecha_hasta)
     
     query += " ORDER BY timestamp DESC"
     
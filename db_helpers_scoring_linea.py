@@ -17,7 +17,7 @@ from pathlib import Path
 
 # Importar conexión desde database.py
 try:
-    from database import conectar_db, DB_PATH
+    from database import conectar_db, obtener_version_datos, DB_PATH
 except ImportError:
     DB_PATH = Path(__file__).parent / 'loansi.db'
     
@@ -27,11 +27,17 @@ except ImportError:
         conn.execute("PRAGMA foreign_keys = ON")
         return conn
 
+    def obtener_version_datos(nombre):
+        return None
+
 
 # ============================================================================
 # CACHE PARA OPTIMIZACIÓN
 # ============================================================================
 
+# Cada entrada guarda la versión de version_datos['scoring'] con la que se
+# leyó: si otro proceso modifica el scoring la entrada se descarta aunque
+# no haya vencido el TTL.
 _SCORING_LINEA_CACHE = {}
 _CACHE_TTL = 300  # 5 minutos
 
@@ -226,11 +232,12 @@ def obtener_config_scoring_linea(linea_id):
     import time
     cache_key = f"config_{linea_id}"
     now = time.time()
+    version = obtener_version_datos("scoring")
     
     # Verificar cache
     if cache_key in _SCORING_LINEA_CACHE:
-        cached_data, timestamp = _SCORING_LINEA_CACHE[cache_key]
-        if now - timestamp < _CACHE_TTL:
+        cached_data, timestamp, cached_version = _SCORING_LINEA_CACHE[cache_key]
+        if now - timestamp < _CACHE_TTL and cached_version == version:
             return cached_data
     
     conn = conectar_db()
@@ -372,7 +379,7 @@ def obtener_config_scoring_linea(linea_id):
             })
         
         # Guardar en cache
-        _SCORING_LINEA_CACHE[cache_key] = (config, now)
+        _SCORING_LINEA_CACHE[cache_key] = (config, now, version)
         
         return config
         
@@ -0,0 +1,330 @@
+"""
+DB_JERARQUIA.PY - Jerarquía organizacional (user_assignments)
+=============================================================
+
+Las asignaciones manager -> miembro forman un grafo (gerente -> supervisor
+-> asesor). Para no recorrerlo en cada consulta se mantienen dos cosas:
+
+1. Tabla user_assignments_closure (clausura transitiva): una fila
+   (ancestor, descendant, depth) por cada par conectado por asignaciones
+   activas, con depth = camino más corto. Se actualiza en la misma
+   transacción que add_assignment / remove_assignment:
+   - Alta de arista: una sola sentencia combina los ancestros del manager
+     con los descendientes del miembro (incremental)
+   - Baja de arista: se recalculan solo los ancestros del manager (y el
+     manager), que son los únicos cuyos caminos podían pasar por ella
+2. IndiceJerarquia: snapshot en memoria de la clausura, los reportes
+   directos y los datos de cada usuario, versionado con
+   version_datos['jerarquia'] (triggers sobre user_assignments y usuarios).
+   Responde "usuarios visibles", "reportes directos" y "árbol con nombres"
+   en tiempo proporcional al resultado, sin consultas.
+
+Los ciclos (asignaciones mal hechas) no rompen nada: la clausura guarda
+un solo camino por par y nunca el par (X, X), y el árbol corta la rama al
+repetirse un usuario.
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import json
+import sqlite3
+import threading
+
+from database import conectar_db, obtener_memo_request, obtener_version_datos
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+MAX_PROFUNDIDAD = 5  # Niveles visibles por defecto (evita cadenas mal asignadas)
+
+_INDICE = None
+_INDICE_LOCK = threading.Lock()
+
+
+# ============================================================================
+# MANTENIMIENTO DE LA CLAUSURA (dentro de la transacción del llamador)
+# ============================================================================
+
+def _grafo_activo(conn):
+    """Mapa manager -> [miembros] de las asignaciones activas."""
+    grafo = {}
+    for manager, miembro in conn.execute(
+        "SELECT manager_username, member_username FROM user_assignments WHERE activo = 1"
+    ):
+        grafo.setdefault(manager, []).append(miembro)
+    return grafo
+
+
+def _calcular_clausura(grafo, origenes):
+    """BFS desde cada origen: filas (ancestor, descendant, depth)."""
+    filas = []
+    for origen in origenes:
+        visitados = {origen}
+        frontera = [origen]
+        profundidad = 0
+        while frontera:
+            profundidad += 1
+            siguiente = []
+            for nodo in frontera:
+                for miembro in grafo.get(nodo, ()):
+                    if miembro not in visitados:
+                        visitados.add(miembro)
+                        filas.append((origen, miembro, profundidad))
+                        siguiente.append(miembro)
+            frontera = siguiente
+    return filas
+
+
+def agregar_arista_clausura(conn, manager_username, member_username):
+    """
+    Extiende la clausura con la arista manager -> miembro (ya activa).
+
+    Cada ancestro A del manager (y el manager) queda conectado con cada
+    descendiente D del miembro (y el miembro) a profundidad
+    depth(A, manager) + 1 + depth(miembro, D), conservando la menor.
+    """
+    conn.execute(
+        """
+        INSERT INTO user_assignments_closure (ancestor, descendant, depth)
+        SELECT a.ancestor, d.descendant, a.depth + 1 + d.depth
+        FROM (
+            SELECT ? AS ancestor, 0 AS depth
+            UNION ALL
+            SELECT ancestor, depth FROM user_assignments_closure WHERE descendant = ?
+        ) a, (
+            SELECT ? AS descendant, 0 AS depth
+            UNION ALL
+            SELECT descendant, depth FROM user_assignments_closure WHERE ancestor = ?
+        ) d
+        WHERE a.ancestor <> d.descendant
+        ON CONFLICT (ancestor, descendant) DO UPDATE SET depth = MIN(depth, excluded.depth)
+    """,
+        (manager_username, manager_username, member_username, member_username),
+    )
+
+
+def quitar_arista_clausura(conn, manager_username):
+    """
+    Recalcula la clausura tras desactivar una arista que sale de
+    manager_username. Solo cambian las filas del manager y de sus
+    ancestros; se recalculan con el grafo ya sin la arista.
+    """
+    ancestros = [manager_username] + [
+        row[0] for row in conn.execute(
+            "SELECT ancestor FROM user_assignments_closure WHERE descendant = ?",
+            (manager_username,),
+        )
+    ]
+    conn.execute(
+        "DELETE FROM user_assignments_closure WHERE ancestor IN (SELECT value FROM json_each(?))",
+        (json.dumps(ancestros),),
+    )
+    conn.executemany(
+        "INSERT INTO user_assignments_closure (ancestor, descendant, depth) VALUES (?, ?, ?)",
+        _calcular_clausura(_grafo_activo(conn), ancestros),
+    )
+
+
+def _reconstruir_clausura(conn):
+    """Recalcula user_assignments_closure desde cero (operación del escritor)."""
+    grafo = _grafo_activo(conn)
+    conn.execute("DELETE FROM user_assignments_closure")
+    conn.executemany(
+        "INSERT INTO user_assignments_closure (ancestor, descendant, depth) VALUES (?, ?, ?)",
+        _calcular_clausura(grafo, grafo),
+    )
+    return conn.execute("SELECT COUNT(*) FROM user_assignments_closure").fetchone()[0]
+
+
+def reconstruir_clausura(timeout=60.0):
+    """
+    Recalcula la clausura completa en una transacción del escritor. Para
+    reparar la tabla si se escribió user_assignments sin pasar por
+    add_assignment / remove_assignment.
+
+    Returns:
+        int: Pares (ancestro, descendiente) resultantes
+    """
+    from db_writer import ejecutar_escritura
+
+    return ejecutar_escritura(_reconstruir_clausura, timeout=timeout)
+
+
+# ============================================================================
+# ÍNDICE EN MEMORIA
+# ============================================================================
+
+class IndiceJerarquia:
+    """
+    Snapshot inmutable de la jerarquía. Las listas que retorna son copias;
+    el orden es el de las consultas que reemplaza.
+    """
+
+    def __init__(self, version, usuarios, aristas, clausura):
+        """
+        Args:
+            version (int | None): version_datos['jerarquia'] de la carga
+            usuarios (dict): username -> (nombre_completo, rol, activo)
+            aristas (list): (manager, miembro, fecha_creacion) activas
+            clausura (list): (ancestor, descendant, depth)
+        """
+        self.version = version
+        self._usuarios = usuarios
+        self._fechas = {(manager, miembro): fecha for manager, miembro, fecha in aristas}
+
+        # Reportes directos ordenados por nombre (como ORDER BY nombre_completo)
+        directos = {}
+        for manager, miembro, _fecha in aristas:
+            directos.setdefault(manager, []).append(miembro)
+        self._directos = {
+            manager: tuple(sorted(miembros, key=self._clave_nombre))
+            for manager, miembros in directos.items()
+        }
+
+        # Descendientes ordenados por username, con y sin límite de profundidad
+        descendientes = {}
+        for ancestro, descendiente, profundidad in clausura:
+            descendientes.setdefault(ancestro, []).append((descendiente, profundidad))
+        self._descendientes = {}
+        self._visibles = {}
+        for ancestro, filas in descendientes.items():
+            filas.sort()
+            self._descendientes[ancestro] = tuple(filas)
+            self._visibles[ancestro] = tuple(
+                username for username, profundidad in filas if profundidad <= MAX_PROFUNDIDAD
+            )
+
+    def _clave_nombre(self, username):
+        return (self._usuarios.get(username, (None,))[0] or '', username)
+
+    def info_usuario(self, username):
+        """Datos de usuarios (None si el username no existe en la tabla)."""
+        nombre, rol, activo = self._usuarios.get(username, (None, None, None))
+        return {'username': username, 'nombre_completo': nombre, 'rol': rol, 'activo': activo}
+
+    def reportes_directos(self, username):
+        """Miembros asignados directamente, ordenados por nombre."""
+        return list(self._directos.get(username, ()))
+
+    def reportes_nivel(self, username, nivel=2):
+        """
+        Miembros a exactamente `nivel` asignaciones de distancia siguiendo
+        reportes directos (p. ej. asesores de los supervisores de un
+        gerente), sin repetir y en orden de aparición.
+        """
+        actuales = [username]
+        for _ in range(nivel):
+            actuales = [m for u in actuales for m in self._directos.get(u, ())]
+        return list(dict.fromkeys(actuales))
+
+    def fecha_asignacion(self, manager_username, member_username):
+        """fecha_creacion de la asignación activa (o None)."""
+        return self._fechas.get((manager_username, member_username))
+
+    def usuarios_visibles(self, username, max_depth=MAX_PROFUNDIDAD):
+        """Subordinados directos e indirectos hasta max_depth, ordenados por username."""
+        if max_depth == MAX_PROFUNDIDAD:
+            return list(self._visibles.get(username, ()))
+        return [
+            descendiente for descendiente, profundidad in self._descendientes.get(username, ())
+            if profundidad <= max_depth
+        ]
+
+    def arbol(self, username, max_depth=MAX_PROFUNDIDAD):
+        """
+        Árbol de subordinados con nombres:
+        {username, nombre_completo, rol, activo, subordinados: [...]}.
+        Un usuario que ya está en la rama actual no se vuelve a expandir.
+        """
+        def nodo(actual, camino, profundidad):
+            datos = self.info_usuario(actual)
+            datos['subordinados'] = [] if profundidad >= max_depth else [
+                nodo(miembro, camino | {miembro}, profundidad + 1)
+                for miembro in self._directos.get(actual, ())
+                if miembro not in camino
+            ]
+            return datos
+
+        return nodo(username, {username}, 0)
+
+    def estadisticas(self):
+        return {
+            'version': self.version,
+            'usuarios': len(self._usuarios),
+            'asignaciones': len(self._fechas),
+            'pares_clausura': sum(len(filas) for filas in self._descendientes.values()),
+        }
+
+
+def _cargar_indice(version):
+    """Lee usuarios, asignaciones activas y la clausura (3 consultas)."""
+    conn = conectar_db()
+    try:
+        usuarios = {
+            row[0]: (row[1], row[2], row[3])
+            for row in conn.execute("SELECT username, nombre_completo, rol, activo FROM usuarios")
+        }
+        aristas = conn.execute(
+            "SELECT manager_username, member_username, fecha_creacion "
+            "FROM user_assignments WHERE activo = 1"
+        ).fetchall()
+        try:
+            clausura = conn.execute(
+                "SELECT ancestor, descendant, depth FROM user_assignments_closure"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Base sin migrar: se calcula en memoria
+            grafo = {}
+            for manager, miembro, _fecha in aristas:
+                grafo.setdefault(manager, []).append(miembro)
+            clausura = _calcular_clausura(grafo, grafo)
+    finally:
+        conn.close()
+    return IndiceJerarquia(version, usuarios, aristas, clausura)
+
+
+def obtener_indice_jerarquia():
+    """
+    Retorna el índice de jerarquía vigente.
+
+    Dentro de un request se resuelve una sola vez (memo del request); fuera
+    de él cuesta una consulta por PK a version_datos. Solo si la versión
+    cambió se vuelve a cargar.
+
+    Returns:
+        IndiceJerarquia
+    """
+    global _INDICE
+
+    memo = obtener_memo_request("jerarquia")
+    if memo is not None and "indice" in memo:
+        return memo["indice"]
+
+    version = obtener_version_datos("jerarquia")
+    indice = _INDICE
+
+    if indice is None or version is None or indice.version != version:
+        with _INDICE_LOCK:
+            indice = _INDICE
+            if indice is None or version is None or indice.version != version:
+                indice = _cargar_indice(version)
+                if version is not None:
+                    _INDICE = indice
+
+    if memo is not None:
+        memo["indice"] = indice
+    return indice
+
+
+def invalidar_indice_jerarquia():
+    """Descarta el índice del proceso y el memo del request actual."""
+    global _INDICE
+    with _INDICE_LOCK:
+        _INDICE = None
+    memo = obtener_memo_request("jerarquia")
+    if memo:
+        memo.clear()
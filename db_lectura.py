@@ -0,0 +1,276 @@
+"""
+DB_LECTURA.PY - Lotes de consultas de solo lectura en paralelo
+===============================================================
+
+Los dashboards por rol ejecutan varias consultas agregadas independientes
+(totales, distribución por rol, casos pendientes, top de asesores...). En
+una sola conexión corren una detrás de otra; aquí se declaran como un lote
+y se reparten en un pool de hilos, cada uno con su propia conexión de solo
+lectura (URI mode=ro, WAL: los lectores no bloquean al escritor ni entre sí):
+
+1. Cada consulta del lote es una Consulta(sql, params, modo, defecto)
+2. ejecutar_lote() las envía al pool y espera hasta el plazo del lote
+3. Si el plazo vence, las que siguen en cola se cancelan y las que están
+   corriendo se interrumpen (sqlite3 interrupt); su valor es el `defecto`
+   y el resultado queda marcado como parcial
+4. Cualquier otro error de una consulta se propaga al llamador
+
+Cada consulta ve su propio snapshot: dos consultas del mismo lote pueden
+diferir en escrituras confirmadas entre una y otra (igual que dos requests
+seguidos). Para lecturas que deban ser consistentes entre sí, usar una
+sola sentencia.
+
+Uso:
+    from db_lectura import Consulta, ejecutar_lote
+
+    resultado = ejecutar_lote({
+        'usuarios': Consulta("SELECT COUNT(*) FROM usuarios", modo='valor', defecto=0),
+        'por_rol': Consulta("SELECT rol, COUNT(*) FROM usuarios GROUP BY rol", defecto=[]),
+    })
+    resultado['usuarios'], resultado.parcial, resultado.incompletas
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+import database
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+MAX_HILOS_LECTURA = 4       # Consultas simultáneas por proceso (0 = sin pool, en línea)
+PLAZO_DASHBOARD = 2.0       # Segundos por lote antes de entregar resultados parciales
+
+# PRAGMAs de database.PRAGMAS_CONEXION que no aplican a una conexión mode=ro
+_PRAGMAS_SOLO_ESCRITURA = {"journal_mode", "synchronous", "foreign_keys", "recursive_triggers"}
+
+_MODOS = ("valor", "fila", "filas")
+
+
+class Consulta:
+    """
+    Consulta de solo lectura dentro de un lote.
+
+    Args:
+        sql (str): Sentencia SELECT / WITH
+        params (tuple | list): Parámetros de la sentencia
+        modo (str): 'valor' (primera columna de la primera fila),
+                    'fila' (primera fila) o 'filas' (todas)
+        defecto: Valor si la consulta no termina dentro del plazo
+    """
+
+    __slots__ = ("sql", "params", "modo", "defecto")
+
+    def __init__(self, sql, params=(), modo="filas", defecto=None):
+        if modo not in _MODOS:
+            raise ValueError(f"modo inválido: {modo}")
+        self.sql = sql
+        self.params = params
+        self.modo = modo
+        self.defecto = defecto
+
+    def leer(self, cursor):
+        """Convierte el cursor ejecutado según el modo (consume todas las filas)."""
+        filas = cursor.fetchall()
+        if self.modo == "filas":
+            return filas
+        if not filas:
+            return self.defecto
+        return filas[0][0] if self.modo == "valor" else filas[0]
+
+
+class ResultadoLote(dict):
+    """
+    Valores por nombre de consulta, más:
+    - parcial (bool): alguna consulta no terminó dentro del plazo
+    - incompletas (list): nombres de esas consultas (tienen su `defecto`)
+    - duracion_ms (float): tiempo de pared del lote
+    """
+
+    def __init__(self, valores, incompletas, duracion_ms):
+        super().__init__(valores)
+        self.incompletas = incompletas
+        self.parcial = bool(incompletas)
+        self.duracion_ms = duracion_ms
+
+
+# ============================================================================
+# CONEXIONES DE SOLO LECTURA (una por hilo del pool)
+# ============================================================================
+
+_local = threading.local()
+_lock = threading.Lock()
+_conexiones = set()      # Todas las conexiones abiertas (para cerrarlas)
+_en_curso = {}           # Clave de la consulta en curso -> conexión (para interrumpir)
+_ejecutor = None
+_stats = {
+    "lotes": 0,
+    "consultas": 0,
+    "lotes_parciales": 0,
+    "consultas_interrumpidas": 0,
+    "aperturas": 0,
+}
+
+
+def _abrir_conexion_lectura(ruta):
+    """Abre una conexión mode=ro sobre `ruta` con los PRAGMAs de lectura."""
+    conn = sqlite3.connect(
+        f"{ruta.as_uri()}?mode=ro",
+        uri=True,
+        check_same_thread=False,  # close()/interrupt() desde otros hilos
+        timeout=5.0,
+    )
+    for pragma, valor in database.PRAGMAS_CONEXION:
+        if pragma not in _PRAGMAS_SOLO_ESCRITURA:
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+    with _lock:
+        _conexiones.add(conn)
+        _stats["aperturas"] += 1
+    return conn
+
+
+def _conexion_lectura():
+    """Conexión del hilo actual; se reabre si cambió database.DB_PATH."""
+    ruta = Path(database.DB_PATH).resolve()
+    actual = getattr(_local, "conexion", None)
+    if actual is not None and actual[0] == ruta:
+        return actual[1]
+    if actual is not None:
+        _cerrar(actual[1])
+    conn = _abrir_conexion_lectura(ruta)
+    _local.conexion = (ruta, conn)
+    return conn
+
+
+def _cerrar(conn):
+    with _lock:
+        _conexiones.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _ejecutar_consulta(clave, consulta):
+    """Corre en un hilo del pool; registra la conexión mientras ejecuta."""
+    conn = _conexion_lectura()
+    with _lock:
+        _en_curso[clave] = conn
+    try:
+        return consulta.leer(conn.execute(consulta.sql, consulta.params))
+    finally:
+        with _lock:
+            _en_curso.pop(clave, None)
+
+
+def _obtener_ejecutor():
+    global _ejecutor
+    if _ejecutor is None:
+        with _lock:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(
+                    max_workers=MAX_HILOS_LECTURA, thread_name_prefix="loansi-db-lectura"
+                )
+                atexit.register(cerrar_lectores)
+    return _ejecutor
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+def _ejecutar_en_linea(consultas):
+    """Sin pool: todas las consultas en la conexión administrada del llamador."""
+    conn = database.conectar_db()
+    try:
+        return {nombre: c.leer(conn.execute(c.sql, c.params)) for nombre, c in consultas.items()}
+    finally:
+        conn.close()
+
+
+def ejecutar_lote(consultas, plazo=None):
+    """
+    Ejecuta consultas independientes en paralelo con un plazo común.
+
+    Args:
+        consultas (dict): nombre -> Consulta
+        plazo (float, optional): Segundos para todo el lote (por defecto
+                                 PLAZO_DASHBOARD); al vencer se entregan
+                                 los `defecto` de las consultas pendientes
+
+    Returns:
+        ResultadoLote: dict nombre -> valor, con .parcial e .incompletas
+    """
+    inicio = time.perf_counter()
+    plazo = PLAZO_DASHBOARD if plazo is None else plazo
+    if MAX_HILOS_LECTURA <= 0 or len(consultas) < 2:
+        valores = _ejecutar_en_linea(consultas)
+        with _lock:
+            _stats["lotes"] += 1
+            _stats["consultas"] += len(consultas)
+        return ResultadoLote(valores, [], (time.perf_counter() - inicio) * 1000)
+
+    ejecutor = _obtener_ejecutor()
+    futuros = {}
+    for nombre, consulta in consultas.items():
+        clave = object()
+        futuros[nombre] = (clave, ejecutor.submit(_ejecutar_consulta, clave, consulta))
+
+    wait([futuro for _clave, futuro in futuros.values()], timeout=plazo)
+
+    valores, incompletas = {}, []
+    for nombre, (clave, futuro) in futuros.items():
+        if futuro.done():
+            valores[nombre] = futuro.result()  # Propaga errores que no son de plazo
+            continue
+        # Plazo vencido: cancelar si no empezó, interrumpir si está corriendo
+        if not futuro.cancel():
+            with _lock:
+                conn = _en_curso.get(clave)
+                if conn is not None:
+                    conn.interrupt()
+        valores[nombre] = consultas[nombre].defecto
+        incompletas.append(nombre)
+
+    with _lock:
+        _stats["lotes"] += 1
+        _stats["consultas"] += len(consultas)
+        _stats["lotes_parciales"] += int(bool(incompletas))
+        _stats["consultas_interrumpidas"] += len(incompletas)
+    if incompletas:
+        print(f"⚠️ Lote de lectura parcial tras {plazo} s: {', '.join(incompletas)}")
+    return ResultadoLote(valores, incompletas, (time.perf_counter() - inicio) * 1000)
+
+
+def cerrar_lectores():
+    """Detiene el pool y cierra las conexiones de solo lectura."""
+    global _ejecutor
+    with _lock:
+        ejecutor, _ejecutor = _ejecutor, None
+    if ejecutor is not None:
+        ejecutor.shutdown(wait=True, cancel_futures=True)
+    with _lock:
+        conexiones = list(_conexiones)
+    for conn in conexiones:
+        _cerrar(conn)
+    return len(conexiones)
+
+
+def obtener_estadisticas_lectura():
+    """Contadores de lotes, consultas, plazos vencidos y conexiones abiertas."""
+    with _lock:
+        stats = dict(_stats)
+        stats["conexiones_abiertas"] = len(_conexiones)
+    stats["max_hilos"] = MAX_HILOS_LECTURA
+    stats["activo"] = _ejecutor is not None
+    return stats
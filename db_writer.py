@@ -0,0 +1,363 @@
+"""
+DB_WRITER.PY - Escritor único para mutaciones SQLite
+=====================================================
+
+SQLite admite un solo escritor a la vez. Con app.run(threaded=True) varios
+asesores guardando al mismo tiempo abrían transacciones de escritura
+concurrentes y producían "database is locked" y picos de latencia.
+
+Este módulo canaliza todas las mutaciones por un único hilo con su propia
+conexión:
+1. Las operaciones se encolan y el llamador recibe un Future
+2. El hilo escritor agrupa las operaciones pendientes en un lote y hace
+   un solo COMMIT por lote (group commit)
+3. Cada operación corre dentro de un SAVEPOINT: si falla, solo se revierte
+   esa operación y el resto del lote se confirma
+4. Los errores transitorios de bloqueo se reintentan con backoff
+   exponencial acotado, solo en el paso que los produjo (BEGIN, la
+   operación o el COMMIT); una operación que ya terminó no se repite
+
+Uso:
+    from db_writer import ejecutar_escritura, enviar_escritura
+
+    def _op(conn):
+        conn.execute("UPDATE ...", params)
+
+    ejecutar_escritura(_op)            # Espera el commit
+    futuro = enviar_escritura(_op)     # No bloquea
+
+Author: Sistema Loansi
+Date: 2026-10-17
+Version: 1.0
+"""
+
+import atexit
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import database
+
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+MAX_OPERACIONES_LOTE = 64      # Operaciones máximas por COMMIT
+MAX_REINTENTOS = 6             # Reintentos por lote ante bloqueo
+BACKOFF_BASE = 0.01            # Segundos del primer reintento
+BACKOFF_MAX = 0.5              # Tope de espera entre reintentos
+BUSY_TIMEOUT_ESCRITOR_MS = 250  # Espera interna de SQLite antes de reintentar
+TIMEOUT_ESPERA_DEFECTO = 30.0  # Segundos que espera ejecutar_escritura()
+
+_FIN = object()  # Centinela para detener el hilo
+
+
+def es_error_bloqueo(error):
+    """Indica si una excepción es un bloqueo transitorio de SQLite."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+
+# ============================================================================
+# ESCRITOR
+# ============================================================================
+
+class EscritorDB:
+    """
+    Hilo dedicado que ejecuta todas las escrituras con una sola conexión.
+
+    Las operaciones son callables ``operacion(conn, *args, **kwargs)`` que
+    no deben hacer commit ni rollback: el escritor controla la transacción.
+    El valor retornado por la operación se entrega en el Future.
+    """
+
+    def __init__(self, db_path=None, max_lote=MAX_OPERACIONES_LOTE,
+                 max_reintentos=MAX_REINTENTOS, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX):
+        self.db_path = db_path
+        self.max_lote = max_lote
+        self.max_reintentos = max_reintentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "operaciones": 0,
+            "lotes": 0,
+            "max_lote": 0,
+            "reintentos": 0,
+            "errores_bloqueo": 0,
+            "errores_operacion": 0,
+            "errores_lote": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Inicia el hilo escritor si no está corriendo."""
+        with self._lock:
+            if self.activo:
+                return self
+            self._hilo = threading.Thread(
+                target=self._bucle, name="loansi-db-writer", daemon=True
+            )
+            self._hilo.start()
+        return self
+
+    def detener(self, timeout=10.0):
+        """Procesa lo pendiente y detiene el hilo escritor."""
+        with self._lock:
+            hilo = self._hilo
+            if hilo is None:
+                return
+            self._cola.put(_FIN)
+        hilo.join(timeout)
+        with self._lock:
+            if self._hilo is hilo:
+                self._hilo = None
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def enviar(self, operacion, *args, **kwargs):
+        """
+        Encola una operación de escritura.
+
+        Returns:
+            Future: Se resuelve con el retorno de la operación tras el COMMIT
+        """
+        futuro = Future()
+
+        # Reentrada desde el propio hilo escritor: ejecutar en línea para
+        # no bloquearse esperando su propia cola.
+        if threading.current_thread() is self._hilo:
+            try:
+                futuro.set_result(operacion(self._conn, *args, **kwargs))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+
+        if not self.activo:
+            self.iniciar()
+        self._cola.put((futuro, operacion, args, kwargs))
+        return futuro
+
+    def ejecutar(self, operacion, *args, timeout=TIMEOUT_ESPERA_DEFECTO, **kwargs):
+        """Encola la operación y espera su resultado (o su excepción)."""
+        return self.enviar(operacion, *args, **kwargs).result(timeout)
+
+    def estadisticas(self):
+        """Contadores de operaciones, lotes y reintentos."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pendientes"] = self._cola.qsize()
+        stats["promedio_lote"] = (
+            round(stats["operaciones"] / stats["lotes"], 2) if stats["lotes"] else 0
+        )
+        stats["activo"] = self.activo
+        return stats
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+
+    def _abrir_conexion(self):
+        conn = sqlite3.connect(
+            self.db_path or database.DB_PATH,
+            isolation_level=None,  # Transacciones controladas manualmente
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        database.aplicar_pragmas(conn)
+        # Espera corta: los bloqueos se manejan con backoff propio
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_ESCRITOR_MS}")
+        return conn
+
+    def _bucle(self):
+        self._conn = self._abrir_conexion()
+        print("✅ Escritor de base de datos iniciado")
+        detener = False
+
+        try:
+            while not detener:
+                item = self._cola.get()
+                if item is _FIN:
+                    break
+
+                lote = [item]
+                while len(lote) < self.max_lote:
+                    try:
+                        siguiente = self._cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if siguiente is _FIN:
+                        detener = True
+                        break
+                    lote.append(siguiente)
+
+                self._procesar_lote(lote)
+        finally:
+            self._conn.close()
+            self._conn = None
+            print("🛑 Escritor de base de datos detenido")
+
+    def _procesar_lote(self, lote):
+        # Descartar futuros cancelados antes de empezar
+        lote = [item for item in lote if item[0].set_running_or_notify_cancel()]
+        if not lote:
+            return
+
+        try:
+            resultados = self._ejecutar_transaccion(lote)
+        except Exception as e:
+            # Cualquier error de BEGIN/COMMIT (bloqueo persistente,
+            # DatabaseError, IntegrityError de una FK diferida...) falla
+            # solo este lote; el hilo sigue atendiendo la cola
+            with self._lock:
+                self._stats["errores_bloqueo"] += int(es_error_bloqueo(e))
+                self._stats["errores_lote"] += 1
+            print(f"❌ Lote de escritura descartado ({len(lote)} ops): {e}")
+            for futuro, *_ in lote:
+                futuro.set_exception(e)
+            return
+
+        with self._lock:
+            self._stats["lotes"] += 1
+            self._stats["operaciones"] += len(lote)
+            self._stats["max_lote"] = max(self._stats["max_lote"], len(lote))
+
+        # Resolver futuros solo después del COMMIT
+        for (futuro, *_), (ok, valor) in zip(lote, resultados):
+            if ok:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
+
+    def _con_reintentos(self, paso):
+        """
+        Ejecuta `paso()` reintentando con backoff solo si falla por bloqueo.
+
+        Returns:
+            El retorno de `paso`; el último error de bloqueo (o cualquier
+            otro error) se propaga
+        """
+        intento = 0
+        while True:
+            try:
+                return paso()
+            except sqlite3.OperationalError as e:
+                if not es_error_bloqueo(e) or intento >= self.max_reintentos:
+                    raise
+            espera = min(self.backoff_max, self.backoff_base * (2 ** intento))
+            time.sleep(espera * random.uniform(0.5, 1.0))
+            intento += 1
+            with self._lock:
+                self._stats["reintentos"] += 1
+
+    def _ejecutar_operacion(self, conn, operacion, args, kwargs):
+        """Una operación en su SAVEPOINT; si falla se revierte solo ella."""
+        conn.execute("SAVEPOINT op")
+        try:
+            valor = operacion(conn, *args, **kwargs)
+        except BaseException:
+            conn.execute("ROLLBACK TO op")
+            conn.execute("RELEASE op")
+            raise
+        conn.execute("RELEASE op")
+        return valor
+
+    def _ejecutar_transaccion(self, lote):
+        """
+        Ejecuta el lote en una transacción con un solo COMMIT.
+
+        Los bloqueos se reintentan solo en el paso que los produjo: BEGIN
+        IMMEDIATE (aún no corrió ninguna operación), la operación que lo
+        recibió (revertida a su SAVEPOINT) o el COMMIT (la transacción
+        sigue abierta tras un COMMIT ocupado). Una operación que terminó
+        bien nunca se vuelve a ejecutar; solo se repite la que falló por
+        bloqueo, así que sus efectos fuera de SQL deben tolerar repetirse
+        en ese caso. Los demás errores de una operación revierten solo su
+        SAVEPOINT.
+        """
+        conn = self._conn
+        resultados = []
+        self._con_reintentos(lambda: conn.execute("BEGIN IMMEDIATE"))
+        try:
+            for futuro, operacion, args, kwargs in lote:
+                try:
+                    valor = self._con_reintentos(
+                        lambda: self._ejecutar_operacion(conn, operacion, args, kwargs)
+                    )
+                    resultados.append((True, valor))
+                except Exception as e:
+                    resultados.append((False, e))
+                    with self._lock:
+                        self._stats["errores_bloqueo"] += int(es_error_bloqueo(e))
+                        self._stats["errores_operacion"] += 1
+            self._con_reintentos(lambda: conn.execute("COMMIT"))
+        except BaseException:
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            raise
+        return resultados
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def obtener_escritor():
+    """Retorna el escritor global del proceso (lo crea e inicia si hace falta)."""
+    global _escritor
+    if _escritor is None:
+        with _escritor_lock:
+            if _escritor is None:
+                _escritor = EscritorDB().iniciar()
+                atexit.register(detener_escritor)
+    return _escritor
+
+
+def enviar_escritura(operacion, *args, **kwargs):
+    """Encola una escritura en el escritor global. Retorna un Future."""
+    return obtener_escritor().enviar(operacion, *args, **kwargs)
+
+
+def ejecutar_escritura(operacion, *args, timeout=TIMEOUT_ESPERA_DEFECTO, **kwargs):
+    """Encola una escritura y espera a que quede confirmada."""
+    return obtener_escritor().ejecutar(operacion, *args, timeout=timeout, **kwargs)
+
+
+def detener_escritor(timeout=10.0):
+    """Drena la cola y detiene el escritor global."""
+    if _escritor is not None:
+        _escritor.detener(timeout)
+
+
+def obtener_estadisticas_escritor():
+    """Estadísticas del escritor global (vacías si no se ha usado)."""
+    if _escritor is None:
+        return {"activo": False}
+    return _escritor.estadisticas()
@@ -51,11 +51,28 @@ PERMISOS_PROTEGIDOS_ADMIN = {
 # ============================================================================
 
 def _conectar_db():
-    """Conecta a la base de datos SQLite"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
+    """Obtiene la conexión administrada (compartida por request) de database.py"""
+    from database import conectar_db
+    return conectar_db()
+
+
+def _ejecutar_escritura(operacion):
+    """Ejecuta `operacion(conn)` en el escritor único y espera el commit."""
+    from db_writer import ejecutar_escritura
+    return ejecutar_escritura(operacion)
+
+
+def _insertar_auditoria(usuario, accion, datos, ip_address):
+    """Encola el registro de auditoría en el escritor único sin esperarlo."""
+    from db_writer import enviar_escritura
+
+    def _insertar(conn):
+        conn.execute("""
+            INSERT INTO auditoria (usuario, accion, tabla_afectada, datos_nuevos, ip_address)
+            VALUES (?, ?, 'permisos', ?, ?)
+        """, (usuario, accion, json.dumps(datos), ip_address))
+
+    enviar_escritura(_insertar)
 
 
 # ============================================================================
@@ -464,25 +481,18 @@ def requiere_rol(*roles_permitidos):
 def _registrar_acceso_denegado(permiso_requerido):
     """Registra intentos de acceso denegado para auditoría"""
     try:
-        conn = _conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO auditoria (usuario, accion, tabla_afectada, datos_nuevos, ip_address)
-            VALUES (?, 'ACCESO_DENEGADO', 'permisos', ?, ?)
-        """, (
+        # Los datos del request se leen aquí; la escritura va al escritor
+        _insertar_auditoria(
             session.get('username', 'anónimo'),
-            json.dumps({
+            'ACCESO_DENEGADO',
+            {
                 'permiso_requerido': str(permiso_requerido),
                 'ruta': request.path,
                 'metodo': request.method,
                 'rol_usuario': session.get('rol', 'sin_rol')
-            }),
+            },
             request.remote_addr
-        ))
-
-        conn.commit()
-        conn.close()
+        )
     except Exception as e:
         print(f"⚠️ Error registrando acceso denegado: {e}")
 
@@ -490,21 +500,12 @@ def _registrar_acceso_denegado(permiso_requerido):
 def registrar_accion_permiso(accion, detalles):
     """Registra acciones relacionadas con permisos para auditoría"""
     try:
-        conn = _conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO auditoria (usuario, accion, tabla_afectada, datos_nuevos, ip_address)
-            VALUES (?, ?, 'permisos', ?, ?)
-        """, (
+        _insertar_auditoria(
             session.get('username', 'sistema'),
             accion,
-            json.dumps(detalles),
+            detalles,
             request.remote_addr if request else None
-        ))
-
-        conn.commit()
-        conn.close()
+        )
     except Exception as e:
         print(f"⚠️ Error registrando acción: {e}")
 
@@ -547,14 +548,13 @@ def agregar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
                 'auto_permiso_bloqueado': True
             }
     # ═══════════════════════════════════════════════════════════════════════
-    conn = _conectar_db()
-    cursor = conn.cursor()
+    asignado_por = session.get('username')
 
-    try:
+    def _agregar(conn):
         # Obtener ID del permiso
-        # Obtener ID del permiso
-        cursor.execute("SELECT id FROM permisos WHERE codigo = ? AND activo = 1", (permiso_codigo,))
-        permiso = cursor.fetchone()
+        permiso = conn.execute(
+            "SELECT id FROM permisos WHERE codigo = ? AND activo = 1", (permiso_codigo,)
+        ).fetchone()
 
         if not permiso:
             return {'success': False, 'message': f'Permiso "{permiso_codigo}" no existe'}
@@ -562,51 +562,48 @@ def agregar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
         permiso_id = permiso[0]
 
         # Verificar si ya tiene el permiso asignado
-        cursor.execute("""
+        existente = conn.execute("""
             SELECT id, tipo FROM usuario_permisos
             WHERE usuario_id = ? AND permiso_id = ?
-        """, (usuario_id, permiso_id))
-
-        existente = cursor.fetchone()
+        """, (usuario_id, permiso_id)).fetchone()
 
         if existente:
             if existente[1] == 'agregar':
                 return {'success': False, 'message': 'El usuario ya tiene este permiso'}
-            else:
-                # Cambiar de 'quitar' a 'agregar'
-                cursor.execute("""
-                    UPDATE usuario_permisos
-                    SET tipo = 'agregar',
-                        asignado_por = ?,
-                        motivo = ?,
-                        fecha_asignacion = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (session.get('username'), motivo, existente[0]))
+            # Cambiar de 'quitar' a 'agregar'
+            conn.execute("""
+                UPDATE usuario_permisos
+                SET tipo = 'agregar',
+                    asignado_por = ?,
+                    motivo = ?,
+                    fecha_asignacion = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (asignado_por, motivo, existente[0]))
         else:
-            cursor.execute("""
+            conn.execute("""
                 INSERT INTO usuario_permisos (usuario_id, permiso_id, tipo, asignado_por, motivo)
                 VALUES (?, ?, 'agregar', ?, ?)
-            """, (usuario_id, permiso_id, session.get('username'), motivo))
-
-        conn.commit()
+            """, (usuario_id, permiso_id, asignado_por, motivo))
+        return None
 
-        # Invalidar cache
-        invalidar_cache_permisos(usuario_id)
+    try:
+        error = _ejecutar_escritura(_agregar)
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+    if error:
+        return error
 
-        # Registrar en auditoría
-        registrar_accion_permiso('PERMISO_AGREGADO', {
-            'usuario_id': usuario_id,
-            'permiso': permiso_codigo,
-            'motivo': motivo
-        })
+    # Invalidar cache
+    invalidar_cache_permisos(usuario_id)
 
-        return {'success': True, 'message': 'Permiso agregado correctamente'}
+    # Registrar en auditoría
+    registrar_accion_permiso('PERMISO_AGREGADO', {
+        'usuario_id': usuario_id,
+        'permiso': permiso_codigo,
+        'motivo': motivo
+    })
 
-    except Exception as e:
-        conn.rollback()
-        return {'success': False, 'message': str(e)}
-    finally:
-        conn.close()
+    return {'success': True, 'message': 'Permiso agregado correctamente'}
 
 
 def quitar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
@@ -644,13 +641,11 @@ def quitar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
                 'auto_permiso_bloqueado': True
             }
     # ═══════════════════════════════════════════════════════════════════════
-    conn = _conectar_db()
-    cursor = conn.cursor()
+    asignado_por = session.get('username')
 
-    try:
+    def _quitar(conn):
         # Verificar si el usuario es admin y el permiso es protegido
-        cursor.execute("SELECT rol FROM usuarios WHERE id = ?", (usuario_id,))
-        user_row = cursor.fetchone()
+        user_row = conn.execute("SELECT rol FROM usuarios WHERE id = ?", (usuario_id,)).fetchone()
 
         if not user_row:
             return {'success': False, 'message': 'Usuario no encontrado'}
@@ -667,8 +662,9 @@ def quitar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
             }
 
         # Obtener ID del permiso
-        cursor.execute("SELECT id FROM permisos WHERE codigo = ? AND activo = 1", (permiso_codigo,))
-        permiso = cursor.fetchone()
+        permiso = conn.execute(
+            "SELECT id FROM permisos WHERE codigo = ? AND activo = 1", (permiso_codigo,)
+        ).fetchone()
 
         if not permiso:
             return {'success': False, 'message': f'Permiso "{permiso_codigo}" no existe'}
@@ -676,51 +672,48 @@ def quitar_permiso_usuario(usuario_id, permiso_codigo, motivo=None):
         permiso_id = permiso[0]
 
         # Verificar si ya tiene registro
-        cursor.execute("""
+        existente = conn.execute("""
             SELECT id, tipo FROM usuario_permisos
             WHERE usuario_id = ? AND permiso_id = ?
-        """, (usuario_id, permiso_id))
-
-        existente = cursor.fetchone()
+        """, (usuario_id, permiso_id)).fetchone()
 
         if existente:
             if existente[1] == 'quitar':
                 return {'success': False, 'message': 'El permiso ya está quitado'}
-            else:
-                # Cambiar de 'agregar' a 'quitar'
-                cursor.execute("""
-                    UPDATE usuario_permisos
-                    SET tipo = 'quitar',
-                        asignado_por = ?,
-                        motivo = ?,
-                        fecha_asignacion = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (session.get('username'), motivo, existente[0]))
+            # Cambiar de 'agregar' a 'quitar'
+            conn.execute("""
+                UPDATE usuario_permisos
+                SET tipo = 'quitar',
+                    asignado_por = ?,
+                    motivo = ?,
+                    fecha_asignacion = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (asignado_por, motivo, existente[0]))
         else:
-            cursor.execute("""
+            conn.execute("""
                 INSERT INTO usuario_permisos (usuario_id, permiso_id, tipo, asignado_por, motivo)
                 VALUES (?, ?, 'quitar', ?, ?)
-            """, (usuario_id, permiso_id, session.get('username'), motivo))
-
-        conn.commit()
+            """, (usuario_id, permiso_id, asignado_por, motivo))
+        return None
 
-        # Invalidar cache
-        invalidar_cache_permisos(usuario_id)
+    try:
+        error = _ejecutar_escritura(_quitar)
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
+    if error:
+        return error
 
-        # Registrar en auditoría
-        registrar_accion_permiso('PERMISO_QUITADO', {
-            'usuario_id': usuario_id,
-            'permiso': permiso_codigo,
-            'motivo': motivo
-        })
+    # Invalidar cache
+    invalidar_cache_permisos(usuario_id)
 
-        return {'success': True, 'message': 'Permiso quitado correctamente'}
+    # Registrar en auditoría
+    registrar_accion_permiso('PERMISO_QUITADO', {
+        'usuario_id': usuario_id,
+        'permiso': permiso_codigo,
+        'motivo': motivo
+    })
 
-    except Exception as e:
-        conn.rollback()
-        return {'success': False, 'message': str(e)}
-    finally:
-        conn.close()
+    return {'success': True, 'message': 'Permiso quitado correctamente'}
 
 
 def restaurar_permiso_usuario(usuario_id, permiso_codigo):
@@ -753,37 +746,31 @@ def restaurar_permiso_usuario(usuario_id, permiso_codigo):
                 'auto_permiso_bloqueado': True
             }
     # ═══════════════════════════════════════════════════════════════════════
-    conn = _conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("""
+    def _restaurar(conn):
+        return conn.execute("""
             DELETE FROM usuario_permisos
             WHERE usuario_id = ?
             AND permiso_id = (SELECT id FROM permisos WHERE codigo = ?)
-        """, (usuario_id, permiso_codigo))
+        """, (usuario_id, permiso_codigo)).rowcount
 
-        if cursor.rowcount == 0:
-            return {'success': False, 'message': 'No hay override para restaurar'}
-
-        conn.commit()
+    try:
+        eliminados = _ejecutar_escritura(_restaurar)
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
 
-        # Invalidar cache
-        invalidar_cache_permisos(usuario_id)
+    if eliminados == 0:
+        return {'success': False, 'message': 'No hay override para restaurar'}
 
-        # Registrar en auditoría
-        registrar_accion_permiso('PERMISO_RESTAURADO', {
-            'usuario_id': usuario_id,
-            'permiso': permiso_codigo
-        })
+    # Invalidar cache
+    invalidar_cache_permisos(usuario_id)
 
-        return {'success': True, 'message': 'Permiso restaurado a valor del rol'}
+    # Registrar en auditoría
+    registrar_accion_permiso('PERMISO_RESTAURADO', {
+        'usuario_id': usuario_id,
+        'permiso': permiso_codigo
+    })
 
-    except Exception as e:
-        conn.rollback()
-        return {'success': False, 'message': str(e)}
-    finally:
-        conn.close()
+    return {'success': True, 'message': 'Permiso restaurado a valor del rol'}
 
 
 def limpiar_overrides_invalidos():
@@ -893,39 +880,35 @@ def agregar_permiso_rol(rol, permiso_codigo):
     Returns:
         dict: {'success': bool, 'message': str}
     """
-    conn = _conectar_db()
-    cursor = conn.cursor()
+    asignado_por = session.get('username')
 
-    try:
-        cursor.execute("""
+    def _agregar(conn):
+        return conn.execute("""
             INSERT INTO rol_permisos (rol, permiso_id, asignado_por)
             SELECT ?, id, ? FROM permisos WHERE codigo = ? AND activo = 1
-        """, (rol, session.get('username'), permiso_codigo))
-
-        if cursor.rowcount == 0:
-            return {'success': False, 'message': 'Permiso no encontrado'}
-
-        conn.commit()
-
-        # Invalidar cache de este rol
-        cache_key = f"rol_{rol}"
-        if cache_key in _PERMISOS_CACHE:
-            del _PERMISOS_CACHE[cache_key]
-
-        registrar_accion_permiso('PERMISO_ROL_AGREGADO', {
-            'rol': rol,
-            'permiso': permiso_codigo
-        })
-
-        return {'success': True, 'message': f'Permiso agregado al rol {rol}'}
+        """, (rol, asignado_por, permiso_codigo)).rowcount
 
+    try:
+        agregados = _ejecutar_escritura(_agregar)
     except sqlite3.IntegrityError:
         return {'success': False, 'message': 'El rol ya tiene este permiso'}
     except Exception as e:
-        conn.rollback()
         return {'success': False, 'message': str(e)}
-    finally:
-        conn.close()
+
+    if agregados == 0:
+        return {'success': False, 'message': 'Permiso no encontrado'}
+
+    # Invalidar cache de este rol
+    cache_key = f"rol_{rol}"
+    if cache_key in _PERMISOS_CACHE:
+        del _PERMISOS_CACHE[cache_key]
+
+    registrar_accion_permiso('PERMISO_ROL_AGREGADO', {
+        'rol': rol,
+        'permiso': permiso_codigo
+    })
+
+    return {'success': True, 'message': f'Permiso agregado al rol {rol}'}
 
 
 def quitar_permiso_rol(rol, permiso_codigo):
@@ -938,38 +921,32 @@ def quitar_permiso_rol(rol, permiso_codigo):
     if rol == 'admin':
         return {'success': False, 'message': 'No se pueden modificar permisos del rol admin'}
 
-    conn = _conectar_db()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("""
+    def _quitar(conn):
+        return conn.execute("""
             DELETE FROM rol_permisos
             WHERE rol = ?
             AND permiso_id = (SELECT id FROM permisos WHERE codigo = ?)
-        """, (rol, permiso_codigo))
-
-        if cursor.rowcount == 0:
-            return {'success': False, 'message': 'El rol no tiene este permiso'}
+        """, (rol, permiso_codigo)).rowcount
 
-        conn.commit()
+    try:
+        eliminados = _ejecutar_escritura(_quitar)
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
 
-        # Invalidar cache
-        cache_key = f"rol_{rol}"
-        if cache_key in _PERMISOS_CACHE:
-            del _PERMISOS_CACHE[cache_key]
+    if eliminados == 0:
+        return {'success': False, 'message': 'El rol no tiene este permiso'}
 
-        registrar_accion_permiso('PERMISO_ROL_QUITADO', {
-            'rol': rol,
-            'permiso': permiso_codigo
-        })
+    # Invalidar cache
+    cache_key = f"rol_{rol}"
+    if cache_key in _PERMISOS_CACHE:
+        del _PERMISOS_CACHE[cache_key]
 
-        return {'success': True, 'message': f'Permiso quitado del rol {rol}'}
+    registrar_accion_permiso('PERMISO_ROL_QUITADO', {
+        'rol': rol,
+        'permiso': permiso_codigo
+    })
 
-    except Exception as e:
-        conn.rollback()
-        return {'success': False, 'message': str(e)}
-    finally:
-        conn.close()
+    return {'success': True, 'message': f'Permiso quitado del rol {rol}'}
 
 
 # ============================================================================
@@ -0,0 +1,109 @@
+/*
+ * eventos-loansi.js - Cliente SSE de /api/eventos con respaldo por polling
+ *
+ * Uso:
+ *   LoansiEventos.conectar({
+ *     eventos: { caso_aprobado: fn, badge: fn, resync: fn, ... },
+ *     polling: fn,          // Consulta de respaldo (la misma que hacía el setInterval)
+ *     intervaloMs: 15000,   // Polling sin stream (navegador sin EventSource o stream caído)
+ *     respaldoMs: 120000    // Polling lento mientras el stream está abierto (0 = ninguno)
+ *   });
+ *
+ * Si el navegador no soporta EventSource, el servidor rechaza el stream
+ * (401, 503) o la conexión falla varias veces seguidas, se usa el polling
+ * a intervaloMs y se vuelve a intentar el stream más tarde.
+ */
+(function () {
+  "use strict";
+
+  var URL_EVENTOS = "/api/eventos";
+  var MAX_FALLOS = 3;               // Errores seguidos antes de pasar a polling
+  var REINTENTO_STREAM_MS = 300000; // Nuevo intento de stream estando en polling
+
+  function conectar(opciones) {
+    var eventos = opciones.eventos || {};
+    var polling = opciones.polling || function () {};
+    var intervaloMs = opciones.intervaloMs || 15000;
+    var respaldoMs = opciones.respaldoMs === undefined ? 120000 : opciones.respaldoMs;
+
+    var fuente = null;
+    var fallos = 0;
+    var timerPolling = null;
+    var timerReintento = null;
+
+    function programarPolling(ms) {
+      if (timerPolling) {
+        clearInterval(timerPolling);
+        timerPolling = null;
+      }
+      if (ms > 0) {
+        timerPolling = setInterval(function () {
+          if (!window.isLoggingOut) {
+            polling();
+          }
+        }, ms);
+      }
+    }
+
+    function pasarAPolling() {
+      if (fuente) {
+        fuente.close();
+        fuente = null;
+      }
+      programarPolling(intervaloMs);
+      if (!timerReintento && window.EventSource) {
+        timerReintento = setTimeout(function () {
+          timerReintento = null;
+          abrirStream();
+        }, REINTENTO_STREAM_MS);
+      }
+    }
+
+    function abrirStream() {
+      if (!window.EventSource) {
+        pasarAPolling();
+        return;
+      }
+      fuente = new EventSource(URL_EVENTOS);
+
+      fuente.onopen = function () {
+        fallos = 0;
+        programarPolling(respaldoMs);
+      };
+
+      fuente.onerror = function () {
+        // CLOSED: el servidor respondió un error HTTP (no reintenta solo)
+        fallos += 1;
+        if (!fuente || fuente.readyState === EventSource.CLOSED || fallos >= MAX_FALLOS) {
+          pasarAPolling();
+        }
+      };
+
+      Object.keys(eventos).forEach(function (tipo) {
+        fuente.addEventListener(tipo, function (evento) {
+          var datos = {};
+          try {
+            datos = JSON.parse(evento.data || "{}");
+          } catch (e) {
+            console.warn("Evento SSE no válido:", tipo);
+          }
+          eventos[tipo](datos);
+        });
+      });
+    }
+
+    window.addEventListener("beforeunload", function () {
+      if (fuente) {
+        fuente.close();
+      }
+      programarPolling(0);
+      if (timerReintento) {
+        clearTimeout(timerReintento);
+      }
+    });
+
+    abrirStream();
+  }
+
+  window.LoansiEventos = { conectar: conectar };
+})();
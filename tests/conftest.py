@@ -0,0 +1,42 @@
+"""
+Fixtures compartidas de los tests.
+
+Cada test que toca la base trabaja sobre una COPIA temporal de loansi.db
+con las migraciones aplicadas; nunca sobre el archivo del repositorio.
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db_temporal(tmp_path):
+    """Copia migrada de loansi.db como database.DB_PATH durante el test."""
+    from db_writer import detener_escritor
+
+    original = database.DB_PATH
+    copia = tmp_path / "loansi.db"
+    shutil.copy2(original, copia)
+    database.cerrar_pool_conexiones()
+    database.DB_PATH = copia
+    try:
+        # Las migraciones imprimen su avance
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.aplicar_migraciones()
+        yield copia
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            detener_escritor()
+        database.cerrar_pool_conexiones()
+        database.DB_PATH = original
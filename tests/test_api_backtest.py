@@ -0,0 +1,39 @@
+"""POST /api/scoring/backtest corre en el request: limite por defecto y con tope."""
+
+import pytest
+
+import backtesting_scoring
+import permisos
+
+
+@pytest.fixture
+def cliente(db_temporal, monkeypatch):
+    from app import create_app
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    monkeypatch.setattr(permisos, "tiene_permiso", lambda permiso: True)
+    llamadas = []
+    monkeypatch.setattr(
+        backtesting_scoring, "ejecutar_backtest",
+        lambda borrador, **opciones: llamadas.append(opciones) or {"success": True, **opciones},
+    )
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion["autorizado"] = True
+    cliente.llamadas = llamadas
+    return cliente
+
+
+def test_limite_por_defecto(cliente):
+    respuesta = cliente.post("/api/scoring/backtest", json={"borrador": {}})
+    assert respuesta.status_code == 200
+    assert cliente.llamadas[-1]["limite"] == backtesting_scoring.MAX_LIMITE_API
+
+
+@pytest.mark.parametrize("limite", [backtesting_scoring.MAX_LIMITE_API + 1, -5])
+def test_limite_fuera_de_rango(cliente, limite):
+    respuesta = cliente.post("/api/scoring/backtest", json={"borrador": {}, "limite": limite})
+    assert respuesta.status_code == 400
+    assert "limite" in respuesta.get_json()["error"]
+    assert not cliente.llamadas
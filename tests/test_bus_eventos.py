@@ -0,0 +1,64 @@
+"""Publicaciones del bus de eventos disparadas por escrituras diferidas."""
+
+import threading
+
+import database
+import db_helpers
+
+
+def test_nuevo_pendiente_no_se_publica_en_el_hilo_escritor(db_temporal, monkeypatch):
+    hilos = []
+    publicado = threading.Event()
+
+    def _registrar(evaluacion):
+        hilos.append(threading.current_thread().name)
+        publicado.set()
+
+    monkeypatch.setattr(db_helpers, "publicar_nuevo_pendiente", _registrar)
+    conn = database.conectar_db()
+    try:
+        asesor = conn.execute("SELECT username FROM usuarios LIMIT 1").fetchone()[0]
+    finally:
+        conn.close()
+
+    futuro = db_helpers.guardar_evaluacion(
+        {"timestamp": "2026-10-17T09:00:00", "asesor": asesor, "estado_comite": "pending"},
+        esperar=False,
+    )
+    futuro.result(5)
+
+    assert publicado.wait(5)
+    assert hilos and not hilos[0].startswith("loansi-db-writer")
+
+
+def test_marcar_caso_visto_publica_el_badge_del_asesor(db_temporal, monkeypatch):
+    import bus_eventos
+    from app import create_app
+
+    conn = database.conectar_db()
+    try:
+        timestamp, asesor = conn.execute(
+            "SELECT timestamp, asesor FROM evaluaciones WHERE asesor IS NOT NULL LIMIT 1"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    asesores = []
+    publicado = threading.Event()
+
+    def _registrar(asesor=None, comite=False):
+        asesores.append(asesor)
+        publicado.set()
+
+    monkeypatch.setattr(bus_eventos, "publicar_badges", _registrar)
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion["autorizado"] = True
+        sesion["username"] = asesor
+
+    respuesta = cliente.post(f"/asesor/marcar-caso-visto/{timestamp}")
+    assert respuesta.status_code == 200
+    assert publicado.wait(5)
+    assert asesores == [asesor]
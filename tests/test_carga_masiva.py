@@ -0,0 +1,44 @@
+"""Lectura en streaming de arreglos JSON (carga_masiva)."""
+
+import io
+import json
+
+import pytest
+
+import carga_masiva
+
+
+@pytest.fixture
+def bloques_pequenos(monkeypatch):
+    monkeypatch.setattr(carga_masiva, "TAMANO_BLOQUE_LECTURA", 64)
+    monkeypatch.setattr(carga_masiva, "MAX_TAMANO_ELEMENTO", 4096)
+
+
+def _leer(texto):
+    archivo = io.StringIO(texto)
+    primero = archivo.read(carga_masiva.TAMANO_BLOQUE_LECTURA)
+    return archivo, carga_masiva._leer_arreglo_json(archivo, primero)
+
+
+def test_elementos_que_cruzan_bloques(bloques_pequenos):
+    registros = [{"id": i, "texto": "x" * (i * 50)} for i in range(40)]
+    _, elementos = _leer(json.dumps(registros))
+    assert list(elementos) == registros
+
+
+def test_elemento_mal_formado_falla_sin_leer_el_resto(bloques_pequenos):
+    resto = ", ".join(json.dumps({"id": i}) for i in range(5000))
+    archivo, elementos = _leer('[{"id": 0}, {"id": 1,, "x": 2}, ' + resto + "]")
+
+    assert next(elementos) == {"id": 0}
+    with pytest.raises(ValueError, match="Elemento 2"):
+        next(elementos)
+    assert archivo.tell() < 1024
+
+
+def test_elemento_mayor_al_tope_falla(bloques_pequenos):
+    archivo, elementos = _leer('[{"texto": "' + "x" * 100_000 + '"}]')
+
+    with pytest.raises(ValueError, match="Elemento 1"):
+        next(elementos)
+    assert archivo.tell() < 8192
@@ -0,0 +1,35 @@
+"""Columnas derivadas de evaluaciones.resultado (triggers)."""
+
+import json
+
+import pytest
+
+import database
+
+
+def _derivadas(resultado):
+    conn = database.conectar_db()
+    try:
+        asesor = conn.execute("SELECT username FROM usuarios LIMIT 1").fetchone()[0]
+        cursor = conn.execute(
+            "INSERT INTO evaluaciones (timestamp, asesor, resultado) VALUES ('2026-10-01T10:00:00', ?, ?)",
+            (asesor, json.dumps(resultado)),
+        )
+        fila = conn.execute(
+            "SELECT aprobado, rechazo_automatico FROM evaluaciones WHERE id = ?", (cursor.lastrowid,)
+        ).fetchone()
+        conn.rollback()
+        return tuple(fila)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("resultado, esperado", [
+    ({"aprobado": True, "rechazo_automatico": False}, (1, 0)),
+    ({"aprobado": False, "rechazo_automatico": "Mora activa"}, (0, 1)),
+    ({"aprobado": 1, "rechazo_automatico": 0}, (1, 0)),
+    ({"aprobado": 0, "rechazo_automatico": 1}, (0, 1)),
+    ({"aprobado": None, "rechazo_automatico": None}, (None, 0)),
+])
+def test_aprobado_y_rechazo_aceptan_booleanos_y_enteros(db_temporal, resultado, esperado):
+    assert _derivadas(resultado) == esperado
@@ -0,0 +1,91 @@
+"""Conexión compartida: los helpers anidados no tocan la transacción del llamador."""
+
+import database
+
+
+def _nombres(conn):
+    return [fila[0] for fila in conn.execute("SELECT nombre FROM prueba ORDER BY nombre")]
+
+
+def _crear_tabla():
+    conn = database.conectar_db()
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS prueba (nombre TEXT)")
+        conn.execute("DELETE FROM prueba")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_commit_del_helper_no_confirma_al_llamador(db_temporal):
+    _crear_tabla()
+    conn = database.conectar_db()
+    try:
+        conn.execute("INSERT INTO prueba VALUES ('llamador')")
+
+        helper = database.conectar_db()
+        assert helper is conn
+        helper.execute("INSERT INTO prueba VALUES ('helper')")
+        helper.commit()
+        helper.close()
+
+        # El llamador sigue con su transacción y puede descartarla entera
+        assert conn.in_transaction
+        conn.rollback()
+        assert _nombres(conn) == []
+    finally:
+        conn.close()
+
+
+def test_rollback_del_helper_conserva_el_trabajo_del_llamador(db_temporal):
+    _crear_tabla()
+    conn = database.conectar_db()
+    try:
+        conn.execute("INSERT INTO prueba VALUES ('llamador')")
+
+        helper = database.conectar_db()
+        helper.execute("INSERT INTO prueba VALUES ('helper')")
+        helper.rollback()
+        helper.close()
+
+        conn.commit()
+        assert _nombres(conn) == ["llamador"]
+    finally:
+        conn.close()
+
+
+def test_close_del_helper_descarta_solo_lo_no_confirmado(db_temporal):
+    _crear_tabla()
+    conn = database.conectar_db()
+    try:
+        conn.execute("INSERT INTO prueba VALUES ('llamador')")
+
+        helper = database.conectar_db()
+        helper.execute("INSERT INTO prueba VALUES ('confirmado')")
+        helper.commit()
+        helper.execute("INSERT INTO prueba VALUES ('sin_commit')")
+        helper.close()
+
+        conn.commit()
+        assert _nombres(conn) == ["confirmado", "llamador"]
+    finally:
+        conn.close()
+
+
+def test_helper_sin_transaccion_del_llamador_confirma_normal(db_temporal):
+    _crear_tabla()
+    conn = database.conectar_db()
+    try:
+        helper = database.conectar_db()
+        helper.execute("INSERT INTO prueba VALUES ('helper')")
+        helper.commit()
+        helper.close()
+        assert not conn.in_transaction
+    finally:
+        conn.close()
+
+    otra = database.conectar_db()
+    try:
+        assert _nombres(otra) == ["helper"]
+    finally:
+        otra.close()
@@ -0,0 +1,81 @@
+"""Escritor único: fallos por operación y por lote, y reintentos por bloqueo."""
+
+import sqlite3
+
+import pytest
+
+import database
+from db_writer import EscritorDB
+
+
+@pytest.fixture
+def escritor(db_temporal):
+    escritor = EscritorDB(backoff_base=0.001, backoff_max=0.001).iniciar()
+    escritor.ejecutar(lambda conn: conn.execute("CREATE TABLE prueba (nombre TEXT)"))
+    yield escritor
+    escritor.detener()
+
+
+def _nombres():
+    conn = database.conectar_db()
+    try:
+        return sorted(fila[0] for fila in conn.execute("SELECT nombre FROM prueba"))
+    finally:
+        conn.close()
+
+
+def _insertar(conn, nombre):
+    conn.execute("INSERT INTO prueba VALUES (?)", (nombre,))
+
+
+def test_operacion_fallida_no_afecta_al_resto_del_lote(escritor):
+    def _fallar(conn):
+        _insertar(conn, "fallida")
+        raise ValueError("falla")
+
+    futuros = [escritor.enviar(_insertar, "a"), escritor.enviar(_fallar), escritor.enviar(_insertar, "b")]
+
+    assert futuros[0].result(5) is None
+    with pytest.raises(ValueError):
+        futuros[1].result(5)
+    assert futuros[2].result(5) is None
+    assert _nombres() == ["a", "b"]
+
+
+def test_bloqueo_reintenta_solo_la_operacion_afectada(escritor):
+    llamadas = {"a": 0, "bloqueada": 0}
+
+    def _contar(conn):
+        llamadas["a"] += 1
+        _insertar(conn, "a")
+
+    def _bloqueada(conn):
+        llamadas["bloqueada"] += 1
+        _insertar(conn, "bloqueada")
+        if llamadas["bloqueada"] == 1:
+            raise sqlite3.OperationalError("database is locked")
+
+    futuros = [escritor.enviar(_contar), escritor.enviar(_bloqueada)]
+    for futuro in futuros:
+        futuro.result(5)
+
+    assert llamadas == {"a": 1, "bloqueada": 2}
+    # El primer intento se revirtió a su SAVEPOINT: una sola fila
+    assert _nombres() == ["a", "bloqueada"]
+
+
+def test_error_del_lote_falla_sus_futuros_y_el_hilo_sigue(escritor, monkeypatch):
+    original = escritor._ejecutar_transaccion
+
+    def _fallar_una_vez(lote):
+        monkeypatch.setattr(escritor, "_ejecutar_transaccion", original)
+        raise sqlite3.DatabaseError("disk I/O error")
+
+    monkeypatch.setattr(escritor, "_ejecutar_transaccion", _fallar_una_vez)
+    with pytest.raises(sqlite3.DatabaseError):
+        escritor.ejecutar(_insertar, "perdida")
+
+    assert escritor.activo
+    escritor.ejecutar(_insertar, "despues")
+    assert _nombres() == ["despues"]
+    assert escritor.estadisticas()["errores_lote"] == 1
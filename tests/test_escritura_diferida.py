@@ -0,0 +1,52 @@
+"""Write-behind de simulaciones: reintentos acotados y archivo de descarte."""
+
+import json
+
+import pytest
+
+import db_escritura_diferida
+import db_helpers
+from db_escritura_diferida import EscrituraDiferida
+
+
+@pytest.fixture
+def diferida(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_escritura_diferida.time, "sleep", lambda _segundos: None)
+    return EscrituraDiferida(tmp_path)
+
+
+def _lote(diferida, simulaciones):
+    """Anota las simulaciones en un segmento de spill como haría encolar()."""
+    with diferida._lock:
+        segmento = diferida._segmento_para_escribir()
+        for simulacion in simulaciones:
+            segmento.archivo.write(json.dumps(simulacion) + "\n")
+            segmento.pendientes += 1
+    return [(simulacion, segmento) for simulacion in simulaciones], segmento
+
+
+def test_simulacion_envenenada_va_al_descarte(diferida, monkeypatch):
+    insertadas = []
+
+    def _guardar(simulaciones, tamano_lote=None):
+        if any(s["timestamp"] == "veneno" for s in simulaciones):
+            raise ValueError("fila inválida")
+        insertadas.extend(simulaciones)
+        return {"insertadas": len(simulaciones), "errores": 0, "detalle_errores": []}
+
+    monkeypatch.setattr(db_helpers, "guardar_simulaciones_bulk", _guardar)
+    simulaciones = [{"timestamp": "a"}, {"timestamp": "veneno"}, {"timestamp": "b"}]
+    lote, segmento = _lote(diferida, simulaciones)
+    diferida._cerrar_segmento(segmento)
+
+    diferida._persistir(lote)
+
+    assert [s["timestamp"] for s in insertadas] == ["a", "b"]
+    (descarte,) = diferida.directorio_spill.glob("descartadas-*.jsonl")
+    assert [json.loads(linea) for linea in descarte.read_text().splitlines()] == [{"timestamp": "veneno"}]
+    # El segmento quedó confirmado y se borra: el descarte no se reinserta
+    assert not segmento.ruta.exists()
+    stats = diferida.estadisticas()
+    assert stats["reintentos"] == db_escritura_diferida.MAX_REINTENTOS_LOTE
+    assert stats["descartadas"] == 1
+    assert stats["persistidas"] == 2
@@ -0,0 +1,67 @@
+"""Tarjetas y filtro de asesores del historial desde metricas_asesores."""
+
+import database
+import db_helpers
+
+
+def _directo(asesor=None):
+    """Conteo sobre evaluaciones (la consulta anterior)."""
+    conn = database.conectar_db()
+    try:
+        sql = "SELECT COUNT(*), COALESCE(SUM(aprobado = 1), 0) FROM evaluaciones"
+        if asesor:
+            return tuple(conn.execute(sql + " WHERE asesor = ?", (asesor,)).fetchone())
+        return tuple(conn.execute(sql).fetchone())
+    finally:
+        conn.close()
+
+
+def _tarjetas(asesor=None):
+    stats = db_helpers.obtener_estadisticas_historial({"asesor": asesor} if asesor else {})
+    assert stats["rechazados"] == stats["total"] - stats["aprobados"]
+    return stats["total"], stats["aprobados"]
+
+
+def test_tarjetas_y_asesores_iguales_a_evaluaciones(db_temporal):
+    conn = database.conectar_db()
+    try:
+        distintos = [fila[0] for fila in conn.execute(
+            "SELECT DISTINCT asesor FROM evaluaciones WHERE asesor IS NOT NULL AND asesor != '' ORDER BY asesor"
+        )]
+    finally:
+        conn.close()
+    assert db_helpers.obtener_asesores_con_evaluaciones() == distintos
+
+    asesor = distintos[0]
+    assert _tarjetas() == _directo()
+    assert _tarjetas(asesor) == _directo(asesor)
+
+    # Los triggers siguen a aprobado cuando se guarda o cambia el resultado
+    timestamp = "2026-10-17T10:00:00"
+    db_helpers.guardar_evaluacion({
+        "timestamp": timestamp, "asesor": asesor,
+        "resultado": {"score": 80, "aprobado": True},
+    })
+    assert _tarjetas(asesor) == _directo(asesor)
+    db_helpers.actualizar_evaluacion(timestamp, {"resultado": {"score": 10, "aprobado": False}})
+    assert _tarjetas(asesor) == _directo(asesor)
+    assert _tarjetas() == _directo()
+
+
+def test_vista_sin_fechas_no_lee_evaluaciones(db_temporal, monkeypatch):
+    consultas = []
+    conectar = db_helpers.conectar_db
+
+    def _conectar_con_traza():
+        conn = conectar()
+        conn.set_trace_callback(consultas.append)
+        return conn
+
+    monkeypatch.setattr(db_helpers, "conectar_db", _conectar_con_traza)
+    db_helpers.obtener_asesores_con_evaluaciones()
+    db_helpers.obtener_estadisticas_historial({})
+    db_helpers.obtener_estadisticas_historial({"asesor": "admin"})
+    assert consultas and not any("FROM evaluaciones" in sql for sql in consultas)
+
+    db_helpers.obtener_estadisticas_historial({"desde": "2026-01-01"})
+    assert any("FROM evaluaciones" in sql for sql in consultas)
@@ -0,0 +1,161 @@
+"""
+POST /scoring antes y después del motor, sobre las configuraciones reales.
+
+`_antes` es el cálculo en línea que tenía scoring_routes.calcular_scoring
+antes de delegar en MotorScoring. El motor cambia la fórmula a propósito
+(ver motor_scoring.py); este test fija qué se conserva y qué cambia:
+
+- Igual: el rango que aplica y los puntos de cada criterio
+- Cambia: score = suma de puntos x peso / 100; score_normalizado = score
+  sobre el máximo alcanzable con los criterios diligenciados x escala_max;
+  el nivel se busca con score_normalizado; se aplican los factores de
+  rechazo automático de la línea
+"""
+
+import database
+from app.services.motor_scoring import NIVELES_RECHAZO, obtener_motor_scoring
+from db_helpers import cargar_scoring
+from db_helpers_scoring_linea import cargar_scoring_por_linea
+
+
+def _antes(config, valores):
+    """Cálculo en línea anterior de POST /scoring (sin cambios)."""
+    criterios = config.get("criterios", {})
+    pares = criterios.items() if hasattr(criterios, "items") else ((c.get("codigo"), c) for c in criterios)
+    puntajes = {}
+    score_total = 0
+    for codigo, config_criterio in pares:
+        if not config_criterio.get("activo", True):
+            continue
+        valor = valores.get(codigo)
+        if valor is None:
+            continue
+
+        valor_num = None
+        limpio = str(valor).replace("$", "").replace(".", "").replace(",", "").strip()
+        if limpio.isdigit():
+            valor_num = float(limpio)
+
+        puntaje_criterio = 0
+        for rango in config_criterio.get("rangos", []):
+            rango_min, rango_max, rango_valor = rango.get("min"), rango.get("max"), rango.get("valor")
+            inferior = float(rango_min) if rango_min is not None else float("-inf")
+            superior = float(rango_max) if rango_max is not None else float("inf")
+            if rango_valor is not None:
+                if str(rango_valor).lower() == str(valor).lower():
+                    puntaje_criterio = rango.get("puntos", 0)
+                    break
+            elif valor_num is not None and (rango_min is not None or rango_max is not None):
+                if inferior <= valor_num <= superior:
+                    puntaje_criterio = rango.get("puntos", 0)
+                    break
+        score_total += puntaje_criterio
+        puntajes[codigo] = puntaje_criterio
+    return score_total, puntajes
+
+
+def _criterios_activos(config):
+    criterios = config.get("criterios", {})
+    pares = criterios.items() if hasattr(criterios, "items") else ((c.get("codigo"), c) for c in criterios)
+    return [(codigo, criterio) for codigo, criterio in pares if criterio.get("activo", True)]
+
+
+def _solicitudes(config):
+    """Un valor por límite de cada rango (enteros >= 0) y una fila con un criterio sin diligenciar."""
+    opciones = {}
+    for codigo, criterio in _criterios_activos(config):
+        valores = []
+        for rango in criterio.get("rangos", ()):
+            for limite in (rango.get("min"), rango.get("max")):
+                if limite is not None and float(limite) >= 0 and float(limite).is_integer():
+                    valores.append(str(int(limite)))
+        opciones[codigo] = valores or ["0"]
+    filas = max((len(v) for v in opciones.values()), default=0)
+    solicitudes = [
+        {codigo: valores[i % len(valores)] for codigo, valores in opciones.items()}
+        for i in range(filas)
+    ]
+    if solicitudes and opciones:
+        incompleta = dict(solicitudes[0])
+        incompleta.pop(next(iter(opciones)))
+        solicitudes.append(incompleta)
+    return solicitudes
+
+
+def _despues_esperado(config, puntajes):
+    """score y score_normalizado (sin redondear) con la fórmula del motor, desde los puntos de `_antes`."""
+    score = 0
+    maximo = 0
+    for codigo, criterio in _criterios_activos(config):
+        if codigo not in puntajes:
+            continue
+        factor = criterio.get("peso", 5) / 100.0
+        score += puntajes[codigo] * factor
+        maximo += max((r.get("puntos", 0) for r in criterio.get("rangos", ())), default=0) * factor
+    escala = config.get("escala_max", 100)
+    normalizado = (score / maximo) * escala if maximo > 0 else 0
+    return score, min(escala, max(0, normalizado))
+
+
+def _nivel(config, score):
+    for nivel in config.get("niveles_riesgo", ()):
+        if nivel.get("min", 0) <= score <= nivel.get("max", 100):
+            return nivel.get("nombre", "Sin clasificar")
+    return "Sin clasificar"
+
+
+def test_antes_y_despues_en_configuraciones_reales(db_temporal):
+    motor = obtener_motor_scoring()
+    motor.invalidar()
+    conn = database.conectar_db()
+    try:
+        lineas = [fila[0] for fila in conn.execute("SELECT nombre FROM lineas_credito WHERE activo = 1")]
+    finally:
+        conn.close()
+
+    revisadas = 0
+    for linea in lineas + [None]:
+        _modelo, origen = motor.modelo_para(linea)
+        config = cargar_scoring_por_linea(origen) if origen else cargar_scoring()
+        rechazos = {
+            factor.get("criterio") for factor in config.get("factores_rechazo_automatico", ())
+            if factor.get("activo", True) and factor.get("nivel") in NIVELES_RECHAZO
+        }
+
+        for valores in _solicitudes(config):
+            _score_antes, puntajes_antes = _antes(config, valores)
+            despues = motor.evaluar(valores, linea)
+            puntajes_despues = {e["codigo"]: e["puntaje"] for e in despues["criterios_evaluados"]}
+
+            # Se conserva: los puntos de cada criterio
+            assert puntajes_despues == puntajes_antes, (linea, valores)
+            # Cambia: ponderación por peso y normalización contra el máximo
+            score, normalizado = _despues_esperado(config, puntajes_antes)
+            assert despues["score"] == round(score, 2), (linea, valores)
+            assert despues["score_normalizado"] == round(normalizado, 2), (linea, valores)
+            # Cambia: el nivel se busca con el score normalizado, no con la suma de puntos
+            assert despues["nivel"] == _nivel(config, normalizado), (linea, valores)
+            # Cambia: los factores de rechazo automático ahora aplican
+            if despues["rechazo_automatico"]:
+                assert despues["factor_rechazo"] in rechazos
+            minimo = config.get("puntaje_minimo_aprobacion", 17)
+            assert despues["aprobado"] == (not despues["rechazo_automatico"] and normalizado >= minimo)
+            revisadas += bool(puntajes_antes)
+
+    assert revisadas > 0, "Ninguna configuración real con criterios"
+
+
+def test_factor_de_rechazo_de_la_linea_aplica(db_temporal):
+    motor = obtener_motor_scoring()
+    config = cargar_scoring_por_linea("LoansiFlex")
+    factor = next(
+        f for f in config["factores_rechazo_automatico"]
+        if f.get("activo", True) and f.get("nivel") in NIVELES_RECHAZO
+        and f.get("operador") == ">" and f.get("valor") is not None
+    )
+    valores = {factor["criterio"]: str(int(float(factor["valor"])) + 1)}
+
+    assert _antes(config, valores)[0] == 0  # Antes nunca rechazaba
+    despues = motor.evaluar(valores, "LoansiFlex")
+    assert despues["rechazo_automatico"] and despues["factor_rechazo"] == factor["criterio"]
+    assert not despues["aprobado"]
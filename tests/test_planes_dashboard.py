@@ -0,0 +1,42 @@
+"""
+Planes de las consultas de dashboard: con WHERE deben buscar por índice.
+
+Usa la captura de benchmarks/explain_dashboard.py: ejecuta los helpers de
+dashboard y de estados para cada rol, registra cada SELECT y falla si el
+plan recorre completa evaluaciones, simulaciones o actividad_diaria (SCAN)
+en lugar de usar los índices compuestos (SEARCH).
+"""
+
+import database
+from benchmarks import explain_dashboard
+
+
+FILAS_SINTETICAS = 5000
+
+
+def test_consultas_de_dashboard_usan_indices(db_temporal):
+    conn = database.conectar_db()
+    try:
+        explain_dashboard._poblar(conn, FILAS_SINTETICAS)
+    finally:
+        conn.close()
+
+    consultas = explain_dashboard._capturar_consultas(explain_dashboard._llamadas())
+    vigiladas = {
+        sql: etiqueta for sql, etiqueta in consultas.items()
+        if any(tabla in sql for tabla in explain_dashboard.TABLAS_VIGILADAS)
+    }
+    assert vigiladas, "No se capturó ninguna consulta de dashboard"
+
+    conn = database.conectar_db()
+    try:
+        cursor = conn.cursor()
+        fallas = []
+        for sql, etiqueta in vigiladas.items():
+            plan, malos = explain_dashboard._recorridos_completos(cursor, sql)
+            if malos:
+                fallas.append(f"[{etiqueta}] {sql[:160]}\n    " + "\n    ".join(plan))
+    finally:
+        conn.close()
+
+    assert not fallas, "Consultas que recorren la tabla completa:\n" + "\n".join(fallas)
@@ -0,0 +1,106 @@
+"""Scoring por lotes (NumPy): mismo resultado que calcular_scoring por fila."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.scoring_lote import calcular_scoring_lote  # noqa: E402
+from app.services.scoring_service import ScoringService  # noqa: E402
+
+
+CONFIG = {
+    "criterios": {
+        "ingresos": {
+            "nombre": "Ingresos", "peso": 30, "tipo_campo": "numerico",
+            "rangos": [
+                {"min": 0, "max": 999999, "puntaje": 2},
+                {"min": 1000000, "max": 2999999, "puntaje": 6},
+                {"min": 3000000, "puntaje": 10},
+            ],
+        },
+        "mora_telcos": {
+            "nombre": "Mora telcos", "peso": 20, "tipo_campo": "numerico",
+            "rangos": [
+                {"min": 0, "max": 0, "puntaje": 10},
+                {"min": 1, "max": 200000, "puntaje": 4},
+            ],
+        },
+        "vivienda": {
+            "nombre": "Vivienda", "peso": 25, "tipo_campo": "seleccion",
+            "rangos": [
+                {"valor": "Propia", "puntaje": 10},
+                {"valor": "Familiar", "puntaje": 7},
+                {"valor": "Arriendo", "puntaje": 4},
+            ],
+        },
+        "reportado": {
+            "nombre": "Reportado", "peso": 25, "tipo_campo": "booleano",
+            "rangos": [{"valor": True, "puntaje": 0}, {"valor": False, "puntaje": 10}],
+        },
+    },
+    "factores_rechazo_automatico": [
+        {"criterio": "mora_telcos", "operador": ">", "valor": 200000, "mensaje": "Mora telcos"},
+        {"criterio": "edad", "operador": "<", "valor": 18, "mensaje": "Menor de edad"},
+    ],
+    # Límites pegados: 40 y 70 exactos deben caer en el mismo nivel en ambos caminos
+    "niveles_riesgo": [
+        {"nombre": "Alto riesgo", "min": 0, "max": 40},
+        {"nombre": "Riesgo moderado", "min": 40.01, "max": 70},
+        {"nombre": "Bajo riesgo", "min": 70.01, "max": 100},
+    ],
+    "puntaje_minimo_aprobacion": 40,
+}
+
+COLUMNAS = {
+    "ingresos": [500000, "1.500.000", "$3.000.000", None, "abc", 999999, 1000000, 2999999.0, "0", None],
+    "mora_telcos": [0, "0", 150000, 250000, None, "200000", "200001", 1, None, 0],
+    "vivienda": ["Propia", "arriendo", "FAMILIAR", "Otra", None, "Propia", "", "Arriendo", None, "propia"],
+    "reportado": [False, "true", "si", "no", None, "1", "0", False, None, True],
+    "edad": [30, 17, None, "18", 25, "17,5", 40, None, None, 16],
+}
+
+
+def _comparar(servicio, columnas):
+    lote = calcular_scoring_lote(servicio.modelo, columnas, desglose=True)
+    n = len(next(iter(columnas.values())))
+    assert len(lote) == n
+    for i in range(n):
+        valores = {codigo: columna[i] for codigo, columna in columnas.items() if columna[i] is not None}
+        esperado = servicio.calcular_scoring(valores)
+        fila = lote.fila(i)
+        assert fila["score"] == esperado["score"], i
+        assert fila["score_normalizado"] == esperado["score_normalizado"], i
+        assert fila["nivel"] == esperado["nivel"], i
+        assert fila["aprobado"] == esperado["aprobado"], i
+        assert fila["rechazo_automatico"] == esperado["rechazo_automatico"], i
+        assert fila["factor_rechazo"] == esperado["factor_rechazo"], i
+        puntajes = {e["codigo"]: e["puntaje"] for e in esperado["criterios_evaluados"]}
+        obtenidos = {c: p for c, p in fila["desglose"].items() if not np.isnan(p)}
+        assert obtenidos == puntajes, i
+
+
+@pytest.mark.parametrize("normalizacion", ["peso", "maximo"])
+def test_lote_igual_a_calcular_scoring_por_fila(normalizacion):
+    _comparar(ScoringService(dict(CONFIG, normalizacion=normalizacion)), COLUMNAS)
+
+
+def test_lote_con_arreglos_numpy():
+    columnas = dict(COLUMNAS, ingresos=np.array([0, 999999, 1000000, 2999999, 3000000,
+                                                 -5, 10**9, 1500000, 1, 2000000]))
+    _comparar(ScoringService(CONFIG), columnas)
+
+
+def test_limites_de_nivel_y_rechazo():
+    servicio = ScoringService(dict(CONFIG, normalizacion="maximo"))
+    # Solo vivienda: 10, 7 y 4 puntos normalizan a 100, 70 y 40 exactos
+    columnas = {
+        "vivienda": ["Propia", "Familiar", "Arriendo", "Propia"],
+        "mora_telcos": [None, None, None, "200001"],
+    }
+    lote = calcular_scoring_lote(servicio.modelo, columnas)
+    assert lote.score_normalizado.tolist()[:3] == [100.0, 70.0, 40.0]
+    assert lote.nivel.tolist()[:3] == ["Bajo riesgo", "Riesgo moderado", "Alto riesgo"]
+    # 40 es el puntaje mínimo: aprueba; la última fila la rechaza el factor
+    assert lote.aprobado.tolist() == [True, True, True, False]
+    assert lote.factor_rechazo.tolist() == [None, None, None, "mora_telcos"]
+    _comparar(servicio, columnas)
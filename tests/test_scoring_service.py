@@ -0,0 +1,119 @@
+"""ScoringService, motor y backtest comparten un solo modelo compilado por línea."""
+
+import pytest
+
+import database
+from app.services import modelo_scoring
+from app.services.motor_scoring import obtener_motor_scoring
+from app.services.scoring_service import ScoringService
+
+
+def _lineas_con_criterios():
+    conn = database.conectar_db()
+    try:
+        lineas = [fila[0] for fila in conn.execute("SELECT nombre FROM lineas_credito WHERE activo = 1")]
+    finally:
+        conn.close()
+    motor = obtener_motor_scoring()
+    return [linea for linea in lineas if motor.modelo_para(linea)[1] == linea] + [None]
+
+
+def _mejores_valores(config):
+    """Para cada criterio, el límite inferior del rango con más puntos."""
+    valores = {}
+    for criterio in config["criterios"]:
+        rangos = [r for r in criterio.get("rangos", ()) if r.get("min") is not None]
+        if rangos:
+            mejor = max(rangos, key=lambda r: r.get("puntaje", 0))
+            valores[criterio["codigo"]] = str(int(float(mejor["min"])))
+    return valores
+
+
+def test_servicio_usa_el_modelo_del_motor(db_temporal):
+    motor = obtener_motor_scoring()
+    motor.invalidar()
+    lineas = _lineas_con_criterios()
+    assert len(lineas) > 1, "Ninguna línea real con criterios"
+
+    for linea in lineas:
+        servicio = ScoringService()
+        servicio.cargar_config(linea)
+        modelo, _origen, config = motor.entrada_para(linea)
+        assert servicio.modelo is modelo
+        assert servicio.config is config
+
+        valores = _mejores_valores(config)
+        resultado = servicio.calcular_scoring(valores, linea)
+        esperado = motor.evaluar(valores, linea)
+        for clave in ("score", "score_normalizado", "nivel", "aprobado", "rechazo_automatico"):
+            assert resultado[clave] == esperado[clave], (linea, clave)
+        if valores:
+            # Los rangos de la base usan "puntos": convertidos, sí puntúan
+            assert resultado["score"] > 0, linea
+
+
+def test_lote_usa_el_modelo_del_motor(db_temporal):
+    pytest.importorskip("numpy")
+    motor = obtener_motor_scoring()
+    linea = _lineas_con_criterios()[0]
+    _modelo, _origen, config = motor.entrada_para(linea)
+    valores = _mejores_valores(config)
+
+    lote = ScoringService().calcular_scoring_lote({c: [v] for c, v in valores.items()}, linea)
+    esperado = motor.evaluar(valores, linea)
+    assert float(lote.score[0]) == esperado["score"]
+    assert float(lote.score_normalizado[0]) == esperado["score_normalizado"]
+
+
+def test_backtest_de_la_configuracion_vigente_no_recompila(db_temporal, monkeypatch):
+    from backtesting_scoring import ejecutar_backtest
+
+    motor = obtener_motor_scoring()
+    linea = _lineas_con_criterios()[0]
+    motor.entrada_para(linea)
+
+    def _no_compilar(config):
+        raise AssertionError("El backtest de la configuración vigente compiló otro modelo")
+
+    monkeypatch.setattr(modelo_scoring, "CompiledScoringModel", _no_compilar)
+    resultado = ejecutar_backtest({}, linea_credito=linea, limite=50, procesos=1)
+    assert resultado["success"]
+
+
+def test_evaluar_criterio_igual_que_calcular_scoring(db_temporal):
+    from db_helpers_scoring_linea import cargar_scoring_por_linea
+
+    linea = _lineas_con_criterios()[0]
+    servicio = ScoringService()
+    _modelo, _origen, config = obtener_motor_scoring().entrada_para(linea)
+    valores = _mejores_valores(config)
+    resultado = servicio.calcular_scoring(valores, linea)
+    puntajes = {e["codigo"]: e["puntaje"] for e in resultado["criterios_evaluados"]}
+
+    # Criterios en el formato guardado ('puntos', 'number'...)
+    guardados = {c["codigo"]: c for c in cargar_scoring_por_linea(linea)["criterios"]}
+    for codigo, puntaje in puntajes.items():
+        assert servicio.evaluar_criterio(codigo, valores[codigo], guardados[codigo])["puntaje"] == puntaje
+    assert any(puntajes.values())
+
+
+def test_evaluar_criterio_limites_abiertos_y_texto():
+    criterio = {
+        "peso": 50, "tipo_campo": "numerico",
+        "rangos": [{"min": None, "max": "10", "puntaje": 4}, {"min": "11", "puntaje": 9}],
+    }
+    servicio = ScoringService()
+    assert servicio.evaluar_criterio("x", "5", criterio)["puntaje"] == 4
+    evaluado = servicio.evaluar_criterio("x", "1.000.000", criterio)
+    assert evaluado["puntaje"] == 9 and evaluado["puntaje_ponderado"] == 4.5
+
+
+def test_config_del_servicio_es_de_solo_lectura(db_temporal):
+    servicio = ScoringService()
+    servicio.cargar_config(_lineas_con_criterios()[0])
+
+    assert isinstance(servicio.criterios, tuple) and "codigo" in servicio.criterios[0]
+    with pytest.raises(TypeError):
+        servicio.config["puntaje_minimo_aprobacion"] = 0
+    with pytest.raises(TypeError):
+        servicio.criterios[0]["peso"] = 0
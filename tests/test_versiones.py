@@ -0,0 +1,54 @@
+"""Contadores de version_datos: usuarios va aparte de 'configuracion'."""
+
+import database
+import db_helpers
+from db_writer import ejecutar_escritura
+
+
+def _renombrar(username, nombre):
+    ejecutar_escritura(lambda conn: conn.execute(
+        "UPDATE usuarios SET nombre_completo = ? WHERE username = ?", (nombre, username)
+    ))
+
+
+def test_cambio_de_usuario_no_toca_la_version_de_configuracion(db_temporal):
+    antes, _ = database.obtener_versiones(("configuracion", "usuarios"))
+    username = next(iter(db_helpers.obtener_snapshot_configuracion()["USUARIOS"]))
+
+    _renombrar(username, "Nombre de prueba")
+
+    despues, _ = database.obtener_versiones(("configuracion", "usuarios"))
+    assert despues["configuracion"] == antes["configuracion"]
+    assert despues["usuarios"] > antes["usuarios"]
+
+
+def test_snapshot_se_reconstruye_con_la_version_de_usuarios(db_temporal):
+    db_helpers.invalidar_cache_configuracion()
+    snapshot = db_helpers.obtener_snapshot_configuracion()
+    username = next(iter(snapshot["USUARIOS"]))
+
+    _renombrar(username, "Otro nombre")
+
+    nuevo = db_helpers.obtener_snapshot_configuracion()
+    assert nuevo is not snapshot
+    assert nuevo.version == snapshot.version
+    assert nuevo["USUARIOS"][username]["nombre_completo"] == "Otro nombre"
+
+
+def test_cargar_configuracion_da_una_copia_por_llamada(db_temporal):
+    from flask import Flask
+
+    with Flask(__name__).test_request_context():
+        config = db_helpers.cargar_configuracion()
+        config["SEGUROS"] = {"SEGURO_VIDA": "sin guardar"}
+        config["LINEAS_CREDITO"].clear()
+
+        otra = db_helpers.cargar_configuracion()
+        assert otra is not config
+        assert otra["SEGUROS"] != config["SEGUROS"]
+        assert otra["LINEAS_CREDITO"]
+        assert db_helpers.obtener_snapshot_configuracion()["LINEAS_CREDITO"]
+
+        scoring = db_helpers.cargar_scoring()
+        scoring["niveles_riesgo"].clear()
+        assert db_helpers.cargar_scoring()["niveles_riesgo"]